@@ -0,0 +1,143 @@
+"""Benchmark the rendering of `check` results for many pipelines and config files.
+
+Usage:
+    python benchmarks/bench_check_results.py --n-pipelines 500 --n-configs 10
+
+Results are synthetic: 10% of configs are invalid, 20% use default values and 2% of pipelines
+fail to import. It compares the full table, the paginated table and the summary with the
+previous rendering, which built a pydantic row model per config and pruned empty columns by
+joining all their cells.
+"""
+
+import argparse
+import io
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import create_model
+from rich.table import Table
+
+from deployer.constants import PIPELINE_CHECKS_TABLE_COLUMNS
+from deployer.pipeline_checks import PipelineCheckResult
+from deployer.utils import utils
+from deployer.utils.models import CustomBaseModel
+
+
+class _LegacyChecksTableRow(CustomBaseModel):
+    status: str
+    pipeline: str
+    pipeline_error_message: Optional[str] = None
+    config_file: str
+    attribute: Optional[str] = None
+    config_error_type: Optional[str] = None
+    config_error_message: Optional[str] = None
+
+
+def legacy_build_table(results: List[PipelineCheckResult]) -> Table:
+    """Previous rendering, only for valid and invalid configs (enough to compare costs)."""
+    table = Table(show_header=True, header_style="bold", show_lines=True)
+    for column in PIPELINE_CHECKS_TABLE_COLUMNS:
+        table.add_column(column)
+    for result in results:
+        for config_filepath in result.config_paths:
+            errors_ = result.errors.get(config_filepath.name) or []
+            row = _LegacyChecksTableRow(
+                status="❌" if errors_ else "✅",
+                pipeline=result.pipeline_name,
+                config_file=config_filepath.name,
+                config_error_type="\n".join(e["type"] for e in errors_),
+                attribute="\n".join(e.get("field", "") for e in errors_),
+                config_error_message="\n".join(e["msg"] for e in errors_),
+            )
+            table.add_row(*row.model_dump().values())
+    table.columns = [c for c in table.columns if "".join(c._cells) != ""]
+    return table
+
+
+def generate_results(n_pipelines: int, n_configs: int) -> List[PipelineCheckResult]:
+    """Generate synthetic check results."""
+    results = []
+    for i in range(n_pipelines):
+        config_paths = [Path(f"config_{j}.json") for j in range(n_configs)]
+        if i % 50 == 1:
+            errors = {"pipeline level error": [{"type": "value_error", "msg": "Import failed"}]}
+            warnings = {}
+        else:
+            errors = {
+                c.name: [{"type": "missing", "msg": "Field required", "field": "name"}]
+                for j, c in enumerate(config_paths)
+                if (i + j) % 10 == 0
+            }
+            warnings = {
+                c.name: [{"type": "default_value", "field": "count", "msg": "Default: 1"}]
+                for j, c in enumerate(config_paths)
+                if (i + j) % 5 == 1
+            }
+        results.append(
+            PipelineCheckResult(
+                pipeline_name=f"pipeline_{i}",
+                config_paths=config_paths,
+                errors=errors,
+                warnings=warnings,
+                elapsed=0.1,
+            )
+        )
+    return results
+
+
+def time_it(func, n_runs: int) -> float:
+    """Return the best wall-clock time of n runs, in milliseconds."""
+    timings = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-pipelines", type=int, default=500)
+    parser.add_argument("--n-configs", type=int, default=10)
+    parser.add_argument("--n-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = generate_results(args.n_pipelines, args.n_configs)
+    model = create_model("Config", **{f"field_{i}": (int, i + 1) for i in range(30)})(field_0=0)
+    utils.console.width = 160
+
+    def _print(print_func):
+        def _run():
+            utils.console.file = io.StringIO()
+            print_func()
+
+        return _run
+
+    timings = {
+        "build table (previous)": time_it(lambda: legacy_build_table(results), args.n_runs),
+        "build table": time_it(lambda: utils.build_check_results_table(results), args.n_runs),
+        "print table (previous)": time_it(
+            _print(lambda: utils.console.print(legacy_build_table(results))), 1
+        ),
+        "print table": time_it(
+            _print(lambda: utils.print_check_results_table(results, page_size=0)), 1
+        ),
+        "print table, pages of 500": time_it(
+            _print(lambda: utils.print_check_results_table(results, page_size=500)), 1
+        ),
+        "print summary": time_it(
+            _print(lambda: utils.print_check_results_table(results, summary=True)), args.n_runs
+        ),
+        "unset default fields x1000": time_it(
+            lambda: [utils._get_unset_default_fields(model) for _ in range(1000)], args.n_runs
+        ),
+    }
+
+    print(f"{args.n_pipelines} pipelines, {args.n_configs} config files each")
+    for name, timing in timings.items():
+        print(f"  {name:<30} {timing:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
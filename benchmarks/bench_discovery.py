@@ -0,0 +1,129 @@
+"""Benchmark settings loading and pipelines / config files discovery on a synthetic repo.
+
+Usage:
+    python benchmarks/bench_discovery.py --n-pipelines 500
+
+It compares the cold path (no discovery cache) with the warm path (discovery cache up to date)
+for the steps run by every CLI invocation, and for `vertex-deployer list --with-configs`.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from deployer.constants import ConfigType
+from deployer.utils.discovery import DiscoveryCache
+
+CLI_ENTRYPOINT = "from deployer.cli import app; app(prog_name='vertex-deployer')"
+
+PYPROJECT_TOML = """
+[tool.vertex_deployer]
+log_level = "WARNING"
+
+[tool.vertex_deployer.deploy]
+tags = ["latest"]
+
+[tool.vertex_deployer.list]
+with_configs = true
+"""
+
+
+def generate_repo(root_path: Path, n_pipelines: int) -> None:
+    """Generate a vertex folder with n pipelines and one config file per config type."""
+    (root_path / "pyproject.toml").write_text(PYPROJECT_TOML)
+    pipelines_root_path = root_path / "vertex" / "pipelines"
+    pipelines_root_path.mkdir(parents=True)
+    for i in range(n_pipelines):
+        (pipelines_root_path / f"pipeline_{i}.py").write_text("")
+        configs_dirpath = root_path / "vertex" / "configs" / f"pipeline_{i}"
+        configs_dirpath.mkdir(parents=True)
+        for config_type in ConfigType.__members__:
+            (configs_dirpath / f"config.{config_type}").write_text("")
+
+
+@contextmanager
+def chdir(path: Path):
+    """Change the working directory temporarily."""
+    cwd = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def discover(cache_filepath: Path) -> int:
+    """Run the discovery steps of a CLI invocation, return the number of config files found."""
+    from deployer.settings import load_deployer_settings
+
+    load_deployer_settings.cache_clear()
+    cache = DiscoveryCache(cache_filepath)
+    settings = load_deployer_settings()
+    pipeline_names = cache.list_pipeline_names(settings.pipelines_root_path)
+    n_configs = sum(
+        len(cache.list_config_filepaths(settings.configs_root_path, p)) for p in pipeline_names
+    )
+    cache.save()
+    return n_configs
+
+
+def time_it(func, n_runs: int) -> float:
+    """Return the best wall-clock time of n runs, in milliseconds."""
+    timings = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-pipelines", type=int, default=500)
+    parser.add_argument("--n-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    root_path = Path(tempfile.mkdtemp(prefix="vertex-deployer-bench-"))
+    try:
+        generate_repo(root_path, args.n_pipelines)
+        with chdir(root_path):
+            cache_filepath = root_path / ".vertex-deployer-cache" / "discovery.json"
+
+            def cold():
+                cache_filepath.unlink(missing_ok=True)
+                discover(cache_filepath)
+
+            def warm():
+                discover(cache_filepath)
+
+            def cli(clear_cache: bool):
+                if clear_cache:
+                    cache_filepath.unlink(missing_ok=True)
+                subprocess.run(  # noqa: S603
+                    [sys.executable, "-c", CLI_ENTRYPOINT, "list", "--with-configs"],
+                    check=True,
+                    capture_output=True,
+                )
+
+            results = {
+                "discovery (cold)": time_it(cold, args.n_runs),
+                "discovery (warm)": time_it(warm, args.n_runs),
+                "list --with-configs (cold)": time_it(lambda: cli(True), args.n_runs),
+                "list --with-configs (warm)": time_it(lambda: cli(False), args.n_runs),
+            }
+    finally:
+        shutil.rmtree(root_path)
+
+    print(f"{args.n_pipelines} pipelines, {len(ConfigType.__members__)} config files each")
+    for name, timing in results.items():
+        print(f"  {name:<30} {timing:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Benchmark suite of the deployer on a synthetic repo, with JSON baselines and comparison.
+
+Usage:
+    python benchmarks/bench_suite.py run --output baseline.json
+    python benchmarks/bench_suite.py run --output current.json
+    python benchmarks/bench_suite.py compare baseline.json current.json --threshold 0.1
+
+`run` generates a repo with `benchmarks/synthetic_repo.py` and times CLI startup, `list`,
+`check --all` (in subprocesses), and in-process: loading configs of each type, creating
+pipeline models, compiling pipelines and rendering the check results table. Timings are the
+best of `--n-runs` runs, in milliseconds.
+
+`compare` exits with code 1 if a benchmark is slower than in the baseline by more than
+`--threshold` (relative) and `--min-delta-ms` (absolute, to ignore noise on fast benchmarks).
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bench_discovery import CLI_ENTRYPOINT, chdir, time_it
+from loguru import logger
+from synthetic_repo import generate_repo
+
+from deployer.constants import ConfigType
+
+
+def _run_cli(*args: str) -> None:
+    env = {**os.environ, "VERTEX_DEPLOYER_NO_SERVER": "1"}
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-c", CLI_ENTRYPOINT, *args], check=True, capture_output=True, env=env
+    )
+
+
+def _in_process_benchmarks() -> Dict[str, Callable[[], None]]:
+    """Return in-process benchmarks on the repo of the current directory."""
+    from deployer.pipeline_checks import _convert_artifact_type_to_str, check_pipelines
+    from deployer.settings import load_deployer_settings
+    from deployer.utils import utils
+    from deployer.utils.compilation import compile_pipeline
+    from deployer.utils.config import list_config_filepaths, load_config
+    from deployer.utils.models import create_model_from_func
+
+    settings = load_deployer_settings()
+    pipeline_names = sorted(p.stem for p in settings.pipelines_root_path.glob("pipeline_*.py"))
+    config_filepaths = {
+        p: list_config_filepaths(settings.configs_root_path, p) for p in pipeline_names
+    }
+    pipelines = [
+        utils.import_pipeline_from_dir(settings.pipelines_root_path, p) for p in pipeline_names
+    ]
+    results = list(
+        check_pipelines(
+            config_filepaths,
+            pipelines_root_path=settings.pipelines_root_path,
+            configs_root_path=settings.configs_root_path,
+        )
+    )
+
+    def _load_configs(config_type: ConfigType) -> Callable[[], None]:
+        paths = [
+            path
+            for paths in config_filepaths.values()
+            for path in paths
+            if path.suffix == f".{config_type.value}"
+        ]
+        return lambda: [load_config(path) for path in paths]
+
+    def _print_table():
+        utils.console.file = io.StringIO()
+        utils.print_check_results_table(results)
+
+    benchmarks = {f"load_config ({c.value})": _load_configs(c) for c in ConfigType}
+    benchmarks.update(
+        {
+            "create_model_from_func": lambda: [
+                create_model_from_func(
+                    p.pipeline_func, type_converter=_convert_artifact_type_to_str
+                )
+                for p in pipelines
+            ],
+            "compile": lambda: [compile_pipeline(p) for p in pipelines],
+            "check table rendering": _print_table,
+        }
+    )
+    return benchmarks
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """Generate a synthetic repo and time each benchmark."""
+    parameters = {
+        "n_pipelines": args.n_pipelines,
+        "n_components": args.n_components,
+        "n_configs": args.n_configs,
+        "n_runs": args.n_runs,
+    }
+    root_path = Path(tempfile.mkdtemp(prefix="vertex-deployer-bench-"))
+    sys.path.insert(0, str(root_path))  # to import the generated pipelines in-process
+    timings = {}
+    try:
+        generate_repo(root_path, args.n_pipelines, args.n_components, args.n_configs)
+        with chdir(root_path):
+            timings["cli startup (--version)"] = time_it(
+                lambda: _run_cli("--version"), args.n_runs
+            )
+            timings["list --with-configs"] = time_it(
+                lambda: _run_cli("list", "--with-configs"), args.n_runs
+            )
+            timings["check --all"] = time_it(lambda: _run_cli("check", "--all"), args.n_runs)
+            for name, func in _in_process_benchmarks().items():
+                timings[name] = time_it(func, args.n_runs)
+    finally:
+        sys.path.remove(str(root_path))
+        shutil.rmtree(root_path)
+
+    from kfp import __version__ as kfp_version
+
+    from deployer import __version__
+
+    return {
+        "metadata": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "vertex_deployer": __version__,
+            "kfp": kfp_version,
+            "parameters": parameters,
+        },
+        "timings_ms": timings,
+    }
+
+
+def compare(
+    baseline: Dict, current: Dict, threshold: float, min_delta_ms: float
+) -> List[Dict[str, object]]:
+    """Compare timings with a baseline.
+
+    Returns:
+        List[Dict[str, object]]: One row per benchmark, with its baseline and current timings,
+            the relative change and its status: `regression`, `improvement`, `ok`, `new` or
+            `missing`.
+    """
+    baseline_timings, current_timings = baseline["timings_ms"], current["timings_ms"]
+    rows = []
+    for name in {**baseline_timings, **current_timings}:
+        before, after = baseline_timings.get(name), current_timings.get(name)
+        change = None if before is None or after is None else (after - before) / before
+        if before is None:
+            status = "new"
+        elif after is None:
+            status = "missing"
+        elif change > threshold and after - before > min_delta_ms:
+            status = "regression"
+        elif change < -threshold and before - after > min_delta_ms:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "name": name,
+                "baseline": before,
+                "current": after,
+                "change": change,
+                "status": status,
+            }
+        )
+    return rows
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--n-pipelines", type=int, default=20)
+    run_parser.add_argument("--n-components", type=int, default=5)
+    run_parser.add_argument("--n-configs", type=int, default=2)
+    run_parser.add_argument("--n-runs", type=int, default=3)
+    run_parser.add_argument("--output", type=Path, help="JSON file to save the timings to")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare timings with a baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.add_argument("--min-delta-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        logger.configure(handlers=[{"sink": sys.stderr, "level": "WARNING"}])
+        results = run(args)
+        parameters = results["metadata"]["parameters"]
+        print(
+            f"{parameters['n_pipelines']} pipelines, {parameters['n_components']} components,"
+            f" {parameters['n_configs']} config files of each type per pipeline"
+        )
+        for name, timing in results["timings_ms"].items():
+            print(f"  {name:<30} {timing:>10.1f} ms")
+        if args.output is not None:
+            args.output.write_text(json.dumps(results, indent=2) + "\n")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if baseline["metadata"]["parameters"] != current["metadata"]["parameters"]:
+        print("Warning: benchmarks were run with different parameters")
+    rows = compare(baseline, current, args.threshold, args.min_delta_ms)
+    for row in rows:
+        before = "-" if row["baseline"] is None else f"{row['baseline']:.1f}"
+        after = "-" if row["current"] is None else f"{row['current']:.1f}"
+        change = "" if row["change"] is None else f"{row['change']:+.1%}"
+        print(f"  {row['name']:<30} {before:>10} {after:>10} ms {change:>8}  {row['status']}")
+
+    regressions = [r["name"] for r in rows if r["status"] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
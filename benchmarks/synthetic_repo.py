@@ -0,0 +1,164 @@
+"""Generate a synthetic vertex folder to benchmark the deployer on.
+
+Usage:
+    python benchmarks/synthetic_repo.py path/to/repo --n-pipelines 20 --n-components 5
+
+Pipelines chain all components, passing datasets from one to the next. Their parameters cover
+the types found in real pipelines: strings, numbers, booleans, lists, dicts and input
+artifacts. Each pipeline has `--n-configs` valid config files of each config type.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import yaml
+
+from deployer.constants import ConfigType
+
+PYPROJECT_TOML = """
+[tool.vertex_deployer]
+log_level = "WARNING"
+
+[tool.vertex_deployer.deploy]
+tags = ["latest"]
+"""
+
+COMPONENT_TEMPLATE = """from typing import Dict, List
+
+from kfp import dsl
+from kfp.dsl import Dataset, Input, Metrics, Model, Output
+
+
+@dsl.component(base_image="python:3.10-slim-buster")
+def component_{j}(
+    input_dataset: Input[Dataset],
+    n_estimators: int,
+    learning_rate: float,
+    use_gpu: bool,
+    features: List[str],
+    params: Dict[str, float],
+    output_dataset: Output[Dataset],
+    model: Output[Model],
+    metrics: Output[Metrics],
+) -> None:
+    import shutil
+
+    shutil.copy(input_dataset.path, output_dataset.path)
+    metrics.log_metric("n_features", len(features))
+"""
+
+PIPELINE_TEMPLATE = """from typing import Dict, List
+
+from kfp import dsl
+from kfp.dsl import Dataset, Input
+
+{imports}
+
+
+@dsl.pipeline(name="pipeline-{i}")
+def pipeline_{i}(
+    project_id: str,
+    input_dataset: Input[Dataset],
+    n_estimators: int = 100,
+    learning_rate: float = 0.1,
+    use_gpu: bool = False,
+    features: List[str] = ["age", "income"],
+    params: Dict[str, float] = {{"alpha": 0.5}},
+) -> None:
+    dataset = input_dataset
+{tasks}"""
+
+TASK_TEMPLATE = """    task_{j} = component_{j}(
+        input_dataset=dataset,
+        n_estimators=n_estimators,
+        learning_rate=learning_rate,
+        use_gpu=use_gpu,
+        features=features,
+        params=params,
+    )
+    dataset = task_{j}.outputs["output_dataset"]
+"""
+
+
+def _config_values(i: int, k: int) -> dict:
+    return {
+        "project_id": f"project-{i}",
+        "input_dataset": f"gs://bucket-{i}/datasets/dataset_{k}.csv",
+        "n_estimators": 100 + k,
+        "learning_rate": 0.05,
+        "use_gpu": k % 2 == 0,
+        "features": ["age", "income", f"feature_{k}"],
+        "params": {"alpha": 0.5, "beta": float(k)},
+    }
+
+
+def _format_config(values: dict, config_type: ConfigType) -> str:
+    if config_type == ConfigType.json:
+        return json.dumps(values, indent=2)
+    if config_type == ConfigType.yaml:
+        return yaml.safe_dump(values)
+    if config_type == ConfigType.toml:
+        lines = []
+        for key, value in values.items():
+            if isinstance(value, dict):  # inline tables, not flattened by the deployer
+                items = ", ".join(f"{k} = {json.dumps(v)}" for k, v in value.items())
+                lines.append(f"{key} = {{ {items} }}")
+            else:
+                lines.append(f"{key} = {json.dumps(value)}")
+        return "\n".join(lines) + "\n"
+    artifacts = {"input_dataset": values.pop("input_dataset")}
+    return f"parameter_values = {values!r}\n\ninput_artifacts = {artifacts!r}\n"
+
+
+def generate_repo(root_path: Path, n_pipelines: int, n_components: int, n_configs: int) -> None:
+    """Generate a vertex folder with pipelines, components and config files of each type.
+
+    Args:
+        root_path (Path): The directory to generate the repo in.
+        n_pipelines (int): The number of pipelines.
+        n_components (int): The number of components, all used by each pipeline.
+        n_configs (int): The number of config files of each type per pipeline.
+    """
+    (root_path / "pyproject.toml").write_text(PYPROJECT_TOML)
+    vertex_path = root_path / "vertex"
+    for package in ["", "components", "pipelines"]:
+        (vertex_path / package).mkdir(parents=True, exist_ok=True)
+        (vertex_path / package / "__init__.py").write_text("")
+
+    for j in range(n_components):
+        (vertex_path / "components" / f"component_{j}.py").write_text(
+            COMPONENT_TEMPLATE.format(j=j)
+        )
+
+    imports = "\n".join(
+        f"from vertex.components.component_{j} import component_{j}" for j in range(n_components)
+    )
+    tasks = "".join(TASK_TEMPLATE.format(j=j) for j in range(n_components))
+    for i in range(n_pipelines):
+        (vertex_path / "pipelines" / f"pipeline_{i}.py").write_text(
+            PIPELINE_TEMPLATE.format(i=i, imports=imports, tasks=tasks)
+        )
+        configs_dirpath = vertex_path / "configs" / f"pipeline_{i}"
+        configs_dirpath.mkdir(parents=True)
+        for config_type in ConfigType:
+            for k in range(n_configs):
+                (configs_dirpath / f"config_{k}.{config_type.value}").write_text(
+                    _format_config(_config_values(i, k), config_type)
+                )
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root_path", type=Path)
+    parser.add_argument("--n-pipelines", type=int, default=20)
+    parser.add_argument("--n-components", type=int, default=5)
+    parser.add_argument("--n-configs", type=int, default=2)
+    args = parser.parse_args()
+
+    args.root_path.mkdir(parents=True, exist_ok=True)
+    generate_repo(args.root_path, args.n_pipelines, args.n_components, args.n_configs)
+
+
+if __name__ == "__main__":
+    main()
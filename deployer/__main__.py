@@ -0,0 +1,27 @@
+import sys
+
+
+def main() -> None:
+    """Entrypoint of the `vertex-deployer` CLI.
+
+    Shell completion requests are answered before importing the CLI when possible, and commands
+    are forwarded to the `vertex-deployer serve` server of the current directory if it is running.
+    """
+    from deployer.completion import complete_from_env
+
+    if complete_from_env():
+        sys.exit(0)
+
+    from deployer.server import forward_to_server
+
+    exit_code = forward_to_server(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from deployer.cli import app
+
+    app(prog_name="vertex-deployer")
+
+
+if __name__ == "__main__":
+    main()
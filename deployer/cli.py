@@ -2,16 +2,17 @@ import enum
 import re
 import sys
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 import rich.traceback
 import typer
 from loguru import logger
-from pydantic import ValidationError
+from rich.console import Console
 from rich.prompt import Confirm, Prompt
 from typing_extensions import Annotated
 
 from deployer import constants
+from deployer.completion import complete_config_names, complete_pipeline_names, complete_tags
 from deployer.init_deployer import (
     _create_file_from_template,
     build_default_folder_structure,
@@ -23,19 +24,29 @@ from deployer.settings import (
     DeployerSettings,
     load_deployer_settings,
 )
+from deployer.utils.checkpoint import Checkpoint, get_checkpoint_filepath
 from deployer.utils.config import (
     ConfigType,
-    list_config_filepaths,
-    load_config,
     load_vertex_settings,
     validate_or_log_settings,
 )
 from deployer.utils.console import console
-from deployer.utils.logging import LoguruLevel
+from deployer.utils.discovery import DiscoveryCache, get_discovery_cache
+from deployer.utils.import_timing import build_import_timings_table
+from deployer.utils.instrumentation import collect_all_stages
+from deployer.utils.ledger import DeploymentLedger, get_environment_key
+from deployer.utils.logging import LoguruLevel, configure_logging
+from deployer.utils.memory import build_memory_table
+from deployer.utils.reports import (
+    format_check_report,
+    format_chrome_trace,
+    format_import_timings_report,
+    format_memory_report,
+)
 from deployer.utils.utils import (
+    build_check_results_table,
     dict_to_repr,
-    import_pipeline_from_dir,
-    make_enum_from_python_package_dir,
+    format_check_result_summary,
     print_check_results_table,
     print_pipelines_list,
 )
@@ -64,6 +75,16 @@ def main(
     log_level: Annotated[
         LoguruLevel, typer.Option("--log-level", "-log", help="Set the logging level.")
     ] = constants.DEFAULT_LOG_LEVEL,
+    log_format: Annotated[
+        constants.LogFormat,
+        typer.Option(
+            "--log-format",
+            "-lf",
+            help="Format of logs. `json` writes one JSON object per line, with the pipeline,"
+            " stage, run name, elapsed milliseconds and a correlation ID of the invocation"
+            " (`VERTEX_DEPLOYER_CORRELATION_ID` environment variable, or a random ID).",
+        ),
+    ] = constants.LogFormat.text,
     version: Annotated[
         bool,
         typer.Option(
@@ -73,17 +94,115 @@ def main(
             help="Display the version number and exit.",
         ),
     ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile / --no-profile",
+            help="Whether to profile the command with pyinstrument (`profiling` extra).",
+        ),
+    ] = False,
+    profile_format: Annotated[
+        constants.ProfileFormat,
+        typer.Option(
+            "--profile-format",
+            "-pf",
+            help="Format of profile reports. speedscope reports can be opened in"
+            " https://www.speedscope.app.",
+        ),
+    ] = constants.ProfileFormat.html,
+    profile_output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--profile-output",
+            "-po",
+            help="File to write the profile report to. Defaults to"
+            " `.vertex-deployer-cache/profiles/{command}-{timestamp}.{ext}`.",
+            dir_okay=False,
+        ),
+    ] = None,
+    metrics_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--metrics-file",
+            "-mf",
+            help="File to write metrics of the command to when it exits, in the Prometheus text"
+            " format (e.g. for the node exporter textfile collector): histograms of stage"
+            " durations and counts of cache hits and misses, config files and API retries,"
+            " labelled by command and pipeline.",
+            dir_okay=False,
+            envvar=constants.METRICS_FILE_ENV_VAR,
+        ),
+    ] = None,
+    metrics_push_url: Annotated[
+        Optional[str],
+        typer.Option(
+            "--metrics-push-url",
+            "-mpu",
+            help="URL of a Prometheus Pushgateway to push metrics of the command to when it"
+            " exits, e.g. `http://localhost:9091`.",
+            envvar=constants.METRICS_PUSH_URL_ENV_VAR,
+        ),
+    ] = None,
 ):
-    logger.configure(handlers=[{"sink": sys.stderr, "level": log_level}])
+    configure_logging(log_level, log_format)
+
+    if profile:
+        from deployer.utils.profiling import get_profile_filepath, profiling
+
+        if profile_output is None:
+            profile_output = get_profile_filepath(ctx.invoked_subcommand or "main", profile_format)
+        try:
+            # the profile is written when the command exits, whatever its exit code
+            ctx.with_resource(profiling(profile_output, profile_format))
+        except ImportError as e:
+            raise typer.BadParameter(str(e), param_hint="--profile") from e
+
+    metrics = None
+    if metrics_file is not None or metrics_push_url is not None:
+        from deployer.utils.metrics import collect_metrics
+
+        command = ctx.invoked_subcommand or "main"
+        metrics = ctx.with_resource(collect_metrics(command))
+        # metrics are written when the command exits, whatever its exit code
+        ctx.call_on_close(lambda: _output_metrics(metrics, metrics_file, metrics_push_url))
+
+    discovery_cache = get_discovery_cache()
+    ctx.call_on_close(discovery_cache.save)
 
     deployer_settings = load_deployer_settings()
+    pipeline_names = discovery_cache.list_pipeline_names(deployer_settings.pipelines_root_path)
     ctx.obj = {
+        "log_level": log_level,
+        "profile_format": profile_format,
         "settings": deployer_settings,
-        "pipeline_names": make_enum_from_python_package_dir(deployer_settings.pipelines_root_path),
+        "pipeline_names": enum.Enum(
+            deployer_settings.pipelines_root_path.stem, {p: p for p in pipeline_names}
+        ),
+        "discovery_cache": discovery_cache,
+        "metrics": metrics,
     }
     ctx.default_map = deployer_settings.model_dump(exclude_unset=True)
 
 
+def _output_metrics(
+    metrics: Any, metrics_file: Optional[Path], metrics_push_url: Optional[str]
+) -> None:
+    """Write metrics to a file and push them to a Pushgateway. Push errors are only logged."""
+    from deployer.utils.metrics import push_metrics, write_metrics_file
+
+    formatted_metrics = metrics.format()
+    if metrics_file is not None:
+        write_metrics_file(formatted_metrics, metrics_file)
+        logger.debug(f"Metrics written to '{metrics_file}'")
+    if metrics_push_url is not None:
+        try:
+            push_metrics(formatted_metrics, metrics_push_url, {"command": metrics.command})
+        except OSError as e:
+            logger.warning(f"Could not push metrics to {metrics_push_url}: {e}")
+        else:
+            logger.debug(f"Metrics pushed to {metrics_push_url}")
+
+
 def pipeline_name_callback(ctx: typer.Context, value: Union[str, bool]) -> Union[str, bool]:
     """Callback to check that the pipeline name is valid."""
     if value is None:  # None is allowed for optional arguments
@@ -117,19 +236,65 @@ def pipeline_name_callback(ctx: typer.Context, value: Union[str, bool]) -> Union
     return value
 
 
+# options of `deploy` that do not change what is deployed, ignored in checkpoint file names
+_CHECKPOINT_IGNORED_PARAMS = {
+    "resume",
+    "skip_validation",
+    "trace_memory",
+    "trace_memory_file",
+    "trace_file",
+}
+
+
+def _validate_stage_options(
+    pipeline_names: List[str],
+    run: bool,
+    schedule: bool,
+    cron: Optional[str],
+    config_filepath: Optional[Path],
+    config_name: Optional[str],
+) -> None:
+    """Check that the options of `deploy` allow to run and schedule the pipelines."""
+    if schedule:
+        if cron is None or cron == "":
+            raise typer.BadParameter("--cron must be specified to schedule a pipeline")
+    if run or schedule:
+        if config_filepath is None and config_name is None:
+            raise typer.BadParameter(
+                "Both --config-filepath and --config-name are missing."
+                " Please specify at least one to run or schedule a pipeline."
+            )
+        if config_filepath is not None and config_name is not None:
+            raise typer.BadParameter(
+                "Both --config-filepath and --config-name are provided."
+                " Please specify only one to run or schedule a pipeline."
+            )
+        if config_filepath is not None and len(pipeline_names) > 1:
+            raise typer.BadParameter(
+                "Multiple pipelines specified with --config-filepath."
+                " Please specify a --config-name that will be used for each pipeline."
+                " Or specify a single pipeline to use the --config-filepath."
+            )
+
+
 @app.command(no_args_is_help=True)
-def deploy(  # noqa: C901
+def deploy(
     ctx: typer.Context,
     pipeline_names: Annotated[
         List[str],
         typer.Argument(
-            ..., help="The names of the pipeline to run.", callback=pipeline_name_callback
+            ...,
+            help="The names of the pipeline to run.",
+            callback=pipeline_name_callback,
+            shell_complete=complete_pipeline_names,
         ),
     ],
     env_file: Annotated[
-        Optional[Path],
+        Optional[List[Path]],
         typer.Option(
-            help="The environment file to use.",
+            help="The environment file to use. Repeat it to deploy to several environments, e.g."
+            " `--env-file dev.env --env-file prd.env`: pipelines are compiled once, then"
+            " uploaded, run and scheduled in all environments concurrently.",
             exists=True,
             dir_okay=False,
             file_okay=True,
@@ -140,6 +305,29 @@ def deploy(  # noqa: C901
         bool,
         typer.Option("--compile/--no-compile", "-c/-nc", help="Whether to compile the pipeline."),
     ] = True,
+    local_package: Annotated[
+        bool,
+        typer.Option(
+            "--local-package/--no-local-package",
+            "-lp/-nlp",
+            help="Whether to save the compiled pipeline to the local package path"
+            " (`{vertex_folder_path}/pipelines/compiled_pipelines`)."
+            " Otherwise, it is only kept in memory to be uploaded or run.",
+        ),
+    ] = False,
+    patch_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--patch-file",
+            "-pa",
+            help="TOML, YAML or JSON file of patches applied to the compiled pipelines: container"
+            " images, CPU and memory requests and limits, and retry policies, by task name"
+            " pattern. Defaults to the `patches` section of the deployer settings.",
+            exists=True,
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
     upload: Annotated[
         bool,
         typer.Option(
@@ -182,7 +370,10 @@ def deploy(  # noqa: C901
         ),
     ] = constants.DEFAULT_SCHEDULER_TIMEZONE,
     tags: Annotated[
-        Optional[List[str]], typer.Option(help="The tags to use when uploading the pipeline.")
+        Optional[List[str]],
+        typer.Option(
+            help="The tags to use when uploading the pipeline.", shell_complete=complete_tags
+        ),
     ] = constants.DEFAULT_TAGS,
     config_filepath: Annotated[
         Optional[Path],
@@ -204,6 +395,7 @@ def deploy(  # noqa: C901
             help="Name of the json/py file with parameter values and input artifacts"
             " to use when running the pipeline. It must be in the pipeline config dir."
             " e.g. `config_dev.json` for `./vertex/configs/{pipeline-name}/config_dev.json`.",
+            shell_complete=complete_config_names,
         ),
     ] = None,
     enable_caching: Annotated[
@@ -244,99 +436,673 @@ def deploy(  # noqa: C901
             help="Whether to continue without user validation of the settings.",
         ),
     ] = True,
+    trace_memory: Annotated[
+        bool,
+        typer.Option(
+            "--trace-memory / --no-trace-memory",
+            "-tm / -ntm",
+            help="Whether to trace memory allocations with tracemalloc, and print the memory"
+            " allocated by each stage of each pipeline (import, config loading, compile, upload,"
+            " run, schedule), its peak, the peak RSS of the process and the top allocation"
+            " sites. Slows down the command.",
+        ),
+    ] = False,
+    trace_memory_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--trace-memory-file",
+            "-tmf",
+            help="JSON file to write memory usage to, when using --trace-memory. Defaults to"
+            " `.vertex-deployer-cache/profiles/memory-{timestamp}.json`.",
+            dir_okay=False,
+        ),
+    ] = None,
+    trace_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--trace-file",
+            "-tf",
+            help="JSON file to write a trace of the deployment stages to, in the Chrome Trace"
+            " Event format. Open it in https://ui.perfetto.dev to see the time spent compiling,"
+            " uploading, creating and submitting jobs, scheduling and waiting for locks.",
+            dir_okay=False,
+        ),
+    ] = None,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume / --no-resume",
+            help="Whether to skip the uploads, runs and schedules completed by a previous failed"
+            " invocation with the same options, if the compiled pipeline and config file are"
+            " unchanged. Completed stages are recorded in `.vertex-deployer-cache/checkpoints`.",
+        ),
+    ] = False,
+    changed_only: Annotated[
+        bool,
+        typer.Option(
+            "--changed-only / --no-changed-only",
+            "-co / -nco",
+            help="Whether to skip the upload and schedule of pipelines whose compiled pipeline is"
+            " unchanged since they were last deployed to the same project and repository,"
+            " according to the deployment ledger. Pipelines are still compiled, and runs are not"
+            " skipped.",
+        ),
+    ] = False,
+    skip_unchanged_sources: Annotated[
+        bool,
+        typer.Option(
+            "--skip-unchanged-sources / --no-skip-unchanged-sources",
+            help="With --changed-only, whether to also skip the compilation of pipelines whose"
+            " sources are unchanged since they were last deployed. Only the modules of the"
+            " vertex folder and the version of kfp are tracked: changes to other packages the"
+            " pipelines import are not detected.",
+        ),
+    ] = False,
+    ledger: Annotated[
+        Optional[str],
+        typer.Option(
+            "--ledger",
+            help="Deployment ledger recording what was deployed, updated by each deploy: a local"
+            " JSON file or a Cloud Storage URI (`gs://bucket/path/ledger.json`) shared between"
+            " machines. Defaults to `.vertex-deployer-cache/ledger.json`.",
+        ),
+    ] = None,
 ):
-    """Compile, upload, run and schedule pipelines."""
+    """Compile, upload, run and schedule pipelines.
+
+    With several --env-file, pipelines are compiled once, then uploaded, run and scheduled in
+    all environments concurrently.
+    """
+    env_files = env_file or [None]
+    fan_out = len(env_files) > 1
+    for env_file_ in env_files:
+        vertex_settings = load_vertex_settings(env_file=env_file_)
+        validate_or_log_settings(
+            vertex_settings, skip_validation=skip_validation, env_file=env_file_
+        )
+    if fan_out:
+        vertex_settings = load_vertex_settings(env_file=env_files[0])
+
+    _validate_stage_options(
+        pipeline_names,
+        run=run,
+        schedule=schedule,
+        cron=cron,
+        config_filepath=config_filepath,
+        config_name=config_name,
+    )
+    if skip_unchanged_sources and not changed_only:
+        raise typer.BadParameter("--skip-unchanged-sources requires --changed-only")
+
+    deployer_settings: DeployerSettings = ctx.obj["settings"]
+
+    from deployer.deployment import (
+        DeployOptions,
+        StageOptions,
+        build_environments_table,
+        deploy_pipelines,
+    )
+    from deployer.patching import load_patches
+
+    patches = load_patches(patch_file) if patch_file is not None else deployer_settings.patches
+    if trace_file is not None:
+        # the trace is written when the command exits, e.g. to see where a failed deploy stalled
+        stages = ctx.with_resource(collect_all_stages())
+        ctx.call_on_close(lambda: _output_trace([r._asdict() for r in stages], trace_file))
+
+    # the state file is named after the options: a failed invocation is resumed by running the
+    # same command with --resume
+    checkpoint_options = {
+        k: v for k, v in ctx.params.items() if k not in _CHECKPOINT_IGNORED_PARAMS
+    }
+    results = deploy_pipelines(
+        pipeline_names,
+        env_files,
+        vertex_settings,
+        deployer_settings,
+        StageOptions(
+            upload=upload,
+            run=run,
+            schedule=schedule,
+            cron=cron,
+            delete_last_schedule=delete_last_schedule,
+            scheduler_timezone=scheduler_timezone,
+            tags=tags,
+            enable_caching=enable_caching,
+            experiment_name=experiment_name,
+            run_name=run_name,
+            changed_only=changed_only,
+        ),
+        DeployOptions(
+            compile=compile,
+            local_package=local_package,
+            patches=patches,
+            config_filepath=config_filepath,
+            config_name=config_name,
+            resume=resume,
+            ledger=ledger,
+            skip_unchanged_sources=skip_unchanged_sources,
+            trace_memory=trace_memory,
+        ),
+        checkpoint_options,
+    )
+
+    if upload:
+        ctx.obj["discovery_cache"].add_tags(tags or [])
+    if results.environments:
+        console.print(build_environments_table(results.environments))
+    if trace_memory:
+        _output_memory_report(results.memory_stages, trace_memory_file, console)
+
+    if any("error" in o for outcomes in results.environments.values() for o in outcomes.values()):
+        raise typer.Exit(1)
+
+
+def _plan_deployment(
+    ctx: typer.Context,
+    manifest_file: Optional[Path],
+    env_file: Optional[Path],
+    force: bool,
+    dry_run: bool,
+) -> List[Any]:
+    """Build the actions of a deployment manifest and execute them, or only plan them."""
+    from deployer.deployment_plan import (
+        AppliedDigests,
+        apply_actions,
+        build_actions,
+        load_manifest,
+    )
+
+    deployer_settings: DeployerSettings = ctx.obj["settings"]
+    if manifest_file is not None:
+        manifest = load_manifest(manifest_file)
+    elif deployer_settings.manifest is not None:
+        manifest = deployer_settings.manifest
+    else:
+        raise typer.BadParameter(
+            "No deployment manifest found. Please add a [tool.vertex_deployer.manifest] section"
+            " to pyproject.toml or specify a manifest file.",
+            param_hint="--manifest-file",
+        )
+
+    unknown_pipelines = [
+        d.name for d in manifest.pipelines if d.name not in ctx.obj["pipeline_names"].__members__
+    ]
+    if unknown_pipelines:
+        raise typer.BadParameter(
+            f"Pipelines {unknown_pipelines} not found at"
+            f" '{deployer_settings.pipelines_root_path}'."
+            f"\nAvailable pipelines: {list(ctx.obj['pipeline_names'].__members__)}"
+        )
+
+    vertex_settings = load_vertex_settings(env_file=env_file)
+    validate_or_log_settings(vertex_settings, skip_validation=True, env_file=env_file)
+
+    actions = build_actions(manifest, deployer_settings.configs_root_path)
+    with console.status("Planning deployment..." if dry_run else "Applying deployment..."):
+        apply_actions(
+            actions,
+            manifest,
+            vertex_settings,
+            pipelines_root_path=deployer_settings.pipelines_root_path,
+            local_package_path=deployer_settings.local_package_path,
+            applied_digests=AppliedDigests(),
+            dry_run=dry_run,
+            force=force,
+            on_action_end=lambda a: logger.debug(f"Action {a.id}: {a.status.value}"),
+            patches=deployer_settings.patches,
+        )
+
+    for deployment in manifest.pipelines:
+        if deployment.upload and not dry_run:
+            ctx.obj["discovery_cache"].add_tags(deployment.tags or [])
+    return actions
+
+
+@app.command(name="plan")
+def plan(
+    ctx: typer.Context,
+    manifest_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--manifest-file",
+            "-m",
+            help="TOML, YAML or JSON file listing the pipelines to deploy, with their tags, runs"
+            " and schedules. Defaults to the `[tool.vertex_deployer.manifest]` section of"
+            " pyproject.toml.",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    env_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="The environment file to use.",
+            exists=True,
+            dir_okay=False,
+            file_okay=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    force: Annotated[
+        bool,
+        typer.Option(
+            "--force / --no-force",
+            "-f / -nf",
+            help="Whether to plan actions whose inputs are unchanged since they were applied.",
+        ),
+    ] = False,
+):
+    """Show the actions a deployment manifest would apply, without side effects.
+
+    Pipelines are compiled in memory to tell which uploads and schedules are unchanged.
+    """
+    from deployer.deployment_plan import build_actions_table
+
+    actions = _plan_deployment(ctx, manifest_file, env_file, force=force, dry_run=True)
+    console.print(build_actions_table(actions))
+    if any(a.status.value == "failed" for a in actions):
+        raise typer.Exit(1)
+
+
+@app.command(name="apply")
+def apply(
+    ctx: typer.Context,
+    manifest_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--manifest-file",
+            "-m",
+            help="TOML, YAML or JSON file listing the pipelines to deploy, with their tags, runs"
+            " and schedules. Defaults to the `[tool.vertex_deployer.manifest]` section of"
+            " pyproject.toml.",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    env_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="The environment file to use.",
+            exists=True,
+            dir_okay=False,
+            file_okay=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    force: Annotated[
+        bool,
+        typer.Option(
+            "--force / --no-force",
+            "-f / -nf",
+            help="Whether to apply actions whose inputs are unchanged since they were applied.",
+        ),
+    ] = False,
+):
+    """Compile, upload, run and schedule the pipelines of a deployment manifest.
+
+    Actions are executed in dependency order, concurrently up to the limits of the manifest.
+    Uploads and schedules whose inputs are unchanged since they were applied are skipped, as are
+    runs with `skip_unchanged` in the manifest.
+    """
+    from deployer.deployment_plan import build_actions_table
+
+    actions = _plan_deployment(ctx, manifest_file, env_file, force=force, dry_run=False)
+    console.print(build_actions_table(actions, title="Deployment"))
+    if any(a.status.value in ("failed", "skipped") for a in actions):
+        raise typer.Exit(1)
+
+
+@app.command(name="promote")
+def promote(
+    ctx: typer.Context,
+    pipeline_names: Annotated[
+        Optional[List[str]],
+        typer.Argument(
+            ...,
+            help="The names of the pipelines to promote.",
+            callback=pipeline_name_callback,
+            shell_complete=complete_pipeline_names,
+        ),
+    ] = None,
+    all: Annotated[
+        bool,
+        typer.Option("--all", "-a", help="Whether to promote all pipelines."),
+    ] = False,
+    from_tag: Annotated[
+        Optional[str],
+        typer.Option(
+            "--from-tag",
+            "-ft",
+            help="The tag of the versions to promote, e.g. `dev`.",
+            shell_complete=complete_tags,
+        ),
+    ] = None,
+    to_tag: Annotated[
+        Optional[str],
+        typer.Option(
+            "--to-tag",
+            "-tt",
+            help="The tag to attach to the versions, e.g. `prd`.",
+            shell_complete=complete_tags,
+        ),
+    ] = None,
+    env_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="The environment file to use.",
+            exists=True,
+            dir_okay=False,
+            file_okay=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            "--max-workers",
+            "-mw",
+            help="The maximum number of pipelines to promote concurrently.",
+            min=1,
+        ),
+    ] = constants.DEFAULT_PROMOTION_MAX_WORKERS,
+    skip_validation: Annotated[
+        bool,
+        typer.Option(
+            "--skip-validation / --no-skip",
+            "-y / -n",
+            help="Whether to continue without user validation of the settings.",
+        ),
+    ] = True,
+):
+    """Promote pipeline versions from a tag to another, e.g. from `dev` to `prd`.
+
+    The version tagged with --from-tag is resolved in Artifact Registry, then tagged with
+    --to-tag: nothing is compiled nor uploaded, so the promoted artifact is the one validated.
+    """
+    from deployer.promotion import build_promotions_table, get_gar_host, promote_pipelines
+
+    if not from_tag or not to_tag:
+        raise typer.BadParameter("Both --from-tag and --to-tag must be specified.")
+    if from_tag == to_tag:
+        raise typer.BadParameter("--from-tag and --to-tag must be different.")
+
+    if all:
+        pipeline_names = [p.value for p in ctx.obj["pipeline_names"].__members__.values()]
+
     vertex_settings = load_vertex_settings(env_file=env_file)
     validate_or_log_settings(vertex_settings, skip_validation=skip_validation, env_file=env_file)
 
-    if schedule:
-        if cron is None or cron == "":
-            raise typer.BadParameter("--cron must be specified to schedule a pipeline")
+    with console.status(f"Promoting pipelines from {from_tag} to {to_tag}..."):
+        results = promote_pipelines(
+            get_gar_host(vertex_settings),
+            pipeline_names,
+            from_tag=from_tag,
+            to_tag=to_tag,
+            max_workers=max_workers,
+        )
+    ctx.obj["discovery_cache"].add_tags([to_tag])
+
+    console.print(build_promotions_table(results, from_tag=from_tag, to_tag=to_tag))
+    if any(r.status == "failed" for r in results):
+        raise typer.Exit(1)
+
+
+@app.command(name="rollback", no_args_is_help=True)
+def rollback(
+    ctx: typer.Context,
+    pipeline_name: Annotated[
+        str,
+        typer.Argument(
+            ...,
+            help="The name of the pipeline to roll back.",
+            shell_complete=complete_pipeline_names,
+        ),
+    ],
+    to: Annotated[
+        str,
+        typer.Option(
+            "--to",
+            "-t",
+            help="The version to roll back to: a number `n` for the n-th previously used version,"
+            " or a digest, possibly abbreviated. Defaults to the previously used version.",
+        ),
+    ] = "1",
+    list_versions: Annotated[
+        bool,
+        typer.Option("--list", "-l", help="Whether to only list the stored versions."),
+    ] = False,
+    local_package: Annotated[
+        bool,
+        typer.Option(
+            "--local-package/--no-local-package",
+            "-lp/-nlp",
+            help="Whether to also save the version to the local package path"
+            " (`{vertex_folder_path}/pipelines/compiled_pipelines`)."
+            " Otherwise, only the history of the stored versions is updated.",
+        ),
+    ] = False,
+    env_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="The environment file to use.",
+            exists=True,
+            dir_okay=False,
+            file_okay=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    upload: Annotated[
+        bool,
+        typer.Option(
+            "--upload/--no-upload",
+            "-u/-nu",
+            help="Whether to upload the version to Google Artifact Registry.",
+        ),
+    ] = False,
+    run: Annotated[
+        bool, typer.Option("--run/--no-run", "-r/-nr", help="Whether to run the version.")
+    ] = False,
+    schedule: Annotated[
+        bool,
+        typer.Option(
+            "--schedule/--no-schedule",
+            "-s/-ns",
+            help="Whether to create a schedule for the version.",
+        ),
+    ] = False,
+    cron: Annotated[
+        Optional[str],
+        typer.Option(
+            help="Cron expression for scheduling the pipeline."
+            " To pass it to the CLI, use underscore e.g. '0_10_*_*_*'."
+        ),
+    ] = None,
+    delete_last_schedule: Annotated[
+        bool,
+        typer.Option(
+            "--delete-last-schedule",
+            "-dls",
+            help="Whether to delete the previous schedule before creating a new one.",
+        ),
+    ] = False,
+    scheduler_timezone: Annotated[
+        str,
+        typer.Option(
+            help="Timezone for scheduling the pipeline."
+            " Must be a valid string from IANA time zone database",
+        ),
+    ] = constants.DEFAULT_SCHEDULER_TIMEZONE,
+    tags: Annotated[
+        Optional[List[str]],
+        typer.Option(
+            help="The tags to use when uploading the version.", shell_complete=complete_tags
+        ),
+    ] = constants.DEFAULT_TAGS,
+    config_filepath: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--config-filepath",
+            "-cfp",
+            help="Path to the json/py file with parameter values and input artifacts"
+            " to use when running the pipeline.",
+            exists=True,
+            dir_okay=False,
+            file_okay=True,
+        ),
+    ] = None,
+    config_name: Annotated[
+        Optional[str],
+        typer.Option(
+            "--config-name",
+            "-cn",
+            help="Name of the json/py file with parameter values and input artifacts"
+            " to use when running the pipeline. It must be in the pipeline config dir."
+            " e.g. `config_dev.json` for `./vertex/configs/{pipeline-name}/config_dev.json`.",
+            shell_complete=complete_config_names,
+        ),
+    ] = None,
+    enable_caching: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--enable-caching / --no-cache",
+            "-ec / -nec",
+            help="Whether to turn on caching for the run. Overrides the compile time settings."
+            " Defaults to None.",
+        ),
+    ] = None,
+    experiment_name: Annotated[
+        Optional[str],
+        typer.Option(
+            "--experiment-name",
+            "-en",
+            help="The name of the experiment to run the pipeline in."
+            "Defaults to '{pipeline_name}-experiment'.",
+        ),
+    ] = None,
+    run_name: Annotated[
+        Optional[str],
+        typer.Option(
+            "--run-name",
+            "-rn",
+            help="The pipeline's run name. Displayed in the UI."
+            "Defaults to '{pipeline_name}-{tags}-%Y%m%d%H%M%S'.",
+        ),
+    ] = None,
+    ledger: Annotated[
+        Optional[str],
+        typer.Option(
+            "--ledger",
+            help="The deployment ledger to record the rollback in, a local path or a"
+            " `gs://bucket/path.json` URI. Defaults to `.vertex-deployer-cache/ledger.json`.",
+        ),
+    ] = None,
+    skip_validation: Annotated[
+        bool,
+        typer.Option(
+            "--skip-validation / --no-skip",
+            "-y / -n",
+            help="Whether to continue without user validation of the settings.",
+        ),
+    ] = True,
+):
+    """Roll a pipeline back to a previously compiled version, and upload, run or schedule it.
+
+    Versions are read from the compiled pipelines store, without importing the pipeline code.
+    They are only stored when a pipeline is saved to the local package, e.g. with
+    `deploy --local-package`: deploy with it the versions to roll back to.
+    """
+    from deployer.utils.exceptions import PipelineVersionNotFoundError
+    from deployer.utils.store import CompiledPipelineStore, build_versions_table
+
+    deployer_settings: DeployerSettings = ctx.obj["settings"]
+    store = CompiledPipelineStore(deployer_settings.local_package_path)
+    if list_versions:
+        console.print(build_versions_table(pipeline_name, store.history(pipeline_name)))
+        return
+
+    if schedule and not cron:
+        raise typer.BadParameter("--cron must be specified to schedule a pipeline")
     if run or schedule:
-        if config_filepath is None and config_name is None:
+        if (config_filepath is None) == (config_name is None):
             raise typer.BadParameter(
-                "Both --config-filepath and --config-name are missing."
-                " Please specify at least one to run or schedule a pipeline."
+                "Please specify either --config-filepath or --config-name"
+                " to run or schedule a pipeline."
             )
-        if config_filepath is not None and config_name is not None:
-            raise typer.BadParameter(
-                "Both --config-filepath and --config-name are provided."
-                " Please specify only one to run or schedule a pipeline."
-            )
-        if config_filepath is not None and len(pipeline_names) > 1:
-            raise typer.BadParameter(
-                "Multiple pipelines specified with --config-filepath."
-                " Please specify a --config-name that will be used for each pipeline."
-                " Or specify a single pipeline to use the --config-filepath."
+        if config_name is not None:
+            config_filepath = (
+                Path(deployer_settings.configs_root_path) / pipeline_name / config_name
             )
 
-    deployer_settings: DeployerSettings = ctx.obj["settings"]
+    try:
+        digest = store.resolve(pipeline_name, to)
+        compiled_pipeline = store.load(digest)
+    except PipelineVersionNotFoundError as e:
+        raise typer.BadParameter(str(e), param_hint="--to") from e
 
-    from deployer.pipeline_deployer import VertexPipelineDeployer
+    if upload or run or schedule:
+        from deployer.deployment import StageOptions, build_deployer, deploy_stages
 
-    for pipeline_name in pipeline_names:
-        pipeline_func = import_pipeline_from_dir(
-            deployer_settings.pipelines_root_path, pipeline_name
+        vertex_settings = load_vertex_settings(env_file=env_file)
+        validate_or_log_settings(
+            vertex_settings, skip_validation=skip_validation, env_file=env_file
         )
-
-        deployer = VertexPipelineDeployer(
-            project_id=vertex_settings.PROJECT_ID,
-            region=vertex_settings.GCP_REGION,
-            staging_bucket_name=vertex_settings.VERTEX_STAGING_BUCKET_NAME,
-            service_account=vertex_settings.VERTEX_SERVICE_ACCOUNT,
-            pipeline_name=pipeline_name,
+        deployer = build_deployer(
+            vertex_settings,
+            pipeline_name,
+            deployer_settings.local_package_path,
             run_name=run_name,
-            pipeline_func=pipeline_func,
-            gar_location=vertex_settings.GAR_LOCATION,
-            gar_repo_id=vertex_settings.GAR_PIPELINES_REPO_ID,
-            local_package_path=deployer_settings.local_package_path,
         )
-
-        if run or schedule:
-            if config_name is not None:
-                config_filepath = (
-                    Path(deployer_settings.configs_root_path) / pipeline_name / config_name
-                )
-            parameter_values, input_artifacts = load_config(config_filepath)
-
-        if compile:
-            with console.status("Compiling pipeline..."):
-                deployer.compile()
-
+        deployer.compiled_pipeline = compiled_pipeline
+        options = StageOptions(
+            upload=upload,
+            run=run,
+            schedule=schedule,
+            cron=cron,
+            delete_last_schedule=delete_last_schedule,
+            scheduler_timezone=scheduler_timezone,
+            tags=tags,
+            enable_caching=enable_caching,
+            experiment_name=experiment_name,
+            run_name=run_name,
+        )
+        # a rollback is not resumed: its checkpoint is only written for `deploy_stages`
+        checkpoint = Checkpoint(
+            get_checkpoint_filepath(
+                "rollback",
+                {**ctx.params, "target": vertex_settings.model_dump(mode="json")},
+            )
+        )
+        deploy_stages(
+            deployer,
+            options,
+            {"pipeline_spec": digest},
+            checkpoint,
+            DeploymentLedger(
+                get_environment_key(vertex_settings),
+                ledger or constants.DEPLOYMENT_LEDGER_FILEPATH,
+                project_id=vertex_settings.PROJECT_ID,
+            ),
+            config_filepath=config_filepath,
+        )
+        checkpoint.clear()
         if upload:
-            with console.status("Uploading pipeline..."):
-                deployer.upload_to_registry(tags=tags)
-
-        if run:
-            with console.status("Running pipeline..."):
-                deployer.run(
-                    enable_caching=enable_caching,
-                    parameter_values=parameter_values,
-                    experiment_name=experiment_name,
-                    input_artifacts=input_artifacts,
-                    tag=tags[0] if tags else None,
-                )
+            ctx.obj["discovery_cache"].add_tags(tags or [])
 
-        if schedule:
-            with console.status("Scheduling pipeline..."):
-                cron = cron.replace("_", " ")  # ugly fix to allow cron expression as env variable
-                deployer.schedule(
-                    cron=cron,
-                    enable_caching=enable_caching,
-                    parameter_values=parameter_values,
-                    tag=tags[0] if tags else None,
-                    delete_last_schedule=delete_last_schedule,
-                    scheduler_timezone=scheduler_timezone,
-                )
+    store.add(pipeline_name, compiled_pipeline.content, save_package_file=local_package)
+    console.print(f"Pipeline {pipeline_name} rolled back to {digest}", style="bold green")
 
 
 @app.command()
-def check(
+def check(  # noqa: C901
     ctx: typer.Context,
     pipeline_names: Annotated[
         Optional[List[str]],
         typer.Argument(
-            ..., help="The names of the pipeline to check.", callback=pipeline_name_callback
+            ...,
+            help="The names of the pipeline to check.",
+            callback=pipeline_name_callback,
+            shell_complete=complete_pipeline_names,
         ),
     ] = None,
     all: Annotated[
@@ -381,6 +1147,145 @@ def check(
             "and not overwritten in config file.",
         ),
     ] = False,
+    isolated: Annotated[
+        bool,
+        typer.Option(
+            "--isolated / --no-isolated",
+            "-i / -ni",
+            help="Whether to import and check pipelines in a separate worker process,"
+            " replaced every `--max-tasks-per-child` pipelines. This bounds memory usage"
+            " when checking many pipelines.",
+        ),
+    ] = False,
+    max_tasks_per_child: Annotated[
+        int,
+        typer.Option(
+            "--max-tasks-per-child",
+            "-mtpc",
+            help="Number of pipelines checked by a worker before it is replaced,"
+            " when using --isolated.",
+            min=1,
+        ),
+    ] = constants.DEFAULT_MAX_TASKS_PER_CHILD,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch / --no-watch",
+            "-w / -nw",
+            help="Whether to keep checking pipelines each time a file changes in the vertex"
+            " folder. Only pipelines and configs affected by the change are checked again."
+            " Errors are never raised in this mode.",
+        ),
+    ] = False,
+    fail_fast: Annotated[
+        bool,
+        typer.Option(
+            "--fail-fast / --no-fail-fast",
+            "-ff / -nff",
+            help="Whether to stop checking pipelines after the first invalid one.",
+        ),
+    ] = False,
+    output: Annotated[
+        constants.CheckOutputFormat,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Format of the results. `json` and `junit` reports have one record per"
+            " pipeline and config file, with errors, warnings and the time spent in each stage"
+            " (import, compile, model creation, config validation).",
+        ),
+    ] = constants.CheckOutputFormat.table,
+    output_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output-file",
+            "-of",
+            help="File to write the `json` or `junit` report to. If not specified, the report"
+            " is written to stdout and the progress to stderr.",
+            dir_okay=False,
+        ),
+    ] = None,
+    summary: Annotated[
+        bool,
+        typer.Option(
+            "--summary / --no-summary",
+            "-s / -ns",
+            help="Whether to print the number of valid, warning and invalid configs per"
+            " pipeline, followed by invalid configs only, instead of one row per config.",
+        ),
+    ] = False,
+    page_size: Annotated[
+        int,
+        typer.Option(
+            "--page-size",
+            "-ps",
+            help="Maximum number of rows per results table. Larger results are printed as"
+            " several tables. 0 to print a single table.",
+            min=0,
+        ),
+    ] = constants.DEFAULT_CHECK_TABLE_PAGE_SIZE,
+    profile_pipelines: Annotated[
+        bool,
+        typer.Option(
+            "--profile-pipelines / --no-profile-pipelines",
+            "-pp / -npp",
+            help="Whether to profile the check of each pipeline (import, compile and config"
+            " validation) separately. Reports are written to"
+            " `.vertex-deployer-cache/profiles/check-{timestamp}/{pipeline_name}.{ext}`, in the"
+            " format given by `--profile-format`.",
+        ),
+    ] = False,
+    profile_imports: Annotated[
+        bool,
+        typer.Option(
+            "--profile-imports / --no-profile-imports",
+            "-pi / -npi",
+            help="Whether to time the modules imported by each pipeline, and print the project"
+            " modules ranked by the time spent importing them and the modules they import."
+            " Modules already imported, e.g. by a previous pipeline, are not counted.",
+        ),
+    ] = False,
+    profile_imports_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--profile-imports-file",
+            "-pif",
+            help="JSON file to write import times to, when using --profile-imports. Defaults to"
+            " `.vertex-deployer-cache/profiles/imports-{timestamp}.json`.",
+            dir_okay=False,
+        ),
+    ] = None,
+    trace_memory: Annotated[
+        bool,
+        typer.Option(
+            "--trace-memory / --no-trace-memory",
+            "-tm / -ntm",
+            help="Whether to trace memory allocations with tracemalloc, and print the memory"
+            " allocated by each stage of each pipeline (import, compile, model creation, config"
+            " validation), its peak, the peak RSS of the process and the top allocation sites."
+            " Slows down the command.",
+        ),
+    ] = False,
+    trace_memory_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--trace-memory-file",
+            "-tmf",
+            help="JSON file to write memory usage to, when using --trace-memory. Defaults to"
+            " `.vertex-deployer-cache/profiles/memory-{timestamp}.json`.",
+            dir_okay=False,
+        ),
+    ] = None,
+    trace_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--trace-file",
+            "-tf",
+            help="JSON file to write a trace of the check stages to, in the Chrome Trace Event"
+            " format, with one track per worker. Open it in https://ui.perfetto.dev.",
+            dir_okay=False,
+        ),
+    ] = None,
 ):
     """Check that pipelines are valid.
 
@@ -400,8 +1305,14 @@ def check(
     """
     if all and pipeline_names:
         raise typer.BadParameter("Please specify either --all or a pipeline name")
+    if watch and isolated:
+        raise typer.BadParameter("--watch cannot be used with --isolated")
+    if watch and output != constants.CheckOutputFormat.table:
+        raise typer.BadParameter("--watch can only be used with --output table")
 
-    from deployer.pipeline_checks import Pipelines
+    from deployer.pipeline_checks import check_pipelines
+
+    profile_dirpath = _get_pipelines_profile_dirpath() if profile_pipelines else None
 
     deployer_settings: DeployerSettings = ctx.obj["settings"]
 
@@ -411,38 +1322,236 @@ def check(
     logger.info(f"Checking pipelines {pipeline_names}")
 
     if config_filepath is None:
+        discovery_cache: DiscoveryCache = ctx.obj["discovery_cache"]
         to_check = {
-            p: list_config_filepaths(deployer_settings.configs_root_path, p)
+            p: discovery_cache.list_config_filepaths(deployer_settings.configs_root_path, p)
             for p in pipeline_names
         }
     else:
         to_check = {p: [config_filepath] for p in pipeline_names}
 
-    try:
-        with console.status("Checking pipelines..."):
-            pipelines_model = Pipelines.model_validate(
-                {
-                    "pipelines": {
-                        p: {
-                            "pipeline_name": p,
-                            "config_paths": config_filepaths,
-                            "pipelines_root_path": deployer_settings.pipelines_root_path,
-                            "configs_root_path": deployer_settings.configs_root_path,
-                        }
-                        for p, config_filepaths in to_check.items()
-                    }
-                },
-                context={"raise_for_defaults": raise_for_defaults},
-            )
-    except ValidationError as e:
-        if raise_error:
-            raise e
-        print_check_results_table(to_check, validation_error=e)
+    if watch:
+        _watch_check(ctx, None if all else pipeline_names, config_filepath, warn_defaults)
+        return
+
+    # keep stdout for the report if it is not written to a file
+    report_to_stdout = output != constants.CheckOutputFormat.table and output_file is None
+    display_console = Console(stderr=True) if report_to_stdout else console
+    results = _stream_check_results(
+        check_pipelines(
+            to_check,
+            pipelines_root_path=deployer_settings.pipelines_root_path,
+            configs_root_path=deployer_settings.configs_root_path,
+            raise_for_defaults=raise_for_defaults,
+            raise_error=raise_error,
+            isolated=isolated,
+            max_tasks_per_child=max_tasks_per_child,
+            log_level=ctx.obj["log_level"],
+            profile_dirpath=profile_dirpath,
+            profile_format=ctx.obj["profile_format"],
+            profile_imports=profile_imports,
+            trace_memory=trace_memory,
+        ),
+        pipeline_names=list(to_check),
+        warn_defaults=warn_defaults,
+        fail_fast=fail_fast,
+        progress_console=display_console,
+    )
+
+    invalid_pipelines = [r.pipeline_name for r in results if not r.is_valid]
+    if invalid_pipelines and raise_error:  # only reached in isolated mode
+        raise ValueError(f"Pipelines {invalid_pipelines} are not valid.")
+
+    _output_check_results(
+        results,
+        output,
+        output_file,
+        warn_defaults=warn_defaults,
+        summary=summary,
+        page_size=page_size,
+    )
+    if profile_imports:
+        _output_import_timings(results, profile_imports_file, display_console)
+    if trace_memory:
+        memory_stages = [record for result in results for record in result.memory_stages]
+        _output_memory_report(memory_stages, trace_memory_file, display_console)
+    if trace_file is not None:
+        _output_trace([record for result in results for record in result.stages], trace_file)
+    if ctx.obj["metrics"] is not None:
+        for result in results:
+            ctx.obj["metrics"].add_worker_records(result.stages, result.counts)
+    if len(results) < len(to_check):
+        display_console.print(
+            f"Stopped after the first invalid pipeline, {len(to_check) - len(results)}"
+            " pipeline(s) not checked.",
+            style="bold red",
+        )
+    if invalid_pipelines:
         sys.exit(1)
-    else:
+
+
+def _get_pipelines_profile_dirpath() -> Path:
+    """Return the directory of per-pipeline profiles, checking that pyinstrument is installed."""
+    from deployer.utils.profiling import check_profiler_installed, get_profile_filepath
+
+    try:
+        check_profiler_installed()
+    except ImportError as e:
+        raise typer.BadParameter(str(e), param_hint="--profile-pipelines") from e
+    return get_profile_filepath("check")
+
+
+def _output_import_timings(
+    results: List[Any], output_file: Optional[Path], display_console: Console
+) -> None:
+    """Print the import times table of each pipeline and write them to a JSON file."""
+    from deployer.utils.profiling import get_profile_filepath
+
+    for result in results:
+        display_console.print(build_import_timings_table(result))
+    if output_file is None:
+        output_file = get_profile_filepath("imports").with_suffix(".json")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_text(format_import_timings_report(results))
+    logger.info(f"Import times written to '{output_file}'")
+
+
+def _output_memory_report(
+    memory_stages: List[Dict[str, Any]], output_file: Optional[Path], display_console: Console
+) -> None:
+    """Print the memory used by each stage of each pipeline and write it to a JSON file."""
+    from deployer.utils.profiling import get_profile_filepath
+
+    by_pipeline = {}
+    for record in memory_stages:
+        by_pipeline.setdefault(record["labels"].get("pipeline"), []).append(record)
+    for pipeline_name, records in by_pipeline.items():
+        display_console.print(build_memory_table(pipeline_name or "-", records))
+    if output_file is None:
+        output_file = get_profile_filepath("memory").with_suffix(".json")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_text(format_memory_report(memory_stages))
+    logger.info(f"Memory usage written to '{output_file}'")
+
+
+def _output_trace(stages: List[Dict[str, Any]], output_file: Path) -> None:
+    """Write stages to a Chrome Trace Event file."""
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_text(format_chrome_trace(stages))
+    logger.info(f"Trace written to '{output_file}', open it in https://ui.perfetto.dev")
+
+
+def _output_check_results(
+    results: List[Any],
+    output: constants.CheckOutputFormat,
+    output_file: Optional[Path],
+    warn_defaults: bool,
+    summary: bool,
+    page_size: int,
+) -> None:
+    """Print the results table, and write the report to stdout or to a file if requested."""
+    if output == constants.CheckOutputFormat.table:
         print_check_results_table(
-            to_check, pipelines_model=pipelines_model, warn_defaults=warn_defaults
+            results, warn_defaults=warn_defaults, summary=summary, page_size=page_size
         )
+        return
+
+    report = format_check_report(results, output, warn_defaults=warn_defaults)
+    if output_file is None:
+        sys.stdout.write(report)
+        return
+
+    output_file.write_text(report)
+    print_check_results_table(
+        results, warn_defaults=warn_defaults, summary=summary, page_size=page_size
+    )
+    logger.info(f"Check report written to '{output_file}'")
+
+
+def _stream_check_results(
+    results_iter: Iterator[Any],
+    pipeline_names: List[str],
+    warn_defaults: bool,
+    fail_fast: bool,
+    progress_console: Console,
+) -> List[Any]:
+    """Consume check results, printing a line per pipeline as they come, above a progress bar.
+
+    Returns the results received, which stop after the first invalid pipeline if `fail_fast`.
+    """
+    from rich.progress import (
+        BarColumn,
+        MofNCompleteColumn,
+        Progress,
+        SpinnerColumn,
+        TextColumn,
+        TimeElapsedColumn,
+    )
+
+    results = []
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=progress_console,
+        transient=True,
+    ) as progress:
+        task_id = progress.add_task("Checking pipelines...", total=len(pipeline_names))
+        if pipeline_names:
+            progress.update(task_id, description=f"Checking {pipeline_names[0]}...")
+        for result in results_iter:
+            results.append(result)
+            progress.console.print(format_check_result_summary(result, warn_defaults))
+            if fail_fast and not result.is_valid:
+                results_iter.close()  # stops isolated workers
+                break
+            next_description = (
+                f"Checking {pipeline_names[len(results)]}..."
+                if len(results) < len(pipeline_names)
+                else "Done"
+            )
+            progress.update(task_id, advance=1, description=next_description)
+    return results
+
+
+def _watch_check(
+    ctx: typer.Context,
+    pipeline_names: Optional[List[str]],
+    config_filepath: Optional[Path],
+    warn_defaults: bool,
+) -> None:
+    """Check pipelines each time a file changes, updating the results table in place."""
+    from rich.console import Group
+    from rich.live import Live
+    from rich.text import Text
+
+    from deployer.pipeline_checks import watch_pipelines
+
+    deployer_settings: DeployerSettings = ctx.obj["settings"]
+    watching_text = Text(
+        f"Watching '{deployer_settings.vertex_folder_path}' for changes (Ctrl+C to stop)...",
+        style="dim",
+    )
+
+    table = Text("")
+    with Live(console=console, auto_refresh=False) as live:
+        try:
+            for results in watch_pipelines(
+                pipeline_names,
+                vertex_folder_path=deployer_settings.vertex_folder_path,
+                pipelines_root_path=deployer_settings.pipelines_root_path,
+                configs_root_path=deployer_settings.configs_root_path,
+                config_filepath=config_filepath,
+                raise_for_defaults=ctx.params["raise_for_defaults"],
+            ):
+                table = build_check_results_table(results, warn_defaults=warn_defaults)
+                live.update(Group(table, watching_text), refresh=True)
+        except KeyboardInterrupt:
+            live.update(table, refresh=True)
+        except ValueError as e:  # e.g. the vertex folder is not in the working directory
+            raise typer.BadParameter(str(e), param_hint="--watch") from e
 
 
 @app.command(name="list")
@@ -457,8 +1566,11 @@ def list_pipelines(
 ):
     """List all pipelines."""
     if with_configs:
+        discovery_cache: DiscoveryCache = ctx.obj["discovery_cache"]
         pipelines_dict = {
-            p.name: list_config_filepaths(ctx.obj["settings"].configs_root_path, p.name)
+            p.name: discovery_cache.list_config_filepaths(
+                ctx.obj["settings"].configs_root_path, p.name
+            )
             for p in ctx.obj["pipeline_names"].__members__.values()
         }
     else:
@@ -628,3 +1740,67 @@ def list_deployer_settings(
         config_str = "\n".join(config_repr)
 
     console.print(config_str)
+
+
+@app.command(name="serve")
+def serve(
+    ctx: typer.Context,
+    idle_timeout: Annotated[
+        int,
+        typer.Option(
+            "--idle-timeout",
+            "-it",
+            min=0,
+            help="Stop the server after this many seconds without requests. 0 means never.",
+        ),
+    ] = constants.DEFAULT_SERVER_IDLE_TIMEOUT,
+    stop: Annotated[
+        bool, typer.Option("--stop", help="Stop the server running in the current directory.")
+    ] = False,
+    detach: Annotated[
+        bool, typer.Option("--detach", "-d", help="Run the server in the background.")
+    ] = False,
+):
+    """Keep the deployer warm to answer `check`, `list` and `deploy` faster.
+
+    While the server is running, these commands are run by the server when called from the
+    same directory. Pipelines, compiled specs and config models stay in memory, and are
+    reloaded when their files change. Deploy commands that upload, run, schedule or prompt
+    still run in-process.
+    """
+    from deployer.server import DeployerServer, stop_server
+
+    socket_filepath = constants.SERVER_SOCKET_FILEPATH
+
+    if stop:
+        if stop_server(socket_filepath):
+            console.print("Server stopped.", style="bold blue")
+        else:
+            console.print("No server running.", style="yellow")
+        return
+
+    if detach:
+        import subprocess
+
+        subprocess.Popen(  # noqa: S603
+            [sys.executable, "-m", "deployer", "serve", "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        console.print(
+            f"Server starting in the background on {socket_filepath}.", style="bold blue"
+        )
+        return
+
+    import signal
+
+    # exit cleanly on SIGTERM, so that the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        DeployerServer(socket_filepath, idle_timeout=idle_timeout).serve_forever()
+    except RuntimeError as e:
+        raise typer.BadParameter(str(e)) from e
+    except KeyboardInterrupt:
+        pass
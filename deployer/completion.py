@@ -0,0 +1,288 @@
+"""Shell completion for pipeline names, config names and tags.
+
+Completion is requested by the shell on every <TAB>, so it must answer fast. The functions of
+this module answer from the discovery cache (see `deployer.utils.discovery`) and only depend on
+the standard library: `complete_from_env` is called by the entrypoint before importing the CLI,
+and answers without importing pydantic, rich, typer or kfp when possible.
+
+The same functions are registered as click `shell_complete` callbacks in the CLI, which is
+used as a fallback when the fast path cannot answer (e.g. completing option names, or settings
+not cached yet).
+"""
+
+import os
+import shlex
+import sys
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from deployer import constants
+from deployer.utils.discovery import find_pyproject_toml, get_discovery_cache
+
+COMPLETE_VAR = "_VERTEX_DEPLOYER_COMPLETE"
+
+# Commands taking pipeline names as arguments, with their options that expect a value.
+# Kept in sync with the CLI by tests: the CLI is not imported to answer completions fast.
+_PIPELINE_COMMANDS_VALUE_OPTIONS = {
+    "deploy": {
+        "--env-file",
+        "--patch-file",
+        "-pa",
+        "--cron",
+        "--scheduler-timezone",
+        "--tags",
+        "--config-filepath",
+        "-cfp",
+        "--config-name",
+        "-cn",
+        "--experiment-name",
+        "-en",
+        "--run-name",
+        "-rn",
+        "--trace-memory-file",
+        "-tmf",
+        "--trace-file",
+        "-tf",
+        "--ledger",
+    },
+    "check": {
+        "--config-filepath",
+        "-cfp",
+        "--output",
+        "-o",
+        "--output-file",
+        "-of",
+        "--page-size",
+        "-ps",
+        "--max-tasks-per-child",
+        "-mtpc",
+        "--profile-imports-file",
+        "-pif",
+        "--trace-memory-file",
+        "-tmf",
+        "--trace-file",
+        "-tf",
+    },
+}
+_GLOBAL_VALUE_OPTIONS = {
+    "--log-level",
+    "-log",
+    "--log-format",
+    "-lf",
+    "--profile-format",
+    "-pf",
+    "--profile-output",
+    "-po",
+    "--metrics-file",
+    "-mf",
+    "--metrics-push-url",
+    "-mpu",
+}
+_CONFIG_NAME_OPTIONS = {"--config-name", "-cn"}
+_TAGS_OPTIONS = {"--tags"}
+
+
+def _get_cached_settings() -> Optional[dict]:
+    """Return the cached deployer settings if up to date, None otherwise."""
+    pyproject_toml_path = find_pyproject_toml(Path.cwd().resolve())
+    return get_discovery_cache().get_settings(pyproject_toml_path)
+
+
+def _get_settings() -> dict:
+    """Return the deployer settings, loading them (slow path) if they are not cached."""
+    settings = _get_cached_settings()
+    if settings is None:
+        from deployer.settings import load_deployer_settings
+
+        settings = load_deployer_settings().model_dump(mode="json", exclude_unset=True)
+    return settings
+
+
+def _get_vertex_folder_path(settings: dict) -> Path:
+    return Path(settings.get("vertex_folder_path", constants.DEFAULT_VERTEX_FOLDER_PATH))
+
+
+def _parse_args(args: List[str]) -> Tuple[Optional[str], List[str], Optional[str]]:
+    """Parse already typed arguments.
+
+    Returns:
+        Tuple[Optional[str], List[str], Optional[str]]: the command name, the positional
+            arguments of the command, and the option expecting a value if the last argument
+            is an option expecting a value (None otherwise).
+    """
+    command = None
+    positionals = []
+    pending_option = None
+    for arg in args:
+        if pending_option is not None:
+            pending_option = None
+        elif arg.startswith("-"):
+            if command is None:
+                value_options = _GLOBAL_VALUE_OPTIONS
+            else:
+                value_options = _PIPELINE_COMMANDS_VALUE_OPTIONS.get(command, set())
+            if arg in value_options:
+                pending_option = arg
+        elif command is None:
+            command = arg
+        else:
+            positionals.append(arg)
+    return command, positionals, pending_option
+
+
+def _filter(values: List[str], incomplete: str) -> List[str]:
+    return [v for v in values if v.startswith(incomplete or "")]
+
+
+def _complete_pipeline_names(args: List[str], incomplete: str) -> List[str]:
+    settings = _get_settings()
+    pipelines_root_path = _get_vertex_folder_path(settings) / "pipelines"
+    pipeline_names = get_discovery_cache().list_pipeline_names(pipelines_root_path)
+    _, typed_pipeline_names, _ = _parse_args(args)
+    return _filter([p for p in pipeline_names if p not in typed_pipeline_names], incomplete)
+
+
+def _complete_config_names(args: List[str], incomplete: str) -> List[str]:
+    settings = _get_settings()
+    configs_root_path = _get_vertex_folder_path(settings) / "configs"
+    _, pipeline_names, _ = _parse_args(args)
+    discovery_cache = get_discovery_cache()
+    config_names = {
+        p.name
+        for pipeline_name in pipeline_names
+        for p in discovery_cache.list_config_filepaths(configs_root_path, pipeline_name)
+    }
+    return _filter(sorted(config_names), incomplete)
+
+
+def _complete_tags(incomplete: str) -> List[str]:
+    settings = _get_settings()
+    tags = [
+        *(settings.get("deploy", {}).get("tags") or []),
+        *get_discovery_cache().list_tags(),
+        *constants.EnvironmentNames.__members__,
+        "latest",
+    ]
+    return _filter(list(dict.fromkeys(tags)), incomplete)
+
+
+def complete_pipeline_names(ctx: Any, param: Any, incomplete: str) -> List[str]:
+    """Complete pipeline names, excluding those already typed."""
+    completions = _complete_pipeline_names(_get_typed_args(), incomplete)
+    get_discovery_cache().save()
+    return completions
+
+
+def complete_config_names(ctx: Any, param: Any, incomplete: str) -> List[str]:
+    """Complete config names from the config dirs of the pipelines already typed."""
+    completions = _complete_config_names(_get_typed_args(), incomplete)
+    get_discovery_cache().save()
+    return completions
+
+
+def complete_tags(ctx: Any, param: Any, incomplete: str) -> List[str]:
+    """Complete tags from settings, tags of previous uploads and environment names."""
+    completions = _complete_tags(incomplete)
+    get_discovery_cache().save()
+    return completions
+
+
+def _get_typed_args() -> List[str]:
+    """Typed args, read from env as click does not forward them to typer callbacks."""
+    try:
+        _, args, _ = _get_completion_args()
+    except ValueError:
+        return []
+    return args
+
+
+def _get_completion_args() -> Tuple[str, List[str], str]:
+    """Get shell, typed args and incomplete word from env variables set by completion scripts."""
+    shell = os.environ.get(COMPLETE_VAR, "").replace("complete_", "", 1)
+    if shell == "bash":
+        cwords = shlex.split(os.environ.get("COMP_WORDS", ""))
+        cword = int(os.environ.get("COMP_CWORD", len(cwords)))
+        incomplete = cwords[cword] if cword < len(cwords) else ""
+        return shell, cwords[1:cword], incomplete
+
+    completion_args = os.environ.get("_TYPER_COMPLETE_ARGS", "")
+    cwords = shlex.split(completion_args)
+    if shell in ("powershell", "pwsh"):
+        incomplete = os.environ.get("_TYPER_COMPLETE_WORD_TO_COMPLETE", "")
+        return shell, (cwords[1:-1] if incomplete else cwords[1:]), incomplete
+
+    args = cwords[1:]
+    if args and not completion_args.endswith(" "):
+        return shell, args[:-1], args[-1]
+    return shell, args, ""
+
+
+def _format_completions(shell: str, completions: List[str]) -> str:
+    """Format completions the same way typer does for each shell."""
+    if shell == "zsh":
+        if not completions:
+            return "_files"
+        escaped = [
+            '"{}"'.format(
+                c.replace('"', '""').replace("'", "''").replace("$", "\\$").replace("`", "\\`")
+            )
+            for c in completions
+        ]
+        return "_arguments '*: :((" + "\n".join(escaped) + "))'"
+    if shell in ("powershell", "pwsh"):
+        return "\n".join(f"{c}::: " for c in completions)
+    return "\n".join(completions)
+
+
+def get_completions(args: List[str], incomplete: str) -> Optional[List[str]]:
+    """Return completions if the fast path can answer, None otherwise.
+
+    The fast path answers for pipeline names of `deploy` and `check`, and for the values of
+    `--config-name` and `--tags`. It needs settings to be cached.
+    """
+    command, _, pending_option = _parse_args(args)
+    if command not in _PIPELINE_COMMANDS_VALUE_OPTIONS or incomplete.startswith("-"):
+        return None
+    if _get_cached_settings() is None:
+        return None
+
+    if pending_option is None:
+        completions = _complete_pipeline_names(args, incomplete)
+    elif pending_option in _CONFIG_NAME_OPTIONS:
+        completions = _complete_config_names(args, incomplete)
+    elif pending_option in _TAGS_OPTIONS:
+        completions = _complete_tags(incomplete)
+    else:
+        return None
+
+    get_discovery_cache().save()
+    return completions
+
+
+def complete_from_env() -> bool:
+    """Answer a shell completion request from env variables, without importing the CLI.
+
+    Returns:
+        bool: True if the request was answered, False if the full CLI must handle it.
+    """
+    if not os.environ.get(COMPLETE_VAR, "").startswith("complete_"):
+        return False
+
+    try:
+        shell, args, incomplete = _get_completion_args()
+    except ValueError:  # e.g. unbalanced quotes, let click handle it
+        return False
+    completions = get_completions(args, incomplete)
+    if completions is None:
+        return False
+
+    if shell == "fish":
+        action = os.environ.get("_TYPER_COMPLETE_FISH_ACTION", "")
+        if action == "is-args":
+            sys.exit(0 if completions else 1)
+        if completions:
+            print("\n".join(completions))
+        return True
+
+    print(_format_completions(shell, completions))
+    return True
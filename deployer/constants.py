@@ -1,4 +1,5 @@
 import re
+from datetime import timedelta
 from enum import Enum
 from pathlib import Path
 
@@ -10,7 +11,24 @@ DEFAULT_LOG_LEVEL = "INFO"
 DEFAULT_SCHEDULER_TIMEZONE = "Europe/Paris"
 DEFAULT_TAGS = None
 
-TEMP_LOCAL_PACKAGE_PATH = ".vertex-deployer-temp"
+CACHE_DIRPATH = Path(".vertex-deployer-cache")
+DISCOVERY_CACHE_FILEPATH = CACHE_DIRPATH / "discovery.json"
+MAX_CACHED_TAGS = 20
+SERVER_SOCKET_FILEPATH = CACHE_DIRPATH / "server.sock"
+DEFAULT_SERVER_IDLE_TIMEOUT = 3600
+PROFILES_DIRPATH = CACHE_DIRPATH / "profiles"
+APPLIED_DIGESTS_FILEPATH = CACHE_DIRPATH / "applied-digests.json"
+CHECKPOINTS_DIRPATH = CACHE_DIRPATH / "checkpoints"
+DEPLOYMENT_LEDGER_FILEPATH = CACHE_DIRPATH / "ledger.json"
+MAX_COMPILED_VERSIONS = 20
+MAX_COMPILED_VERSION_AGE = timedelta(days=90)
+METRICS_FILE_ENV_VAR = "VERTEX_DEPLOYER_METRICS_FILE"
+METRICS_PUSH_URL_ENV_VAR = "VERTEX_DEPLOYER_METRICS_PUSH_URL"
+CORRELATION_ID_ENV_VAR = "VERTEX_DEPLOYER_CORRELATION_ID"
+
+DEFAULT_MAX_TASKS_PER_CHILD = 10
+DEFAULT_CHECK_TABLE_PAGE_SIZE = 500
+DEFAULT_PROMOTION_MAX_WORKERS = 8
 
 PIPELINE_CHECKS_TABLE_COLUMNS = [
     "Status",
@@ -68,6 +86,23 @@ class ConfigType(str, Enum):  # noqa: D101
     yml = "yaml"
 
 
+class CheckOutputFormat(str, Enum):  # noqa: D101
+    table = "table"
+    json = "json"
+    junit = "junit"
+
+
+class LogFormat(str, Enum):  # noqa: D101
+    text = "text"
+    json = "json"
+
+
+class ProfileFormat(str, Enum):  # noqa: D101
+    html = "html"
+    text = "text"
+    speedscope = "speedscope"
+
+
 class EnvironmentNames(str, Enum):  # noqa: D101
     dev = "dev"
     stg = "stg"
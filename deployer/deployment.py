@@ -0,0 +1,741 @@
+"""Upload, run and schedule compiled pipelines, in one or several environments.
+
+`deploy_stages` uploads, runs and schedules a compiled pipeline in an environment, skipping the
+stages completed by a previous invocation (see `deployer.utils.checkpoint`) and, with
+`changed_only`, the stages unchanged since the last deploy (see `deployer.utils.ledger`).
+
+`deploy_pipelines` compiles pipelines and deploys them, for the `deploy` command. With several
+`--env-file`, each pipeline is compiled once, then the compiled pipelines are deployed to every
+environment with `deploy_to_environments`. Environments are deployed concurrently, each in its
+own process: the Vertex AI SDK keeps the target project, staging bucket and endpoints in global
+state, which threads would share.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from loguru import logger
+from pydantic import Field
+from rich.markup import escape
+from rich.table import Table
+
+from deployer import constants
+from deployer.patching import PipelineSpecPatches, patch_compiled_pipeline
+from deployer.settings import DeployerSettings
+from deployer.utils.checkpoint import Checkpoint, get_checkpoint_filepath
+from deployer.utils.compilation import CompiledPipeline, load_compiled_pipeline
+from deployer.utils.config import VertexPipelinesSettings, load_config, load_vertex_settings
+from deployer.utils.console import console
+from deployer.utils.digest import bytes_digest, file_digest, json_digest
+from deployer.utils.instrumentation import stage
+from deployer.utils.ledger import DeploymentLedger, get_environment_key, get_sources_digest
+from deployer.utils.logging import configure_logging, flush_logs, get_logging_config
+from deployer.utils.memory import trace_memory
+from deployer.utils.models import CustomBaseModel
+from deployer.utils.utils import import_pipeline_from_dir
+from deployer.utils.watch import ModuleGraph
+
+StageOutcomes = Dict[str, str]
+
+
+class StageOptions(CustomBaseModel):
+    """Options of the upload, run and schedule stages of `deploy`."""
+
+    upload: bool = False
+    run: bool = False
+    schedule: bool = False
+    cron: Optional[str] = None
+    delete_last_schedule: bool = False
+    scheduler_timezone: str = constants.DEFAULT_SCHEDULER_TIMEZONE
+    tags: Optional[List[str]] = constants.DEFAULT_TAGS
+    enable_caching: Optional[bool] = None
+    experiment_name: Optional[str] = None
+    run_name: Optional[str] = None
+    changed_only: bool = False
+
+
+def build_deployer(
+    vertex_settings: VertexPipelinesSettings,
+    pipeline_name: str,
+    local_package_path: Path,
+    run_name: Optional[str] = None,
+    pipeline_func: Optional[Any] = None,
+) -> Any:
+    """Build the `VertexPipelineDeployer` of a pipeline in the environment of `vertex_settings`.
+
+    Returns:
+        Any: The `VertexPipelineDeployer`, to compile with `pipeline_func` or to deploy a
+            compiled pipeline.
+    """
+    from deployer.pipeline_deployer import VertexPipelineDeployer
+
+    return VertexPipelineDeployer(
+        project_id=vertex_settings.PROJECT_ID,
+        region=vertex_settings.GCP_REGION,
+        staging_bucket_name=vertex_settings.VERTEX_STAGING_BUCKET_NAME,
+        service_account=vertex_settings.VERTEX_SERVICE_ACCOUNT,
+        pipeline_name=pipeline_name,
+        run_name=run_name,
+        pipeline_func=pipeline_func,
+        gar_location=vertex_settings.GAR_LOCATION,
+        gar_repo_id=vertex_settings.GAR_PIPELINES_REPO_ID,
+        local_package_path=local_package_path,
+        api_endpoint=vertex_settings.VERTEX_API_ENDPOINT,
+        gar_endpoint=vertex_settings.GAR_ENDPOINT,
+    )
+
+
+def get_environment_ledger(
+    vertex_settings: VertexPipelinesSettings, uri: Optional[str] = None
+) -> DeploymentLedger:
+    """Return the deployment ledger of the environment of `vertex_settings`.
+
+    Args:
+        vertex_settings (VertexPipelinesSettings): The settings of the environment.
+        uri (Optional[str], optional): The ledger path or Cloud Storage URI. Defaults to None,
+            for `.vertex-deployer-cache/ledger.json`.
+    """
+    return DeploymentLedger(
+        get_environment_key(vertex_settings),
+        uri or constants.DEPLOYMENT_LEDGER_FILEPATH,
+        project_id=vertex_settings.PROJECT_ID,
+    )
+
+
+def _upload_stage(
+    deployer: Any,
+    options: StageOptions,
+    pipeline_spec: str,
+    checkpoint: Checkpoint,
+    ledger: DeploymentLedger,
+    deployed: Dict[str, Any],
+    sources_digest: Optional[str],
+) -> str:
+    pipeline_name = deployer.pipeline_name
+    sorted_tags = sorted(options.tags or [])
+    uploaded = checkpoint.get_completed(pipeline_name, "upload", {"pipeline_spec": pipeline_spec})
+    outcome = "resumed"
+    if (
+        uploaded is None
+        and options.changed_only
+        and deployed.get("version_name") is not None
+        and deployed.get("pipeline_spec") == pipeline_spec
+        and deployed.get("tags") == sorted_tags
+    ):
+        uploaded = deployed
+        outcome = "unchanged"
+        if sources_digest is not None and sources_digest != deployed.get("sources"):
+            # e.g. a comment changed: the next deploy can skip the compilation
+            ledger.record(pipeline_name, sources=sources_digest)
+    if uploaded is not None:
+        logger.info(f"Pipeline {pipeline_name} already uploaded, skipping upload")
+        deployer.template_name = uploaded["template_name"]
+        deployer.version_name = uploaded["version_name"]
+        return outcome
+
+    with console.status("Uploading pipeline..."), stage("upload"):
+        deployer.upload_to_registry(tags=options.tags)
+    checkpoint.complete(
+        pipeline_name,
+        "upload",
+        {"pipeline_spec": pipeline_spec},
+        {"template_name": deployer.template_name, "version_name": deployer.version_name},
+    )
+    ledger.record(
+        pipeline_name,
+        sources=sources_digest,
+        pipeline_spec=pipeline_spec,
+        tags=sorted_tags,
+        template_name=deployer.template_name,
+        version_name=deployer.version_name,
+    )
+    return "uploaded"
+
+
+def _run_stage(
+    deployer: Any,
+    options: StageOptions,
+    stage_inputs: Dict[str, Any],
+    checkpoint: Checkpoint,
+    parameter_values: Optional[dict],
+    input_artifacts: Optional[dict],
+) -> str:
+    pipeline_name = deployer.pipeline_name
+    completed_run = checkpoint.get_completed(pipeline_name, "run", stage_inputs)
+    if completed_run is not None:
+        logger.info(f"Pipeline {pipeline_name} already run, skipping run")
+        return completed_run["run_name"]
+
+    with console.status("Running pipeline..."), stage("run"):
+        deployer.run(
+            enable_caching=options.enable_caching,
+            parameter_values=parameter_values,
+            experiment_name=options.experiment_name,
+            input_artifacts=input_artifacts,
+            tag=options.tags[0] if options.tags else None,
+        )
+    checkpoint.complete(pipeline_name, "run", stage_inputs, {"run_name": deployer.run_name})
+    return deployer.run_name
+
+
+def _schedule_stage(
+    deployer: Any,
+    options: StageOptions,
+    stage_inputs: Dict[str, Any],
+    checkpoint: Checkpoint,
+    ledger: DeploymentLedger,
+    deployed: Dict[str, Any],
+    parameter_values: Optional[dict],
+) -> str:
+    pipeline_name = deployer.pipeline_name
+    tag = options.tags[0] if options.tags else None
+    # ugly fix to allow cron expression as env variable
+    cron = options.cron.replace("_", " ")
+    schedule_definition = {
+        "cron": cron,
+        "scheduler_timezone": options.scheduler_timezone,
+        "enable_caching": options.enable_caching,
+        "tag": tag,
+        **stage_inputs,
+    }
+    if checkpoint.get_completed(pipeline_name, "schedule", stage_inputs) is not None:
+        logger.info(f"Pipeline {pipeline_name} already scheduled, skipping schedule")
+        return "resumed"
+    if options.changed_only and deployed.get("schedule") == schedule_definition:
+        logger.info(
+            f"Schedule of pipeline {pipeline_name} unchanged since last deploy, skipping schedule"
+        )
+        return "unchanged"
+
+    with console.status("Scheduling pipeline..."), stage("schedule"):
+        deployer.schedule(
+            cron=cron,
+            enable_caching=options.enable_caching,
+            parameter_values=parameter_values,
+            tag=tag,
+            delete_last_schedule=options.delete_last_schedule,
+            scheduler_timezone=options.scheduler_timezone,
+        )
+    checkpoint.complete(
+        pipeline_name,
+        "schedule",
+        stage_inputs,
+        {"schedule_name": deployer.schedule_resource_name},
+    )
+    ledger.record(
+        pipeline_name,
+        schedule=schedule_definition,
+        schedule_name=deployer.schedule_resource_name,
+    )
+    return "scheduled"
+
+
+def deploy_stages(
+    deployer: Any,
+    options: StageOptions,
+    stage_inputs: Dict[str, Any],
+    checkpoint: Checkpoint,
+    ledger: DeploymentLedger,
+    config_filepath: Optional[Path] = None,
+    sources_digest: Optional[str] = None,
+) -> StageOutcomes:
+    """Upload, run and schedule a compiled pipeline.
+
+    Args:
+        deployer (Any): The `VertexPipelineDeployer` of the pipeline, compiled or not.
+        options (StageOptions): The stages to execute and their options.
+        stage_inputs (Dict[str, Any]): The digest of the compiled pipeline, as `pipeline_spec`.
+        checkpoint (Checkpoint): The checkpoint of the invocation, updated after each stage.
+        ledger (DeploymentLedger): The ledger of the environment, saved before returning.
+        config_filepath (Optional[Path], optional): The config to run and schedule the pipeline
+            with. Defaults to None.
+        sources_digest (Optional[str], optional): The digest of the sources the pipeline was
+            compiled from, recorded in the ledger. Defaults to None.
+
+    Returns:
+        StageOutcomes: The outcome of each executed stage, e.g. `uploaded` or `unchanged`
+            for `upload`, and the run name for `run`.
+    """
+    # the ledger is only read to skip unchanged stages, and always updated
+    deployed = ledger.get(deployer.pipeline_name) if options.changed_only else {}
+    stage_inputs = dict(stage_inputs)
+    outcomes: StageOutcomes = {}
+
+    if options.run or options.schedule:
+        parameter_values, input_artifacts = load_config(config_filepath)
+        stage_inputs["config"] = file_digest(config_filepath)
+
+    try:
+        if options.upload:
+            outcomes["upload"] = _upload_stage(
+                deployer,
+                options,
+                stage_inputs["pipeline_spec"],
+                checkpoint,
+                ledger,
+                deployed,
+                sources_digest,
+            )
+        if options.run:
+            outcomes["run"] = _run_stage(
+                deployer, options, stage_inputs, checkpoint, parameter_values, input_artifacts
+            )
+        if options.schedule:
+            outcomes["schedule"] = _schedule_stage(
+                deployer, options, stage_inputs, checkpoint, ledger, deployed, parameter_values
+            )
+    finally:
+        ledger.save()
+
+    return outcomes
+
+
+class EnvironmentDeployment(CustomBaseModel):
+    """The compiled pipelines to deploy to each environment, and how."""
+
+    pipelines: Dict[str, Optional[CompiledPipeline]]
+    """The pipelines compiled in memory, None to use the local package."""
+    config_filepaths: Dict[str, Optional[Path]] = Field(default_factory=dict)
+    stage_inputs: Dict[str, Dict[str, Any]]
+    sources_digests: Dict[str, Optional[str]] = Field(default_factory=dict)
+    unchanged: List[str] = Field(default_factory=list)
+    """The pipelines not compiled, deployed from the version last uploaded to each environment."""
+    options: StageOptions
+    local_package_path: Path
+    checkpoint_options: Dict[str, Any] = Field(default_factory=dict)
+    resume: bool = False
+    ledger: Optional[str] = None
+
+
+def _init_worker(logging_config: Dict[str, Any]) -> None:
+    configure_logging(**logging_config)
+
+
+def deploy_to_environment(
+    env_file: Path, deployment: EnvironmentDeployment
+) -> Dict[str, StageOutcomes]:
+    """Deploy compiled pipelines to the environment of an env file.
+
+    A failed pipeline does not stop the deployment of the others. The checkpoint of the
+    environment is only cleared if all pipelines succeeded, to resume the failed ones.
+
+    Returns:
+        Dict[str, StageOutcomes]: The outcomes of each pipeline, with the error as `error` if
+            it failed.
+    """
+    try:
+        vertex_settings = load_vertex_settings(env_file=env_file)
+        checkpoint = Checkpoint(
+            get_checkpoint_filepath(
+                "deploy",
+                {
+                    **deployment.checkpoint_options,
+                    "target": vertex_settings.model_dump(mode="json"),
+                },
+            ),
+            resume=deployment.resume,
+        )
+        ledger = get_environment_ledger(vertex_settings, deployment.ledger)
+
+        results: Dict[str, StageOutcomes] = {}
+        for pipeline_name, compiled_pipeline in deployment.pipelines.items():
+            with stage("deploy", pipeline=pipeline_name, env_file=env_file.name):
+                deployer = build_deployer(
+                    vertex_settings,
+                    pipeline_name,
+                    deployment.local_package_path,
+                    run_name=deployment.options.run_name,
+                )
+                deployer.compiled_pipeline = compiled_pipeline
+                try:
+                    if pipeline_name in deployment.unchanged:
+                        # run and scheduled from its version in this environment's registry
+                        deployed = ledger.get(pipeline_name)
+                        deployer.template_name = deployed["template_name"]
+                        deployer.version_name = deployed["version_name"]
+                    results[pipeline_name] = deploy_stages(
+                        deployer,
+                        deployment.options,
+                        deployment.stage_inputs[pipeline_name],
+                        checkpoint,
+                        ledger,
+                        config_filepath=deployment.config_filepaths.get(pipeline_name),
+                        sources_digest=deployment.sources_digests.get(pipeline_name),
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to deploy pipeline {pipeline_name} from {env_file}: {e}")
+                    results[pipeline_name] = {"error": f"{type(e).__name__}: {e}"}
+    except Exception as e:
+        # e.g. invalid settings: every pipeline failed
+        logger.error(f"Failed to deploy pipelines from {env_file}: {e}")
+        return {p: {"error": f"{type(e).__name__}: {e}"} for p in deployment.pipelines}
+    finally:
+        # pool workers exit without running exit handlers, which write buffered logs
+        flush_logs()
+
+    if not any("error" in outcomes for outcomes in results.values()):
+        checkpoint.clear()
+    return results
+
+
+def deploy_to_environments(
+    env_files: List[Path], deployment: EnvironmentDeployment
+) -> Dict[str, Dict[str, StageOutcomes]]:
+    """Deploy compiled pipelines to several environments concurrently, one process each.
+
+    Returns:
+        Dict[str, Dict[str, StageOutcomes]]: The outcomes of each pipeline, by env file.
+    """
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=len(env_files),
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(get_logging_config(),),
+    ) as executor:
+        futures = {
+            env_file: executor.submit(deploy_to_environment, env_file, deployment)
+            for env_file in env_files
+        }
+        return {str(env_file): future.result() for env_file, future in futures.items()}
+
+
+class DeployOptions(CustomBaseModel):
+    """Options of `deploy` besides the stages: how pipelines are compiled and configured."""
+
+    compile: bool = True
+    local_package: bool = False
+    patches: Optional[PipelineSpecPatches] = None
+    config_filepath: Optional[Path] = None
+    config_name: Optional[str] = None
+    resume: bool = False
+    ledger: Optional[str] = None
+    skip_unchanged_sources: bool = False
+    """With `changed_only`, whether to not compile pipelines whose sources are unchanged."""
+    trace_memory: bool = False
+
+
+class PreparedPipeline(NamedTuple):
+    """A pipeline ready to be deployed with `deploy_stages`."""
+
+    deployer: Any
+    """The `VertexPipelineDeployer` of the pipeline."""
+    stage_inputs: Dict[str, Any]
+    """The digest of the compiled pipeline, as `pipeline_spec`."""
+    sources_digest: Optional[str]
+    """The digest of the pipeline sources, None if unknown."""
+    unchanged: bool
+    """Whether the pipeline is unchanged since it was last deployed, and was not compiled."""
+
+
+class DeploymentResults(NamedTuple):
+    """The results of `deploy_pipelines`."""
+
+    environments: Dict[str, Dict[str, StageOutcomes]]
+    """The outcomes of each pipeline by env file, with several environments only."""
+    memory_stages: List[Dict[str, Any]]
+    """The memory used by each stage of each pipeline, with `trace_memory`."""
+
+
+def _get_pipeline_sources_digest(
+    pipeline_name: str,
+    deployer_settings: DeployerSettings,
+    module_graph: Optional[ModuleGraph],
+    patches: Optional[PipelineSpecPatches],
+) -> Optional[str]:
+    if module_graph is None:
+        return None
+    sources_digest = get_sources_digest(
+        module_graph, deployer_settings.pipelines_root_path / f"{pipeline_name}.py"
+    )
+    if patches is not None and patches.get_pipeline_patches(pipeline_name):
+        # the pipeline is compiled again when its patches change
+        sources_digest = json_digest(
+            {"sources": sources_digest, "patches": patches.model_dump(mode="json")}
+        )
+    return sources_digest
+
+
+def _load_pipeline(
+    deployer: Any, local_package_path: Path, deploy_options: DeployOptions
+) -> Dict[str, Any]:
+    """Compile the pipeline of `deployer`, or load it from the local package.
+
+    Returns:
+        Dict[str, Any]: The digest of the compiled pipeline, as `pipeline_spec`.
+    """
+    pipeline_name = deployer.pipeline_name
+    patches = deploy_options.patches
+    if deploy_options.compile:
+        with console.status("Compiling pipeline..."), stage("compile"):
+            deployer.compile(save=deploy_options.local_package, patches=patches)
+        return {"pipeline_spec": bytes_digest(deployer.compiled_pipeline.content)}
+
+    local_filepath = local_package_path / f"{pipeline_name}.yaml"
+    if patches is not None and patches.get_pipeline_patches(pipeline_name):
+        with stage("patch"):
+            deployer.compiled_pipeline = patch_compiled_pipeline(
+                load_compiled_pipeline(local_filepath.read_bytes()), pipeline_name, patches
+            )
+        return {"pipeline_spec": bytes_digest(deployer.compiled_pipeline.content)}
+    return {"pipeline_spec": file_digest(local_filepath)}
+
+
+def prepare_pipeline(
+    pipeline_name: str,
+    vertex_settings: VertexPipelinesSettings,
+    deployer_settings: DeployerSettings,
+    options: StageOptions,
+    deploy_options: DeployOptions,
+    deployed: Dict[str, Any],
+    module_graph: Optional[ModuleGraph] = None,
+) -> PreparedPipeline:
+    """Compile a pipeline, or load it from the local package, to deploy it.
+
+    With `changed_only` and `skip_unchanged_sources`, a pipeline whose sources are unchanged
+    since it was last deployed is not compiled: it is run and scheduled from its last uploaded
+    version. Only the sources of the vertex folder are tracked (see `get_sources_digest`).
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        vertex_settings (VertexPipelinesSettings): The settings of the environment.
+        deployer_settings (DeployerSettings): The deployer settings.
+        options (StageOptions): The stages to execute and their options.
+        deploy_options (DeployOptions): How to compile the pipeline.
+        deployed (Dict[str, Any]): The ledger entry of the pipeline in the environment, empty
+            unless compilation may be skipped.
+        module_graph (Optional[ModuleGraph], optional): The graph of the vertex folder modules,
+            to compute the digest of the pipeline sources. Defaults to None, for unknown
+            sources: the pipeline is compiled.
+
+    Returns:
+        PreparedPipeline: The deployer of the pipeline and its stage inputs.
+    """
+    sources_digest = None
+    if deploy_options.compile:
+        sources_digest = _get_pipeline_sources_digest(
+            pipeline_name, deployer_settings, module_graph, deploy_options.patches
+        )
+    # unchanged pipelines are run and scheduled from their last uploaded version
+    skip_compile = (
+        options.changed_only
+        and deploy_options.skip_unchanged_sources
+        and deploy_options.compile
+        and not deploy_options.local_package
+        and sources_digest is not None
+        and deployed.get("sources") == sources_digest
+        and deployed.get("version_name") is not None
+        and (not options.upload or deployed.get("tags") == sorted(options.tags or []))
+    )
+
+    if skip_compile:
+        logger.info(f"Pipeline {pipeline_name} unchanged since last deploy, skipping compilation")
+        deployer = build_deployer(
+            vertex_settings,
+            pipeline_name,
+            deployer_settings.local_package_path,
+            run_name=options.run_name,
+        )
+        deployer.template_name = deployed["template_name"]
+        deployer.version_name = deployed["version_name"]
+        return PreparedPipeline(
+            deployer, {"pipeline_spec": deployed["pipeline_spec"]}, sources_digest, unchanged=True
+        )
+
+    with stage("import"):
+        pipeline_func = import_pipeline_from_dir(
+            deployer_settings.pipelines_root_path, pipeline_name
+        )
+    deployer = build_deployer(
+        vertex_settings,
+        pipeline_name,
+        deployer_settings.local_package_path,
+        run_name=options.run_name,
+        pipeline_func=pipeline_func,
+    )
+    stage_inputs = _load_pipeline(deployer, deployer_settings.local_package_path, deploy_options)
+    return PreparedPipeline(deployer, stage_inputs, sources_digest, unchanged=False)
+
+
+def _get_config_filepath(
+    pipeline_name: str,
+    deployer_settings: DeployerSettings,
+    options: StageOptions,
+    deploy_options: DeployOptions,
+) -> Optional[Path]:
+    if (options.run or options.schedule) and deploy_options.config_name is not None:
+        configs_root_path = Path(deployer_settings.configs_root_path)
+        return configs_root_path / pipeline_name / deploy_options.config_name
+    return deploy_options.config_filepath
+
+
+def _get_deployed(ledgers: List[DeploymentLedger], pipeline_name: str) -> Dict[str, Any]:
+    """Return what was last deployed of a pipeline, if the same in all environments."""
+    entries = [ledger.get(pipeline_name) for ledger in ledgers]
+    keys = ("sources", "pipeline_spec", "tags", "version_name")
+    if not entries or any(
+        [e.get(k) for k in keys] != [entries[0].get(k) for k in keys] for e in entries
+    ):
+        return {}
+    return entries[0]
+
+
+def deploy_pipelines(
+    pipeline_names: List[str],
+    env_files: List[Optional[Path]],
+    vertex_settings: VertexPipelinesSettings,
+    deployer_settings: DeployerSettings,
+    options: StageOptions,
+    deploy_options: DeployOptions,
+    checkpoint_options: Dict[str, Any],
+) -> DeploymentResults:
+    """Compile pipelines, then upload, run and schedule them in one or several environments.
+
+    With a single environment, pipelines are deployed one after the other, and the first
+    failure is raised. With several, they are compiled once, then deployed to all environments
+    concurrently with `deploy_to_environments`. With `changed_only`, pipelines are compiled,
+    and their uploads and schedules are skipped if the compiled pipeline is unchanged in the
+    environment. With `skip_unchanged_sources` too, a pipeline is not compiled if its sources
+    are unchanged in all environments.
+
+    Args:
+        pipeline_names (List[str]): The names of the pipelines to deploy.
+        env_files (List[Optional[Path]]): The env files of the environments, `[None]` for the
+            environment variables.
+        vertex_settings (VertexPipelinesSettings): The settings of the first environment.
+        deployer_settings (DeployerSettings): The deployer settings.
+        options (StageOptions): The stages to execute and their options.
+        deploy_options (DeployOptions): How to compile and configure the pipelines.
+        checkpoint_options (Dict[str, Any]): The options the checkpoint is named after: a
+            failed invocation is resumed by the same command with `resume`.
+
+    Returns:
+        DeploymentResults: The outcomes of each environment and the memory used by each stage.
+    """
+    fan_out = len(env_files) > 1
+    if not fan_out:  # each environment has its own checkpoint
+        checkpoint = Checkpoint(
+            get_checkpoint_filepath(
+                "deploy",
+                {**checkpoint_options, "target": vertex_settings.model_dump(mode="json")},
+            ),
+            resume=deploy_options.resume,
+        )
+        if checkpoint.has_previous and not deploy_options.resume:
+            logger.info(
+                "A previous deploy with the same options did not complete."
+                " Use --resume to skip its completed stages."
+            )
+
+        # every deploy records what it deployed in the ledger, so that the next one can skip
+        # unchanged uploads and schedules
+        ledger = get_environment_ledger(vertex_settings, deploy_options.ledger)
+
+    # the ledgers a pipeline must be unchanged in to not be compiled, if it may be skipped
+    ledgers: List[DeploymentLedger] = []
+    module_graph = None
+    if options.changed_only and deploy_options.skip_unchanged_sources and deploy_options.compile:
+        ledgers = (
+            [
+                get_environment_ledger(load_vertex_settings(env_file=f), deploy_options.ledger)
+                for f in env_files
+            ]
+            if fan_out
+            else [ledger]
+        )
+        try:
+            module_graph = ModuleGraph(deployer_settings.vertex_folder_path)
+        except ValueError:  # not relative to the working directory, sources are not tracked
+            pass
+
+    environment_deployment = EnvironmentDeployment(
+        pipelines={},
+        stage_inputs={},
+        options=options,
+        local_package_path=deployer_settings.local_package_path,
+        checkpoint_options=checkpoint_options,
+        resume=deploy_options.resume,
+        ledger=deploy_options.ledger,
+    )
+    memory_stages = []
+    for pipeline_name in pipeline_names:
+        memory_tracer = trace_memory() if deploy_options.trace_memory else nullcontext([])
+        with memory_tracer as memory, stage("deploy", pipeline=pipeline_name):
+            deployed = _get_deployed(ledgers, pipeline_name)
+            deployer, stage_inputs, sources_digest, unchanged = prepare_pipeline(
+                pipeline_name,
+                vertex_settings,
+                deployer_settings,
+                options,
+                deploy_options,
+                deployed,
+                module_graph,
+            )
+
+            config_filepath = _get_config_filepath(
+                pipeline_name, deployer_settings, options, deploy_options
+            )
+
+            if fan_out:
+                environment_deployment.pipelines[pipeline_name] = deployer.compiled_pipeline
+                environment_deployment.stage_inputs[pipeline_name] = stage_inputs
+                environment_deployment.config_filepaths[pipeline_name] = config_filepath
+                environment_deployment.sources_digests[pipeline_name] = sources_digest
+                if unchanged:
+                    environment_deployment.unchanged.append(pipeline_name)
+            else:
+                deploy_stages(
+                    deployer,
+                    options,
+                    stage_inputs,
+                    checkpoint,
+                    ledger,
+                    config_filepath=config_filepath,
+                    sources_digest=sources_digest,
+                )
+        memory_stages.extend(record._asdict() for record in memory)
+
+    if not fan_out:
+        checkpoint.clear()
+        return DeploymentResults(environments={}, memory_stages=memory_stages)
+
+    with console.status(f"Deploying to {len(env_files)} environments..."):
+        results = deploy_to_environments(env_files, environment_deployment)
+    return DeploymentResults(environments=results, memory_stages=memory_stages)
+
+
+def build_environments_table(
+    results: Dict[str, Dict[str, Dict[str, str]]], title: str = "Deployment results"
+) -> Table:
+    """Build a table of the outcomes of a deployment to several environments.
+
+    Args:
+        results (Dict[str, Dict[str, Dict[str, str]]]): The outcome of each stage of each
+            pipeline (e.g. `{"upload": "uploaded"}`, or `{"error": ...}`), by env file.
+        title (str, optional): The table title. Defaults to "Deployment results".
+
+    Returns:
+        Table: The table, with one row per pipeline and one column per environment.
+    """
+    table = Table(title=title, show_header=True, header_style="bold", show_lines=True)
+    table.add_column("Pipeline")
+    for env_file in results:
+        table.add_column(escape(Path(env_file).name))
+
+    pipeline_names = list(dict.fromkeys(p for outcomes in results.values() for p in outcomes))
+    for pipeline_name in pipeline_names:
+        cells = []
+        for outcomes in results.values():
+            stages = outcomes.get(pipeline_name, {})
+            if "error" in stages:
+                cells.append(f"[red]failed[/]\n{escape(stages['error'])}")
+            else:
+                cells.append(
+                    "\n".join(f"[green]{k}[/]: {escape(v)}" for k, v in stages.items())
+                    or "[dim]compiled[/]"
+                )
+        table.add_row(escape(pipeline_name), *cells)
+    return table
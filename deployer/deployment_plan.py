@@ -0,0 +1,539 @@
+"""Plan and apply the deployments described in a manifest.
+
+A deployment manifest lists pipelines, the tags to upload them with, and the runs and schedules
+to create with their configs. It is read from the `[tool.vertex_deployer.manifest]` section of
+`pyproject.toml`, or from a dedicated TOML, YAML or JSON file with the same fields.
+
+The manifest is turned into a graph of actions: each pipeline is compiled, then uploaded, then
+run or scheduled once per config. Actions are executed in dependency order by a thread pool,
+with a concurrency limit per action kind, e.g. to update one schedule at a time. Pipelines are
+imported and compiled one at a time: kfp builds pipeline graphs in a class-global context.
+
+Compilation is local and always executed, as it gives the digest of the pipeline spec. Other
+actions have a digest of their inputs: the pipeline spec, the config file, their options and the
+target project and repository. Uploads and schedules whose digest is the same as when they were
+last applied are skipped. Runs are always executed, unless their `skip_unchanged` flag is set:
+applying the same manifest twice runs the pipelines again, but does not upload or schedule them.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import toml
+import yaml
+from loguru import logger
+from pydantic import Field, ValidationError, model_validator
+from rich.markup import escape
+from rich.table import Table
+
+from deployer import constants
+from deployer.patching import PipelineSpecPatches
+from deployer.utils.config import VertexPipelinesSettings, load_config
+from deployer.utils.digest import bytes_digest, json_digest
+from deployer.utils.exceptions import BadConfigError, UnsupportedConfigFileError
+from deployer.utils.instrumentation import stage
+from deployer.utils.locking import directory_lock
+from deployer.utils.models import CustomBaseModel
+
+MANIFEST_SUFFIXES = (".toml", ".yaml", ".yml", ".json")
+
+
+class _ConfigSpec(CustomBaseModel):
+    config_name: Optional[str] = None
+    """Name of the config file in the pipeline config dir, e.g. `dev.yaml`."""
+    config_filepath: Optional[Path] = None
+    """Path to the config file, instead of `config_name`."""
+    enable_caching: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def _check_config(self) -> "_ConfigSpec":
+        if (self.config_name is None) == (self.config_filepath is None):
+            raise ValueError("Exactly one of config_name and config_filepath must be provided.")
+        return self
+
+    def get_config_filepath(self, configs_root_path: Path, pipeline_name: str) -> Path:
+        """Return the path of the config file."""
+        if self.config_filepath is not None:
+            return self.config_filepath
+        return Path(configs_root_path) / pipeline_name / self.config_name
+
+
+class RunSpec(_ConfigSpec):
+    """A run of a pipeline in a deployment manifest."""
+
+    experiment_name: Optional[str] = None
+    run_name: Optional[str] = None
+    skip_unchanged: bool = False
+    """Whether to skip the run if its inputs are unchanged since it was last applied."""
+
+
+class ScheduleSpec(_ConfigSpec):
+    """A schedule of a pipeline in a deployment manifest."""
+
+    cron: str
+    scheduler_timezone: str = constants.DEFAULT_SCHEDULER_TIMEZONE
+    delete_last_schedule: bool = False
+
+
+class PipelineDeploymentSpec(CustomBaseModel):
+    """The deployment of a pipeline in a deployment manifest."""
+
+    name: str
+    upload: bool = False
+    tags: Optional[List[str]] = constants.DEFAULT_TAGS
+    local_package: bool = False
+    runs: List[RunSpec] = Field(default_factory=list)
+    schedules: List[ScheduleSpec] = Field(default_factory=list)
+
+
+class ConcurrencyLimits(CustomBaseModel):
+    """Maximum number of actions of each kind executed at the same time."""
+
+    upload: int = Field(default=4, ge=1)
+    run: int = Field(default=4, ge=1)
+    schedule: int = Field(default=1, ge=1)
+
+
+class DeploymentManifest(CustomBaseModel):
+    """The pipelines to deploy, and how many actions to execute at the same time."""
+
+    concurrency: ConcurrencyLimits = ConcurrencyLimits()
+    pipelines: List[PipelineDeploymentSpec] = Field(default_factory=list)
+
+
+class ActionKind(str, Enum):  # noqa: D101
+    compile = "compile"
+    upload = "upload"
+    run = "run"
+    schedule = "schedule"
+
+
+class ActionStatus(str, Enum):  # noqa: D101
+    planned = "planned"
+    unchanged = "unchanged"
+    applied = "applied"
+    failed = "failed"
+    skipped = "skipped"
+
+
+_FAILED_STATUSES = (ActionStatus.failed, ActionStatus.skipped)
+
+ACTION_STATUS_STYLES = {
+    "planned": "bold",
+    "unchanged": "dim",
+    "applied": "green",
+    "failed": "red",
+    "skipped": "yellow",
+}
+
+
+class Action(CustomBaseModel):
+    """An action of a deployment plan."""
+
+    id: str
+    kind: ActionKind
+    pipeline_name: str
+    depends_on: List[str] = Field(default_factory=list)
+    config_filepath: Optional[Path] = None
+    spec: Optional[Any] = None
+    """The `RunSpec` or `ScheduleSpec` of run and schedule actions."""
+    digest: Optional[str] = None
+    """The digest of the action inputs, known once its pipeline is compiled."""
+    status: ActionStatus = ActionStatus.planned
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def load_manifest(manifest_filepath: Path) -> DeploymentManifest:
+    """Load a deployment manifest from a TOML, YAML or JSON file.
+
+    Raises:
+        UnsupportedConfigFileError: If the file extension is not supported.
+        BadConfigError: If the manifest is invalid.
+    """
+    manifest_filepath = Path(manifest_filepath)
+    if manifest_filepath.suffix == ".toml":
+        content = toml.load(manifest_filepath)
+    elif manifest_filepath.suffix in (".yaml", ".yml"):
+        with open(manifest_filepath, "r") as f:
+            content = yaml.safe_load(f) or {}
+    elif manifest_filepath.suffix == ".json":
+        with open(manifest_filepath, "r") as f:
+            content = json.load(f)
+    else:
+        raise UnsupportedConfigFileError(
+            f"{manifest_filepath}: Manifest file extension '{manifest_filepath.suffix}' is not"
+            f" supported. Supported manifest file extensions: {MANIFEST_SUFFIXES}"
+        )
+    try:
+        return DeploymentManifest.model_validate(content)
+    except ValidationError as e:
+        raise BadConfigError(f"Invalid deployment manifest {manifest_filepath}:\n{e}") from e
+
+
+def build_actions(manifest: DeploymentManifest, configs_root_path: Path) -> List[Action]:
+    """Build the actions of a manifest, in an order compatible with their dependencies.
+
+    Raises:
+        BadConfigError: If a run or schedule is declared twice for the same config.
+    """
+    actions: List[Action] = []
+    for deployment in manifest.pipelines:
+        name = deployment.name
+        parent = Action(id=f"compile:{name}", kind=ActionKind.compile, pipeline_name=name)
+        actions.append(parent)
+        if deployment.upload:
+            parent = Action(
+                id=f"upload:{name}",
+                kind=ActionKind.upload,
+                pipeline_name=name,
+                depends_on=[parent.id],
+            )
+            actions.append(parent)
+        for kind, specs in (
+            (ActionKind.run, deployment.runs),
+            (ActionKind.schedule, deployment.schedules),
+        ):
+            for spec in specs:
+                config_filepath = spec.get_config_filepath(configs_root_path, name)
+                actions.append(
+                    Action(
+                        id=f"{kind.value}:{name}:{config_filepath.name}",
+                        kind=kind,
+                        pipeline_name=name,
+                        depends_on=[parent.id],
+                        config_filepath=config_filepath,
+                        spec=spec,
+                    )
+                )
+
+    ids = [action.id for action in actions]
+    duplicates = sorted({i for i in ids if ids.count(i) > 1})
+    if duplicates:
+        raise BadConfigError(f"Actions declared more than once in the manifest: {duplicates}")
+    return actions
+
+
+class AppliedDigests:
+    """Digests of the last applied inputs of each action, stored in a JSON file.
+
+    The file is updated under a lock and merged with its current content, so that concurrent
+    applies in the same workspace keep each other's records.
+    """
+
+    def __init__(self, filepath: Path = constants.APPLIED_DIGESTS_FILEPATH) -> None:  # noqa: D107
+        self.filepath = Path(filepath)
+        self._data = self._read()
+        self._updates: Dict[str, Dict[str, str]] = {}
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, action_id: str) -> Optional[str]:
+        """Return the digest of the last applied inputs of an action, if any."""
+        entry = self._updates.get(action_id) or self._data.get(action_id)
+        return entry["digest"] if entry is not None else None
+
+    def set(self, action_id: str, digest: str) -> None:
+        """Record the digest of applied inputs of an action."""
+        self._updates[action_id] = {
+            "digest": digest,
+            "applied_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def save(self) -> None:
+        """Write the recorded digests, atomically."""
+        if not self._updates:
+            return
+        with directory_lock(self.filepath.parent):
+            self._data = {**self._read(), **self._updates}
+            tmp_filepath = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.tmp")
+            with open(tmp_filepath, "w") as f:
+                json.dump(self._data, f, indent=2, sort_keys=True)
+            os.replace(tmp_filepath, self.filepath)
+        self._updates = {}
+
+
+# `@dsl.pipeline` builds the graph of a pipeline in a class-global context, when its module is
+# imported: pipelines are imported and compiled one at a time, by all executors of the process
+_compile_lock = threading.Lock()
+
+
+class _Executor:
+    """Execute actions with per-kind concurrency limits, sharing a deployer per pipeline."""
+
+    def __init__(
+        self,
+        manifest: DeploymentManifest,
+        vertex_settings: VertexPipelinesSettings,
+        pipelines_root_path: Path,
+        local_package_path: Path,
+        applied_digests: AppliedDigests,
+        dry_run: bool,
+        force: bool,
+        patches: Optional[PipelineSpecPatches] = None,
+    ):
+        self.deployments = {d.name: d for d in manifest.pipelines}
+        self.vertex_settings = vertex_settings
+        self.pipelines_root_path = pipelines_root_path
+        self.local_package_path = local_package_path
+        self.applied_digests = applied_digests
+        self.dry_run = dry_run
+        self.force = force
+        self.patches = patches
+        self.semaphores = {
+            kind: threading.Semaphore(getattr(manifest.concurrency, kind.value))
+            for kind in ActionKind
+            if kind != ActionKind.compile
+        }
+        self.semaphores[ActionKind.compile] = _compile_lock
+        self.deployers: Dict[str, Any] = {}
+        self.spec_digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._experiment_locks: Dict[Tuple[str, Optional[str]], threading.Lock] = {}
+        self._experiments: Set[Tuple[str, Optional[str]]] = set()
+
+    def _target(self) -> Dict[str, Optional[str]]:
+        settings = self.vertex_settings
+        return {
+            "project_id": settings.PROJECT_ID,
+            "region": settings.GCP_REGION,
+            "repository": f"{settings.GAR_LOCATION}/{settings.GAR_PIPELINES_REPO_ID}",
+            "service_account": settings.VERTEX_SERVICE_ACCOUNT,
+            "staging_bucket": settings.VERTEX_STAGING_BUCKET_NAME,
+        }
+
+    def _digest(self, action: Action) -> str:
+        deployment = self.deployments[action.pipeline_name]
+        inputs = {
+            "action": action.id,
+            "pipeline_spec": self.spec_digests[action.pipeline_name],
+            "tags": deployment.tags,
+            "target": self._target(),
+        }
+        if action.config_filepath is not None:
+            inputs["config"] = bytes_digest(Path(action.config_filepath).read_bytes())
+            inputs["options"] = action.spec.model_dump(mode="json")
+        return json_digest(inputs)
+
+    def _compile(self, action: Action) -> None:
+        from deployer.pipeline_deployer import VertexPipelineDeployer
+        from deployer.utils.utils import import_pipeline_from_dir
+
+        deployment = self.deployments[action.pipeline_name]
+        with stage("import"):
+            pipeline_func = import_pipeline_from_dir(
+                self.pipelines_root_path, action.pipeline_name
+            )
+        settings = self.vertex_settings
+        deployer = VertexPipelineDeployer(
+            project_id=settings.PROJECT_ID,
+            region=settings.GCP_REGION,
+            staging_bucket_name=settings.VERTEX_STAGING_BUCKET_NAME,
+            service_account=settings.VERTEX_SERVICE_ACCOUNT,
+            pipeline_name=action.pipeline_name,
+            pipeline_func=pipeline_func,
+            gar_location=settings.GAR_LOCATION,
+            gar_repo_id=settings.GAR_PIPELINES_REPO_ID,
+            local_package_path=self.local_package_path,
+            api_endpoint=settings.VERTEX_API_ENDPOINT,
+            gar_endpoint=settings.GAR_ENDPOINT,
+        )
+        deployer.compile(save=deployment.local_package and not self.dry_run, patches=self.patches)
+        self.deployers[action.pipeline_name] = deployer
+        self.spec_digests[action.pipeline_name] = bytes_digest(deployer.compiled_pipeline.content)
+        action.digest = self.spec_digests[action.pipeline_name]
+
+    def _apply(self, action: Action) -> None:
+        deployment = self.deployments[action.pipeline_name]
+        tag = deployment.tags[0] if deployment.tags else None
+        if action.kind == ActionKind.upload:
+            self.deployers[action.pipeline_name].upload_to_registry(tags=deployment.tags)
+            return
+
+        # runs and schedules set the run name of their deployer: each gets its own copy
+        deployer = copy.copy(self.deployers[action.pipeline_name])
+        spec = action.spec
+        parameter_values, input_artifacts = load_config(action.config_filepath)
+        if action.kind == ActionKind.run:
+            # runs of a pipeline are submitted at the same time: their names include the config
+            deployer.run_name = spec.run_name or "-".join(
+                p for p in (action.pipeline_name, tag, action.config_filepath.stem) if p
+            )
+            # the first run of an experiment creates it: other runs wait to not create it twice
+            experiment_key = (action.pipeline_name, spec.experiment_name)
+            with self._lock:
+                experiment_lock = self._experiment_locks.setdefault(
+                    experiment_key, threading.Lock()
+                )
+            if experiment_key in self._experiments:
+                experiment_lock = nullcontext()
+            with experiment_lock:
+                deployer.run(
+                    enable_caching=spec.enable_caching,
+                    parameter_values=parameter_values,
+                    experiment_name=spec.experiment_name,
+                    input_artifacts=input_artifacts,
+                    tag=tag,
+                )
+                self._experiments.add(experiment_key)
+        else:
+            deployer.schedule(
+                cron=spec.cron,
+                enable_caching=spec.enable_caching,
+                parameter_values=parameter_values,
+                tag=tag,
+                delete_last_schedule=spec.delete_last_schedule,
+                scheduler_timezone=spec.scheduler_timezone,
+            )
+
+    def execute(self, action: Action) -> Action:
+        with self.semaphores[action.kind], stage(action.kind.value, pipeline=action.pipeline_name):
+            start = time.perf_counter()
+            try:
+                if action.kind == ActionKind.compile:
+                    self._compile(action)
+                    action.status = ActionStatus.planned if self.dry_run else ActionStatus.applied
+                else:
+                    action.digest = self._digest(action)
+                    if (
+                        not self.force
+                        and (action.kind != ActionKind.run or action.spec.skip_unchanged)
+                        and self.applied_digests.get(action.id) == action.digest
+                    ):
+                        action.status = ActionStatus.unchanged
+                    elif self.dry_run:
+                        action.status = ActionStatus.planned
+                    else:
+                        self._apply(action)
+                        self.applied_digests.set(action.id, action.digest)
+                        action.status = ActionStatus.applied
+            except Exception as e:
+                logger.opt(exception=e).debug(f"Action {action.id} failed")
+                action.status = ActionStatus.failed
+                action.error = f"{type(e).__name__}: {e}"
+            action.elapsed = time.perf_counter() - start
+        return action
+
+
+def apply_actions(
+    actions: List[Action],
+    manifest: DeploymentManifest,
+    vertex_settings: VertexPipelinesSettings,
+    pipelines_root_path: Path,
+    local_package_path: Path,
+    applied_digests: Optional[AppliedDigests] = None,
+    dry_run: bool = False,
+    force: bool = False,
+    on_action_end: Optional[Callable[[Action], None]] = None,
+    patches: Optional[PipelineSpecPatches] = None,
+) -> List[Action]:
+    """Execute actions in dependency order, skipping actions whose inputs are unchanged.
+
+    Actions whose dependencies failed or were skipped are skipped. The digests of applied
+    actions are saved at the end, even if some actions failed.
+
+    Args:
+        actions (List[Action]): The actions, e.g. from `build_actions`.
+        manifest (DeploymentManifest): The manifest the actions were built from.
+        vertex_settings (VertexPipelinesSettings): The project and repository to deploy to.
+        pipelines_root_path (Path): The directory of pipelines modules.
+        local_package_path (Path): The directory to save compiled pipelines to.
+        applied_digests (Optional[AppliedDigests], optional): The digests of previously applied
+            actions. Defaults to the digests stored in the cache directory.
+        dry_run (bool, optional): Whether to only compile pipelines in memory and compute the
+            status of other actions, without side effects. Defaults to False.
+        force (bool, optional): Whether to apply actions whose inputs are unchanged.
+            Defaults to False.
+        on_action_end (Optional[Callable[[Action], None]], optional): Called in the calling
+            thread when an action ends. Defaults to None.
+        patches (Optional[PipelineSpecPatches], optional): Patches applied to the compiled
+            pipelines, see `deployer.patching`. Defaults to None.
+
+    Returns:
+        List[Action]: The actions, with their status, digest, error and elapsed time.
+    """
+    applied_digests = applied_digests if applied_digests is not None else AppliedDigests()
+    executor = _Executor(
+        manifest,
+        vertex_settings,
+        pipelines_root_path,
+        local_package_path,
+        applied_digests,
+        dry_run=dry_run,
+        force=force,
+        patches=patches,
+    )
+    by_id = {action.id: action for action in actions}
+    waiting = list(actions)
+    running: Dict[Future, Action] = {}
+    finished = set()
+    # compile actions are run one at a time, by a single worker
+    max_workers = 1 + sum(manifest.concurrency.model_dump().values())
+
+    def _end(action: Action) -> None:
+        finished.add(action.id)
+        if on_action_end is not None:
+            on_action_end(action)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="apply") as pool:
+            while waiting or running:
+                for action in list(waiting):
+                    if not finished.issuperset(action.depends_on):
+                        continue
+                    waiting.remove(action)
+                    if any(by_id[i].status in _FAILED_STATUSES for i in action.depends_on):
+                        action.status = ActionStatus.skipped
+                        action.error = "A dependency failed"
+                        _end(action)
+                    else:
+                        running[pool.submit(executor.execute, action)] = action
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _end(running.pop(future))
+    finally:
+        if not dry_run:
+            applied_digests.save()
+    return actions
+
+
+def build_actions_table(actions: Iterable[Action], title: str = "Deployment plan") -> Table:
+    """Build a table of the actions of a deployment plan, with their status.
+
+    Args:
+        actions (Iterable[Action]): The actions of the plan.
+        title (str, optional): The table title. Defaults to "Deployment plan".
+
+    Returns:
+        Table: The table, with one row per action in dependency order.
+    """
+    table = Table(title=title, show_header=True, header_style="bold")
+    for column in ["Action", "Depends on", "Status", "Digest", "Time"]:
+        table.add_column(column, justify="right" if column == "Time" else "left")
+    for action in actions:
+        status = action.status.value
+        table.add_row(
+            escape(action.id),
+            escape(", ".join(action.depends_on)),
+            f"[{ACTION_STATUS_STYLES[status]}]{status}[/]"
+            + (f"\n{escape(action.error)}" if action.error else ""),
+            action.digest.split(":")[-1][:12] if action.digest else "-",
+            f"{action.elapsed:.2f}s" if action.elapsed else "-",
+        )
+    return table
@@ -0,0 +1,646 @@
+"""Local stand-in for the Artifact Registry and Vertex AI APIs used by the deployer.
+
+The fake server keeps everything in memory, and answers:
+
+- the KFP Artifact Registry endpoints used by `kfp.registry.RegistryClient` (upload, download,
+  packages, versions and tags), under `/{project_id}/{repo_id}`;
+- the Vertex AI REST endpoints used by `PipelineJob.submit` and `PipelineJobSchedule`
+  (`pipelineJobs`, `schedules` and the metadata stores and contexts of experiments), under `/v1`;
+- the Cloud Storage endpoints used to check the staging bucket, and to read and write objects
+  (e.g. the deployment ledger), under `/storage/v1`, `/upload/storage/v1` and
+  `/download/storage/v1`.
+
+Point the deployer to it with the `VERTEX_API_ENDPOINT`, `GAR_ENDPOINT` and
+`STORAGE_EMULATOR_HOST` environment variables (see `FakeGCPServer.environ`). Requests can be
+slowed down with a latency, and fail randomly or on demand, to test and benchmark deployments
+offline.
+
+Usage:
+    python -m deployer.fake_gcp --port 8080 --latency 0.1 --error-rate 0.05
+
+Only the standard library is used.
+"""
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+_VERTEX_INITIAL_STATES = {
+    "pipelineJobs": "PIPELINE_STATE_PENDING",
+    "schedules": "ACTIVE",
+}
+_HTTP_STATUSES = {
+    400: "INVALID_ARGUMENT",
+    403: "PERMISSION_DENIED",
+    404: "NOT_FOUND",
+    409: "ALREADY_EXISTS",
+    412: "FAILED_PRECONDITION",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+_FILTER_PATTERN = re.compile(r'(\w+)\s*=\s*"([^"]*)"')
+
+
+class FakeGCPError(Exception):
+    """An error answered by the fake server, with its HTTP status."""
+
+    def __init__(self, status: int, message: str):  # noqa: D107
+        super().__init__(message)
+        self.status = status
+
+
+class RecordedRequest(NamedTuple):
+    """A request received by the fake server."""
+
+    method: str
+    path: str
+    status: int
+
+
+class _ErrorInjection(NamedTuple):
+    count: int
+    status: int
+    method: Optional[str]
+    path_pattern: Optional["re.Pattern[str]"]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _to_camel_case(name: str) -> str:
+    head, *tail = name.split("_")
+    return head + "".join(word.title() for word in tail)
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Dict[str, bytes]:
+    """Return the fields of a `multipart/form-data` body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+        for part in message.iter_parts()
+    }
+
+
+def _parse_pipeline_name(content: bytes) -> str:
+    """Return the pipeline name of a compiled pipeline, without parsing the whole YAML."""
+    match = re.search(
+        rb"^pipelineInfo:\n(?:  .*\n)*?  name: ['\"]?([\w-]+)", content, re.MULTILINE
+    )
+    if match is None:
+        raise FakeGCPError(400, "The uploaded file is not a compiled pipeline")
+    return match.group(1).decode()
+
+
+class FakeGCPState:
+    """In-memory state of the fake Artifact Registry and Vertex AI APIs."""
+
+    def __init__(self, location: str = "europe-west1"):  # noqa: D107
+        self.location = location
+        self.lock = threading.Lock()
+        # (project_id, repo_id, package) -> {"versions": {version: ...}, "tags": {tag: version}}
+        self.packages: Dict[Tuple[str, str, str], Dict[str, Dict[str, Any]]] = {}
+        # Vertex AI resources by name, e.g. "projects/p/locations/l/pipelineJobs/job-id"
+        self.resources: Dict[str, Dict[str, Any]] = {}
+        # (bucket, object name) -> {"content": ..., "generation": ..., "updated": ...}
+        self.objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    def _package_name(self, project_id: str, repo_id: str, package: str) -> str:
+        return (
+            f"projects/{project_id}/locations/{self.location}/repositories/{repo_id}"
+            f"/packages/{package}"
+        )
+
+    def _get_package(self, project_id: str, repo_id: str, package: str) -> Dict[str, Any]:
+        try:
+            return self.packages[(project_id, repo_id, package)]
+        except KeyError:
+            raise FakeGCPError(404, f"Package {package} not found") from None
+
+    def upload(self, project_id: str, repo_id: str, content: bytes, tags: List[str]) -> str:
+        """Store a compiled pipeline and return its `{package}/{version}` reference."""
+        package = _parse_pipeline_name(content)
+        version = f"sha256:{hashlib.sha256(content).hexdigest()}"
+        entry = self.packages.setdefault(
+            (project_id, repo_id, package), {"versions": {}, "tags": {}}
+        )
+        entry["versions"][version] = {"content": content, "createTime": _now()}
+        for tag in tags:
+            entry["tags"][tag] = version
+        return f"{package}/{version}"
+
+    def download(self, project_id: str, repo_id: str, package: str, version_or_tag: str) -> bytes:
+        """Return the content of a pipeline version, by version or tag."""
+        entry = self._get_package(project_id, repo_id, package)
+        version = entry["tags"].get(version_or_tag, version_or_tag)
+        if version not in entry["versions"]:
+            raise FakeGCPError(404, f"Version {version_or_tag} of {package} not found")
+        return entry["versions"][version]["content"]
+
+    def _version(self, project_id: str, repo_id: str, package: str, version: str) -> dict:
+        entry = self._get_package(project_id, repo_id, package)
+        if version not in entry["versions"]:
+            raise FakeGCPError(404, f"Version {version} of {package} not found")
+        return {
+            "name": f"{self._package_name(project_id, repo_id, package)}/versions/{version}",
+            "createTime": entry["versions"][version]["createTime"],
+            "relatedTags": [
+                self._tag(project_id, repo_id, package, tag)
+                for tag, tag_version in entry["tags"].items()
+                if tag_version == version
+            ],
+        }
+
+    def _tag(self, project_id: str, repo_id: str, package: str, tag: str) -> dict:
+        entry = self._get_package(project_id, repo_id, package)
+        if tag not in entry["tags"]:
+            raise FakeGCPError(404, f"Tag {tag} of {package} not found")
+        package_name = self._package_name(project_id, repo_id, package)
+        return {
+            "name": f"{package_name}/tags/{tag}",
+            "version": f"{package_name}/versions/{entry['tags'][tag]}",
+        }
+
+    def handle_registry(  # noqa: C901
+        self,
+        method: str,
+        path: List[str],
+        query: Dict[str, str],
+        body: bytes,
+        content_type: str,
+    ) -> Tuple[int, Any]:
+        """Answer a request to the KFP Artifact Registry API, at `/{project_id}/{repo_id}`."""
+        project_id, repo_id, *path = path
+        if not path and method == "POST":
+            fields = _parse_multipart(content_type, body)
+            if "content" not in fields:
+                raise FakeGCPError(400, "Missing file content")
+            tags = [t for t in fields.get("tags", b"").decode().split(",") if t]
+            return 200, self.upload(project_id, repo_id, fields["content"], tags)
+
+        if path and path[0] != "packages":
+            if len(path) != 2 or method != "GET":
+                raise FakeGCPError(404, "Not found")
+            return 200, self.download(project_id, repo_id, *path)
+
+        if len(path) == 1 and method == "GET":
+            return 200, {
+                "packages": [
+                    {"name": self._package_name(*key)}
+                    for key in self.packages
+                    if key[:2] == (project_id, repo_id)
+                ]
+            }
+
+        package, *path = path[1:]
+        entry = self._get_package(project_id, repo_id, package)
+        if not path:
+            if method == "DELETE":
+                del self.packages[(project_id, repo_id, package)]
+                return 200, {"done": True}
+            return 200, {"name": self._package_name(project_id, repo_id, package)}
+
+        collection, *resource_id = path
+        if collection == "versions":
+            if not resource_id:
+                return 200, {
+                    "versions": [
+                        self._version(project_id, repo_id, package, v) for v in entry["versions"]
+                    ]
+                }
+            version = self._version(project_id, repo_id, package, resource_id[0])
+            if method == "DELETE":
+                del entry["versions"][resource_id[0]]
+                entry["tags"] = {t: v for t, v in entry["tags"].items() if v != resource_id[0]}
+                return 200, {"done": True}
+            return 200, version
+
+        if collection != "tags":
+            raise FakeGCPError(404, "Not found")
+        if not resource_id:
+            if method == "POST":
+                tag = query.get("tagId", "")
+                version = json.loads(body)["version"].split("/")[-1]
+                self._version(project_id, repo_id, package, version)
+                entry["tags"][tag] = version
+                return 200, self._tag(project_id, repo_id, package, tag)
+            return 200, {
+                "tags": [self._tag(project_id, repo_id, package, t) for t in entry["tags"]]
+            }
+        tag = self._tag(project_id, repo_id, package, resource_id[0])
+        if method == "DELETE":
+            del entry["tags"][resource_id[0]]
+            return 200, {}
+        if method == "PATCH":
+            version = json.loads(body)["version"].split("/")[-1]
+            self._version(project_id, repo_id, package, version)
+            entry["tags"][resource_id[0]] = version
+            return 200, self._tag(project_id, repo_id, package, resource_id[0])
+        return 200, tag
+
+    def _operation(self, name: str, response_type: str, response: dict) -> dict:
+        return {
+            "name": f"{name}/operations/{next(self._ids)}",
+            "done": True,
+            "response": {
+                "@type": f"type.googleapis.com/{response_type}",
+                **response,
+            },
+        }
+
+    def _list(self, parent: str, collection: str, query: Dict[str, str]) -> dict:
+        prefix = f"{parent}/{collection}/"
+        resources = [
+            r
+            for name, r in self.resources.items()
+            if name.startswith(prefix) and "/" not in name[len(prefix) :]
+        ]
+        for key, value in _FILTER_PATTERN.findall(query.get("filter", "")):
+            resources = [r for r in resources if r.get(_to_camel_case(key)) == value]
+        if query.get("orderBy"):
+            key, *direction = query["orderBy"].split()
+            resources.sort(
+                key=lambda r: r.get(_to_camel_case(key), ""), reverse=direction == ["desc"]
+            )
+        return {collection: resources}
+
+    def handle_vertex(  # noqa: C901
+        self, method: str, path: List[str], query: Dict[str, str], body: bytes
+    ) -> Tuple[int, Any]:
+        """Answer a request to the Vertex AI API, at `/v1`."""
+        name = "/".join(path)
+        name, _, custom_method = name.partition(":")
+        path = name.split("/")
+        if len(path) < 4 or path[0] != "projects" or path[2] != "locations":
+            raise FakeGCPError(404, "Not found")
+
+        if custom_method:
+            if name not in self.resources:
+                raise FakeGCPError(404, f"{name} not found")
+            return 200, {}
+
+        if len(path) % 2 == 1:  # a collection
+            parent, collection = "/".join(path[:-1]), path[-1]
+            if method == "GET":
+                return 200, self._list(parent, collection, query)
+            if method != "POST":
+                raise FakeGCPError(400, f"Unsupported method {method} on {name}")
+            resource_id = next(
+                (v for k, v in query.items() if k.endswith("Id")), str(next(self._ids))
+            )
+            resource_name = f"{name}/{resource_id}"
+            if resource_name in self.resources:
+                raise FakeGCPError(409, f"{resource_name} already exists")
+            resource = {
+                **json.loads(body or b"{}"),
+                "name": resource_name,
+                "createTime": _now(),
+                "updateTime": _now(),
+            }
+            if collection in _VERTEX_INITIAL_STATES:
+                resource["state"] = _VERTEX_INITIAL_STATES[collection]
+            if collection == "pipelineJobs":
+                # the SDK waits for the run context to associate the job to its experiment
+                context_name = f"{parent}/metadataStores/default/contexts/{resource_id}"
+                self.resources[context_name] = {
+                    "name": context_name,
+                    "displayName": resource_id,
+                    "schemaTitle": "system.PipelineRun",
+                    "createTime": _now(),
+                }
+                resource["jobDetail"] = {"pipelineRunContext": self.resources[context_name]}
+            self.resources[resource_name] = resource
+            if collection == "metadataStores":
+                message_type = "google.cloud.aiplatform.v1.MetadataStore"
+                return 200, self._operation(resource_name, message_type, resource)
+            return 200, resource
+
+        if name not in self.resources:
+            raise FakeGCPError(404, f"{name} not found")
+        if method == "DELETE":
+            del self.resources[name]
+            return 200, self._operation(name, "google.protobuf.Empty", {})
+        if method == "PATCH":
+            self.resources[name].update({**json.loads(body or b"{}"), "updateTime": _now()})
+        return 200, self.resources[name]
+
+    def handle_storage(
+        self,
+        method: str,
+        path: List[str],
+        query: Dict[str, str],
+        body: bytes,
+        content_type: str = "",
+    ) -> Tuple[int, Any]:
+        """Answer a request to the Cloud Storage API, at `/storage/v1` and its upload variants.
+
+        Buckets are not stored: the SDK creates the staging bucket before each submission, which
+        skips checking the project owning it with the Resource Manager API. Objects are stored,
+        with generations to support `ifGenerationMatch` preconditions.
+        """
+        if path[:1] != ["b"]:
+            raise FakeGCPError(404, "Not found")
+        if len(path) == 1 and method == "POST":
+            return 200, json.loads(body or b"{}")
+        if len(path) == 3 and path[2] == "iam":
+            return 200, {"bindings": [], **json.loads(body or b"{}")}
+        if len(path) == 3 and path[2] == "o" and method == "POST":
+            return self._upload_object(path[1], query, body, content_type)
+        if len(path) == 4 and path[2] == "o":
+            return self._get_object(method, path[1], unquote(path[3]), query)
+        raise FakeGCPError(404, f"Bucket {path[1:2]} not found")
+
+    def _check_generation(self, key: Tuple[str, str], query: Dict[str, str]) -> None:
+        if "ifGenerationMatch" not in query:
+            return
+        generation = self.objects[key]["generation"] if key in self.objects else 0
+        if int(query["ifGenerationMatch"]) != generation:
+            raise FakeGCPError(412, f"Precondition failed for object {key[1]}")
+
+    def _object_metadata(self, bucket: str, name: str) -> Dict[str, Any]:
+        entry = self.objects[(bucket, name)]
+        return {
+            "kind": "storage#object",
+            "bucket": bucket,
+            "name": name,
+            "generation": str(entry["generation"]),
+            "metageneration": "1",
+            "size": str(len(entry["content"])),
+            "updated": entry["updated"],
+        }
+
+    def _upload_object(
+        self, bucket: str, query: Dict[str, str], body: bytes, content_type: str
+    ) -> Tuple[int, Any]:
+        if query.get("uploadType") == "multipart":
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body
+            )
+            metadata_part, media_part = list(message.iter_parts())[:2]
+            name = json.loads(metadata_part.get_payload(decode=True))["name"]
+            content = media_part.get_payload(decode=True)
+        elif query.get("uploadType") == "media":
+            name, content = query["name"], body
+        else:
+            raise FakeGCPError(400, f"Unsupported upload type {query.get('uploadType')}")
+
+        key = (bucket, name)
+        self._check_generation(key, query)
+        generation = self.objects[key]["generation"] + 1 if key in self.objects else 1
+        self.objects[key] = {"content": content, "generation": generation, "updated": _now()}
+        return 200, self._object_metadata(bucket, name)
+
+    def _get_object(
+        self, method: str, bucket: str, name: str, query: Dict[str, str]
+    ) -> Tuple[int, Any]:
+        key = (bucket, name)
+        if key not in self.objects:
+            raise FakeGCPError(404, f"Object {name} not found in bucket {bucket}")
+        self._check_generation(key, query)
+        if method == "DELETE":
+            del self.objects[key]
+            return 204, b""
+        if query.get("alt") == "media":
+            return 200, self.objects[key]["content"]
+        return 200, self._object_metadata(bucket, name)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: "_HTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self) -> None:
+        fake = self.server.fake
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        path = [p for p in url.path.split("/") if p]
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if fake.latency:
+            time.sleep(fake.latency)
+        try:
+            fake._maybe_fail(self.command, url.path)
+            with fake.state.lock:
+                if path[:1] == ["v1"]:
+                    status, response = fake.state.handle_vertex(
+                        self.command, path[1:], query, body
+                    )
+                elif path[:2] == ["storage", "v1"]:
+                    status, response = fake.state.handle_storage(
+                        self.command, path[2:], query, body
+                    )
+                elif path[:1] in (["upload"], ["download"]) and path[1:3] == ["storage", "v1"]:
+                    status, response = fake.state.handle_storage(
+                        self.command, path[3:], query, body, self.headers.get("Content-Type", "")
+                    )
+                elif len(path) >= 2:
+                    status, response = fake.state.handle_registry(
+                        self.command, path, query, body, self.headers.get("Content-Type", "")
+                    )
+                else:
+                    raise FakeGCPError(404, "Not found")
+        except FakeGCPError as e:
+            status = e.status
+            response = {
+                "error": {
+                    "code": e.status,
+                    "message": str(e),
+                    "status": _HTTP_STATUSES.get(e.status, "UNKNOWN"),
+                }
+            }
+        except (ValueError, KeyError) as e:
+            status = 400
+            response = {"error": {"code": 400, "message": str(e), "status": "INVALID_ARGUMENT"}}
+
+        fake._record(RecordedRequest(self.command, url.path, status))
+        if isinstance(response, bytes):
+            content, content_type = response, "application/octet-stream"
+        elif isinstance(response, str):
+            content, content_type = response.encode(), "text/plain"
+        else:
+            content, content_type = json.dumps(response).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle  # noqa: N815
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], fake: "FakeGCPServer"):
+        super().__init__(address, _RequestHandler)
+        self.fake = fake
+
+
+class FakeGCPServer:
+    """HTTP server faking the Artifact Registry, Vertex AI and Cloud Storage APIs.
+
+    Use it as a context manager, to serve in a background thread:
+
+        with FakeGCPServer(latency=0.05) as server:
+            os.environ.update(server.environ())
+            ...
+
+    Args:
+        host (str, optional): The host to listen on. Defaults to "127.0.0.1".
+        port (int, optional): The port to listen on. Defaults to 0, for a free port.
+        latency (float, optional): Delay added to each request, in seconds. Defaults to 0.
+        error_rate (float, optional): Probability for each request to fail with
+            `error_status`. Defaults to 0.
+        error_status (int, optional): HTTP status of random errors. Defaults to 503.
+        seed (Optional[int], optional): Seed of random errors. Defaults to None.
+        location (str, optional): Location of Artifact Registry resources.
+            Defaults to "europe-west1".
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+        location: str = "europe-west1",
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.state = FakeGCPState(location=location)
+        self.requests: List[RecordedRequest] = []
+        self._random = random.Random(seed)  # noqa: S311
+        self._injections: List[_ErrorInjection] = []
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:  # noqa: D102
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environ(self) -> Dict[str, str]:
+        """Return the environment variables pointing the deployer to this server."""
+        return {
+            "VERTEX_API_ENDPOINT": self.url,
+            "GAR_ENDPOINT": self.url,
+            "STORAGE_EMULATOR_HOST": self.url,
+        }
+
+    def inject_errors(
+        self,
+        count: int = 1,
+        status: int = 503,
+        method: Optional[str] = None,
+        path_pattern: Optional[str] = None,
+    ) -> None:
+        """Make the next requests fail.
+
+        Args:
+            count (int, optional): Number of requests to fail. Defaults to 1.
+            status (int, optional): HTTP status of the errors. Defaults to 503.
+            method (Optional[str], optional): Only fail requests with this HTTP method.
+                Defaults to None.
+            path_pattern (Optional[str], optional): Only fail requests whose path matches this
+                regular expression, e.g. "/pipelineJobs". Defaults to None.
+        """
+        pattern = re.compile(path_pattern) if path_pattern is not None else None
+        with self._lock:
+            self._injections.append(_ErrorInjection(count, status, method, pattern))
+
+    def _maybe_fail(self, method: str, path: str) -> None:
+        with self._lock:
+            for i, injection in enumerate(self._injections):
+                if injection.method not in (None, method):
+                    continue
+                if injection.path_pattern is not None and not injection.path_pattern.search(path):
+                    continue
+                if injection.count > 1:
+                    self._injections[i] = injection._replace(count=injection.count - 1)
+                else:
+                    del self._injections[i]
+                raise FakeGCPError(injection.status, "Injected error")
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise FakeGCPError(self.error_status, "Injected random error")
+
+    def _record(self, request: RecordedRequest) -> None:
+        with self._lock:
+            self.requests.append(request)
+
+    def start(self) -> "FakeGCPServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeGCPServer":  # noqa: D105
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:  # noqa: D105
+        self.stop()
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--location", default="europe-west1")
+    args = parser.parse_args()
+
+    server = FakeGCPServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        location=args.location,
+    )
+    print(f"Serving fake Artifact Registry and Vertex AI APIs at {server.url}")
+    print("Point the deployer to it with:")
+    for key, value in server.environ().items():
+        print(f"  export {key}={value}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Patch compiled pipeline specs: container images, resources and retry policies.
+
+Patches are read from the `[tool.vertex_deployer.patches]` section of `pyproject.toml`, or from a
+dedicated TOML, YAML or JSON file with the same fields, e.g. one per environment:
+
+```toml
+[images]  # for all pipelines, by image with or without tag
+"europe-docker.pkg.dev/my-project/images/base" = "europe-docker.pkg.dev/my-project/images/base:1.2"
+
+[tasks."train-*"]  # for all pipelines, by task name pattern
+cpu_limit = "8"
+memory_limit = "32G"
+retry = { max_retry_count = 2, backoff_duration = "60s" }
+
+[pipelines.dummy_pipeline.tasks.dummy-component]  # for a pipeline
+image = "python:3.10-slim-bookworm"
+```
+
+Patches are applied to the compiled pipeline spec, without importing nor compiling the pipeline
+again: images first, then task patches, pipeline patches after patches for all pipelines. The
+patched spec is validated against the pipeline spec schema, then serialized as kfp would, with
+the header comments and platform spec of the compiled pipeline.
+
+Resources are the CPU and memory requests and limits, from which Vertex AI picks a machine type.
+Accelerators are not patched. Tasks sharing a container executor get their own copy of it when
+they are patched differently.
+"""
+
+import copy
+import fnmatch
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import toml
+import yaml
+from loguru import logger
+from pydantic import Field, ValidationError, field_validator
+
+from deployer.utils.exceptions import BadConfigError, UnsupportedConfigFileError
+from deployer.utils.models import CustomBaseModel
+
+if TYPE_CHECKING:  # kfp is imported when patching, not when loading settings
+    from deployer.utils.compilation import CompiledPipeline
+
+PATCHES_SUFFIXES = (".toml", ".yaml", ".yml", ".json")
+
+_CPU_PATTERN = re.compile(r"^([0-9]*[.])?[0-9]+m?$")
+_MEMORY_PATTERN = re.compile(r"^[0-9]+(E|Ei|P|Pi|T|Ti|G|Gi|M|Mi|K|Ki)?$")
+_DURATION_PATTERN = re.compile(r"^[0-9]+(\.[0-9]+)?s$")
+_MEMORY_UNITS = {
+    "E": 10**18,
+    "Ei": 2**60,
+    "P": 10**15,
+    "Pi": 2**50,
+    "T": 10**12,
+    "Ti": 2**40,
+    "G": 10**9,
+    "Gi": 2**30,
+    "M": 10**6,
+    "Mi": 2**20,
+    "K": 10**3,
+    "Ki": 2**10,
+    "": 1,
+}
+
+
+@lru_cache()
+def _resource_fields() -> Set[str]:
+    """Return the resource fields of the pipeline spec of the installed kfp."""
+    from kfp.pipeline_spec import pipeline_spec_pb2
+
+    resource_spec = pipeline_spec_pb2.PipelineDeploymentConfig.PipelineContainerSpec.ResourceSpec
+    return {field.json_name for field in resource_spec.DESCRIPTOR.fields}
+
+
+class RetryPolicyPatch(CustomBaseModel):
+    """The retry policy of a task, as set by `PipelineTask.set_retry`."""
+
+    max_retry_count: int = Field(ge=0)
+    backoff_duration: Optional[str] = None
+    """Time to wait before the first retry, e.g. `60s`."""
+    backoff_factor: Optional[float] = None
+    backoff_max_duration: Optional[str] = None
+    """Maximum time to wait between retries, e.g. `3600s`."""
+
+    @field_validator("backoff_duration", "backoff_max_duration")
+    @classmethod
+    def _check_duration(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and not _DURATION_PATTERN.match(value):
+            raise ValueError(f"Invalid duration {value!r}, expected seconds, e.g. '60s'.")
+        return value
+
+
+class TaskPatch(CustomBaseModel):
+    """The container and retry policy of a task. Unset fields are left unchanged."""
+
+    image: Optional[str] = None
+    cpu_request: Optional[str] = None
+    """e.g. `2` or `500m`."""
+    cpu_limit: Optional[str] = None
+    memory_request: Optional[str] = None
+    """e.g. `8G` or `512Mi`."""
+    memory_limit: Optional[str] = None
+    retry: Optional[RetryPolicyPatch] = None
+
+    @field_validator("cpu_request", "cpu_limit", "memory_request", "memory_limit", mode="before")
+    @classmethod
+    def _to_str(cls, value: Any) -> Any:
+        """Accept numbers, e.g. `cpu_limit = 4` in TOML."""
+        return str(value) if isinstance(value, (int, float)) else value
+
+    @field_validator("cpu_request", "cpu_limit")
+    @classmethod
+    def _check_cpu(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and not _CPU_PATTERN.match(value):
+            raise ValueError(
+                f"Invalid cpu {value!r}, expected a number, or millicores e.g. '500m'."
+            )
+        return value
+
+    @field_validator("memory_request", "memory_limit")
+    @classmethod
+    def _check_memory(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and not _MEMORY_PATTERN.match(value):
+            raise ValueError(
+                f"Invalid memory {value!r}, expected a number and a unit, e.g. '16G'."
+            )
+        return value
+
+
+class _Patches(CustomBaseModel):
+    images: Dict[str, str] = Field(default_factory=dict)
+    """New image by image, e.g. `python:3.10` or `python` for any tag of `python`."""
+    tasks: Dict[str, TaskPatch] = Field(default_factory=dict)
+    """Task patches by task name pattern, e.g. `train-*` or `*`."""
+
+
+class PipelinePatches(_Patches):
+    """The patches of a pipeline."""
+
+
+class PipelineSpecPatches(_Patches):
+    """The patches of all pipelines, and of each pipeline."""
+
+    pipelines: Dict[str, PipelinePatches] = Field(default_factory=dict)
+
+    def get_pipeline_patches(self, pipeline_name: str) -> List[_Patches]:
+        """Return the patches to apply to a pipeline, in order."""
+        patches = [self]
+        if pipeline_name in self.pipelines:
+            patches.append(self.pipelines[pipeline_name])
+        return [p for p in patches if p.images or p.tasks]
+
+
+def load_patches(patches_filepath: Path) -> PipelineSpecPatches:
+    """Load pipeline spec patches from a TOML, YAML or JSON file.
+
+    Raises:
+        UnsupportedConfigFileError: If the file extension is not supported.
+        BadConfigError: If the patches are invalid.
+    """
+    patches_filepath = Path(patches_filepath)
+    if patches_filepath.suffix == ".toml":
+        content = toml.load(patches_filepath)
+    elif patches_filepath.suffix in (".yaml", ".yml"):
+        with open(patches_filepath, "r") as f:
+            content = yaml.safe_load(f) or {}
+    elif patches_filepath.suffix == ".json":
+        with open(patches_filepath, "r") as f:
+            content = json.load(f)
+    else:
+        raise UnsupportedConfigFileError(
+            f"{patches_filepath}: Patches file extension '{patches_filepath.suffix}' is not"
+            f" supported. Supported patches file extensions: {PATCHES_SUFFIXES}"
+        )
+    try:
+        return PipelineSpecPatches.model_validate(content)
+    except ValidationError as e:
+        raise BadConfigError(f"Invalid pipeline spec patches {patches_filepath}:\n{e}") from e
+
+
+def _image_repository(image: str) -> str:
+    """Return an image without its tag and digest, e.g. `python` for `python:3.10`."""
+    image = image.split("@")[0]
+    name_start = image.rfind("/") + 1
+    tag_start = image.find(":", name_start)
+    return image if tag_start == -1 else image[:tag_start]
+
+
+def _cpu_to_float(cpu: str) -> float:
+    return float(cpu[:-1]) / 1000 if cpu.endswith("m") else float(cpu)
+
+
+def _memory_to_float(memory: str) -> float:
+    """Return a memory quantity in GB, as kfp writes it to the deprecated resource fields."""
+    number, unit = re.match(r"^([0-9]+)(.*)$", memory).groups()
+    return float(number) * _MEMORY_UNITS[unit] / _MEMORY_UNITS["G"]
+
+
+def _iter_container_tasks(pipeline_spec: dict) -> Iterator[Tuple[str, dict, dict]]:
+    """Yield the name, spec and component of each task running a container, in every DAG."""
+    dags = [pipeline_spec["root"].get("dag", {})] + [
+        c["dag"] for c in pipeline_spec.get("components", {}).values() if "dag" in c
+    ]
+    for dag in dags:
+        for task_name, task in dag.get("tasks", {}).items():
+            component = pipeline_spec["components"][task["componentRef"]["name"]]
+            if "executorLabel" in component:
+                yield task_name, task, component
+
+
+def _unique_name(name: str, existing: Dict[str, Any]) -> str:
+    unique_name, i = name, 1
+    while unique_name in existing:
+        i += 1
+        unique_name = f"{name}-{i}"
+    return unique_name
+
+
+def _patch_container(container: dict, patch: Dict[str, Any]) -> None:
+    if "image" in patch:
+        container["image"] = patch["image"]
+    resources = container.setdefault("resources", {})
+    resource_fields = _resource_fields()
+    for kind in ("cpu", "memory"):
+        for bound in ("request", "limit"):
+            value = patch.get(f"{kind}_{bound}")
+            if value is None:
+                continue
+            field_name = f"{kind}{bound.capitalize()}"
+            if field_name not in resource_fields:
+                raise BadConfigError(
+                    f"{kind}_{bound} is not supported by the pipeline spec of the installed kfp."
+                )
+            to_float = _cpu_to_float if kind == "cpu" else _memory_to_float
+            resources[field_name] = to_float(value)
+            # newer field, that also accepts pipeline parameters
+            if f"resource{field_name[0].upper()}{field_name[1:]}" in resource_fields:
+                resources[f"resource{field_name[0].upper()}{field_name[1:]}"] = value
+    if not resources:
+        del container["resources"]
+
+
+def patch_pipeline_spec(  # noqa: C901
+    pipeline_spec: dict, pipeline_name: str, patches: PipelineSpecPatches
+) -> dict:
+    """Return a copy of a pipeline spec with its patches applied.
+
+    Args:
+        pipeline_spec (dict): The compiled pipeline spec, e.g. `CompiledPipeline.pipeline_spec`.
+        pipeline_name (str): The name of the pipeline, to select its patches.
+        patches (PipelineSpecPatches): The patches.
+
+    Returns:
+        dict: The patched pipeline spec.
+    """
+    pipeline_spec = copy.deepcopy(pipeline_spec)
+    executors = pipeline_spec.get("deploymentSpec", {}).get("executors", {})
+    pipeline_patches = patches.get_pipeline_patches(pipeline_name)
+
+    for patch_set in pipeline_patches:
+        matched_images = set()
+        for executor in executors.values():
+            container = executor.get("container")
+            if container is None:
+                continue
+            for image in (container["image"], _image_repository(container["image"])):
+                if image in patch_set.images:
+                    container["image"] = patch_set.images[image]
+                    matched_images.add(image)
+                    break
+        if patch_set is not patches and set(patch_set.images) - matched_images:
+            logger.warning(
+                f"Images {sorted(set(patch_set.images) - matched_images)} of the patches of"
+                f" pipeline {pipeline_name} not found in the pipeline"
+            )
+
+    # the task patches matching each task, merged in order
+    task_patches: Dict[str, Dict[str, Any]] = {}
+    container_tasks = list(_iter_container_tasks(pipeline_spec))
+    for patch_set in pipeline_patches:
+        for pattern, task_patch in patch_set.tasks.items():
+            matched = [t for t, _, _ in container_tasks if fnmatch.fnmatchcase(t, pattern)]
+            if not matched and patch_set is not patches:
+                logger.warning(
+                    f"Task pattern {pattern!r} of the patches of pipeline {pipeline_name}"
+                    " matches no tasks"
+                )
+            for task_name in matched:
+                task_patches.setdefault(task_name, {}).update(
+                    task_patch.model_dump(exclude_none=True)
+                )
+
+    tasks_by_executor: Dict[str, List[Tuple[str, dict, dict]]] = {}
+    for task_name, task, component in container_tasks:
+        tasks_by_executor.setdefault(component["executorLabel"], []).append(
+            (task_name, task, component)
+        )
+        retry = task_patches.get(task_name, {}).get("retry")
+        if retry is not None:
+            task["retryPolicy"] = {
+                "maxRetryCount": retry["max_retry_count"],
+                "backoffDuration": retry.get("backoff_duration", "0s"),
+                "backoffFactor": retry.get("backoff_factor", 2.0),
+                "backoffMaxDuration": retry.get("backoff_max_duration", "3600s"),
+            }
+
+    for executor_label, tasks in tasks_by_executor.items():
+        container_patches = [
+            {k: v for k, v in task_patches.get(t, {}).items() if k != "retry"} for t, _, _ in tasks
+        ]
+        if all(p == container_patches[0] for p in container_patches):
+            if container_patches[0]:
+                _patch_container(executors[executor_label]["container"], container_patches[0])
+            continue
+        # tasks patched differently: each patched task gets its own component and executor
+        for (task_name, task, component), container_patch in zip(tasks, container_patches):
+            if not container_patch:
+                continue
+            component_name = _unique_name(
+                f"{task['componentRef']['name']}-{task_name}", pipeline_spec["components"]
+            )
+            new_executor_label = _unique_name(f"{executor_label}-{task_name}", executors)
+            pipeline_spec["components"][component_name] = {
+                **copy.deepcopy(component),
+                "executorLabel": new_executor_label,
+            }
+            executors[new_executor_label] = copy.deepcopy(executors[executor_label])
+            _patch_container(executors[new_executor_label]["container"], container_patch)
+            task["componentRef"]["name"] = component_name
+
+    return pipeline_spec
+
+
+def patch_compiled_pipeline(
+    compiled_pipeline: "CompiledPipeline", pipeline_name: str, patches: PipelineSpecPatches
+) -> "CompiledPipeline":
+    """Apply the patches of a pipeline to its compiled spec, and validate the patched spec.
+
+    Raises:
+        BadConfigError: If the patched spec does not match the pipeline spec schema.
+
+    Returns:
+        CompiledPipeline: The patched pipeline, the same one if it has no patches.
+    """
+    from google.protobuf import json_format
+    from kfp.pipeline_spec import pipeline_spec_pb2
+
+    from deployer.utils.compilation import replace_pipeline_spec
+
+    if not patches.get_pipeline_patches(pipeline_name):
+        return compiled_pipeline
+
+    pipeline_spec = patch_pipeline_spec(compiled_pipeline.pipeline_spec, pipeline_name, patches)
+    try:
+        json_format.ParseDict(pipeline_spec, pipeline_spec_pb2.PipelineSpec())
+    except json_format.ParseError as e:
+        raise BadConfigError(f"Patched pipeline spec of {pipeline_name} is invalid: {e}") from e
+    if pipeline_spec == compiled_pipeline.pipeline_spec:
+        return compiled_pipeline
+
+    logger.info(f"Pipeline {pipeline_name} patched")
+    return replace_pipeline_spec(compiled_pipeline, pipeline_spec)
@@ -1,11 +1,15 @@
-import shutil
+import importlib
+import multiprocessing
+import time
+import weakref
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Set, TypeVar
 
 import kfp.dsl
 from loguru import logger
 from pydantic import Field, ValidationError, computed_field, model_validator
-from pydantic.functional_validators import ModelWrapValidatorHandler
 from pydantic_core import PydanticCustomError
 from pydantic_core.core_schema import ValidationInfo
 from typing_extensions import Annotated, _AnnotatedAlias
@@ -15,17 +19,110 @@ try:
 except ImportError:
     from kfp.components import graph_component  # until 2.0.1
 
-from deployer.constants import TEMP_LOCAL_PACKAGE_PATH
-from deployer.pipeline_deployer import VertexPipelineDeployer
+from deployer.constants import ProfileFormat
+from deployer.utils.compilation import CompiledPipeline, compile_pipeline
 from deployer.utils.config import list_config_filepaths, load_config
+from deployer.utils.discovery import CONFIG_SUFFIXES, list_python_modules
 from deployer.utils.exceptions import BadConfigError
-from deployer.utils.logging import DisableLogger
+from deployer.utils.import_timing import collect_imports
+from deployer.utils.instrumentation import (
+    StageRecord,
+    collect_counts,
+    collect_stages,
+    count,
+    stage,
+)
+from deployer.utils.logging import (
+    DisableLogger,
+    configure_logging,
+    flush_logs,
+    get_logging_config,
+)
+from deployer.utils.memory import trace_memory as trace_stages_memory
 from deployer.utils.models import CustomBaseModel, create_model_from_func
-from deployer.utils.utils import import_pipeline_from_dir
+from deployer.utils.profiling import PROFILE_SUFFIXES, profiling
+from deployer.utils.utils import (
+    _get_warnings_for_default_value,
+    _parse_validation_errors,
+    import_pipeline_from_dir,
+)
+from deployer.utils.watch import (
+    ModuleGraph,
+    get_file_watcher,
+    path_to_module_name,
+    unload_modules,
+)
 
 PipelineConfigT = TypeVar("PipelineConfigT")
 
 
+class PipelineCache:
+    """Compiled specs and dynamic models of imported pipelines, reused by later checks.
+
+    Checks only use a cache when one is active (see `use_pipeline_cache`), e.g. while watching
+    files with `check --watch`, or in the process of `vertex-deployer serve`. Otherwise, specs
+    and models are dropped with the check results, so that the memory used by `check --all`
+    does not grow with the number of pipelines.
+
+    Entries are dropped with the pipeline objects, e.g. when pipeline modules are reloaded.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self._compiled_pipelines: "weakref.WeakKeyDictionary[Any, CompiledPipeline]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._models: "weakref.WeakKeyDictionary[Any, Dict[bool, type]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def compile_pipeline(self, pipeline: graph_component.GraphComponent) -> CompiledPipeline:
+        """Compile a pipeline, or return its compiled spec if it was already compiled."""
+        if pipeline not in self._compiled_pipelines:
+            count("cache_misses", cache="compiled_pipelines")
+            self._compiled_pipelines[pipeline] = compile_pipeline(pipeline)
+        else:
+            count("cache_hits", cache="compiled_pipelines")
+        return self._compiled_pipelines[pipeline]
+
+    def create_model(
+        self, pipeline: graph_component.GraphComponent, exclude_defaults: bool
+    ) -> type:
+        """Create the dynamic model of a pipeline, or return it if it was already created."""
+        models = self._models.setdefault(pipeline, {})
+        if exclude_defaults not in models:
+            count("cache_misses", cache="pipeline_models")
+            models[exclude_defaults] = _create_pipeline_model(pipeline, exclude_defaults)
+        else:
+            count("cache_hits", cache="pipeline_models")
+        return models[exclude_defaults]
+
+
+_active_pipeline_cache: ContextVar[Optional[PipelineCache]] = ContextVar(
+    "active_pipeline_cache", default=None
+)
+
+
+@contextmanager
+def use_pipeline_cache(cache: Optional[PipelineCache] = None) -> Iterator[PipelineCache]:
+    """Make the checks run in this block use a cache, a new one by default."""
+    cache = cache if cache is not None else PipelineCache()
+    token = _active_pipeline_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _active_pipeline_cache.reset(token)
+
+
+def _create_pipeline_model(
+    pipeline: graph_component.GraphComponent, exclude_defaults: bool
+) -> type:
+    return create_model_from_func(
+        pipeline.pipeline_func,
+        type_converter=_convert_artifact_type_to_str,
+        exclude_defaults=exclude_defaults,
+    )
+
+
 class ConfigDynamicModel(CustomBaseModel, Generic[PipelineConfigT]):
     """Model used to generate checks for configs based on pipeline dynamic model"""
 
@@ -44,6 +141,14 @@ class ConfigDynamicModel(CustomBaseModel, Generic[PipelineConfigT]):
             data["config"] = {**(parameter_values or {}), **(input_artifacts or {})}
         return data
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def time_config_validation(cls, data: Any, handler: Callable) -> Any:
+        """Measure the loading and validation time of each config"""
+        config_name = Path(data["config_path"]).name if isinstance(data, dict) else None
+        with stage("config_validation", config=config_name):
+            return handler(data)
+
 
 class ConfigsDynamicModel(CustomBaseModel, Generic[PipelineConfigT]):
     """Model used to generate checks for configs based on pipeline dynamic model"""
@@ -75,7 +180,7 @@ class Pipeline(CustomBaseModel):
     def pipeline(self) -> graph_component.GraphComponent:
         """Import pipeline"""
         if getattr(self, "_pipeline", None) is None:
-            with DisableLogger("deployer.utils.utils"):
+            with DisableLogger("deployer.utils.utils"), stage("import"):
                 self._pipeline = import_pipeline_from_dir(
                     str(self.pipelines_root_path), self.pipeline_name
                 )
@@ -93,15 +198,19 @@ class Pipeline(CustomBaseModel):
 
     @model_validator(mode="after")
     def compile_pipeline(self):
-        """Validate that the pipeline can be compiled"""
+        """Validate that the pipeline can be compiled
+
+        The pipeline is compiled in memory, so that concurrent checks in the same workspace
+        do not collide.
+        """
         logger.debug(f"Compiling pipeline {self.pipeline_name}")
         try:
-            with DisableLogger("deployer.pipeline_deployer"):
-                VertexPipelineDeployer(
-                    pipeline_name=self.pipeline_name,
-                    pipeline_func=self.pipeline,
-                    local_package_path=TEMP_LOCAL_PACKAGE_PATH,
-                ).compile()
+            with stage("compile"):
+                cache = _active_pipeline_cache.get()
+                if cache is None:
+                    compile_pipeline(self.pipeline)
+                else:
+                    cache.compile_pipeline(self.pipeline)
         except Exception as e:
             raise ValueError(f"Pipeline compilation failed: {e.__repr__()}")  # noqa: B904
         return self
@@ -110,11 +219,13 @@ class Pipeline(CustomBaseModel):
     def validate_configs(self, info: ValidationInfo):
         """Validate configs against pipeline parameters definition"""
         logger.debug(f"Validating configs for pipeline {self.pipeline_name}")
-        pipelines_dynamic_model = create_model_from_func(
-            self.pipeline.pipeline_func,
-            type_converter=_convert_artifact_type_to_str,
-            exclude_defaults=info.context.get("raise_for_defaults", False),
-        )
+        exclude_defaults = info.context.get("raise_for_defaults", False)
+        with stage("model_creation"):
+            cache = _active_pipeline_cache.get()
+            if cache is None:
+                pipelines_dynamic_model = _create_pipeline_model(self.pipeline, exclude_defaults)
+            else:
+                pipelines_dynamic_model = cache.create_model(self.pipeline, exclude_defaults)
         config_model = ConfigsDynamicModel[pipelines_dynamic_model]
         self.configs = config_model.model_validate(
             {"configs": {x.name: {"config_path": x} for x in self.config_paths}}
@@ -127,19 +238,417 @@ class Pipelines(CustomBaseModel):
 
     pipelines: Dict[str, Pipeline]
 
-    @model_validator(mode="wrap")
-    def _init_remove_temp_directory(self, handler: ModelWrapValidatorHandler) -> Any:
-        """Create and remove temporary directory"""
-        Path(TEMP_LOCAL_PACKAGE_PATH).mkdir(exist_ok=True)
 
-        try:
-            validated_self = handler(self)
-        except ValidationError as e:
-            raise e
-        finally:
-            shutil.rmtree(TEMP_LOCAL_PACKAGE_PATH)
+class PipelineCheckResult(CustomBaseModel):
+    """Compact and serializable result of the checks of one pipeline and its configs"""
+
+    pipeline_name: str
+    config_paths: List[Path]
+    # parsed validation errors, by config file name or "pipeline level error"
+    errors: Dict[str, List[Dict[str, str]]] = Field(default_factory=dict)
+    # default values used and not overwritten in config files, by config file name
+    warnings: Dict[str, List[Dict[str, str]]] = Field(default_factory=dict)
+    # wall-clock time spent checking the pipeline and its configs, in seconds
+    elapsed: float = 0.0
+    # time spent in pipeline stages (import, compile, model_creation), in seconds
+    stage_timings: Dict[str, float] = Field(default_factory=dict)
+    # time spent loading and validating each config, by config file name, in seconds
+    config_timings: Dict[str, float] = Field(default_factory=dict)
+    # modules imported with the pipeline (see `deployer.utils.import_timing.ImportRecord`),
+    # only collected when import times are profiled
+    import_timings: List[Dict[str, Any]] = Field(default_factory=list)
+    # memory used by each stage (see `deployer.utils.memory.StageMemory`), only collected when
+    # memory is traced
+    memory_stages: List[Dict[str, Any]] = Field(default_factory=list)
+    # stages of the check (see `deployer.utils.instrumentation.StageRecord`), e.g. to export traces
+    stages: List[Dict[str, Any]] = Field(default_factory=list)
+    # events counted during the check (see `deployer.utils.instrumentation.CountRecord`)
+    counts: List[Dict[str, Any]] = Field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:  # noqa: D102
+        return len(self.errors) == 0
+
+
+def check_pipeline(
+    pipeline_name: str,
+    config_paths: List[Path],
+    pipelines_root_path: Path,
+    configs_root_path: Path,
+    raise_for_defaults: bool = False,
+    raise_error: bool = False,
+    profile_filepath: Optional[Path] = None,
+    profile_format: ProfileFormat = ProfileFormat.html,
+    profile_imports: bool = False,
+    trace_memory: bool = False,
+    cache: Optional[PipelineCache] = None,
+) -> PipelineCheckResult:
+    """Check one pipeline and its configs, and return only the parsed results.
+
+    The pipeline and configs models are not kept, so that they can be garbage collected
+    as soon as the pipeline is checked.
+
+    Args:
+        pipeline_name (str): The name of the pipeline to check.
+        config_paths (List[Path]): The config files to check.
+        pipelines_root_path (Path): The directory of pipelines modules.
+        configs_root_path (Path): The directory of pipelines config directories.
+        raise_for_defaults (bool, optional): Whether to raise a validation error when a default
+            value is used and not overwritten in config file. Defaults to False.
+        raise_error (bool, optional): Whether to raise the validation error instead of
+            returning it in the result. Defaults to False.
+        profile_filepath (Optional[Path], optional): File to write a profile of the check
+            (import, compile and config validation) to. Defaults to None (not profiled).
+        profile_format (ProfileFormat, optional): The profile report format.
+            Defaults to html.
+        profile_imports (bool, optional): Whether to record the modules imported with the
+            pipeline and their import times. Defaults to False.
+        trace_memory (bool, optional): Whether to trace the memory used by each stage of the
+            check, with tracemalloc. Defaults to False.
+        cache (Optional[PipelineCache], optional): The cache of compiled specs and dynamic
+            models to use. Defaults to None (the active cache if any, see `use_pipeline_cache`).
+
+    Returns:
+        PipelineCheckResult: The check result.
+    """
+    profiler = (
+        nullcontext() if profile_filepath is None else profiling(profile_filepath, profile_format)
+    )
+    import_collector = collect_imports() if profile_imports else nullcontext([])
+    memory_tracer = trace_stages_memory() if trace_memory else nullcontext([])
+    cache_context = use_pipeline_cache(cache) if cache is not None else nullcontext()
+    start = time.perf_counter()
+    with collect_stages() as stages, collect_counts() as counts, import_collector as imports:
+        with memory_tracer as memory, profiler, stage("check", pipeline=pipeline_name):
+            try:
+                with cache_context:
+                    pipelines_model = _validate_pipeline(
+                        pipeline_name,
+                        config_paths,
+                        pipelines_root_path,
+                        configs_root_path,
+                        raise_for_defaults,
+                    )
+            except ValidationError as e:
+                if raise_error:
+                    raise e
+                pipelines_model, validation_error = None, e
+
+    if pipelines_model is None:
+        errors, warnings = _parse_validation_errors(validation_error).get(pipeline_name, {}), {}
+    else:
+        errors, warnings = (
+            {},
+            _get_warnings_for_default_value(pipelines_model).get(pipeline_name, {}),
+        )
+
+    return PipelineCheckResult(
+        pipeline_name=pipeline_name,
+        config_paths=config_paths,
+        errors=errors,
+        warnings=warnings,
+        elapsed=time.perf_counter() - start,
+        **_split_stage_timings(stages),
+        import_timings=[record._asdict() for record in imports],
+        memory_stages=[record._asdict() for record in memory],
+        stages=[record._asdict() for record in stages],
+        counts=[record._asdict() for record in counts],
+    )
+
+
+def _validate_pipeline(
+    pipeline_name: str,
+    config_paths: List[Path],
+    pipelines_root_path: Path,
+    configs_root_path: Path,
+    raise_for_defaults: bool,
+) -> Pipelines:
+    return Pipelines.model_validate(
+        {
+            "pipelines": {
+                pipeline_name: {
+                    "pipeline_name": pipeline_name,
+                    "config_paths": config_paths,
+                    "pipelines_root_path": pipelines_root_path,
+                    "configs_root_path": configs_root_path,
+                }
+            }
+        },
+        context={"raise_for_defaults": raise_for_defaults},
+    )
+
+
+def _split_stage_timings(stages: List[StageRecord]) -> Dict[str, Dict[str, float]]:
+    """Sum stage durations into pipeline stage timings and config validation timings.
+
+    Stages nested in a config validation, e.g. config loading, are part of its timing.
+    """
+    stage_timings, config_timings = {}, {}
+    for record in stages:
+        if record.name == "config_validation":
+            config_timings[record.labels["config"]] = record.elapsed
+        elif record.name != "check" and "config" not in record.labels:
+            stage_timings[record.name] = stage_timings.get(record.name, 0.0) + record.elapsed
+    return {"stage_timings": stage_timings, "config_timings": config_timings}
+
+
+def _init_worker(logging_config: Dict[str, Any]) -> None:
+    configure_logging(**logging_config)
+
+
+def _check_pipeline_task(kwargs: Dict[str, Any]) -> PipelineCheckResult:
+    try:
+        return check_pipeline(**kwargs)
+    finally:
+        # pool workers exit without running exit handlers, which write buffered logs
+        flush_logs()
+
+
+def check_pipelines(
+    to_check: Dict[str, List[Path]],
+    pipelines_root_path: Path,
+    configs_root_path: Path,
+    raise_for_defaults: bool = False,
+    raise_error: bool = False,
+    isolated: bool = False,
+    max_tasks_per_child: Optional[int] = None,
+    log_level: str = "INFO",
+    profile_dirpath: Optional[Path] = None,
+    profile_format: ProfileFormat = ProfileFormat.html,
+    profile_imports: bool = False,
+    trace_memory: bool = False,
+) -> Iterator[PipelineCheckResult]:
+    """Check pipelines one by one, yielding results in order.
+
+    In isolated mode, pipelines are imported and checked in a worker process that is replaced
+    after `max_tasks_per_child` pipelines. Modules imported by pipelines are thus released with
+    the worker, and the memory used by `check --all` stays bounded as the number of pipelines
+    grows.
+
+    Args:
+        to_check (Dict[str, List[Path]]): The pipelines to check and their config files.
+        pipelines_root_path (Path): The directory of pipelines modules.
+        configs_root_path (Path): The directory of pipelines config directories.
+        raise_for_defaults (bool, optional): Whether to raise a validation error when a default
+            value is used and not overwritten in config file. Defaults to False.
+        raise_error (bool, optional): Whether to raise validation errors. Only supported when
+            not isolated, as validation errors cannot be sent back by workers.
+            Defaults to False.
+        isolated (bool, optional): Whether to check pipelines in a worker process.
+            Defaults to False.
+        max_tasks_per_child (Optional[int], optional): The number of pipelines checked by a
+            worker before it is replaced. Defaults to None (never replaced).
+        log_level (str, optional): The logging level of workers. Defaults to "INFO".
+        profile_dirpath (Optional[Path], optional): Directory to write a profile of each
+            pipeline check to, named after the pipeline. Defaults to None (not profiled).
+        profile_format (ProfileFormat, optional): The profile reports format.
+            Defaults to html.
+        profile_imports (bool, optional): Whether to record the modules imported with each
+            pipeline and their import times. Defaults to False.
+        trace_memory (bool, optional): Whether to trace the memory used by each stage of the
+            checks. Memory is traced for one pipeline at a time. Defaults to False.
+
+    Yields:
+        PipelineCheckResult: The check result of each pipeline.
+    """
+    tasks = (
+        {
+            "pipeline_name": pipeline_name,
+            "config_paths": config_paths,
+            "pipelines_root_path": pipelines_root_path,
+            "configs_root_path": configs_root_path,
+            "raise_for_defaults": raise_for_defaults,
+            "raise_error": raise_error and not isolated,
+            "profile_filepath": (
+                None
+                if profile_dirpath is None
+                else profile_dirpath / f"{pipeline_name}{PROFILE_SUFFIXES[profile_format]}"
+            ),
+            "profile_format": profile_format,
+            "profile_imports": profile_imports,
+            "trace_memory": trace_memory,
+        }
+        for pipeline_name, config_paths in to_check.items()
+    )
+
+    if not isolated:
+        for task in tasks:
+            yield _check_pipeline_task(task)
+        return
+
+    # spawn: workers start from a fresh interpreter, not a copy of this process' modules
+    mp_context = multiprocessing.get_context("spawn")
+    with mp_context.Pool(
+        processes=1,
+        initializer=_init_worker,
+        # same log format and correlation ID as the parent process
+        initargs=({**get_logging_config(), "level": log_level},),
+        maxtasksperchild=max_tasks_per_child,
+    ) as pool:
+        yield from pool.imap(_check_pipeline_task, tasks)
+
+
+def _merge_check_results(
+    previous: PipelineCheckResult,
+    partial: Optional[PipelineCheckResult],
+    config_paths: List[Path],
+) -> PipelineCheckResult:
+    """Update a check result with the result of checking only some of its configs."""
+    if partial is not None and "pipeline level error" in partial.errors:
+        return partial.model_copy(update={"config_paths": config_paths})
+
+    config_names = {c.name for c in config_paths}
+    checked_names = {c.name for c in partial.config_paths} if partial is not None else set()
+
+    def _merge(previous_dict: dict, partial_dict: dict) -> dict:
+        kept = {k: v for k, v in previous_dict.items() if k in config_names - checked_names}
+        return {**kept, **partial_dict}
+
+    return PipelineCheckResult(
+        pipeline_name=previous.pipeline_name,
+        config_paths=config_paths,
+        errors=_merge(previous.errors, partial.errors if partial is not None else {}),
+        warnings=_merge(previous.warnings, partial.warnings if partial is not None else {}),
+        elapsed=partial.elapsed if partial is not None else previous.elapsed,
+        stage_timings=partial.stage_timings if partial is not None else previous.stage_timings,
+        config_timings=_merge(
+            previous.config_timings, partial.config_timings if partial is not None else {}
+        ),
+    )
+
+
+def _group_configs_by_pipeline(paths: Set[Path], configs_root_path: Path) -> Dict[str, Set[str]]:
+    """Return the names of the config files among paths, by pipeline name."""
+    configs_root_path = Path(configs_root_path).resolve()
+    configs = {}
+    for path in paths:
+        path = Path(path).resolve()
+        if path.suffix in CONFIG_SUFFIXES and path.parent.parent == configs_root_path:
+            configs.setdefault(path.parent.name, set()).add(path.name)
+    return configs
+
+
+def _build_module_graph(vertex_folder_path: Path) -> ModuleGraph:
+    try:
+        return ModuleGraph(vertex_folder_path)
+    except ValueError as e:  # modules are named after their path from the working directory
+        raise ValueError(
+            f"Cannot watch '{vertex_folder_path}': it must be in the current working"
+            f" directory '{Path.cwd()}'. Run the command from the root of your project."
+        ) from e
+
+
+def watch_pipelines(
+    pipeline_names: Optional[List[str]],
+    vertex_folder_path: Path,
+    pipelines_root_path: Path,
+    configs_root_path: Path,
+    config_filepath: Optional[Path] = None,
+    raise_for_defaults: bool = False,
+    force_polling: bool = False,
+) -> Iterator[List[PipelineCheckResult]]:
+    """Check pipelines, then check them again each time a file of the vertex folder changes.
+
+    Pipelines are checked in this process, so kfp and pydantic stay loaded. When python files
+    change, only them and the modules importing them (found with an import graph of the vertex
+    folder) are unloaded, and only the pipelines depending on them are checked again. When only
+    config files change, only these configs are checked again.
+
+    Args:
+        pipeline_names (Optional[List[str]]): The pipelines to check. If None, all pipelines
+            are checked, including pipelines created while watching.
+        vertex_folder_path (Path): The folder to watch.
+        pipelines_root_path (Path): The directory of pipelines modules.
+        configs_root_path (Path): The directory of pipelines config directories.
+        config_filepath (Optional[Path], optional): The only config file to check for each
+            pipeline. Defaults to None (all config files of each pipeline).
+        raise_for_defaults (bool, optional): Whether to raise a validation error when a default
+            value is used and not overwritten in config file. Defaults to False.
+        force_polling (bool, optional): Whether to poll files for changes instead of using
+            inotify. Defaults to False.
+
+    Raises:
+        ValueError: Raised when the vertex folder is not in the current working directory.
+
+    Yields:
+        List[PipelineCheckResult]: The check results of all pipelines, after each change.
+    """
+
+    def _list_pipelines() -> List[str]:
+        existing_names = list_python_modules(pipelines_root_path)
+        if pipeline_names is None:
+            return existing_names
+        return [p for p in pipeline_names if p in existing_names]
+
+    def _list_configs(pipeline_name: str) -> List[Path]:
+        if config_filepath is not None:
+            return [config_filepath]
+        return list_config_filepaths(configs_root_path, pipeline_name)
+
+    # pipelines stay imported while watching: their specs and models are reused
+    cache = PipelineCache()
+
+    def _check(pipeline_name: str, config_paths: List[Path]) -> PipelineCheckResult:
+        return check_pipeline(
+            pipeline_name,
+            config_paths,
+            pipelines_root_path=pipelines_root_path,
+            configs_root_path=configs_root_path,
+            raise_for_defaults=raise_for_defaults,
+            cache=cache,
+        )
+
+    # watch before the first check so that no change is missed
+    watcher = get_file_watcher(vertex_folder_path, force_polling=force_polling)
+    try:
+        module_graph = _build_module_graph(vertex_folder_path)
+        results = {p: _check(p, _list_configs(p)) for p in _list_pipelines()}
+        yield list(results.values())
+
+        while True:
+            changed_paths = watcher.wait_for_changes()
+            logger.debug(f"Changed files: {sorted(str(p) for p in changed_paths)}")
+
+            affected_modules = module_graph.dependents(module_graph.update(changed_paths))
+            unload_modules(affected_modules)
+            importlib.invalidate_caches()
+
+            changed_configs = _group_configs_by_pipeline(
+                changed_paths | module_graph.get_paths(affected_modules), configs_root_path
+            )
+
+            new_results = {}
+            for pipeline_name in _list_pipelines():
+                previous = results.get(pipeline_name)
+                config_paths = _list_configs(pipeline_name)
+                pipeline_module_name = path_to_module_name(
+                    Path(pipelines_root_path) / f"{pipeline_name}.py"
+                )
+                if (
+                    previous is None
+                    or pipeline_module_name in affected_modules
+                    or "pipeline level error" in previous.errors
+                ):
+                    new_results[pipeline_name] = _check(pipeline_name, config_paths)
+                    continue
 
-        return validated_self
+                to_check = [
+                    c
+                    for c in config_paths
+                    if c.name in changed_configs.get(pipeline_name, set())
+                    or c not in previous.config_paths
+                ]
+                if to_check or config_paths != previous.config_paths:
+                    partial = _check(pipeline_name, to_check) if to_check else None
+                    new_results[pipeline_name] = _merge_check_results(
+                        previous, partial, config_paths
+                    )
+                else:
+                    new_results[pipeline_name] = previous
+            results = new_results
+            yield list(results.values())
+    finally:
+        watcher.close()
 
 
 def _convert_artifact_type_to_str(annotation: type) -> type:
@@ -1,22 +1,33 @@
 from __future__ import annotations
 
 import os
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from typing import Callable, List, Optional
 
+import requests
+from google.auth.credentials import AnonymousCredentials
 from google.cloud import aiplatform
 from google.cloud.aiplatform import PipelineJobSchedule
-from kfp import compiler
 from kfp.registry import RegistryClient
 from loguru import logger
 from requests import HTTPError
 
 from deployer import constants
+from deployer.patching import PipelineSpecPatches, patch_compiled_pipeline
+from deployer.utils.compilation import (
+    CompiledPipeline,
+    compile_pipeline,
+    compiled_pipeline_file,
+)
 from deployer.utils.exceptions import (
     MissingGoogleArtifactRegistryHostError,
     TagNotFoundError,
 )
+from deployer.utils.instrumentation import stage
+from deployer.utils.locking import directory_lock
+from deployer.utils.store import CompiledPipelineStore
 
 
 class VertexPipelineDeployer:
@@ -34,6 +45,8 @@ class VertexPipelineDeployer:
         gar_location: Optional[str] = None,
         gar_repo_id: Optional[str] = None,
         local_package_path: Optional[Path] = None,
+        api_endpoint: Optional[str] = None,
+        gar_endpoint: Optional[str] = None,
     ) -> None:
         """I don't want to write a dostring here but ruff wants me to"""
         self.project_id = project_id
@@ -48,22 +61,31 @@ class VertexPipelineDeployer:
         self.gar_location = gar_location
         self.gar_repo_id = gar_repo_id
         self.local_package_path = Path(local_package_path)
+        self.gar_endpoint = gar_endpoint
 
+        self.compiled_pipeline: Optional[CompiledPipeline] = None
         self.template_name = None
         self.version_name = None
+        self.schedule_resource_name = None
+
+        endpoint_kwargs = {}
+        if api_endpoint is not None:
+            endpoint_kwargs["api_endpoint"] = api_endpoint
+            if api_endpoint.startswith("http://"):  # e.g. the server of deployer.fake_gcp
+                endpoint_kwargs.update(api_transport="rest", credentials=AnonymousCredentials())
 
         aiplatform.init(
             project=self.project_id,
             staging_bucket=f"gs://{self.staging_bucket_name}",
+            **endpoint_kwargs,
         )
 
     @property
     def gar_host(self) -> Optional[str]:
         """Return the Artifact Registry host if the location and repo ID are provided"""
         if self.gar_location is not None and self.gar_repo_id is not None:
-            return os.path.join(
-                f"https://{self.gar_location}-kfp.pkg.dev", self.project_id, self.gar_repo_id
-            )
+            endpoint = self.gar_endpoint or f"https://{self.gar_location}-kfp.pkg.dev"
+            return os.path.join(endpoint, self.project_id, self.gar_repo_id)
         logger.debug(
             "No Artifact Registry location or repo ID provided: not using Artifact Registry"
         )
@@ -92,6 +114,10 @@ class VertexPipelineDeployer:
                 " Falling back to local package."
             )
 
+        return self._local_template_path
+
+    @property
+    def _local_template_path(self) -> str:
         return os.path.join(str(self.local_package_path), f"{self.pipeline_name}.yaml")
 
     def _check_gar_host(self) -> None:
@@ -161,27 +187,65 @@ class VertexPipelineDeployer:
         Returns:
             aiplatform.PipelineJob: The pipeline job object
         """  # noqa: E501
-        job = aiplatform.PipelineJob(
-            display_name=self.pipeline_name,
-            job_id=self.run_name,
-            template_path=template_path,
-            pipeline_root=self.staging_bucket_uri,
-            location=self.region,
-            enable_caching=enable_caching,
-            parameter_values=parameter_values,
-            input_artifacts=input_artifacts,
-        )
+        # aiplatform only reads templates from files or https URLs: a pipeline compiled in
+        # memory, or downloaded over http (e.g. from deployer.fake_gcp), is written to a
+        # temporary file
+        template_file = nullcontext(template_path)
+        if self.compiled_pipeline is not None and template_path == self._local_template_path:
+            logger.debug(f"Using pipeline {self.pipeline_name} compiled in memory")
+            template_file = compiled_pipeline_file(self.compiled_pipeline.content)
+        elif template_path.startswith("http://"):
+            logger.debug(f"Downloading pipeline template from {template_path}")
+            with stage("template_download"):
+                response = requests.get(template_path, timeout=60)
+                response.raise_for_status()
+            template_file = compiled_pipeline_file(response.content)
+
+        with template_file as template_filepath, stage("job_creation", run_name=self.run_name):
+            job = aiplatform.PipelineJob(
+                display_name=self.pipeline_name,
+                job_id=self.run_name,
+                template_path=template_filepath,
+                pipeline_root=self.staging_bucket_uri,
+                location=self.region,
+                enable_caching=enable_caching,
+                parameter_values=parameter_values,
+                input_artifacts=input_artifacts,
+            )
         return job
 
-    def compile(self) -> VertexPipelineDeployer:
-        """Compile pipeline and save it to the local package path using kfp compiler"""
-        self.local_package_path.mkdir(parents=True, exist_ok=True)
-        pipeline_filepath = self.local_package_path / f"{self.pipeline_name}.yaml"
+    def compile(
+        self, save: bool = True, patches: Optional[PipelineSpecPatches] = None
+    ) -> VertexPipelineDeployer:
+        """Compile pipeline in memory using kfp compiler
 
-        compiler.Compiler().compile(
-            pipeline_func=self.pipeline_func,
-            package_path=str(pipeline_filepath),
-        )
+        The compiled pipeline is kept in memory to be uploaded or run. It is also saved to the
+        local package path if `save` is True, and added to the versions of the pipeline in its
+        store (see `deployer.utils.store`). The local package path is then locked while
+        writing, and the file is written atomically, so that concurrent deployments in the same
+        workspace never read a partially written file.
+
+        Args:
+            save (bool, optional): Whether to save the compiled pipeline to the local package
+                path. Defaults to True.
+            patches (Optional[PipelineSpecPatches], optional): Patches applied to the compiled
+                pipeline spec before it is saved, see `deployer.patching`. Defaults to None.
+        """
+        self.compiled_pipeline = compile_pipeline(self.pipeline_func)
+        if patches is not None:
+            with stage("patch"):
+                self.compiled_pipeline = patch_compiled_pipeline(
+                    self.compiled_pipeline, self.pipeline_name, patches
+                )
+        if not save:
+            logger.info(f"Pipeline {self.pipeline_name} compiled")
+            return self
+
+        pipeline_filepath = self.local_package_path / f"{self.pipeline_name}.yaml"
+        with stage("save"):
+            CompiledPipelineStore(self.local_package_path).add(
+                self.pipeline_name, self.compiled_pipeline.content, save_package_file=True
+            )
         logger.info(f"Pipeline {self.pipeline_name} compiled to {pipeline_filepath}")
 
         return self
@@ -190,13 +254,24 @@ class VertexPipelineDeployer:
         self,
         tags: List[str] = ["latest"],  # noqa: B006
     ) -> VertexPipelineDeployer:
-        """Upload pipeline to Artifact Registry"""
+        """Upload pipeline to Artifact Registry
+
+        Upload the pipeline compiled in memory if any, the pipeline in the local package
+        otherwise.
+        """
         self._check_gar_host()
         client = RegistryClient(host=self.gar_host)
-        template_name, version_name = client.upload_pipeline(
-            file_name=self.local_package_path / f"{self.pipeline_name}.yaml",
-            tags=tags,
-        )
+        if self.compiled_pipeline is not None:
+            with compiled_pipeline_file(self.compiled_pipeline.content) as pipeline_filepath:
+                template_name, version_name = client.upload_pipeline(
+                    file_name=pipeline_filepath, tags=tags
+                )
+        else:
+            with directory_lock(self.local_package_path, shared=True):
+                template_name, version_name = client.upload_pipeline(
+                    file_name=self.local_package_path / f"{self.pipeline_name}.yaml",
+                    tags=tags,
+                )
         logger.info(f"Pipeline {self.pipeline_name} uploaded to {self.gar_host} with tags {tags}")
         self.template_name = template_name
         self.version_name = version_name
@@ -253,10 +328,12 @@ class VertexPipelineDeployer:
         )
 
         try:
-            job.submit(
-                experiment=experiment_name,
-                service_account=self.service_account,
-            )
+            # includes the association of the job with the experiment
+            with stage("submit", run_name=job.job_id):
+                job.submit(
+                    experiment=experiment_name,
+                    service_account=self.service_account,
+                )
         except RuntimeError as e:  # HACK: This is a temporary fix
             if "could not be associated with Experiment" in str(e):
                 logger.warning(
@@ -318,11 +395,12 @@ class VertexPipelineDeployer:
         self._check_gar_host()
 
         schedule_display_name = f"schedule-{self.pipeline_name}"
-        schedules_list = PipelineJobSchedule.list(
-            filter=f'display_name="{schedule_display_name}"',
-            order_by="create_time desc",
-            location=self.region,
-        )
+        with stage("schedule_listing"):
+            schedules_list = PipelineJobSchedule.list(
+                filter=f'display_name="{schedule_display_name}"',
+                order_by="create_time desc",
+                location=self.region,
+            )
 
         logger.info(
             f"There are {len(schedules_list)} schedules defined for pipeline {self.pipeline_name}"
@@ -332,13 +410,15 @@ class VertexPipelineDeployer:
                 f"Deleting schedule {schedules_list[0].display_name}"
                 f" for pipeline {self.pipeline_name} at {schedules_list[0].cron}"
             )
-            schedules_list[0].delete()
+            with stage("schedule_deletion"):
+                schedules_list[0].delete()
 
         if tag:
             client = RegistryClient(host=self.gar_host)
             package_name = self.pipeline_name.replace("_", "-")
             try:
-                tag_metadata = client.get_tag(package_name=package_name, tag=tag)
+                with stage("tag_resolution"):
+                    tag_metadata = client.get_tag(package_name=package_name, tag=tag)
             except HTTPError as e:
                 tags_list = client.list_tags(package_name)
                 tags_list_parsed = [x["name"].split("/")[-1] for x in tags_list]
@@ -371,9 +451,11 @@ class VertexPipelineDeployer:
             location=self.region,
         )
 
-        pipeline_job_schedule.create(
-            cron=f"TZ={scheduler_timezone} {cron}",
-            service_account=self.service_account,
-        )
+        with stage("schedule_creation"):
+            pipeline_job_schedule.create(
+                cron=f"TZ={scheduler_timezone} {cron}",
+                service_account=self.service_account,
+            )
+        self.schedule_resource_name = pipeline_job_schedule.resource_name
 
         return self
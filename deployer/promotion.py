@@ -0,0 +1,302 @@
+"""Promote pipeline versions from a tag to another in Artifact Registry.
+
+Promoting a pipeline attaches a tag, e.g. `prd`, to the version another tag points to, e.g.
+`dev`. Nothing is compiled nor uploaded: the tagged version is the very artifact that was
+validated, identified by the digest of its content. The version is resolved once, then the
+target tag is attached to that digest and read back, so a `dev` tag moved in the meantime
+cannot be promoted by mistake.
+
+Pipelines are promoted concurrently by a thread pool. The threads share one registry client,
+whose requests go through a single `requests.Session`, so they reuse a few connections instead
+of opening one per request. The client sends the same tag requests as
+`kfp.registry.RegistryClient`, which opens a new connection for each of them.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import google.auth
+import google.auth.transport.requests
+import requests
+from loguru import logger
+from requests import HTTPError
+from rich.markup import escape
+from rich.table import Table
+
+from deployer import constants
+from deployer.utils.config import VertexPipelinesSettings
+from deployer.utils.exceptions import (
+    MissingGoogleArtifactRegistryHostError,
+    PromotionError,
+    TagNotFoundError,
+)
+from deployer.utils.instrumentation import stage
+from deployer.utils.models import CustomBaseModel
+
+
+class PromotionResult(CustomBaseModel):
+    """The outcome of the promotion of a pipeline."""
+
+    pipeline_name: str
+    status: str
+    """`promoted`, `unchanged` if the tag was already on the version, or `failed`."""
+    version: Optional[str] = None
+    previous_version: Optional[str] = None
+    error: Optional[str] = None
+
+
+def get_gar_host(vertex_settings: VertexPipelinesSettings) -> str:
+    """Return the Artifact Registry host of an environment, as `VertexPipelineDeployer`.
+
+    Raises:
+        MissingGoogleArtifactRegistryHostError: Raised when the location or repo ID is missing.
+    """
+    if vertex_settings.GAR_LOCATION is None or vertex_settings.GAR_PIPELINES_REPO_ID is None:
+        raise MissingGoogleArtifactRegistryHostError(
+            "Google Artifact Registry host is missing. "
+            "Please provide GAR_LOCATION and GAR_PIPELINES_REPO_ID."
+        )
+    endpoint = (
+        vertex_settings.GAR_ENDPOINT or f"https://{vertex_settings.GAR_LOCATION}-kfp.pkg.dev"
+    )
+    return os.path.join(
+        endpoint, vertex_settings.PROJECT_ID, vertex_settings.GAR_PIPELINES_REPO_ID
+    )
+
+
+# the Artifact Registry hosts of kfp, whose packages are managed with the Artifact Registry API
+_AR_HOST_PATTERN = re.compile(
+    r"^https://(?P<location>[\w-]+)-kfp\.pkg\.dev/(?P<project_id>[^/]+)/(?P<repo_id>[^/]+)$"
+)
+_AR_API_URL = "https://artifactregistry.googleapis.com/v1"
+_AR_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+
+class _RegistryClient:
+    """Client of the tags of a Kubeflow pipelines repository, shared by several threads.
+
+    Requests are sent on the connections of a `requests.Session`. Artifact Registry hosts
+    (`https://{location}-kfp.pkg.dev/{project_id}/{repo_id}`) are managed with the Artifact
+    Registry API and the default Google credentials, refreshed once for all threads. Other hosts,
+    e.g. `deployer.fake_gcp`, serve the same endpoints under `{host}/packages`, unauthenticated.
+    """
+
+    def __init__(self, host: str, session: requests.Session) -> None:
+        """Create a client of the repository at `host`, sending requests on `session`."""
+        self.host = host.rstrip("/")
+        self._session = session
+        self._credentials = None
+        self._creds_lock = threading.Lock()
+        matched = _AR_HOST_PATTERN.match(self.host)
+        if matched is not None:
+            self._packages_name = (
+                "projects/{project_id}/locations/{location}/repositories/{repo_id}/packages"
+            ).format(**matched.groupdict())
+            self._packages_url = f"{_AR_API_URL}/{self._packages_name}"
+            self._credentials, _ = google.auth.default(scopes=_AR_SCOPES)
+        else:
+            self._packages_name = "packages"
+            self._packages_url = f"{self.host}/packages"
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> Any:
+        headers = {}
+        if self._credentials is not None:
+            with self._creds_lock:
+                if not self._credentials.valid:
+                    self._credentials.refresh(google.auth.transport.requests.Request())
+                headers["Authorization"] = f"Bearer {self._credentials.token}"
+        # no timeout, as in RegistryClient
+        response = self._session.request(
+            method, f"{self._packages_url}/{path}", json=body, headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _version_name(self, package_name: str, version: str) -> str:
+        return f"{self._packages_name}/{package_name}/versions/{version}"
+
+    def get_tag(self, package_name: str, tag: str) -> Dict[str, Any]:
+        """Return the metadata of a tag, with the `version` it points to."""
+        return self._request("GET", f"{package_name}/tags/{tag}")
+
+    def list_tags(self, package_name: str) -> List[Dict[str, Any]]:
+        """Return the metadata of the tags of a package."""
+        return self._request("GET", f"{package_name}/tags").get("tags", [])
+
+    def create_tag(self, package_name: str, version: str, tag: str) -> Dict[str, Any]:
+        """Attach a new tag to a version of a package."""
+        body = {"name": "", "version": self._version_name(package_name, version)}
+        return self._request("POST", f"{package_name}/tags?tagId={tag}", body)
+
+    def update_tag(self, package_name: str, version: str, tag: str) -> Dict[str, Any]:
+        """Move an existing tag to a version of a package."""
+        body = {"name": "", "version": self._version_name(package_name, version)}
+        return self._request("PATCH", f"{package_name}/tags/{tag}?updateMask=version", body)
+
+
+def _is_not_found(e: HTTPError) -> bool:
+    return e.response is not None and e.response.status_code == 404
+
+
+def _get_tag_version(client: _RegistryClient, package_name: str, tag: str) -> Optional[str]:
+    """Return the version a tag points to, e.g. `sha256:...`, or None if it does not exist."""
+    try:
+        tag_metadata = client.get_tag(package_name=package_name, tag=tag)
+    except HTTPError as e:
+        if _is_not_found(e):
+            return None
+        raise
+    return tag_metadata["version"].split("/")[-1]
+
+
+def promote_pipeline(
+    client: _RegistryClient,
+    pipeline_name: str,
+    from_tag: str,
+    to_tag: str,
+) -> PromotionResult:
+    """Attach `to_tag` to the version of a pipeline tagged with `from_tag`.
+
+    Args:
+        client (_RegistryClient): The client of the Artifact Registry repository.
+        pipeline_name (str): The name of the pipeline.
+        from_tag (str): The tag of the version to promote, e.g. `dev`.
+        to_tag (str): The tag to attach to the version, e.g. `prd`.
+
+    Raises:
+        TagNotFoundError: Raised when the pipeline has no version tagged with `from_tag`.
+        PromotionError: Raised when `to_tag` does not point to the promoted version afterwards,
+            e.g. because it was moved concurrently.
+
+    Returns:
+        PromotionResult: The promoted version, and the one `to_tag` pointed to before if any.
+    """
+    package_name = pipeline_name.replace("_", "-")
+    with stage("tag_resolution", pipeline=pipeline_name):
+        version = _get_tag_version(client, package_name, from_tag)
+        if version is None:
+            try:
+                tags_list = client.list_tags(package_name)
+            except HTTPError as e:
+                if not _is_not_found(e):
+                    raise
+                raise TagNotFoundError(
+                    f"Package {client.host}/{package_name} not found."
+                    " Please upload the pipeline first."
+                ) from e
+            tags_list_parsed = [x["name"].split("/")[-1] for x in tags_list]
+            raise TagNotFoundError(
+                f"Tag {from_tag} not found for package {client.host}/{package_name}."
+                f" Available tags: {tags_list_parsed}"
+            )
+        previous_version = _get_tag_version(client, package_name, to_tag)
+
+    if previous_version == version:
+        logger.info(f"Pipeline {pipeline_name} {version} already tagged {to_tag}")
+        return PromotionResult(
+            pipeline_name=pipeline_name,
+            status="unchanged",
+            version=version,
+            previous_version=previous_version,
+        )
+
+    with stage("promotion", pipeline=pipeline_name):
+        if previous_version is None:
+            client.create_tag(package_name=package_name, version=version, tag=to_tag)
+        else:
+            client.update_tag(package_name=package_name, version=version, tag=to_tag)
+        tagged_version = _get_tag_version(client, package_name, to_tag)
+    if tagged_version != version:
+        raise PromotionError(
+            f"Tag {to_tag} of pipeline {pipeline_name} points to {tagged_version}"
+            f" instead of the promoted version {version}"
+        )
+
+    logger.info(
+        f"Pipeline {pipeline_name} {version} promoted from {from_tag} to {to_tag}"
+        + (f" (was {previous_version})" if previous_version else "")
+    )
+    return PromotionResult(
+        pipeline_name=pipeline_name,
+        status="promoted",
+        version=version,
+        previous_version=previous_version,
+    )
+
+
+def promote_pipelines(
+    gar_host: str,
+    pipeline_names: List[str],
+    from_tag: str,
+    to_tag: str,
+    max_workers: int = constants.DEFAULT_PROMOTION_MAX_WORKERS,
+) -> List[PromotionResult]:
+    """Promote several pipelines concurrently, over a shared pool of connections.
+
+    A failed promotion does not stop the others: its result has the `failed` status and the
+    error.
+
+    Args:
+        gar_host (str): The Artifact Registry host, see `get_gar_host`.
+        pipeline_names (List[str]): The names of the pipelines to promote.
+        from_tag (str): The tag of the versions to promote, e.g. `dev`.
+        to_tag (str): The tag to attach to the versions, e.g. `prd`.
+        max_workers (int, optional): The maximum number of pipelines promoted at once.
+            Defaults to constants.DEFAULT_PROMOTION_MAX_WORKERS.
+
+    Returns:
+        List[PromotionResult]: The result of each pipeline, in the order of `pipeline_names`.
+    """
+    max_workers = max(1, min(max_workers, len(pipeline_names)))
+
+    def _promote(pipeline_name: str) -> PromotionResult:
+        try:
+            return promote_pipeline(client, pipeline_name, from_tag, to_tag)
+        except Exception as e:
+            logger.error(f"Failed to promote pipeline {pipeline_name}: {e}")
+            return PromotionResult(
+                pipeline_name=pipeline_name, status="failed", error=f"{type(e).__name__}: {e}"
+            )
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        client = _RegistryClient(host=gar_host, session=session)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="promote") as pool:
+            return list(pool.map(_promote, pipeline_names))
+
+
+def build_promotions_table(
+    results: Iterable[PromotionResult], from_tag: str, to_tag: str
+) -> Table:
+    """Build a table of the promotions of pipeline versions from a tag to another.
+
+    Args:
+        results (Iterable[PromotionResult]): The results of the promotions.
+        from_tag (str): The tag the versions were promoted from.
+        to_tag (str): The tag the versions were promoted to.
+
+    Returns:
+        Table: The table, with one row per pipeline.
+    """
+    table = Table(
+        title=f"Promotion from {escape(from_tag)} to {escape(to_tag)}",
+        show_header=True,
+        header_style="bold",
+    )
+    for column in ["Pipeline", "Status", "Version", f"Previous {escape(to_tag)} version"]:
+        table.add_column(column)
+    status_styles = {"promoted": "green", "unchanged": "dim", "failed": "red"}
+    for result in results:
+        table.add_row(
+            escape(result.pipeline_name),
+            f"[{status_styles[result.status]}]{result.status}[/]"
+            + (f"\n{escape(result.error)}" if result.error else ""),
+            result.version.split(":")[-1][:12] if result.version else "-",
+            result.previous_version.split(":")[-1][:12] if result.previous_version else "-",
+        )
+    return table
@@ -0,0 +1,376 @@
+"""Long-lived deployer server, answering CLI requests over a unix domain socket.
+
+`vertex-deployer serve` keeps settings, imported pipelines, compiled specs and config models in
+memory. When a server is running in the current directory, the `vertex-deployer` entrypoint
+forwards `check`, `list` and compile-only `deploy` commands to it, and prints its output.
+Otherwise, or if the server cannot answer, commands run in-process as usual.
+
+Before each request, the server looks for files changed in the vertex folder (by modification
+time, then content digest), and unloads the modules that depend on them.
+
+The client side of this module only depends on the standard library, so that forwarding a
+command does not import pydantic, rich, typer or kfp.
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from deployer import constants
+from deployer.completion import _parse_args
+
+NO_SERVER_ENV_VAR = "VERTEX_DEPLOYER_NO_SERVER"
+FORWARDED_COMMANDS = {"check", "list", "deploy"}
+
+# flags of `deploy` that make it do more than compiling: (flags setting True, flags setting False)
+_DEPLOY_REMOTE_FLAGS = {
+    "upload": (("--upload", "-u"), ("--no-upload", "-nu")),
+    "run": (("--run", "-r"), ("--no-run", "-nr")),
+    "schedule": (("--schedule", "-s"), ("--no-schedule", "-ns")),
+}
+_DEPLOY_SKIP_VALIDATION_FLAGS = (("--skip-validation", "-y"), ("--no-skip", "-n"))
+
+
+def _send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _iter_messages(sock: socket.socket) -> Iterator[Dict[str, Any]]:
+    buffer = b""
+    while True:
+        chunk = sock.recv(64 * 1024)
+        if not chunk:
+            return
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield json.loads(line)
+
+
+def _connect(socket_filepath: Path) -> Optional[socket.socket]:
+    """Connect to the server listening on this socket, if any."""
+    if getattr(socket, "AF_UNIX", None) is None or not socket_filepath.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_filepath))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _is_forwardable(args: List[str]) -> bool:
+    command, _, _ = _parse_args(args)
+    if command not in FORWARDED_COMMANDS:
+        return False
+    # interactive or long-running commands stay in the client process, and so do profiled
+    # commands, whose profile must not depend on a server being up, and commands exporting
+    # metrics, which describe this invocation
+    if os.environ.get(constants.METRICS_FILE_ENV_VAR) or os.environ.get(
+        constants.METRICS_PUSH_URL_ENV_VAR
+    ):
+        return False
+    profiling_flags = {
+        "--profile",
+        "--profile-pipelines",
+        "-pp",
+        "--profile-imports",
+        "-pi",
+        "--trace-memory",
+        "-tm",
+        "--trace-file",
+        "-tf",
+        "--metrics-file",
+        "-mf",
+        "--metrics-push-url",
+        "-mpu",
+    }
+    return not {"--watch", "-w", "--help", *profiling_flags} & set(args)
+
+
+def forward_to_server(
+    args: List[str], socket_filepath: Path = constants.SERVER_SOCKET_FILEPATH
+) -> Optional[int]:
+    """Run a CLI command on the server of the current directory, if one is running.
+
+    Args:
+        args (List[str]): The CLI arguments, without the program name.
+        socket_filepath (Path, optional): The server socket.
+            Defaults to `.vertex-deployer-cache/server.sock`.
+
+    Returns:
+        Optional[int]: The exit code of the command, or None if the command must run
+            in-process (no server running, or command not handled by the server).
+    """
+    if os.environ.get(NO_SERVER_ENV_VAR) or not _is_forwardable(args):
+        return None
+    sock = _connect(Path(socket_filepath))
+    if sock is None:
+        return None
+
+    with sock:
+        _send_message(
+            sock,
+            {
+                "command": "run",
+                "args": args,
+                "cwd": os.getcwd(),
+                "env": dict(os.environ),
+                "is_terminal": sys.stdout.isatty(),
+                "width": shutil.get_terminal_size().columns,
+            },
+        )
+        handled = False
+        for message in _iter_messages(sock):
+            if "handled" in message:
+                handled = message["handled"]
+                if not handled:
+                    return None
+            elif "stream" in message:
+                stream = sys.stdout if message["stream"] == "stdout" else sys.stderr
+                stream.write(message["data"])
+                stream.flush()
+            elif "exit_code" in message:
+                return message["exit_code"]
+
+    if not handled:
+        return None
+    sys.stderr.write("Connection to vertex-deployer server lost.\n")
+    return 1
+
+
+def stop_server(socket_filepath: Path = constants.SERVER_SOCKET_FILEPATH) -> bool:
+    """Stop the server of the current directory. Return False if no server is running."""
+    sock = _connect(Path(socket_filepath))
+    if sock is None:
+        return False
+    with sock:
+        _send_message(sock, {"command": "stop"})
+        for _ in _iter_messages(sock):
+            pass
+    return True
+
+
+class _SocketWriter:
+    """Text stream sending everything written to a client, as `stream` messages."""
+
+    def __init__(self, sock: socket.socket, name: str, is_terminal: bool) -> None:
+        self._sock = sock
+        self._name = name
+        self._is_terminal = is_terminal
+        self._disconnected = False
+
+    def write(self, data: str) -> int:
+        if data and not self._disconnected:
+            try:
+                _send_message(self._sock, {"stream": self._name, "data": data})
+            except OSError:  # client went away, e.g. Ctrl+C: let the command finish
+                self._disconnected = True
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return self._is_terminal
+
+
+def _flag_value(args: List[str], flags: tuple, default: bool) -> bool:
+    true_flags, false_flags = flags
+    value = default
+    for arg in args:
+        if arg in true_flags:
+            value = True
+        elif arg in false_flags:
+            value = False
+    return value
+
+
+class DeployerServer:
+    """Server running CLI commands in a warm interpreter. See module docstring."""
+
+    def __init__(  # noqa: D107
+        self,
+        socket_filepath: Path = constants.SERVER_SOCKET_FILEPATH,
+        idle_timeout: Optional[float] = constants.DEFAULT_SERVER_IDLE_TIMEOUT,
+    ) -> None:
+        self.socket_filepath = Path(socket_filepath)
+        self.idle_timeout = idle_timeout or None
+        self.cwd = os.getcwd()
+        self._file_digests: Dict[Path, tuple] = {}
+        self._module_graph = None
+        self._vertex_folder_path = None
+        self._pyproject_stat = None
+        self._pipeline_cache = None
+
+    def serve_forever(self) -> None:
+        """Answer requests until stopped, or until idle for `idle_timeout` seconds."""
+        from loguru import logger
+
+        if _connect(self.socket_filepath) is not None:
+            raise RuntimeError(f"A server is already listening on {self.socket_filepath}")
+        self.socket_filepath.unlink(missing_ok=True)  # left by a server that did not stop
+        self.socket_filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        self._refresh()
+        server_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server_sock.bind(str(self.socket_filepath))
+            server_sock.listen()
+            server_sock.settimeout(self.idle_timeout)
+            logger.info(f"Listening on {self.socket_filepath}")
+            while True:
+                try:
+                    conn, _ = server_sock.accept()
+                except socket.timeout:
+                    logger.info(f"No request for {self.idle_timeout}s, stopping")
+                    return
+                conn.settimeout(None)
+                with conn:
+                    if not self._handle(conn):
+                        logger.info("Stopping")
+                        return
+        finally:
+            server_sock.close()
+            self.socket_filepath.unlink(missing_ok=True)
+
+    def _handle(self, conn: socket.socket) -> bool:
+        """Answer a request. Return False if the server must stop."""
+        try:
+            request = next(_iter_messages(conn))
+        except (StopIteration, ValueError, OSError):
+            return True
+
+        if request.get("command") == "stop":
+            self.socket_filepath.unlink(missing_ok=True)  # no new client from now on
+            _send_message(conn, {"exit_code": 0})
+            return False
+
+        if request.get("cwd") != self.cwd or not self._can_handle(request["args"]):
+            _send_message(conn, {"handled": False})
+            return True
+
+        _send_message(conn, {"handled": True})
+        exit_code = self._run_command(conn, request)
+        try:
+            _send_message(conn, {"exit_code": exit_code})
+        except OSError:
+            pass
+        return True
+
+    def _can_handle(self, args: List[str]) -> bool:
+        command, _, _ = _parse_args(args)
+        if command != "deploy":
+            return True
+
+        # deploy is only handled when it compiles without prompting
+        from deployer.settings import load_deployer_settings
+
+        self._refresh()
+        deploy_settings = load_deployer_settings().deploy
+        remote_actions = [
+            _flag_value(args, flags, getattr(deploy_settings, name))
+            for name, flags in _DEPLOY_REMOTE_FLAGS.items()
+        ]
+        skip_validation = _flag_value(
+            args, _DEPLOY_SKIP_VALIDATION_FLAGS, deploy_settings.skip_validation
+        )
+        return not any(remote_actions) and skip_validation
+
+    def _refresh(self) -> None:
+        """Drop settings and modules that are out of date with files of the workspace."""
+        from deployer.settings import load_deployer_settings
+        from deployer.utils.discovery import _stat_key, find_pyproject_toml
+        from deployer.utils.watch import ModuleGraph, unload_modules
+
+        pyproject_toml_path = find_pyproject_toml(Path(self.cwd))
+        pyproject_stat = _stat_key(pyproject_toml_path)
+        if pyproject_stat != self._pyproject_stat:
+            load_deployer_settings.cache_clear()
+            self._pyproject_stat = pyproject_stat
+
+        vertex_folder_path = load_deployer_settings().vertex_folder_path
+        if vertex_folder_path != self._vertex_folder_path:
+            self._vertex_folder_path = vertex_folder_path
+            self._module_graph = ModuleGraph(vertex_folder_path)
+            self._file_digests = {}
+            self._find_changed_files()
+            return
+
+        changed_paths = self._find_changed_files()
+        if changed_paths:
+            changed_modules = self._module_graph.update(changed_paths)
+            unload_modules(self._module_graph.dependents(changed_modules))
+
+    def _find_changed_files(self) -> set:
+        """Return files created, deleted or with a new content since the last call."""
+        from deployer.utils.digest import file_digest
+        from deployer.utils.discovery import _stat_key
+        from deployer.utils.watch import iter_watched_files
+
+        previous_digests = self._file_digests
+        self._file_digests = {}
+        changed_paths = set()
+        for path in iter_watched_files(self._vertex_folder_path):
+            stat_key = _stat_key(path)
+            previous = previous_digests.pop(path, None)
+            if previous is not None and previous[0] == stat_key:
+                self._file_digests[path] = previous
+                continue
+            digest = file_digest(path)
+            self._file_digests[path] = (stat_key, digest)
+            # a file touched but not modified is not a change
+            if previous is None or previous[1] != digest:
+                changed_paths.add(path)
+        changed_paths.update(previous_digests)  # deleted files
+        return changed_paths
+
+    def _run_command(self, conn: socket.socket, request: Dict[str, Any]) -> int:
+        """Run a CLI command, sending its output to the client. Return the exit code."""
+        import contextlib
+
+        from loguru import logger
+        from rich.console import Console
+
+        from deployer.cli import app
+        from deployer.pipeline_checks import PipelineCache, use_pipeline_cache
+        from deployer.utils.console import console
+
+        self._refresh()
+        if self._pipeline_cache is None:
+            # compiled specs and config models are reused by the next requests
+            self._pipeline_cache = PipelineCache()
+
+        stdout = _SocketWriter(conn, "stdout", request["is_terminal"])
+        stderr = _SocketWriter(conn, "stderr", request["is_terminal"])
+        saved_environ = dict(os.environ)
+        saved_console = console.__dict__.copy()
+        try:
+            os.environ.clear()
+            os.environ.update(request["env"])
+            # the shared console is configured for the client terminal (colors, width)
+            client_console = Console(
+                force_terminal=request["is_terminal"] or None, width=request["width"]
+            )
+            console.__dict__.update(client_console.__dict__)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    with use_pipeline_cache(self._pipeline_cache):
+                        app(args=request["args"], prog_name="vertex-deployer")
+                except SystemExit as e:
+                    return e.code if isinstance(e.code, int) else int(e.code is not None)
+                except Exception:
+                    sys.excepthook(*sys.exc_info())  # rich traceback, as in-process
+                    return 1
+            return 0
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_environ)
+            console.__dict__.clear()
+            console.__dict__.update(saved_console)
+            logger.configure(handlers=[{"sink": sys.stderr, "level": "INFO"}])
@@ -5,11 +5,14 @@ from typing import Any, Dict, List, Optional
 import toml
 import tomlkit
 from loguru import logger
-from pydantic import ValidationError
+from pydantic import ValidationError, field_serializer, field_validator
 from tomlkit.toml_file import TOMLFile
 
 from deployer import __version__, constants
+from deployer.deployment_plan import DeploymentManifest
+from deployer.patching import PipelineSpecPatches
 from deployer.utils.config import ConfigType
+from deployer.utils.discovery import find_pyproject_toml, get_discovery_cache
 from deployer.utils.exceptions import InvalidPyProjectTOMLError
 from deployer.utils.models import CustomBaseModel
 
@@ -17,8 +20,10 @@ from deployer.utils.models import CustomBaseModel
 class _DeployerDeploySettings(CustomBaseModel):
     """Settings for Vertex Deployer `deploy` command."""
 
-    env_file: Optional[Path] = None
+    env_file: Optional[List[Path]] = None
     compile: bool = True
+    local_package: bool = False
+    patch_file: Optional[Path] = None
     upload: bool = False
     run: bool = False
     schedule: bool = False
@@ -32,6 +37,28 @@ class _DeployerDeploySettings(CustomBaseModel):
     experiment_name: Optional[str] = None
     run_name: Optional[str] = None
     skip_validation: bool = True
+    trace_memory: bool = False
+    trace_memory_file: Optional[Path] = None
+    trace_file: Optional[Path] = None
+    resume: bool = False
+    changed_only: bool = False
+    skip_unchanged_sources: bool = False
+    ledger: Optional[str] = None
+
+    @field_validator("env_file", mode="before")
+    @classmethod
+    def _env_file_to_list(cls, value: Any) -> Any:
+        """Accept a single env file, e.g. `env_file = "dev.env"` in pyproject.toml."""
+        if isinstance(value, (str, Path)):
+            return [value]
+        return value
+
+    @field_serializer("env_file", when_used="json")
+    def _serialize_env_file(self, value: Optional[List[Path]]) -> Any:
+        """Write a single env file as a path, as before several env files were supported."""
+        if value is not None and len(value) == 1:
+            return str(value[0])
+        return [str(v) for v in value] if value is not None else None
 
 
 class _DeployerCheckSettings(CustomBaseModel):
@@ -42,6 +69,20 @@ class _DeployerCheckSettings(CustomBaseModel):
     raise_error: bool = False
     warn_defaults: bool = True
     raise_for_defaults: bool = False
+    isolated: bool = False
+    max_tasks_per_child: int = constants.DEFAULT_MAX_TASKS_PER_CHILD
+    watch: bool = False
+    fail_fast: bool = False
+    output: constants.CheckOutputFormat = constants.CheckOutputFormat.table
+    output_file: Optional[Path] = None
+    summary: bool = False
+    page_size: int = constants.DEFAULT_CHECK_TABLE_PAGE_SIZE
+    profile_pipelines: bool = False
+    profile_imports: bool = False
+    profile_imports_file: Optional[Path] = None
+    trace_memory: bool = False
+    trace_memory_file: Optional[Path] = None
+    trace_file: Optional[Path] = None
 
 
 class _DeployerListSettings(CustomBaseModel):
@@ -62,6 +103,64 @@ class _DeployerConfigSettings(CustomBaseModel):
     all: bool = False
 
 
+class _DeployerServeSettings(CustomBaseModel):
+    """Settings for Vertex Deployer `serve` command."""
+
+    idle_timeout: int = constants.DEFAULT_SERVER_IDLE_TIMEOUT
+    stop: bool = False
+    detach: bool = False
+
+
+class _DeployerPlanSettings(CustomBaseModel):
+    """Settings for Vertex Deployer `plan` command."""
+
+    manifest_file: Optional[Path] = None
+    env_file: Optional[Path] = None
+    force: bool = False
+
+
+class _DeployerApplySettings(CustomBaseModel):
+    """Settings for Vertex Deployer `apply` command."""
+
+    manifest_file: Optional[Path] = None
+    env_file: Optional[Path] = None
+    force: bool = False
+
+
+class _DeployerPromoteSettings(CustomBaseModel):
+    """Settings for Vertex Deployer `promote` command."""
+
+    all: bool = False
+    from_tag: Optional[str] = None
+    to_tag: Optional[str] = None
+    env_file: Optional[Path] = None
+    max_workers: int = constants.DEFAULT_PROMOTION_MAX_WORKERS
+    skip_validation: bool = True
+
+
+class _DeployerRollbackSettings(CustomBaseModel):
+    """Settings for Vertex Deployer `rollback` command."""
+
+    to: str = "1"
+    list_versions: bool = False
+    local_package: bool = False
+    env_file: Optional[Path] = None
+    upload: bool = False
+    run: bool = False
+    schedule: bool = False
+    cron: Optional[str] = None
+    delete_last_schedule: bool = False
+    scheduler_timezone: str = constants.DEFAULT_SCHEDULER_TIMEZONE
+    tags: Optional[List[str]] = constants.DEFAULT_TAGS
+    config_filepath: Optional[Path] = None
+    config_name: Optional[str] = None
+    enable_caching: Optional[bool] = None
+    experiment_name: Optional[str] = None
+    run_name: Optional[str] = None
+    ledger: Optional[str] = None
+    skip_validation: bool = True
+
+
 class DeployerSettings(CustomBaseModel):
     """Settings for Vertex Deployer."""
 
@@ -72,6 +171,13 @@ class DeployerSettings(CustomBaseModel):
     list: _DeployerListSettings = _DeployerListSettings()
     create: _DeployerCreateSettings = _DeployerCreateSettings()
     config: _DeployerConfigSettings = _DeployerConfigSettings()
+    serve: _DeployerServeSettings = _DeployerServeSettings()
+    plan: _DeployerPlanSettings = _DeployerPlanSettings()
+    apply: _DeployerApplySettings = _DeployerApplySettings()
+    promote: _DeployerPromoteSettings = _DeployerPromoteSettings()
+    rollback: _DeployerRollbackSettings = _DeployerRollbackSettings()
+    manifest: Optional[DeploymentManifest] = None
+    patches: Optional[PipelineSpecPatches] = None
 
     @property
     def pipelines_root_path(self) -> Path:
@@ -89,15 +195,6 @@ class DeployerSettings(CustomBaseModel):
         return self.vertex_folder_path / "pipelines" / "compiled_pipelines"
 
 
-def find_pyproject_toml(path_project_root: Path) -> Optional[str]:
-    """Find the pyproject.toml file."""
-    path_pyproject_toml = path_project_root / "pyproject.toml"
-    if path_pyproject_toml.is_file():
-        if path_pyproject_toml.exists():
-            return str(path_pyproject_toml)
-    return None
-
-
 def parse_pyproject_toml(path_pyproject_toml: str) -> Dict[str, Any]:
     """Parse a pyproject toml file, pulling out relevant parts for Deployer."""
     pyproject_toml = toml.load(path_pyproject_toml)
@@ -141,6 +238,12 @@ def load_deployer_settings() -> DeployerSettings:
     path_project_root = Path.cwd().resolve()
     path_pyproject_toml = find_pyproject_toml(path_project_root)
 
+    discovery_cache = get_discovery_cache()
+    cached_settings = discovery_cache.get_settings(path_pyproject_toml)
+    if cached_settings is not None:
+        logger.trace("Using cached settings for Vertex Deployer.")
+        return DeployerSettings.model_validate(cached_settings)
+
     if path_pyproject_toml is None:
         logger.debug("No pyproject.toml file found. Using default settings for Vertex Deployer.")
         settings = {}
@@ -156,4 +259,8 @@ def load_deployer_settings() -> DeployerSettings:
 
         raise InvalidPyProjectTOMLError(msg) from e
 
+    discovery_cache.set_settings(
+        path_pyproject_toml, settings.model_dump(mode="json", exclude_unset=True)
+    )
+
     return settings
@@ -0,0 +1,100 @@
+"""Checkpoints of `deploy` invocations, to resume them after a failure.
+
+Each invocation of `deploy` records the stages it completed for each pipeline (e.g. `upload`,
+`run`, `schedule`), with the digest of their inputs and their outputs, e.g. the uploaded template
+version or the run name. The state file is named after a digest of the command options, so
+running the same command again with `--resume` finds it and skips the stages whose inputs are
+unchanged. The file is written after each completed stage, and removed once the invocation
+succeeds.
+
+Only the standard library is used.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from deployer import __version__, constants
+from deployer.utils.digest import json_digest
+
+
+def get_checkpoint_filepath(
+    command: str,
+    options: Dict[str, Any],
+    checkpoints_dirpath: Path = constants.CHECKPOINTS_DIRPATH,
+) -> Path:
+    """Return the checkpoint file of an invocation, named after a digest of its options."""
+    digest = json_digest(options).split(":")[-1]
+    return Path(checkpoints_dirpath) / f"{command}-{digest[:16]}.json"
+
+
+class Checkpoint:
+    """Completed stages of an invocation, with the digest of their inputs and their outputs."""
+
+    def __init__(self, filepath: Path, resume: bool = False) -> None:
+        """Load the checkpoint of a previous invocation if resuming, or start a new one.
+
+        Args:
+            filepath (Path): The state file, e.g. from `get_checkpoint_filepath`.
+            resume (bool, optional): Whether to skip the stages completed by the previous
+                invocation. Defaults to False.
+        """
+        self.filepath = Path(filepath)
+        self.resume = resume
+        previous = self._read()
+        self.has_previous = bool(previous["pipelines"])
+        self._data = previous if resume else {"version": __version__, "pipelines": {}}
+
+    def _read(self) -> Dict[str, Any]:
+        empty = {"version": __version__, "pipelines": {}}
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        if not isinstance(data, dict) or data.get("version") != __version__:
+            return empty
+        return data
+
+    def get_completed(
+        self, pipeline_name: str, stage_name: str, inputs: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the outputs of a stage completed with the same inputs, None otherwise.
+
+        Always None if not resuming.
+        """
+        if not self.resume:
+            return None
+        entry = self._data["pipelines"].get(pipeline_name, {}).get(stage_name)
+        if entry is None or entry["digest"] != json_digest(inputs):
+            return None
+        return entry["outputs"]
+
+    def complete(
+        self,
+        pipeline_name: str,
+        stage_name: str,
+        inputs: Dict[str, Any],
+        outputs: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record a completed stage and write the state file."""
+        self._data["pipelines"].setdefault(pipeline_name, {})[stage_name] = {
+            "digest": json_digest(inputs),
+            "outputs": outputs or {},
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._write()
+
+    def _write(self) -> None:
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        # written to a temporary file and renamed, so that a failure never leaves a partial file
+        tmp_filepath = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.tmp")
+        with open(tmp_filepath, "w") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_filepath, self.filepath)
+
+    def clear(self) -> None:
+        """Remove the state file, e.g. once the invocation succeeded."""
+        self.filepath.unlink(missing_ok=True)
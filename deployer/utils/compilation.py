@@ -0,0 +1,105 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from itertools import takewhile
+from typing import Iterator, NamedTuple
+
+import yaml
+from google.protobuf import json_format
+from kfp.compiler import pipeline_spec_builder
+
+try:
+    from kfp.dsl import base_component  # since 2.1
+except ImportError:
+    from kfp.components import base_component  # until 2.0.1
+
+
+class CompiledPipeline(NamedTuple):
+    """A pipeline compiled in memory."""
+
+    pipeline_spec: dict
+    """The pipeline spec, as a dict."""
+    content: bytes
+    """The pipeline spec serialized to YAML, as written by `kfp.compiler.Compiler`."""
+
+
+@contextmanager
+def compiled_pipeline_file(content: bytes) -> Iterator[str]:
+    """Write a compiled pipeline to a temporary file, for the APIs that only read files.
+
+    Only `RegistryClient.upload_pipeline` and `aiplatform.PipelineJob` need one: compilation
+    and patching are done in memory. The file is removed on exit.
+
+    Args:
+        content (bytes): The compiled pipeline.
+
+    Yields:
+        str: The path of the temporary file.
+    """
+    with tempfile.NamedTemporaryFile("wb", suffix=".yaml", delete=False) as f:
+        f.write(content)
+    try:
+        yield f.name
+    finally:
+        os.unlink(f.name)
+
+
+def compile_pipeline(pipeline_func: base_component.BaseComponent) -> CompiledPipeline:
+    """Compile a pipeline in memory, to the same YAML as `kfp.compiler.Compiler`.
+
+    The pipeline spec and platform spec built by the `@dsl.pipeline` decorator are serialized
+    without writing any file.
+
+    Args:
+        pipeline_func (base_component.BaseComponent): Pipeline function constructed with
+            the `@dsl.pipeline` decorator.
+
+    Returns:
+        CompiledPipeline: the pipeline spec as a dict and serialized to YAML.
+    """
+    if not isinstance(pipeline_func, base_component.BaseComponent):
+        raise ValueError(
+            "Unsupported pipeline_func type. Expected a pipeline constructed with the"
+            f" @dsl.pipeline decorator. Got: {type(pipeline_func)}"
+        )
+    pipeline_spec = json_format.MessageToDict(pipeline_func.pipeline_spec)
+    documents = [pipeline_spec]
+    platform_spec = getattr(pipeline_func, "platform_spec", None)
+    if platform_spec is not None and len(platform_spec.platforms) > 0:
+        documents.append(json_format.MessageToDict(platform_spec))
+    header_comments = pipeline_spec_builder.extract_comments_from_pipeline_spec(
+        pipeline_spec, pipeline_func.description
+    )
+    content = header_comments + yaml.dump_all(documents, sort_keys=True)
+    return CompiledPipeline(pipeline_spec=pipeline_spec, content=content.encode("utf-8"))
+
+
+def load_compiled_pipeline(content: bytes) -> CompiledPipeline:
+    """Load a pipeline compiled to YAML, e.g. by `compile_pipeline` or `kfp.compiler.Compiler`."""
+    # the platform spec, if any, is a second document
+    pipeline_spec = next(yaml.safe_load_all(content))
+    return CompiledPipeline(pipeline_spec=pipeline_spec, content=content)
+
+
+def replace_pipeline_spec(
+    compiled_pipeline: CompiledPipeline, pipeline_spec: dict
+) -> CompiledPipeline:
+    """Replace the pipeline spec of a compiled pipeline, serialized as kfp does.
+
+    The header comments (name, description, inputs and outputs) and the platform spec of the
+    compiled pipeline are kept as is: the new spec must have the same interface.
+
+    Args:
+        compiled_pipeline (CompiledPipeline): The compiled pipeline.
+        pipeline_spec (dict): The new pipeline spec.
+
+    Returns:
+        CompiledPipeline: The compiled pipeline with the new spec.
+    """
+    content = compiled_pipeline.content.decode("utf-8")
+    header_comments = "".join(
+        takewhile(lambda line: line.startswith("#"), content.splitlines(keepends=True))
+    )
+    documents = [pipeline_spec, *list(yaml.safe_load_all(content))[1:]]
+    content = header_comments + yaml.dump_all(documents, sort_keys=True)
+    return CompiledPipeline(pipeline_spec=pipeline_spec, content=content.encode("utf-8"))
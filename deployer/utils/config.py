@@ -15,7 +15,9 @@ from tomlkit.toml_file import TOMLFile
 
 from deployer.constants import ConfigType
 from deployer.utils.console import console
+from deployer.utils.discovery import CONFIG_SUFFIXES, list_files_with_suffixes
 from deployer.utils.exceptions import BadConfigError, UnsupportedConfigFileError
+from deployer.utils.instrumentation import count, stage
 
 
 class VertexPipelinesSettings(BaseSettings):  # noqa: D101
@@ -27,6 +29,9 @@ class VertexPipelinesSettings(BaseSettings):  # noqa: D101
     GAR_PIPELINES_REPO_ID: str
     VERTEX_STAGING_BUCKET_NAME: str
     VERTEX_SERVICE_ACCOUNT: str
+    # endpoints overrides, e.g. to use the local stand-in server of `deployer.fake_gcp`
+    VERTEX_API_ENDPOINT: Optional[str] = None
+    GAR_ENDPOINT: Optional[str] = None
 
 
 def load_vertex_settings(env_file: Optional[Path] = None) -> VertexPipelinesSettings:
@@ -65,13 +70,15 @@ def validate_or_log_settings(
 
     if skip_validation:
         msg += "\nLoaded settings for Vertex:"
-        msg += "\n" + "\n".join(f"  {k:<30} {v:<30}" for k, v in settings.model_dump().items())
+        msg += "\n" + "\n".join(
+            f"  {k:<30} {v:<30}" for k, v in settings.model_dump(exclude_none=True).items()
+        )
         logger.info(msg)
     else:
         table = Table(show_header=True, header_style="bold", show_lines=True)
         table.add_column("Setting Name")
         table.add_column("Value")
-        for k, v in settings.model_dump().items():
+        for k, v in settings.model_dump(exclude_none=True).items():
             table.add_row(k, v)
 
         console.print(msg)
@@ -91,11 +98,7 @@ def list_config_filepaths(configs_root_path: Path, pipeline_name: str) -> List[P
         List[Path]: A list of `Path` objects representing the config filepaths.
     """
     configs_dirpath = Path(configs_root_path) / pipeline_name
-    config_filepaths = [
-        x
-        for config_type in ConfigType.__members__.keys()
-        for x in configs_dirpath.glob(f"*.{config_type}")
-    ]
+    config_filepaths = list_files_with_suffixes(configs_dirpath, CONFIG_SUFFIXES)
     return config_filepaths
 
 
@@ -118,7 +121,12 @@ def load_config(config_filepath: Path) -> Tuple[Optional[dict], Optional[dict]]:
         UnsupportedConfigFileError: If the file has an unsupported extension.
     """
     config_filepath = Path(config_filepath)
+    count("configs")
+    with stage("config_loading", config=config_filepath.name):
+        return _load_config(config_filepath)
+
 
+def _load_config(config_filepath: Path) -> Tuple[Optional[dict], Optional[dict]]:
     if config_filepath.suffix == ".json":
         with open(config_filepath, "r") as f:
             parameter_values = json.load(f)
@@ -0,0 +1,27 @@
+"""Content digests, used to detect changes independently of file modification times."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+DIGEST_ALGORITHM = "sha256"
+
+
+def bytes_digest(content: bytes) -> str:
+    """Return the digest of some content, prefixed with the algorithm (e.g. `sha256:...`)."""
+    return f"{DIGEST_ALGORITHM}:{hashlib.new(DIGEST_ALGORITHM, content).hexdigest()}"
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """Return the digest of a file content, or None if it cannot be read."""
+    try:
+        content = Path(path).read_bytes()
+    except OSError:
+        return None
+    return bytes_digest(content)
+
+
+def json_digest(value: Any) -> str:
+    """Return the digest of a json-serializable value, independent of the order of dict keys."""
+    return bytes_digest(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
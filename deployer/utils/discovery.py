@@ -0,0 +1,200 @@
+"""Discovery of pipelines and config files, with an on-disk cache.
+
+This module only depends on the standard library so that it can be used in latency sensitive
+code paths (e.g. shell completion) without importing pydantic, rich or kfp.
+"""
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from deployer import __version__, constants
+from deployer.utils.instrumentation import count
+
+StatKey = Optional[Tuple[int, int]]
+
+CONFIG_SUFFIXES = tuple(f".{config_type}" for config_type in constants.ConfigType.__members__)
+
+
+def list_python_modules(dirpath: Path) -> List[str]:
+    """List the names of the python modules (without extension) in a directory.
+
+    `__init__.py` is ignored. Returns an empty list if the directory does not exist.
+    """
+    return sorted(
+        p.stem for p in list_files_with_suffixes(dirpath, [".py"]) if p.stem != "__init__"
+    )
+
+
+def list_files_with_suffixes(dirpath: Path, suffixes: Iterable[str]) -> List[Path]:
+    """List the files of a directory having one of the given suffixes, in a single pass.
+
+    Args:
+        dirpath (Path): The directory to scan. It is not scanned recursively.
+        suffixes (Iterable[str]): The suffixes to keep, with the leading dot (e.g. `.json`).
+
+    Returns:
+        List[Path]: The matching file paths, sorted by name. Empty if the directory does not exist.
+    """
+    suffixes = tuple(suffixes)
+    try:
+        with os.scandir(dirpath) as it:
+            filenames = [
+                entry.name for entry in it if entry.name.endswith(suffixes) and entry.is_file()
+            ]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return [Path(dirpath) / name for name in sorted(filenames)]
+
+
+def find_pyproject_toml(path_project_root: Path) -> Optional[str]:
+    """Find the pyproject.toml file."""
+    path_pyproject_toml = path_project_root / "pyproject.toml"
+    if path_pyproject_toml.is_file():
+        return str(path_pyproject_toml)
+    return None
+
+
+def _stat_key(path: Optional[Path]) -> StatKey:
+    """Return (mtime_ns, size) of a path, or None if it does not exist."""
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _stat_key_from_json(value: Optional[List[int]]) -> StatKey:
+    return tuple(value) if value is not None else None
+
+
+class DiscoveryCache:
+    """On-disk cache of deployer settings, pipeline names and config file lists.
+
+    Every entry stores the mtime of the file or directory it was computed from. Adding, removing
+    or renaming a file in a directory updates its mtime, so an entry is recomputed as soon as its
+    source changes. The cache is also invalidated when the deployer version changes.
+
+    Entries are computed lazily and the cache file is written once, when calling `save`.
+    """
+
+    def __init__(self, filepath: Path = constants.DISCOVERY_CACHE_FILEPATH) -> None:  # noqa: D107
+        self.filepath = Path(filepath)
+        self._data = self._read()
+        self._dirty = False
+
+    def _read(self) -> Dict[str, Any]:
+        empty = {
+            "version": __version__,
+            "settings": None,
+            "pipelines": {},
+            "configs": {},
+            "tags": [],
+        }
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        if not isinstance(data, dict) or data.get("version") != __version__:
+            return empty
+        return {**empty, **data}
+
+    def _get_entry(self, section: str, key: str, stat_key: StatKey) -> Optional[Any]:
+        entry = self._data[section].get(key)
+        if entry is None or _stat_key_from_json(entry["stat"]) != stat_key:
+            count("cache_misses", cache="discovery")
+            return None
+        count("cache_hits", cache="discovery")
+        return entry["value"]
+
+    def _set_entry(self, section: str, key: str, stat_key: StatKey, value: Any) -> None:
+        self._data[section][key] = {"stat": stat_key, "value": value}
+        self._dirty = True
+
+    def get_settings(self, pyproject_toml_path: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the cached settings for this pyproject.toml, or None if not cached or stale."""
+        entry = self._data["settings"]
+        if entry is None or entry["path"] != pyproject_toml_path:
+            count("cache_misses", cache="discovery")
+            return None
+        if _stat_key_from_json(entry["stat"]) != _stat_key(pyproject_toml_path):
+            count("cache_misses", cache="discovery")
+            return None
+        count("cache_hits", cache="discovery")
+        return entry["value"]
+
+    def set_settings(self, pyproject_toml_path: Optional[str], settings: Dict[str, Any]) -> None:
+        """Store the resolved settings (json-serializable dict) for this pyproject.toml."""
+        self._data["settings"] = {
+            "path": pyproject_toml_path,
+            "stat": _stat_key(pyproject_toml_path),
+            "value": settings,
+        }
+        self._dirty = True
+
+    def list_pipeline_names(self, pipelines_root_path: Path) -> List[str]:
+        """List pipeline names in the pipelines root path, using the cache if up to date."""
+        key = str(pipelines_root_path)
+        stat_key = _stat_key(pipelines_root_path)
+        names = self._get_entry("pipelines", key, stat_key)
+        if names is None:
+            names = list_python_modules(pipelines_root_path)
+            self._set_entry("pipelines", key, stat_key, names)
+        return names
+
+    def list_config_filepaths(self, configs_root_path: Path, pipeline_name: str) -> List[Path]:
+        """List config filepaths for a pipeline, using the cache if up to date."""
+        configs_dirpath = Path(configs_root_path) / pipeline_name
+        key = str(configs_dirpath)
+        stat_key = _stat_key(configs_dirpath)
+        filenames = self._get_entry("configs", key, stat_key)
+        if filenames is None:
+            filepaths = list_files_with_suffixes(configs_dirpath, CONFIG_SUFFIXES)
+            self._set_entry("configs", key, stat_key, [p.name for p in filepaths])
+            return filepaths
+        return [configs_dirpath / name for name in filenames]
+
+    def list_tags(self) -> List[str]:
+        """List the tags used in previous uploads."""
+        return list(self._data["tags"])
+
+    def add_tags(self, tags: Iterable[str]) -> None:
+        """Record tags used in an upload, most recent first."""
+        tags = [t for t in tags if t]
+        self._data["tags"] = tags + [t for t in self._data["tags"] if t not in tags]
+        self._data["tags"] = self._data["tags"][: constants.MAX_CACHED_TAGS]
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache file if it was updated. Errors are ignored: the cache is optional."""
+        if not self._dirty:
+            return
+        try:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            gitignore_path = self.filepath.parent / ".gitignore"
+            if not gitignore_path.exists():
+                gitignore_path.write_text("# Created by vertex-deployer\n*\n")
+            # write to a temporary file and rename it so that concurrent readers never see
+            # a partially written cache
+            tmp_filepath = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.tmp")
+            with open(tmp_filepath, "w") as f:
+                json.dump(self._data, f)
+            os.replace(tmp_filepath, self.filepath)
+        except OSError:
+            return
+        self._dirty = False
+
+
+def get_discovery_cache() -> DiscoveryCache:
+    """Return the discovery cache of the current working directory."""
+    return _get_discovery_cache(Path.cwd())
+
+
+@lru_cache()
+def _get_discovery_cache(cwd: Path) -> DiscoveryCache:
+    return DiscoveryCache(cwd / constants.DISCOVERY_CACHE_FILEPATH)
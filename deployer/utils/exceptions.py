@@ -20,3 +20,11 @@ class InvalidPyProjectTOMLError(Exception):
 
 class TemplateFileCreationError(Exception):
     """Exception raised when a file cannot be created from a template."""
+
+
+class PromotionError(Exception):
+    """Raised when a pipeline version cannot be promoted to a tag."""
+
+
+class PipelineVersionNotFoundError(Exception):
+    """Raised when a version of a pipeline is not found in the compiled pipelines store."""
@@ -0,0 +1,245 @@
+"""Timing of module imports, like `python -X importtime` but scoped to blocks of code.
+
+Imports are timed within `traced_imports` blocks (e.g. importing a pipeline), and recorded only
+in contexts collecting them (see `collect_imports`). While a collector is active, a finder is
+inserted at the start of `sys.meta_path` to wrap module loaders with a timer. Modules already
+imported are not imported again, so their cost goes to the first block importing them.
+Only the standard library is used, except by `build_import_timings_table`.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+
+class ImportRecord(NamedTuple):
+    """An imported module."""
+
+    module: str
+    """The module name."""
+    imported_by: Optional[str]
+    """The module whose import triggered this one, None for the block's own imports."""
+    project_module: Optional[str]
+    """The closest project module among the modules whose import triggered this one."""
+    is_project: bool
+    """Whether the module is a project module, i.e. a file of the current directory."""
+    self_time: float
+    """The time spent executing the module, without its imports, in seconds."""
+    cumulative_time: float
+    """The time spent executing the module and its imports, in seconds."""
+
+
+class _ImportFrame:
+    __slots__ = ("children_time", "is_project", "module")
+
+    def __init__(self, module: str, is_project: bool):
+        self.module = module
+        self.is_project = is_project
+        self.children_time = 0.0
+
+
+_collectors: ContextVar[Tuple[List[ImportRecord], ...]] = ContextVar(
+    "import_collectors", default=()
+)
+_tracing: ContextVar[bool] = ContextVar("tracing_imports", default=False)
+_local = threading.local()
+_finder_users = 0
+_finder_lock = threading.Lock()
+
+
+def _get_stack() -> List[_ImportFrame]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _is_project_file(origin: Optional[str]) -> bool:
+    if not origin or not origin.endswith(".py"):
+        return False
+    path = Path(origin).resolve()
+    if {"site-packages", "dist-packages"} & set(path.parts):
+        return False
+    return Path.cwd().resolve() in path.parents
+
+
+class _TimedLoader:
+    """Loader proxy timing the execution of a module."""
+
+    def __init__(self, loader: Any):
+        self._loader = loader
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        stack = _get_stack()
+        parent = stack[-1] if stack else None
+        project_module = next((f.module for f in reversed(stack) if f.is_project), None)
+        frame = _ImportFrame(module.__name__, _is_project_file(getattr(module, "__file__", None)))
+
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumulative_time = time.perf_counter() - start
+            stack.pop()
+            if parent is not None:
+                parent.children_time += cumulative_time
+            # modules keep their original loader once imported
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+            record = ImportRecord(
+                module=frame.module,
+                imported_by=parent.module if parent is not None else None,
+                project_module=project_module,
+                is_project=frame.is_project,
+                self_time=cumulative_time - frame.children_time,
+                cumulative_time=cumulative_time,
+            )
+            for collector in _collectors.get():
+                collector.append(record)
+
+
+class _TimedImportFinder:
+    """Meta path finder wrapping the loaders found by the next finders with `_TimedLoader`."""
+
+    def find_spec(self, fullname: str, path: Any, target: Any = None) -> Any:
+        if not _tracing.get() or not _collectors.get():
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+_finder = _TimedImportFinder()
+
+
+@contextmanager
+def traced_imports() -> Iterator[None]:
+    """Time the modules imported within the block, if imports are collected."""
+    token = _tracing.set(True)
+    try:
+        yield
+    finally:
+        _tracing.reset(token)
+
+
+@contextmanager
+def collect_imports() -> Iterator[List[ImportRecord]]:
+    """Collect the modules imported in `traced_imports` blocks of the current context."""
+    global _finder_users
+
+    records: List[ImportRecord] = []
+    with _finder_lock:
+        if _finder_users == 0:
+            sys.meta_path.insert(0, _finder)
+        _finder_users += 1
+    token = _collectors.set((*_collectors.get(), records))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+        with _finder_lock:
+            _finder_users -= 1
+            if _finder_users == 0:
+                sys.meta_path.remove(_finder)
+
+
+def summarize_imports(records: List[ImportRecord], n_heaviest: int = 3) -> List[Dict[str, Any]]:
+    """Attribute import times to the project modules that triggered them.
+
+    The cost of a project module is its own execution time, plus the cumulative time of the
+    non-project modules it imports directly (including what they import).
+
+    Args:
+        records (List[ImportRecord]): The collected imports.
+        n_heaviest (int, optional): Number of heaviest imports listed per project module.
+            Defaults to 3.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per project module, sorted by decreasing total time, with
+            `module`, `total_time`, `self_time`, `imports_time` and `heaviest_imports`, a list of
+            (module, cumulative time) tuples.
+    """
+    summary = {
+        r.module: {"module": r.module, "self_time": r.self_time, "imports": []}
+        for r in records
+        if r.is_project
+    }
+    for record in records:
+        if not record.is_project and record.imported_by in summary:
+            summary[record.imported_by]["imports"].append((record.module, record.cumulative_time))
+
+    entries = []
+    for entry in summary.values():
+        imports = sorted(entry.pop("imports"), key=lambda x: x[1], reverse=True)
+        imports_time = sum(t for _, t in imports)
+        entries.append(
+            {
+                **entry,
+                "total_time": entry["self_time"] + imports_time,
+                "imports_time": imports_time,
+                "heaviest_imports": imports[:n_heaviest],
+            }
+        )
+    return sorted(entries, key=lambda x: x["total_time"], reverse=True)
+
+
+def build_import_timings_table(result: Any, top: int = 10) -> "Table":
+    """Build a table of the project modules of a pipeline ranked by import time.
+
+    Args:
+        result (Any): The `PipelineCheckResult` of the pipeline, with import timings.
+        top (int, optional): Maximum number of project modules in the table. Defaults to 10.
+
+    Returns:
+        Table: The table, with the time spent in each project module and in the modules it
+            imports directly.
+    """
+    from rich.markup import escape
+    from rich.table import Table
+
+    import_time = result.stage_timings.get("import", 0.0)
+    table = Table(
+        title=f"Imports of {escape(result.pipeline_name)} ({import_time * 1000:.0f} ms)",
+        show_header=True,
+        header_style="bold",
+    )
+    for column in ["#", "Project module", "Total (ms)", "Own code (ms)", "Imports (ms)"]:
+        table.add_column(column, justify="left" if column == "Project module" else "right")
+    table.add_column("Heaviest imports")
+
+    entries = summarize_imports([ImportRecord(**r) for r in result.import_timings])
+    for rank, entry in enumerate(entries[:top], start=1):
+        table.add_row(
+            str(rank),
+            entry["module"],
+            f"{entry['total_time'] * 1000:.1f}",
+            f"{entry['self_time'] * 1000:.1f}",
+            f"{entry['imports_time'] * 1000:.1f}",
+            "\n".join(f"{m} ({t * 1000:.1f} ms)" for m, t in entry["heaviest_imports"]),
+        )
+    if not entries:
+        table.caption = "No project module imported (already imported by a previous pipeline)"
+    elif len(entries) > top:
+        table.caption = f"{len(entries) - top} more project module(s) in the JSON report"
+    return table
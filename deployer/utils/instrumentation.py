@@ -0,0 +1,184 @@
+"""Timing of processing stages, e.g. importing, compiling or validating a pipeline.
+
+Code to measure is wrapped in `stage`. Records of finished stages are sent to the collectors of
+the current context (see `collect_stages`) and to global listeners (see `add_listener`), e.g. to
+collect the stages of all threads (see `collect_all_stages`). Global start listeners are also
+called when a stage starts (see `add_start_listener`).
+
+Events that are counted rather than timed, e.g. cache hits, are recorded with `count`, and
+delivered the same way (see `collect_counts` and `add_count_listener`).
+Only the standard library is used.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class StageRecord(NamedTuple):
+    """A finished stage."""
+
+    name: str
+    """The stage name, e.g. `compile`."""
+    labels: Dict[str, Any]
+    """The labels of the stage and of the stages it is nested in, e.g. the pipeline name."""
+    start: float
+    """The start time, from `time.perf_counter`."""
+    elapsed: float
+    """The wall-clock duration, in seconds."""
+    process_id: int
+    """The id of the process that ran the stage."""
+    thread_name: str
+    """The name of the thread that ran the stage, e.g. `MainThread`."""
+
+
+class CountRecord(NamedTuple):
+    """A counted event."""
+
+    name: str
+    """The event name, e.g. `cache_hits`."""
+    labels: Dict[str, Any]
+    """The labels of the event and of the stages it happened in, e.g. the pipeline name."""
+    value: float
+    """The count."""
+    process_id: int
+    """The id of the process where the event happened."""
+
+
+_current_labels: ContextVar[Optional[Dict[str, Any]]] = ContextVar("stage_labels", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("stage_name", default=None)
+_collectors: ContextVar[Tuple[List[StageRecord], ...]] = ContextVar("stage_collectors", default=())
+_count_collectors: ContextVar[Tuple[List[CountRecord], ...]] = ContextVar(
+    "count_collectors", default=()
+)
+_listeners: List[Callable[[StageRecord], None]] = []
+_start_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+_count_listeners: List[Callable[[CountRecord], None]] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener: Callable[[StageRecord], None]) -> None:
+    """Call a function with every finished stage, in any thread."""
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[StageRecord], None]) -> None:  # noqa: D103
+    with _listeners_lock:
+        _listeners.remove(listener)
+
+
+def add_start_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    """Call a function with the name and labels of every started stage, in any thread."""
+    with _listeners_lock:
+        _start_listeners.append(listener)
+
+
+def remove_start_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:  # noqa: D103
+    with _listeners_lock:
+        _start_listeners.remove(listener)
+
+
+def add_count_listener(listener: Callable[[CountRecord], None]) -> None:
+    """Call a function with every counted event, in any thread."""
+    with _listeners_lock:
+        _count_listeners.append(listener)
+
+
+def remove_count_listener(listener: Callable[[CountRecord], None]) -> None:  # noqa: D103
+    with _listeners_lock:
+        _count_listeners.remove(listener)
+
+
+def current_labels() -> Dict[str, Any]:
+    """Return the labels of the stages the caller is in."""
+    return _current_labels.get() or {}
+
+
+def current_stage() -> Optional[str]:
+    """Return the name of the innermost stage the caller is in, if any."""
+    return _current_stage.get()
+
+
+@contextmanager
+def stage(name: str, **labels: Any) -> Iterator[None]:
+    """Measure the duration of a block of code.
+
+    Args:
+        name (str): The stage name.
+        **labels: Labels of the stage, inherited by nested stages.
+    """
+    labels = {**current_labels(), **labels}
+    token = _current_labels.set(labels)
+    stage_token = _current_stage.set(name)
+    for listener in list(_start_listeners):
+        listener(name, labels)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = StageRecord(
+            name,
+            labels,
+            start,
+            time.perf_counter() - start,
+            os.getpid(),
+            threading.current_thread().name,
+        )
+        _current_stage.reset(stage_token)
+        _current_labels.reset(token)
+        for collector in _collectors.get():
+            collector.append(record)
+        for listener in list(_listeners):
+            listener(record)
+
+
+@contextmanager
+def collect_stages() -> Iterator[List[StageRecord]]:
+    """Collect the stages finished in the current context (thread or task) within the block."""
+    records: List[StageRecord] = []
+    token = _collectors.set((*_collectors.get(), records))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def collect_all_stages() -> Iterator[List[StageRecord]]:
+    """Collect the stages finished in any thread within the block."""
+    records: List[StageRecord] = []
+    add_listener(records.append)
+    try:
+        yield records
+    finally:
+        remove_listener(records.append)
+
+
+def count(name: str, value: float = 1, **labels: Any) -> None:
+    """Count an event, e.g. a cache hit.
+
+    Args:
+        name (str): The event name.
+        value (float, optional): The count. Defaults to 1.
+        **labels: Labels of the event, added to the labels of the current stages.
+    """
+    record = CountRecord(name, {**current_labels(), **labels}, value, os.getpid())
+    for collector in _count_collectors.get():
+        collector.append(record)
+    for listener in list(_count_listeners):
+        listener(record)
+
+
+@contextmanager
+def collect_counts() -> Iterator[List[CountRecord]]:
+    """Collect the events counted in the current context (thread or task) within the block."""
+    records: List[CountRecord] = []
+    token = _count_collectors.set((*_count_collectors.get(), records))
+    try:
+        yield records
+    finally:
+        _count_collectors.reset(token)
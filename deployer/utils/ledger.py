@@ -0,0 +1,201 @@
+"""Ledger of the pipelines deployed in each environment, used by `deploy --changed-only`.
+
+For each environment (project, region and Artifact Registry repository) and pipeline, the ledger
+records what was last deployed: the digests of the pipeline sources, of the compiled pipeline
+spec and of the config file, the uploaded version and its tags, and the schedule definition.
+`deploy --changed-only` compares them with the current ones to skip the upload and schedule of
+unchanged pipelines, and with `--skip-unchanged-sources` their compilation.
+
+The ledger is a JSON file, stored locally (by default in `.vertex-deployer-cache/ledger.json`) or
+in a Cloud Storage bucket (`gs://bucket/path/ledger.json`) to be shared between machines, e.g.
+CI runners. Updates are merged with concurrent ones: under a file lock locally, and with
+generation preconditions in Cloud Storage.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from loguru import logger
+
+from deployer import __version__, constants
+from deployer.utils.config import VertexPipelinesSettings
+from deployer.utils.digest import file_digest, json_digest
+from deployer.utils.instrumentation import stage
+from deployer.utils.locking import directory_lock
+from deployer.utils.watch import ModuleGraph, path_to_module_name
+
+LedgerData = Dict[str, Any]
+
+GCS_URI_PREFIX = "gs://"
+MAX_GCS_UPDATE_ATTEMPTS = 5
+
+
+def get_environment_key(vertex_settings: VertexPipelinesSettings) -> str:
+    """Return the key of an environment in the ledger, e.g. `project/region/location/repo`."""
+    return "/".join(
+        str(v)
+        for v in (
+            vertex_settings.PROJECT_ID,
+            vertex_settings.GCP_REGION,
+            vertex_settings.GAR_LOCATION,
+            vertex_settings.GAR_PIPELINES_REPO_ID,
+        )
+    )
+
+
+def get_sources_digest(module_graph: ModuleGraph, pipeline_filepath: Path) -> Optional[str]:
+    """Return the digest of the sources a pipeline is compiled from, None if unknown.
+
+    The sources are the pipeline module and the modules of the directory it imports, directly or
+    not, along with the versions of kfp and of the deployer. Modules imported from outside the
+    directory (e.g. an installed package) are not followed.
+    """
+    try:
+        module_names = module_graph.dependencies([path_to_module_name(pipeline_filepath)])
+    except ValueError:  # not relative to the working directory
+        return None
+    if not module_names:
+        return None
+    try:
+        kfp_version = version("kfp")
+    except PackageNotFoundError:
+        kfp_version = None
+    files = {str(p): file_digest(p) for p in module_graph.get_paths(module_names)}
+    return json_digest({"files": files, "kfp": kfp_version, "deployer": __version__})
+
+
+class _LocalLedgerStore:
+    def __init__(self, filepath: Path) -> None:
+        self.filepath = Path(filepath)
+
+    def _read(self) -> LedgerData:
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def read(self) -> LedgerData:
+        return self._read()
+
+    def update(self, func: Callable[[LedgerData], LedgerData]) -> LedgerData:
+        with directory_lock(self.filepath.parent):
+            data = func(self._read())
+            tmp_filepath = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.tmp")
+            with open(tmp_filepath, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_filepath, self.filepath)
+        return data
+
+
+class _GCSLedgerStore:
+    def __init__(self, uri: str, project_id: Optional[str] = None) -> None:
+        from google.cloud import storage
+
+        bucket_name, _, blob_name = uri[len(GCS_URI_PREFIX) :].partition("/")
+        if not bucket_name or not blob_name:
+            raise ValueError(f"Invalid ledger URI {uri}, expected gs://bucket/path/ledger.json")
+        self.uri = uri
+        self.bucket = storage.Client(project=project_id).bucket(bucket_name)
+        self.blob_name = blob_name
+
+    def _read(self) -> Tuple[LedgerData, int]:
+        from google.api_core.exceptions import NotFound
+
+        blob = self.bucket.blob(self.blob_name)
+        try:
+            blob.reload()
+            content = blob.download_as_bytes(if_generation_match=blob.generation)
+        except NotFound:
+            return {}, 0
+        data = json.loads(content or b"{}")
+        return (data if isinstance(data, dict) else {}), blob.generation
+
+    def read(self) -> LedgerData:
+        return self._read()[0]
+
+    def update(self, func: Callable[[LedgerData], LedgerData]) -> LedgerData:
+        from google.api_core.exceptions import PreconditionFailed
+
+        for _ in range(MAX_GCS_UPDATE_ATTEMPTS):
+            data, generation = self._read()
+            data = func(data)
+            try:
+                self.bucket.blob(self.blob_name).upload_from_string(
+                    json.dumps(data, indent=2, sort_keys=True),
+                    content_type="application/json",
+                    if_generation_match=generation,
+                )
+                return data
+            except PreconditionFailed:  # updated concurrently, merge again
+                logger.debug(f"Ledger {self.uri} updated concurrently, retrying")
+        raise RuntimeError(
+            f"Could not update ledger {self.uri}: updated concurrently"
+            f" {MAX_GCS_UPDATE_ATTEMPTS} times"
+        )
+
+
+class DeploymentLedger:
+    """What was last deployed of each pipeline in an environment.
+
+    The ledger is only read by `get`, on its first call. Entries are recorded with `record` and
+    written with `save`, which merges them with the current content of the ledger: recording a
+    deploy does not require reading the ledger beforehand.
+    """
+
+    def __init__(
+        self,
+        environment: str,
+        uri: Union[str, Path] = constants.DEPLOYMENT_LEDGER_FILEPATH,
+        project_id: Optional[str] = None,
+    ) -> None:
+        """Create the ledger of an environment, without reading it.
+
+        Args:
+            environment (str): The key of the environment, see `get_environment_key`.
+            uri (Union[str, Path], optional): A local file path, or a Cloud Storage URI
+                (`gs://bucket/path/ledger.json`). Defaults to `.vertex-deployer-cache/ledger.json`.
+            project_id (Optional[str], optional): The project to bill Cloud Storage requests to.
+                Defaults to None, for the project of the credentials.
+        """
+        self.environment = environment
+        if str(uri).startswith(GCS_URI_PREFIX):
+            self._store = _GCSLedgerStore(str(uri), project_id=project_id)
+        else:
+            self._store = _LocalLedgerStore(Path(uri))
+        self._entries: Optional[LedgerData] = None
+        self._updates: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, pipeline_name: str) -> Dict[str, Any]:
+        """Return what was last deployed of a pipeline, empty if it never was."""
+        if self._entries is None:
+            with stage("ledger_read"):
+                self._entries = self._store.read().get(self.environment, {})
+        return {**self._entries.get(pipeline_name, {}), **self._updates.get(pipeline_name, {})}
+
+    def record(self, pipeline_name: str, **fields: Any) -> None:
+        """Record deployed fields of a pipeline, e.g. `pipeline_spec` or `schedule`."""
+        self._updates.setdefault(pipeline_name, {}).update(
+            fields, updated_at=datetime.now(timezone.utc).isoformat()
+        )
+
+    def save(self) -> None:
+        """Write the recorded entries, merged with the current content of the ledger."""
+        if not self._updates:
+            return
+
+        def _merge(data: LedgerData) -> LedgerData:
+            entries = data.setdefault(self.environment, {})
+            for pipeline_name, fields in self._updates.items():
+                entries[pipeline_name] = {**entries.get(pipeline_name, {}), **fields}
+            return data
+
+        with stage("ledger_write"):
+            data = self._store.update(_merge)
+        self._entries = data.get(self.environment, {})
+        self._updates = {}
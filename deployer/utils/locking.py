@@ -0,0 +1,83 @@
+"""Advisory inter-process file locks.
+
+Locks are advisory: they only protect against other processes that take the same lock, e.g.
+two `vertex-deployer deploy` invocations writing to the same `compiled_pipelines` folder.
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+from loguru import logger
+
+from deployer.utils.instrumentation import stage
+
+LOCK_FILENAME = ".lock"
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _try_lock(fd: int, shared: bool) -> bool:
+    """Try to acquire the lock without blocking, return True if acquired."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _lock(fd: int, shared: bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    else:  # msvcrt has no shared locks, LK_LOCK retries for 10 seconds before raising
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def directory_lock(dirpath: Union[str, Path], shared: bool = False) -> Iterator[None]:
+    """Hold an advisory lock on a directory, blocking until it is available.
+
+    The lock is taken on a `.lock` file inside the directory, which is created if needed.
+
+    Args:
+        dirpath (Union[str, Path]): The directory to lock. Created if it does not exist.
+        shared (bool, optional): Whether to take a shared (read) lock instead of an
+            exclusive (write) lock. Shared locks are exclusive on Windows. Defaults to False.
+    """
+    dirpath = Path(dirpath)
+    dirpath.mkdir(parents=True, exist_ok=True)
+    lock_filepath = dirpath / LOCK_FILENAME
+
+    fd = os.open(lock_filepath, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if not _try_lock(fd, shared):
+            logger.info(f"Waiting for another process to release the lock on {dirpath}")
+            with stage("lock_wait", lock=str(dirpath)):
+                _lock(fd, shared)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
@@ -1,7 +1,28 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
 from enum import Enum
+from typing import IO, Any, Dict, List, Optional
 
 from loguru import logger
 
+from deployer import constants
+from deployer.utils.instrumentation import current_labels, current_stage
+
+try:
+    from select import PIPE_BUF
+except ImportError:  # Windows
+    PIPE_BUF = 512
+
+JSON_LOGS_FLUSH_INTERVAL = 0.1
+
+# configuration of the current process, to configure worker processes the same way
+_logging_config: Dict[str, Any] = {}
+_json_sinks: List["JsonLogSink"] = []
+
 
 class LoguruLevel(str, Enum):  # noqa: D101
     TRACE = "TRACE"
@@ -24,3 +45,169 @@ class DisableLogger(object):
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:  # noqa: D105
         logger.enable(self.name)
+
+
+class JsonLogSink:
+    """Loguru sink writing log records as JSON lines, from a buffer.
+
+    Records are serialized in the logging thread and appended to an in-memory buffer, which a
+    background thread writes every `flush_interval` seconds: logging never waits for the stream.
+    Lines are written with one system call per chunk of whole lines no larger than `PIPE_BUF`,
+    so that lines written by several processes to the same pipe or file are never interleaved.
+    Streams without file descriptor, e.g. captured streams, are written synchronously.
+
+    Each line has the time, level, message and origin of the record, the correlation ID of the
+    invocation, the milliseconds elapsed since it started, the current stage and the stage
+    labels (e.g. `pipeline`, `run_name`), and the extra fields bound to the logger.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str],
+        correlation_id: str,
+        start_time: float,
+        flush_interval: float = JSON_LOGS_FLUSH_INTERVAL,
+    ) -> None:
+        """Create a sink writing to a stream.
+
+        Args:
+            stream (IO[str]): The stream to write to, e.g. `sys.stderr`.
+            correlation_id (str): The ID of the invocation, shared with worker processes.
+            start_time (float): The start time of the invocation, from `time.time`.
+            flush_interval (float, optional): Seconds between writes of the buffer.
+                Defaults to 0.1.
+        """
+        self.stream = stream
+        self.correlation_id = correlation_id
+        self.start_time = start_time
+        self.flush_interval = flush_interval
+        try:
+            self._fd: Optional[int] = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            self._fd = None
+        self._buffer: List[bytes] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def format_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the JSON fields of a loguru record."""
+        fields = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "message": record["message"],
+            "name": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "process": record["process"].id,
+            "thread": record["thread"].name,
+            "correlation_id": self.correlation_id,
+            "elapsed_ms": round((record["time"].timestamp() - self.start_time) * 1000, 3),
+            "stage": current_stage(),
+            **current_labels(),
+            **record["extra"],
+        }
+        if record["exception"] is not None:
+            exc_type, exc_value, _ = record["exception"]
+            fields["exception"] = f"{getattr(exc_type, '__name__', exc_type)}: {exc_value}"
+        return fields
+
+    def write(self, message: Any) -> None:
+        """Serialize a loguru message, and buffer it or write it."""
+        line = json.dumps(self.format_record(message.record), default=str) + "\n"
+        data = line.encode("utf-8")
+        if self._fd is None:
+            with self._write_lock:
+                self.stream.write(line)
+                self.stream.flush()
+            return
+        with self._lock:
+            self._buffer.append(data)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="json-log-sink", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush_buffer()
+
+    def flush_buffer(self) -> None:
+        """Write the buffered lines."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        chunk = b""
+        with self._write_lock:
+            for line in lines:
+                if chunk and len(chunk) + len(line) > PIPE_BUF:
+                    self._write_all(chunk)
+                    chunk = b""
+                chunk += line
+            self._write_all(chunk)
+
+    def _write_all(self, data: bytes) -> None:
+        while data:
+            data = data[os.write(self._fd, data) :]
+
+    def stop(self) -> None:
+        """Stop the background thread and write the remaining lines, e.g. when removed."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush_buffer()
+        self._stopped.clear()
+
+
+def configure_logging(
+    level: str = constants.DEFAULT_LOG_LEVEL,
+    log_format: constants.LogFormat = constants.LogFormat.text,
+    correlation_id: Optional[str] = None,
+    start_time: Optional[float] = None,
+) -> None:
+    """Configure the loguru handler of the process, writing to stderr.
+
+    Args:
+        level (str, optional): The logging level. Defaults to "INFO".
+        log_format (constants.LogFormat, optional): Whether to write human-readable lines or
+            JSON lines (see `JsonLogSink`). Defaults to text.
+        correlation_id (Optional[str], optional): The ID of the invocation in JSON logs, the same
+            in worker processes. Defaults to the `VERTEX_DEPLOYER_CORRELATION_ID` environment
+            variable, e.g. a CI build ID, or a random ID.
+        start_time (Optional[float], optional): The start time of the invocation, from
+            `time.time`, for the elapsed time in JSON logs. Defaults to now.
+    """
+    correlation_id = (
+        correlation_id or os.environ.get(constants.CORRELATION_ID_ENV_VAR) or uuid.uuid4().hex
+    )
+    start_time = start_time if start_time is not None else time.time()
+    _logging_config.clear()
+    _logging_config.update(
+        level=level,
+        log_format=log_format,
+        correlation_id=correlation_id,
+        start_time=start_time,
+    )
+
+    _json_sinks.clear()
+    if log_format == constants.LogFormat.json:
+        sink = JsonLogSink(sys.stderr, correlation_id=correlation_id, start_time=start_time)
+        _json_sinks.append(sink)
+        logger.configure(handlers=[{"sink": sink, "level": level, "format": "{message}"}])
+    else:
+        logger.configure(handlers=[{"sink": sys.stderr, "level": level}])
+
+
+def get_logging_config() -> Dict[str, Any]:
+    """Return the arguments of the last `configure_logging` call, e.g. for worker processes."""
+    return dict(_logging_config)
+
+
+def flush_logs() -> None:
+    """Write the buffered JSON log lines, e.g. before a worker process exits."""
+    for sink in _json_sinks:
+        sink.flush_buffer()
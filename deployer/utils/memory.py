@@ -0,0 +1,314 @@
+"""Memory usage of processing stages, e.g. importing, compiling or validating a pipeline.
+
+Within `trace_memory` blocks, allocations are traced with `tracemalloc`, and each stage (see
+`deployer.utils.instrumentation.stage`) gets a `StageMemory` record: the memory it allocated and
+still used when it ended, its peak memory, the top allocation sites and the peak RSS of the
+process. Allocation sites are found by comparing snapshots taken when stages start and end;
+the memory used by these snapshots is not counted. Snapshots get slower as more memory is traced,
+so blocks should be kept small, e.g. one per pipeline.
+
+Peaks of nested stages are tracked by resetting the tracemalloc peak at each stage boundary, which
+requires python >= 3.9. With older versions, peaks are only measured at stage boundaries.
+Only the standard library is used, except by `build_memory_table`.
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from deployer.utils import instrumentation
+from deployer.utils.instrumentation import (
+    StageRecord,
+    add_listener,
+    add_start_listener,
+    remove_listener,
+    remove_start_listener,
+)
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+DEFAULT_N_ALLOCATION_SITES = 5
+
+_IGNORED_FILES = (
+    tracemalloc.__file__,
+    instrumentation.__file__,
+    __file__,
+    "<frozen importlib._bootstrap>",
+    "<unknown>",
+)
+
+
+class StageMemory(NamedTuple):
+    """Memory used by a finished stage."""
+
+    name: str
+    """The stage name, e.g. `compile`."""
+    labels: Dict[str, Any]
+    """The labels of the stage and of the stages it is nested in, e.g. the pipeline name."""
+    allocated: int
+    """The memory allocated by the stage and still used when it ended, in bytes."""
+    peak: int
+    """The peak memory used during the stage, above the memory used when it started, in bytes."""
+    top_sites: List[Tuple[str, int]]
+    """The (file:line, bytes) allocation sites with the most memory allocated by the stage."""
+    peak_rss: Optional[int]
+    """The peak resident set size of the process when the stage ended, in bytes."""
+
+
+class _OpenStage:
+    __slots__ = ("peak", "snapshot", "snapshot_size", "start_memory")
+
+    def __init__(self, start_memory: int):
+        self.start_memory = start_memory
+        self.peak = start_memory
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.snapshot_size = 0
+
+
+def get_peak_rss() -> Optional[int]:
+    """Return the peak resident set size of the process in bytes, None if unknown."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024  # kilobytes on linux
+
+
+def _format_site(frame: tracemalloc.Frame) -> str:
+    """Format an allocation site as `path:line`, relative to its `sys.path` entry if any."""
+    filename = frame.filename
+    roots = [p for p in sys.path if p and filename.startswith(os.path.join(p, ""))]
+    if roots:
+        filename = os.path.relpath(filename, max(roots, key=len))
+    return f"{filename}:{frame.lineno}"
+
+
+def _top_sites(
+    start: tracemalloc.Snapshot, end: tracemalloc.Snapshot, n_sites: int
+) -> List[Tuple[str, int]]:
+    diffs = (
+        diff
+        for diff in end.compare_to(start, "lineno")
+        if diff.size_diff > 0 and diff.traceback[0].filename not in _IGNORED_FILES
+    )
+    return [(_format_site(diff.traceback[0]), diff.size_diff) for diff in islice(diffs, n_sites)]
+
+
+class _MemoryTracer:
+    """Tracer of stages memory, started with the first `trace_memory` block."""
+
+    def __init__(self, n_sites: int):
+        self.n_sites = n_sites
+        self.collectors: List[List[StageMemory]] = []
+        self.started_tracemalloc = False
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._open_stages: List[_OpenStage] = []
+        self._snapshots_size = 0  # memory used by the snapshots of open stages
+
+    def _stack(self) -> List[_OpenStage]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _traced_memory(self) -> int:
+        """Update the peaks of open stages and return the traced memory."""
+        current, peak = tracemalloc.get_traced_memory()
+        if not hasattr(tracemalloc, "reset_peak"):  # python < 3.9
+            peak = current
+        for open_stage in self._open_stages:
+            open_stage.peak = max(open_stage.peak, peak - self._snapshots_size)
+        return current - self._snapshots_size
+
+    def _reset_peak(self) -> None:
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    def on_start(self, name: str, labels: Dict[str, Any]) -> None:
+        with self._lock:
+            open_stage = _OpenStage(self._traced_memory())
+            if self.n_sites > 0:
+                before = tracemalloc.get_traced_memory()[0]
+                open_stage.snapshot = tracemalloc.take_snapshot()
+                open_stage.snapshot_size = tracemalloc.get_traced_memory()[0] - before
+                self._snapshots_size += open_stage.snapshot_size
+            self._open_stages.append(open_stage)
+            self._stack().append(open_stage)
+            self._reset_peak()
+
+    def on_end(self, record: StageRecord) -> None:
+        with self._lock:
+            stack = self._stack()
+            if not stack:  # started before tracing
+                return
+            open_stage = stack.pop()
+            end_memory = self._traced_memory()
+            top_sites = []
+            if open_stage.snapshot is not None:
+                top_sites = _top_sites(
+                    open_stage.snapshot, tracemalloc.take_snapshot(), self.n_sites
+                )
+                open_stage.snapshot = None
+                self._snapshots_size -= open_stage.snapshot_size
+            self._open_stages.remove(open_stage)
+            self._reset_peak()
+
+            memory = StageMemory(
+                name=record.name,
+                labels=record.labels,
+                allocated=end_memory - open_stage.start_memory,
+                peak=open_stage.peak - open_stage.start_memory,
+                top_sites=top_sites,
+                peak_rss=get_peak_rss(),
+            )
+            for collector in self.collectors:
+                collector.append(memory)
+
+
+_tracer: Optional[_MemoryTracer] = None
+_tracer_lock = threading.Lock()
+
+
+@contextmanager
+def trace_memory(n_sites: int = DEFAULT_N_ALLOCATION_SITES) -> Iterator[List[StageMemory]]:
+    """Trace the memory used by the stages run within the block, in any thread.
+
+    tracemalloc is started if it is not already tracing, and stopped after the block.
+
+    Args:
+        n_sites (int, optional): Number of top allocation sites recorded per stage, 0 to skip
+            snapshots. Defaults to 5.
+
+    Yields:
+        List[StageMemory]: The memory records of stages, appended as they end.
+    """
+    global _tracer
+
+    records: List[StageMemory] = []
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = _MemoryTracer(n_sites)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracer.started_tracemalloc = True
+            add_start_listener(_tracer.on_start)
+            add_listener(_tracer.on_end)
+        tracer = _tracer
+        tracer.collectors.append(records)
+    try:
+        yield records
+    finally:
+        with _tracer_lock:
+            tracer.collectors.remove(records)
+            if not tracer.collectors:
+                remove_start_listener(tracer.on_start)
+                remove_listener(tracer.on_end)
+                if tracer.started_tracemalloc:
+                    tracemalloc.stop()
+                _tracer = None
+
+
+def summarize_memory(records: List[StageMemory]) -> List[Dict[str, Any]]:
+    """Aggregate stage memory records by pipeline and stage name.
+
+    Args:
+        records (List[StageMemory]): The records, e.g. of all configs validated for a pipeline.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per (pipeline, stage) in order of first appearance, with
+            `pipeline`, `stage`, `count`, `allocated` (sum), `peak` (max), `peak_rss` (max) and
+            `top_sites`, a list of (file:line, bytes) summed over records.
+    """
+    entries: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+    for record in records:
+        key = (record.labels.get("pipeline"), record.name)
+        entry = entries.setdefault(
+            key,
+            {
+                "pipeline": key[0],
+                "stage": key[1],
+                "count": 0,
+                "allocated": 0,
+                "peak": 0,
+                "peak_rss": None,
+                "top_sites": {},
+            },
+        )
+        entry["count"] += 1
+        entry["allocated"] += record.allocated
+        entry["peak"] = max(entry["peak"], record.peak)
+        if record.peak_rss is not None:
+            entry["peak_rss"] = max(entry["peak_rss"] or 0, record.peak_rss)
+        for site, size in record.top_sites:
+            entry["top_sites"][site] = entry["top_sites"].get(site, 0) + size
+
+    for entry in entries.values():
+        top_sites = sorted(entry["top_sites"].items(), key=lambda x: x[1], reverse=True)
+        entry["top_sites"] = top_sites[:DEFAULT_N_ALLOCATION_SITES]
+    return list(entries.values())
+
+
+def format_size(size: Optional[int]) -> str:
+    """Format a number of bytes, e.g. `12.3 MiB`."""
+    if size is None:
+        return "-"
+    value = float(size)
+    for unit in ["B", "KiB", "MiB"]:
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.2f} GiB"
+
+
+def build_memory_table(
+    pipeline_name: str, memory_stages: List[Dict[str, Any]], n_sites: int = 3
+) -> "Table":
+    """Build a table of the memory used by each stage of a pipeline.
+
+    Args:
+        pipeline_name (str): The pipeline name.
+        memory_stages (List[Dict[str, Any]]): The `StageMemory` records of the pipeline
+            stages, as dicts.
+        n_sites (int, optional): Number of top allocation sites shown per stage. Defaults to 3.
+
+    Returns:
+        Table: The table, with one row per stage name, summing the memory allocated by stages
+            run several times (e.g. the validation of each config).
+    """
+    from rich.markup import escape
+    from rich.table import Table
+
+    entries = summarize_memory([StageMemory(**r) for r in memory_stages])
+    peak_rss = max((e["peak_rss"] for e in entries if e["peak_rss"] is not None), default=None)
+    table = Table(
+        title=f"Memory of {escape(pipeline_name)} (peak RSS: {format_size(peak_rss)})",
+        show_header=True,
+        header_style="bold",
+    )
+    for column in ["Stage", "Runs", "Allocated", "Peak"]:
+        table.add_column(column, justify="left" if column == "Stage" else "right", no_wrap=True)
+    table.add_column("Top allocation sites")
+
+    for entry in entries:
+        table.add_row(
+            entry["stage"],
+            str(entry["count"]),
+            format_size(entry["allocated"]),
+            format_size(entry["peak"]),
+            "\n".join(
+                f"{escape(site)} ({format_size(size)})"
+                for site, size in entry["top_sites"][:n_sites]
+            ),
+        )
+    if not entries:
+        table.caption = "No stage traced"
+    return table
@@ -0,0 +1,219 @@
+"""Metrics of deployer commands in the Prometheus text format, e.g. for CI dashboards.
+
+Within `collect_metrics` blocks, the durations of stages (see
+`deployer.utils.instrumentation.stage`) are aggregated into histograms, and counted events (see
+`deployer.utils.instrumentation.count`), e.g. cache hits and misses or loaded configs, into
+counters. Calls to Google Cloud APIs retried by `google.api_core` are counted from its logs.
+Metrics are labelled by command and pipeline. They can be written to a file read by the node
+exporter textfile collector, or pushed to a Pushgateway.
+Only the standard library is used.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from deployer.utils.instrumentation import (
+    CountRecord,
+    StageRecord,
+    add_count_listener,
+    add_listener,
+    count,
+    remove_count_listener,
+    remove_listener,
+)
+
+METRICS_PREFIX = "vertex_deployer"
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+COUNTERS_HELP = {
+    "api_retries": "Calls to Google Cloud APIs retried after an error.",
+    "cache_hits": "Lookups answered by a cache.",
+    "cache_misses": "Lookups not answered by a cache.",
+    "configs": "Config files loaded.",
+}
+# labels of records kept in metrics, others (e.g. config file names) have a high cardinality
+METRIC_LABELS = ("pipeline", "cache")
+RETRY_LOGGER_NAME = "google.api_core.retry"
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self) -> None:
+        self.bucket_counts = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, upper_bound in enumerate(DURATION_BUCKETS):
+            if value <= upper_bound:
+                self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsCollector:
+    """Histograms of stage durations and counters of events, for one command."""
+
+    def __init__(self, command: str) -> None:  # noqa: D107
+        self.command = command
+        self._lock = threading.Lock()
+        self._histograms: Dict[LabelsKey, _Histogram] = {}
+        self._counters: Dict[str, Dict[LabelsKey, float]] = {}
+
+    def _labels_key(self, labels: Dict[str, Any], **extra: str) -> LabelsKey:
+        kept = {k: str(v) for k, v in labels.items() if k in METRIC_LABELS and v is not None}
+        return tuple(sorted({"command": self.command, **kept, **extra}.items()))
+
+    def add_stage(self, record: StageRecord) -> None:
+        """Add the duration of a finished stage to its histogram."""
+        key = self._labels_key(record.labels, stage=record.name)
+        with self._lock:
+            self._histograms.setdefault(key, _Histogram()).observe(record.elapsed)
+
+    def add_count(self, record: CountRecord) -> None:
+        """Add a counted event to its counter."""
+        key = self._labels_key(record.labels)
+        with self._lock:
+            counter = self._counters.setdefault(record.name, {})
+            counter[key] = counter.get(key, 0) + record.value
+
+    def add_worker_records(
+        self, stages: Iterable[Dict[str, Any]], counts: Iterable[Dict[str, Any]]
+    ) -> None:
+        """Add the stages and counts of worker processes, e.g. sent back with check results.
+
+        Records of the current process are ignored, as they are collected as they happen.
+        """
+        pid = os.getpid()
+        for stage_record in stages:
+            if stage_record["process_id"] != pid:
+                self.add_stage(StageRecord(**stage_record))
+        for count_record in counts:
+            if count_record["process_id"] != pid:
+                self.add_count(CountRecord(**count_record))
+
+    def format(self) -> str:
+        """Format the metrics in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            if self._histograms:
+                name = f"{METRICS_PREFIX}_stage_duration_seconds"
+                lines.append(f"# HELP {name} Duration of the stages of deployer commands.")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(self._histograms.items()):
+                    for upper_bound, bucket_count in zip(
+                        (*DURATION_BUCKETS, "+Inf"), (*histogram.bucket_counts, histogram.count)
+                    ):
+                        bucket_key = (*key, ("le", str(upper_bound)))
+                        lines.append(f"{name}_bucket{_format_labels(bucket_key)} {bucket_count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for counter_name, counter in sorted(self._counters.items()):
+                name = f"{METRICS_PREFIX}_{counter_name}_total"
+                help_text = COUNTERS_HELP.get(counter_name, f"Counted {counter_name} events.")
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(counter.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "".join(f"{line}\n" for line in lines)
+
+
+def _format_labels(key: LabelsKey) -> str:
+    def _escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _RetryLogHandler(logging.Handler):
+    """Count the retries logged by `google.api_core.retry`."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.getMessage().startswith("Retrying due to"):
+            count("api_retries")
+
+
+@contextmanager
+def collect_metrics(command: str) -> Iterator[MetricsCollector]:
+    """Collect the metrics of the stages and events of any thread within the block.
+
+    Args:
+        command (str): The command name, used as label of all metrics.
+
+    Yields:
+        MetricsCollector: The metrics, updated as stages end and events are counted.
+    """
+    collector = MetricsCollector(command)
+    retry_logger = logging.getLogger(RETRY_LOGGER_NAME)
+    retry_handler = _RetryLogHandler()
+    retry_logger_level = retry_logger.level
+    # retries are logged at debug level
+    retry_logger.setLevel(logging.DEBUG)
+    retry_logger.addHandler(retry_handler)
+    add_listener(collector.add_stage)
+    add_count_listener(collector.add_count)
+    try:
+        yield collector
+    finally:
+        remove_count_listener(collector.add_count)
+        remove_listener(collector.add_stage)
+        retry_logger.removeHandler(retry_handler)
+        retry_logger.setLevel(retry_logger_level)
+
+
+def write_metrics_file(metrics: str, filepath: Union[str, Path]) -> None:
+    """Write metrics to a file, atomically so that collectors never read a partial file."""
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_filepath = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(metrics)
+        os.chmod(tmp_filepath, 0o644)  # readable by collectors running as another user
+        os.replace(tmp_filepath, filepath)
+    finally:
+        Path(tmp_filepath).unlink(missing_ok=True)
+
+
+def push_metrics(
+    metrics: str,
+    gateway_url: str,
+    grouping_key: Optional[Dict[str, str]] = None,
+    timeout: float = 10,
+) -> None:
+    """Push metrics to a Pushgateway, replacing the metrics of the same job and grouping key.
+
+    Args:
+        metrics (str): The metrics, in the Prometheus text format.
+        gateway_url (str): The Pushgateway URL, e.g. `http://localhost:9091`.
+        grouping_key (Optional[Dict[str, str]], optional): Labels identifying the pushed group
+            of metrics, in addition to the `vertex_deployer` job. Defaults to None.
+        timeout (float, optional): The request timeout, in seconds. Defaults to 10.
+
+    Raises:
+        urllib.error.URLError: If the metrics cannot be pushed.
+    """
+    path = f"/metrics/job/{METRICS_PREFIX}"
+    for label, value in (grouping_key or {}).items():
+        path += f"/{label}/{urllib.parse.quote(value, safe='')}"
+    request = urllib.request.Request(  # noqa: S310
+        gateway_url.rstrip("/") + path,
+        data=metrics.encode("utf-8"),
+        method="PUT",
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout):  # noqa: S310
+        pass
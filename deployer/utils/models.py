@@ -1,5 +1,5 @@
 from inspect import Parameter, signature
-from typing import Callable, Literal, Optional, Protocol
+from typing import Callable, Optional, Protocol
 
 from pydantic import BaseModel, ConfigDict, create_model
 
@@ -59,15 +59,3 @@ def create_model_from_func(
     )
 
     return func_model
-
-
-class ChecksTableRow(CustomBaseModel):
-    """A class to represent a row of the check results table."""
-
-    status: Literal["✅", "⚠️", "❌"]
-    pipeline: str
-    pipeline_error_message: Optional[str] = None
-    config_file: str
-    attribute: Optional[str] = None
-    config_error_type: Optional[str] = None
-    config_error_message: Optional[str] = None
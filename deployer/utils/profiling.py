@@ -0,0 +1,85 @@
+"""Profiling of CLI commands and pipeline checks with pyinstrument.
+
+pyinstrument is an optional dependency, installed with the `profiling` extra. It is only
+imported when a profile is requested.
+"""
+
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from loguru import logger
+
+from deployer.constants import PROFILES_DIRPATH, ProfileFormat
+
+PROFILE_SUFFIXES = {
+    ProfileFormat.html: ".html",
+    ProfileFormat.text: ".txt",
+    ProfileFormat.speedscope: ".speedscope.json",
+}
+
+
+def _get_profiler_class() -> Any:
+    try:
+        from pyinstrument import Profiler
+    except ImportError as e:
+        raise ImportError(
+            "Profiling requires pyinstrument. Install it with"
+            " `pip install vertex-deployer[profiling]`."
+        ) from e
+    return Profiler
+
+
+def check_profiler_installed() -> None:
+    """Raise an ImportError with installation instructions if pyinstrument is missing."""
+    _get_profiler_class()
+
+
+def get_profile_filepath(name: str, profile_format: Optional[ProfileFormat] = None) -> Path:
+    """Return the default path of a profile report, e.g. `profiles/check-20240101-120000.html`.
+
+    Args:
+        name (str): The name of the profiled command.
+        profile_format (Optional[ProfileFormat], optional): The report format. Defaults to None,
+            to get the path of a directory of reports instead.
+
+    Returns:
+        Path: The report path, in `.vertex-deployer-cache/profiles`.
+    """
+    suffix = "" if profile_format is None else PROFILE_SUFFIXES[profile_format]
+    return PROFILES_DIRPATH / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}"
+
+
+def _render(profiler: Any, profile_format: ProfileFormat) -> str:
+    if profile_format == ProfileFormat.html:
+        return profiler.output_html()
+    if profile_format == ProfileFormat.speedscope:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        return profiler.output(SpeedscopeRenderer())
+    return profiler.output_text(unicode=True)
+
+
+@contextmanager
+def profiling(output_filepath: Path, profile_format: ProfileFormat) -> Iterator[None]:
+    """Profile a block of code and write the report to a file.
+
+    Profiles can be nested, e.g. a profile of each pipeline check within the profile of
+    the whole `check` command.
+
+    Args:
+        output_filepath (Path): The report file. Parent directories are created.
+        profile_format (ProfileFormat): The report format.
+    """
+    # async_mode disabled: pyinstrument refuses to start a profiler while another one runs
+    # in the same context otherwise
+    profiler = _get_profiler_class()(async_mode="disabled")
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        output_filepath.parent.mkdir(parents=True, exist_ok=True)
+        output_filepath.write_text(_render(profiler, profile_format), encoding="utf-8")
+        logger.info(f"Profile written to '{output_filepath}'")
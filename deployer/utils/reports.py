@@ -0,0 +1,250 @@
+"""Machine-readable reports of check results, with one record per pipeline and config file."""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+from xml.etree import ElementTree
+
+from deployer.constants import CheckOutputFormat
+from deployer.utils.import_timing import ImportRecord, summarize_imports
+from deployer.utils.memory import StageMemory, summarize_memory
+
+PIPELINE_STAGES = ("import", "compile", "model_creation")
+
+
+def build_check_records(results: Iterable[Any], warn_defaults: bool = True) -> List[Dict]:
+    """Flatten check results into one record per (pipeline, config file).
+
+    Pipelines without config files get a single `skipped` record with no config file. When a
+    pipeline cannot be imported or compiled, the pipeline error is reported for all its configs.
+
+    Args:
+        results (Iterable[Any]): The `PipelineCheckResult` of each checked pipeline.
+        warn_defaults (bool, optional): whether configs using default values have a `warning`
+            status instead of `passed`. Defaults to True.
+
+    Returns:
+        List[Dict]: The records, with `pipeline`, `config_file`, `status` (one of `passed`,
+            `warning`, `failed`, `skipped`), `errors`, `warnings` and `timings` in seconds.
+    """
+    records = []
+    for result in results:
+        pipeline_timings = {
+            s: result.stage_timings[s] for s in PIPELINE_STAGES if s in result.stage_timings
+        }
+        pipeline_errors = result.errors.get("pipeline level error")
+
+        if not result.config_paths:
+            records.append(
+                {
+                    "pipeline": result.pipeline_name,
+                    "config_file": None,
+                    "status": "failed" if pipeline_errors else "skipped",
+                    "errors": pipeline_errors or [],
+                    "warnings": [],
+                    "timings": pipeline_timings,
+                }
+            )
+
+        for config_path in result.config_paths:
+            errors = pipeline_errors or result.errors.get(config_path.name, [])
+            warnings = result.warnings.get(config_path.name, [])
+            if errors:
+                status = "failed"
+            elif warn_defaults and warnings:
+                status = "warning"
+            else:
+                status = "passed"
+
+            timings = dict(pipeline_timings)
+            if config_path.name in result.config_timings:
+                timings["config_validation"] = result.config_timings[config_path.name]
+
+            records.append(
+                {
+                    "pipeline": result.pipeline_name,
+                    "config_file": str(config_path),
+                    "status": status,
+                    "errors": errors,
+                    "warnings": warnings,
+                    "timings": timings,
+                }
+            )
+    return records
+
+
+def _format_junit(results: Iterable[Any], warn_defaults: bool) -> str:
+    """One testsuite per pipeline, one testcase per config file.
+
+    Pipeline stage timings are shared by all configs of a pipeline: they are reported as
+    testsuite properties, and testcase times only include config validation.
+    """
+    testsuites = ElementTree.Element("testsuites", name="vertex-deployer check")
+    n_tests, n_failures, total_time = 0, 0, 0.0
+
+    for result in results:
+        records = build_check_records([result], warn_defaults=warn_defaults)
+        testsuite = ElementTree.SubElement(
+            testsuites,
+            "testsuite",
+            name=result.pipeline_name,
+            tests=str(len(records)),
+            failures=str(sum(r["status"] == "failed" for r in records)),
+            skipped=str(sum(r["status"] == "skipped" for r in records)),
+            time=f"{result.elapsed:.6f}",
+        )
+        properties = ElementTree.SubElement(testsuite, "properties")
+        for stage_name, seconds in result.stage_timings.items():
+            ElementTree.SubElement(
+                properties, "property", name=f"{stage_name}_seconds", value=f"{seconds:.6f}"
+            )
+
+        for record in records:
+            testcase = ElementTree.SubElement(
+                testsuite,
+                "testcase",
+                classname=record["pipeline"],
+                name=record["config_file"] or "(no config files)",
+                time=f"{record['timings'].get('config_validation', 0.0):.6f}",
+            )
+            if record["status"] == "skipped":
+                ElementTree.SubElement(testcase, "skipped", message="No config files found")
+            for error in record["errors"]:
+                failure = ElementTree.SubElement(
+                    testcase, "failure", type=error["type"], message=error["msg"]
+                )
+                failure.text = f"{error.get('field', '')}: {error['msg']}".lstrip(": ")
+            if record["warnings"]:
+                system_out = ElementTree.SubElement(testcase, "system-out")
+                system_out.text = "\n".join(
+                    f"{w['type']}: {w.get('field', '')}: {w['msg']}" for w in record["warnings"]
+                )
+
+        n_tests += len(records)
+        n_failures += sum(r["status"] == "failed" for r in records)
+        total_time += result.elapsed
+
+    testsuites.set("tests", str(n_tests))
+    testsuites.set("failures", str(n_failures))
+    testsuites.set("time", f"{total_time:.6f}")
+    if hasattr(ElementTree, "indent"):  # python >= 3.9
+        ElementTree.indent(testsuites)
+    return ElementTree.tostring(testsuites, encoding="unicode", xml_declaration=True) + "\n"
+
+
+def format_check_report(
+    results: Iterable[Any], output_format: CheckOutputFormat, warn_defaults: bool = True
+) -> str:
+    """Format check results as a JSON or JUnit XML report.
+
+    Args:
+        results (Iterable[Any]): The `PipelineCheckResult` of each checked pipeline.
+        output_format (CheckOutputFormat): `json` or `junit`.
+        warn_defaults (bool, optional): whether configs using default values have a `warning`
+            status. Defaults to True.
+
+    Returns:
+        str: The report.
+    """
+    if output_format == CheckOutputFormat.json:
+        records = build_check_records(results, warn_defaults=warn_defaults)
+        return json.dumps(records, indent=2) + "\n"
+    if output_format == CheckOutputFormat.junit:
+        return _format_junit(results, warn_defaults=warn_defaults)
+    raise ValueError(f"Unsupported report format: {output_format}")
+
+
+def format_import_timings_report(results: Iterable[Any]) -> str:
+    """Format the import times of checked pipelines as a JSON report.
+
+    Args:
+        results (Iterable[Any]): The `PipelineCheckResult` of each checked pipeline, with
+            import timings.
+
+    Returns:
+        str: The report, with for each pipeline its import time, the time attributed to each
+            project module, and the import times of all modules, in seconds.
+    """
+    pipelines = []
+    for result in results:
+        project_modules = summarize_imports([ImportRecord(**r) for r in result.import_timings])
+        for entry in project_modules:
+            entry["heaviest_imports"] = [
+                {"module": module, "cumulative_time": cumulative_time}
+                for module, cumulative_time in entry["heaviest_imports"]
+            ]
+        pipelines.append(
+            {
+                "pipeline": result.pipeline_name,
+                "import_time": result.stage_timings.get("import"),
+                "project_modules": project_modules,
+                "modules": result.import_timings,
+            }
+        )
+    return json.dumps({"pipelines": pipelines}, indent=2) + "\n"
+
+
+def format_memory_report(memory_stages: List[Dict[str, Any]]) -> str:
+    """Format the memory used by stages as a JSON report.
+
+    Args:
+        memory_stages (List[Dict[str, Any]]): The `StageMemory` records of the stages, as dicts.
+
+    Returns:
+        str: The report, with the peak RSS of the process, the memory used by each stage name of
+            each pipeline, and all stage records, in bytes.
+    """
+    summary = summarize_memory([StageMemory(**r) for r in memory_stages])
+    for entry in summary:
+        entry["top_sites"] = [{"site": site, "size": size} for site, size in entry["top_sites"]]
+    peak_rss = max((e["peak_rss"] for e in summary if e["peak_rss"] is not None), default=None)
+    report = {"peak_rss": peak_rss, "stages": summary, "records": memory_stages}
+    return json.dumps(report, indent=2) + "\n"
+
+
+def format_chrome_trace(stages: List[Dict[str, Any]]) -> str:
+    """Format stages as a trace in the Chrome Trace Event format, e.g. for https://ui.perfetto.dev.
+
+    Each stage is a complete event, with its labels as arguments. Stages run by each thread of
+    each process (e.g. the workers of `check --isolated`) are on their own track, where nested
+    stages are shown below the stages they are in. Start times are from `time.perf_counter`,
+    which uses a system-wide clock on Linux, macOS and Windows: stages run by different
+    processes are on the same timeline.
+
+    Args:
+        stages (List[Dict[str, Any]]): The `StageRecord` of the stages, as dicts.
+
+    Returns:
+        str: The trace, with times in microseconds since the start of the first stage.
+    """
+    origin = min((s["start"] for s in stages), default=0.0)
+    main_pid = os.getpid()
+    thread_ids: Dict[Tuple[int, str], int] = {}
+    events: List[Dict[str, Any]] = []
+    # parents first, so that stages starting at the same time are nested
+    for record in sorted(stages, key=lambda s: (s["start"], -s["elapsed"])):
+        pid = record["process_id"]
+        track = (pid, record["thread_name"])
+        if track not in thread_ids:
+            if all(p != pid for p, _ in thread_ids):
+                process_name = "vertex-deployer" if pid == main_pid else f"worker {pid}"
+                events.append(_metadata_event("process_name", pid, 0, process_name))
+            thread_ids[track] = len(thread_ids) + 1
+            events.append(_metadata_event("thread_name", pid, thread_ids[track], track[1]))
+        events.append(
+            {
+                "name": record["name"],
+                "cat": "stage",
+                "ph": "X",
+                "ts": round((record["start"] - origin) * 1e6, 3),
+                "dur": round(record["elapsed"] * 1e6, 3),
+                "pid": pid,
+                "tid": thread_ids[track],
+                "args": record["labels"],
+            }
+        )
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str) + "\n"
+
+
+def _metadata_event(name: str, pid: int, tid: int, value: str) -> Dict[str, Any]:
+    return {"name": name, "ph": "M", "pid": pid, "tid": tid, "args": {"name": value}}
@@ -0,0 +1,233 @@
+"""Content-addressed store of compiled pipelines, to roll back to a previous version.
+
+The store lives in a `.store` folder of the local package path (by default
+`vertex/pipelines/compiled_pipelines/.store`):
+- `versions/{digest}.yaml` holds each compiled pipeline spec once, named after the digest of its
+  content, the same as the version of the pipeline uploaded to Artifact Registry;
+- `refs/{pipeline_name}.json` holds the history of the versions of a pipeline, most recently
+  used first. The first one is the current version of the pipeline.
+
+A version is added when a pipeline is saved to the local package (`--local-package`), and moved
+to the front of the history when it is added again or rolled back to. Histories are bounded:
+versions beyond `constants.MAX_COMPILED_VERSIONS`, or not used for
+`constants.MAX_COMPILED_VERSION_AGE`, are dropped, and version files no history refers to are
+removed.
+
+The store is written under the lock of the local package path, see `deployer.utils.locking`.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from loguru import logger
+from rich.markup import escape
+from rich.table import Table
+
+from deployer import constants
+from deployer.utils.compilation import CompiledPipeline, load_compiled_pipeline
+from deployer.utils.digest import DIGEST_ALGORITHM, bytes_digest
+from deployer.utils.exceptions import PipelineVersionNotFoundError
+from deployer.utils.locking import directory_lock
+
+STORE_DIRNAME = ".store"
+
+
+def _write_atomic(filepath: Path, content: bytes) -> None:
+    """Write a file to a temporary file then rename it, so that it is never partially written."""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_filepath = tempfile.mkstemp(
+        dir=filepath.parent, prefix=f".{filepath.stem}-", suffix=filepath.suffix
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_filepath, filepath)
+    finally:
+        Path(tmp_filepath).unlink(missing_ok=True)
+
+
+class CompiledPipelineStore:
+    """Versions of compiled pipelines by digest, and the history of each pipeline."""
+
+    def __init__(
+        self,
+        local_package_path: Path,
+        max_versions: int = constants.MAX_COMPILED_VERSIONS,
+        max_age: timedelta = constants.MAX_COMPILED_VERSION_AGE,
+    ) -> None:
+        """Open the store of a local package path, created on the first write.
+
+        Args:
+            local_package_path (Path): The folder compiled pipelines are saved to.
+            max_versions (int, optional): The number of versions kept per pipeline.
+                Defaults to constants.MAX_COMPILED_VERSIONS.
+            max_age (timedelta, optional): How long unused versions are kept.
+                Defaults to constants.MAX_COMPILED_VERSION_AGE.
+        """
+        self.local_package_path = Path(local_package_path)
+        self.dirpath = self.local_package_path / STORE_DIRNAME
+        self.max_versions = max_versions
+        self.max_age = max_age
+
+    def _version_filepath(self, digest: str) -> Path:
+        return self.dirpath / "versions" / f"{digest.split(':')[-1]}.yaml"
+
+    def _ref_filepath(self, pipeline_name: str) -> Path:
+        return self.dirpath / "refs" / f"{pipeline_name}.json"
+
+    def history(self, pipeline_name: str) -> List[Dict[str, Any]]:
+        """Return the versions of a pipeline, most recently used first.
+
+        Each version is a dict with its `digest`, and when it was `added_at` and last `used_at`.
+        """
+        try:
+            with open(self._ref_filepath(pipeline_name), "r") as f:
+                return json.load(f)["versions"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def add(self, pipeline_name: str, content: bytes, save_package_file: bool = False) -> str:
+        """Add a version of a pipeline and make it the current one.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            content (bytes): The compiled pipeline, as written by `kfp.compiler.Compiler`.
+            save_package_file (bool, optional): Whether to also write the version to
+                `{local_package_path}/{pipeline_name}.yaml`. Defaults to False.
+
+        Returns:
+            str: The digest of the version, e.g. `sha256:...`.
+        """
+        digest = bytes_digest(content)
+        now = datetime.now(timezone.utc).isoformat()
+        with directory_lock(self.local_package_path):
+            version_filepath = self._version_filepath(digest)
+            if not version_filepath.exists():
+                _write_atomic(version_filepath, content)
+
+            versions = self.history(pipeline_name)
+            added_at = next((v["added_at"] for v in versions if v["digest"] == digest), now)
+            versions = [v for v in versions if v["digest"] != digest]
+            versions.insert(0, {"digest": digest, "added_at": added_at, "used_at": now})
+            self._write_history(pipeline_name, versions)
+
+            if save_package_file:
+                _write_atomic(self.local_package_path / f"{pipeline_name}.yaml", content)
+            self._collect_garbage()
+        return digest
+
+    def _write_history(self, pipeline_name: str, versions: List[Dict[str, Any]]) -> None:
+        content = json.dumps({"pipeline_name": pipeline_name, "versions": versions}, indent=2)
+        _write_atomic(self._ref_filepath(pipeline_name), content.encode("utf-8"))
+
+    def resolve(self, pipeline_name: str, version: str) -> str:
+        """Return the digest of a version of a pipeline.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            version (str): A number `n`, for the n-th previous version (`0` is the current one),
+                or a digest, with or without the `sha256:` prefix, possibly abbreviated.
+
+        Raises:
+            PipelineVersionNotFoundError: Raised when no version, or several, match.
+
+        Returns:
+            str: The digest of the version.
+        """
+        versions = self.history(pipeline_name)
+        if not versions:
+            raise PipelineVersionNotFoundError(
+                f"No versions of pipeline {pipeline_name} in {self.dirpath}."
+                " Versions are stored when a pipeline is saved to the local package,"
+                " e.g. with `deploy --local-package`."
+            )
+        if version.isdigit():
+            if int(version) >= len(versions):
+                raise PipelineVersionNotFoundError(
+                    f"Pipeline {pipeline_name} has {len(versions)} stored versions,"
+                    f" no version {version}."
+                )
+            return versions[int(version)]["digest"]
+
+        algorithm, _, prefix = version.rpartition(":")
+        matches = []
+        if algorithm in ("", DIGEST_ALGORITHM):
+            matches = [
+                v["digest"] for v in versions if v["digest"].split(":")[-1].startswith(prefix)
+            ]
+        if len(matches) != 1:
+            raise PipelineVersionNotFoundError(
+                f"{'No' if not matches else 'Several'} stored versions of pipeline"
+                f" {pipeline_name} match {version}."
+                f" Available versions: {[v['digest'] for v in versions]}"
+            )
+        return matches[0]
+
+    def load(self, digest: str) -> CompiledPipeline:
+        """Load a version of a pipeline, without importing its Python code.
+
+        Raises:
+            PipelineVersionNotFoundError: Raised when the version file was removed.
+        """
+        try:
+            content = self._version_filepath(digest).read_bytes()
+        except FileNotFoundError as e:
+            raise PipelineVersionNotFoundError(
+                f"Version {digest} not found in {self.dirpath}"
+            ) from e
+        return load_compiled_pipeline(content)
+
+    def _collect_garbage(self) -> None:
+        """Drop old versions from histories and remove the unreferenced version files."""
+        min_used_at = datetime.now(timezone.utc) - self.max_age
+        referenced = set()
+        for ref_filepath in (self.dirpath / "refs").glob("*.json"):
+            pipeline_name = ref_filepath.stem
+            versions = self.history(pipeline_name)
+            # the current version is always kept
+            kept = versions[:1] + [
+                v
+                for v in versions[1 : self.max_versions]
+                if datetime.fromisoformat(v["used_at"]) >= min_used_at
+            ]
+            if len(kept) != len(versions):
+                logger.debug(
+                    f"Dropping {len(versions) - len(kept)} old versions of pipeline"
+                    f" {pipeline_name} from {self.dirpath}"
+                )
+                self._write_history(pipeline_name, kept)
+            referenced.update(self._version_filepath(v["digest"]).name for v in kept)
+
+        for version_filepath in (self.dirpath / "versions").glob("*.yaml"):
+            if version_filepath.name not in referenced:
+                version_filepath.unlink(missing_ok=True)
+
+
+def build_versions_table(pipeline_name: str, versions: List[Dict[str, Any]]) -> Table:
+    """Build a table of the stored versions of a pipeline.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        versions (List[Dict[str, Any]]): The versions, most recently used first, as returned by
+            `CompiledPipelineStore.history`.
+
+    Returns:
+        Table: The table, with one row per version and the number to roll back to it.
+    """
+    table = Table(
+        title=f"Versions of {escape(pipeline_name)}", show_header=True, header_style="bold"
+    )
+    for column in ["#", "Digest", "Added", "Last used"]:
+        table.add_column(column, justify="right" if column == "#" else "left")
+    for i, version in enumerate(versions):
+        table.add_row(
+            "[green]current[/]" if i == 0 else str(i),
+            version["digest"].split(":")[-1][:12],
+            version["added_at"][:19].replace("T", " "),
+            version["used_at"][:19].replace("T", " "),
+        )
+    return table
@@ -5,15 +5,28 @@ from collections import defaultdict
 from enum import Enum
 from pathlib import Path
 from types import TracebackType
-from typing import Any, Callable, Dict, List, Mapping, Optional, Protocol, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
 
 from loguru import logger
 from pydantic import BaseModel, ValidationError
+from rich.markup import escape
 from rich.table import Table
 
 from deployer.constants import PIPELINE_CHECKS_TABLE_COLUMNS
 from deployer.utils.console import console
-from deployer.utils.models import ChecksTableRow
+from deployer.utils.import_timing import traced_imports
 
 
 def make_enum_from_python_package_dir(dir_path: Path, raise_if_not_found: bool = False) -> Enum:
@@ -96,7 +109,8 @@ def import_pipeline_from_dir(dirpath: Path, pipeline_name: str) -> GraphComponen
     module_folder_path = dirpath_ / f"{pipeline_name}.py"  # used as a path to a file
 
     try:
-        pipeline_module = importlib.import_module(module_import_path)
+        with traced_imports():
+            pipeline_module = importlib.import_module(module_import_path)
     except ModuleNotFoundError as e:
         raise e
     except Exception as e:
@@ -193,103 +207,226 @@ def print_pipelines_list(pipelines_dict: Dict[str, list], with_configs: bool = F
 
 
 def print_check_results_table(
-    to_check: Dict[str, list],
-    pipelines_model: Optional[Any] = None,
-    validation_error: Optional[ValidationError] = None,
+    results: Iterable[Any],
     warn_defaults: bool = True,
+    summary: bool = False,
+    page_size: Optional[int] = None,
 ) -> None:
     """Print a table of check results to the console.
 
     Args:
-        to_check (Dict[str, list]): A dictionary containing the pipelines to check
-            as keys and the config filepaths as values.
-        pipelines_model (Optional[Any], optional): A Pipelines model used to retrieve default
-            field and warn user when default value was used. Defaults to None.
-        validation_error (Optional[ValidationError], optional): The validation error if any
-            occurred during the check. Defaults to None.
+        results (Iterable[Any]): The `PipelineCheckResult` of each checked pipeline.
         warn_defaults (bool, optional): whether to warn when default values are used and not
             overwritten in config file. Defaults to True.
+        summary (bool, optional): whether to print counts per pipeline and only the rows of
+            invalid configs, instead of one row per config. Defaults to False.
+        page_size (Optional[int], optional): Maximum number of rows per table. Larger results
+            are printed as several tables, each printed as soon as it is built.
+            Defaults to None (a single table).
     """
-    parsed_val_error_dict = _parse_validation_errors(validation_error)
-    parsed_warnings_dict = _get_warnings_for_default_value(pipelines_model)
+    results = list(results)
+    if summary:
+        console.print(build_check_summary_table(results, warn_defaults=warn_defaults))
+        if all(r.is_valid for r in results):
+            return
+
+    rows = list(_iter_check_results_rows(results, warn_defaults=warn_defaults))
+    if summary:
+        rows = [row for row in rows if row[1] == "red"]
+
+    # columns are dropped if they are empty in all pages, so that pages have the same columns
+    kept_columns = [
+        i for i in range(len(PIPELINE_CHECKS_TABLE_COLUMNS)) if any(cells[i] for cells, _ in rows)
+    ]
+    page_size = page_size or len(rows) or 1
+    for page_start in range(0, max(len(rows), 1), page_size):
+        console.print(_build_table(rows[page_start : page_start + page_size], kept_columns))
+
+
+def format_check_result_summary(result: Any, warn_defaults: bool = True) -> str:
+    """Summarize the check result of a pipeline in one line, with rich markup.
+
+    Args:
+        result (Any): The `PipelineCheckResult` of the pipeline.
+        warn_defaults (bool, optional): whether to warn when default values are used and not
+            overwritten in config file. Defaults to True.
+
+    Returns:
+        str: e.g. `❌ dummy_pipeline  2/5 configs invalid  (1.23s)`.
+    """
+    n_configs = len(result.config_paths)
+    if "pipeline level error" in result.errors:
+        status, style = "❌", "red"
+        details = result.errors["pipeline level error"][0]["msg"].splitlines()[0]
+    elif result.errors:
+        status, style = "❌", "red"
+        details = f"{len(result.errors)}/{n_configs} configs invalid"
+    elif n_configs == 0:
+        status, style = "⚠️", "yellow"
+        details = "No config files found"
+    elif warn_defaults and result.warnings:
+        status, style = "⚠️", "yellow"
+        details = f"{n_configs} configs valid, {len(result.warnings)} using default values"
+    else:
+        status, style = "✅", "green"
+        details = f"{n_configs} configs valid"
+    return (
+        f"{status} [{style}]{result.pipeline_name}[/{style}]  {escape(details)}"
+        f"  [dim]({result.elapsed:.2f}s)[/dim]"
+    )
+
+
+def build_check_results_table(results: Iterable[Any], warn_defaults: bool = True) -> Table:
+    """Build a table of check results.
+
+    Args:
+        results (Iterable[Any]): The `PipelineCheckResult` of each checked pipeline.
+        warn_defaults (bool, optional): whether to warn when default values are used and not
+            overwritten in config file. Defaults to True.
 
+    Returns:
+        Table: The table of check results, with one row per config file.
+    """
+    rows = list(_iter_check_results_rows(results, warn_defaults=warn_defaults))
+    kept_columns = [
+        i for i in range(len(PIPELINE_CHECKS_TABLE_COLUMNS)) if any(cells[i] for cells, _ in rows)
+    ]
+    return _build_table(rows, kept_columns)
+
+
+def _build_table(rows: List[Tuple[Tuple[str, ...], str]], kept_columns: List[int]) -> Table:
     table = Table(show_header=True, header_style="bold", show_lines=True)
-    for column in PIPELINE_CHECKS_TABLE_COLUMNS:
-        table.add_column(column)
-        table.columns[0].justify = "center"
+    for i in kept_columns:
+        table.add_column(PIPELINE_CHECKS_TABLE_COLUMNS[i], justify="center" if i == 0 else "left")
+    for cells, style in rows:
+        table.add_row(*(cells[i] for i in kept_columns), style=style)
+    return table
+
 
-    for pipeline_name, config_filepaths in to_check.items():
-        p_errors = parsed_val_error_dict.get(pipeline_name, {})
-        p_warnings = parsed_warnings_dict.get(pipeline_name, {})
+def _iter_check_results_rows(
+    results: Iterable[Any], warn_defaults: bool = True
+) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """Yield the cells and style of each row of the check results table.
+
+    Cells are plain strings in the order of `PIPELINE_CHECKS_TABLE_COLUMNS`: Status, Pipeline,
+    Pipeline Error Message, Config File, Attribute, Config Error Type, Config Error Message.
+    """
+    for result in results:
+        pipeline_name, config_filepaths = result.pipeline_name, result.config_paths
+        p_errors, p_warnings = result.errors, result.warnings
 
         if len(p_errors) == 0 and len(p_warnings) == 0:
             if len(config_filepaths) == 0:
-                row = ChecksTableRow(
-                    status="⚠️",
-                    pipeline=pipeline_name,
-                    config_file="No config files found",
-                )
-                table.add_row(*row.model_dump().values(), style="bold yellow")
-
+                yield ("⚠️", pipeline_name, "", "No config files found", "", "", ""), "bold yellow"
             for config_filepath in config_filepaths:
-                row = ChecksTableRow(
-                    status="✅",
-                    pipeline=pipeline_name,
-                    config_file=config_filepath.name,
-                )
-                table.add_row(*row.model_dump().values(), style="green")
+                yield ("✅", pipeline_name, "", config_filepath.name, "", "", ""), "green"
 
         elif len(p_errors) == 1 and p_errors.keys() == {"pipeline level error"}:
-            error = p_errors["pipeline level error"]
-            row = ChecksTableRow(
-                status="❌",
-                pipeline=pipeline_name,
-                pipeline_error_message=error[0]["msg"],
-                config_file="Could not check config files due to pipeline error.",
-            )
-            table.add_row(*row.model_dump().values(), style="red")
+            error_message = p_errors["pipeline level error"][0]["msg"]
+            config_file = "Could not check config files due to pipeline error."
+            yield ("❌", pipeline_name, error_message, config_file, "", "", ""), "red"
 
         else:
             for config_filepath in config_filepaths:
-                config_error_type_l = []
-                attribute_l = []
-                config_error_message_l = []
-                status, style = "✅", "green"
-
-                warnings_ = p_warnings.get(config_filepath.name)
-                if warn_defaults and warnings_ is not None:
-                    status, style = "⚠️", "yellow"
-                    # yellow styling in error string if there are errors + warnings
-                    config_error_type_l.extend(
-                        [f"[yellow]{wr['type']}[/yellow]" for wr in warnings_]
-                    )
-                    attribute_l.extend(
-                        [f"[yellow]{wr.get('field', '')}[/yellow]" for wr in warnings_]
-                    )
-                    config_error_message_l.extend(
-                        [f"[yellow]{wr['msg']}[/yellow]" for wr in warnings_]
-                    )
-
-                errors_ = p_errors.get(config_filepath.name)
-                if errors_ is not None:
-                    status, style = "❌", "red"
-                    config_error_type_l.extend([f"{er['type']}" for er in errors_])
-                    attribute_l.extend([f"{er.get('field', '')}" for er in errors_])
-                    config_error_message_l.extend([f"{er['msg']}" for er in errors_])
-
-                row = ChecksTableRow(
-                    status=status,
-                    pipeline=pipeline_name,
-                    config_file=config_filepath.name,
-                    config_error_type="\n".join(config_error_type_l),
-                    attribute="\n".join(attribute_l),
-                    config_error_message="\n".join(config_error_message_l),
+                yield _build_config_row(
+                    pipeline_name,
+                    config_filepath.name,
+                    errors_=p_errors.get(config_filepath.name),
+                    warnings_=p_warnings.get(config_filepath.name) if warn_defaults else None,
                 )
-                table.add_row(*row.model_dump().values(), style=style)
 
-    table.columns = [c for c in table.columns if "".join(c._cells) != ""]
 
-    console.print(table)
+def _build_config_row(
+    pipeline_name: str,
+    config_name: str,
+    errors_: Optional[List[Dict[str, str]]],
+    warnings_: Optional[List[Dict[str, str]]],
+) -> Tuple[Tuple[str, ...], str]:
+    config_error_type_l = []
+    attribute_l = []
+    config_error_message_l = []
+    status, style = "✅", "green"
+
+    if warnings_ is not None:
+        status, style = "⚠️", "yellow"
+        # yellow styling in error string if there are errors + warnings
+        for wr in warnings_:
+            config_error_type_l.append(f"[yellow]{wr['type']}[/yellow]")
+            attribute_l.append(f"[yellow]{wr.get('field', '')}[/yellow]")
+            config_error_message_l.append(f"[yellow]{wr['msg']}[/yellow]")
+
+    if errors_ is not None:
+        status, style = "❌", "red"
+        for er in errors_:
+            config_error_type_l.append(er["type"])
+            attribute_l.append(er.get("field", ""))
+            config_error_message_l.append(er["msg"])
+
+    cells = (
+        status,
+        pipeline_name,
+        "",
+        config_name,
+        "\n".join(attribute_l),
+        "\n".join(config_error_type_l),
+        "\n".join(config_error_message_l),
+    )
+    return cells, style
+
+
+def build_check_summary_table(results: Iterable[Any], warn_defaults: bool = True) -> Table:
+    """Build a table with the number of valid, warning and invalid configs of each pipeline.
+
+    Args:
+        results (Iterable[Any]): The `PipelineCheckResult` of each checked pipeline.
+        warn_defaults (bool, optional): whether to count configs using default values as
+            warnings. Defaults to True.
+
+    Returns:
+        Table: The summary table, with one row per pipeline and a total row.
+    """
+    table = Table(show_header=True, header_style="bold", show_footer=True)
+    columns = ["Status", "Pipeline", "Configs", "Valid", "Warnings", "Invalid", "Time (s)"]
+    for column in columns:
+        table.add_column(column, justify="left" if column == "Pipeline" else "right")
+    table.columns[0].justify = "center"
+
+    totals = [0, 0, 0, 0, 0.0]
+    for result in results:
+        n_configs = len(result.config_paths)
+        if "pipeline level error" in result.errors:
+            n_invalid, n_warnings = n_configs, 0
+        else:
+            n_invalid = sum(c.name in result.errors for c in result.config_paths)
+            n_warnings = warn_defaults * sum(
+                c.name in result.warnings and c.name not in result.errors
+                for c in result.config_paths
+            )
+        n_valid = n_configs - n_invalid - n_warnings
+
+        if not result.is_valid:
+            status, style = "❌", "red"
+        elif n_warnings or n_configs == 0:
+            status, style = "⚠️", "yellow"
+        else:
+            status, style = "✅", "green"
+        table.add_row(
+            status,
+            result.pipeline_name,
+            str(n_configs),
+            str(n_valid),
+            str(n_warnings),
+            str(n_invalid),
+            f"{result.elapsed:.2f}",
+            style=style,
+        )
+        for i, value in enumerate([n_configs, n_valid, n_warnings, n_invalid, result.elapsed]):
+            totals[i] += value
+
+    table.columns[1].footer = "Total"
+    for column, total in zip(table.columns[2:], totals):
+        column.footer = f"{total:.2f}" if isinstance(total, float) else str(total)
+    return table
 
 
 def _parse_validation_errors(
@@ -366,9 +503,8 @@ def _get_unset_default_fields(model: BaseModel) -> List[Dict]:
     """
     if model is None:
         return None
-    unset_fields = set(model.model_dump()) - set(model.model_dump(exclude_unset=True))
     unset_fields_with_default = []
-    for field in unset_fields:
-        if getattr(model, field):
+    for field in type(model).model_fields:
+        if field not in model.model_fields_set and getattr(model, field):
             unset_fields_with_default.append({"field": field, "default": getattr(model, field)})
     return unset_fields_with_default
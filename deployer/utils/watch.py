@@ -0,0 +1,311 @@
+"""File watching and python modules dependency graph, used by `check --watch`.
+
+Changes are detected with inotify on Linux, and by polling file stats elsewhere (or when inotify
+is not available). Only the standard library is used.
+"""
+
+import abc
+import ast
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from deployer.utils.discovery import CONFIG_SUFFIXES
+
+WATCHED_SUFFIXES = (".py", *CONFIG_SUFFIXES)
+IGNORED_DIRNAMES = {"__pycache__", "compiled_pipelines"}
+
+
+def _is_watched(path: Path) -> bool:
+    return path.suffix in WATCHED_SUFFIXES and not path.name.startswith(".")
+
+
+def _walk_dirs(root_path: Path) -> Iterator[Path]:
+    for dirpath, dirnames, _ in os.walk(root_path):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRNAMES and not d.startswith(".")]
+        yield Path(dirpath)
+
+
+def iter_watched_files(root_path: Path) -> Iterator[Path]:
+    """Iterate over python and config files under a directory, recursively."""
+    for dirpath in _walk_dirs(root_path):
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.is_file() and _is_watched(Path(entry.name)):
+                        yield dirpath / entry.name
+        except OSError:
+            continue
+
+
+class FileWatcher(abc.ABC):
+    """Base class of file watchers. Use `get_file_watcher` to get the best available one."""
+
+    def __init__(self, root_path: Path, debounce: float = 0.2) -> None:  # noqa: D107
+        self.root_path = Path(root_path)
+        self.debounce = debounce
+
+    @abc.abstractmethod
+    def _poll(self, timeout: float) -> Set[Path]:
+        """Return the files changed within `timeout` seconds, empty if none."""
+
+    def wait_for_changes(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Wait for files to be created, modified or deleted.
+
+        Changes happening within `debounce` seconds of the first one are grouped together,
+        e.g. when an editor writes several files at once.
+
+        Args:
+            timeout (Optional[float], optional): Maximum time to wait, in seconds.
+                Defaults to None (wait forever).
+
+        Returns:
+            Set[Path]: The changed files. Empty if the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changes: Set[Path] = set()
+        while not changes:
+            remaining = 1.0 if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return changes
+            changes = self._poll(min(remaining, 1.0))
+        while True:
+            more_changes = self._poll(self.debounce)
+            if not more_changes:
+                return changes
+            changes |= more_changes
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Stop watching and release the resources of the watcher."""
+
+
+class PollingFileWatcher(FileWatcher):
+    """Detect changes by comparing the stats of watched files."""
+
+    def __init__(self, root_path: Path, debounce: float = 0.2, interval: float = 0.5) -> None:  # noqa: D107
+        super().__init__(root_path, debounce)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in iter_watched_files(self.root_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _poll(self, timeout: float) -> Set[Path]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._take_snapshot()
+        changes = {
+            p
+            for p in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(p) != self._snapshot.get(p)
+        }
+        self._snapshot = snapshot
+        return changes
+
+    def close(self) -> None:  # noqa: D102
+        self._snapshot = {}
+
+
+class InotifyFileWatcher(FileWatcher):
+    """Detect changes with Linux inotify, watching every directory under the root path."""
+
+    _EVENT_HEADER = struct.Struct("iIII")
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_ISDIR = 0x40000000
+    _MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+    def __init__(self, root_path: Path, debounce: float = 0.2) -> None:  # noqa: D107
+        super().__init__(root_path, debounce)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watched_dirs: Dict[int, Path] = {}
+        for dirpath in _walk_dirs(self.root_path):
+            self._add_watch(dirpath)
+
+    def _add_watch(self, dirpath: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self._MASK)
+        if wd < 0:
+            logger.debug(f"Could not watch {dirpath}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watched_dirs[wd] = dirpath
+
+    def _poll(self, timeout: float) -> Set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changes = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = self._EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset : offset + name_length].rstrip(b"\0"))
+            offset += name_length
+            dirpath = self._watched_dirs.get(wd)
+            if dirpath is None or not name:
+                continue
+            path = dirpath / name
+            if mask & self._IN_ISDIR:
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO) and name not in IGNORED_DIRNAMES:
+                    for new_dirpath in _walk_dirs(path):
+                        self._add_watch(new_dirpath)
+                    changes.update(iter_watched_files(path))
+            elif _is_watched(path):
+                changes.add(path)
+        return changes
+
+    def close(self) -> None:  # noqa: D102
+        os.close(self._fd)
+
+
+def get_file_watcher(root_path: Path, force_polling: bool = False) -> FileWatcher:
+    """Return an inotify file watcher if available, a polling file watcher otherwise."""
+    if sys.platform.startswith("linux") and not force_polling:
+        try:
+            return InotifyFileWatcher(root_path)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"inotify not available ({e}), falling back to polling")
+    return PollingFileWatcher(root_path)
+
+
+def path_to_module_name(path: Path) -> str:
+    """Return the module name of a python file, relative to the current working directory."""
+    path = Path(path).resolve().relative_to(Path.cwd())
+    parts = path.with_suffix("").parts
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _parse_imported_modules(path: Path, module_name: str) -> Set[str]:
+    """Return the names of the modules imported by a python file (absolute, not filtered)."""
+    try:
+        tree = ast.parse(Path(path).read_bytes(), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return set()
+
+    package = module_name if Path(path).stem == "__init__" else module_name.rpartition(".")[0]
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_parts = package.split(".")
+                base_parts = base_parts[: len(base_parts) - node.level + 1]
+                base = ".".join(base_parts + ([node.module] if node.module else []))
+            else:
+                base = node.module or ""
+            imported.add(base)
+            # `from package import module` imports a module too
+            imported.update(f"{base}.{alias.name}" for alias in node.names)
+    return imported
+
+
+class ModuleGraph:
+    """Import graph of the python modules of a directory.
+
+    Only imports between modules of the directory are followed. It is used to find which modules
+    must be reloaded when a file changes: the changed modules and all the modules importing
+    them, directly or not.
+    """
+
+    def __init__(self, root_path: Path) -> None:  # noqa: D107
+        self.root_path = Path(root_path)
+        self._imports: Dict[str, Set[str]] = {}
+        self._paths: Dict[str, Path] = {}
+        for path in iter_watched_files(self.root_path):
+            if path.suffix == ".py":
+                self._paths[path_to_module_name(path)] = path
+        for module_name in self._paths:
+            self._update_module(module_name)
+
+    def _update_module(self, module_name: str) -> None:
+        imported = _parse_imported_modules(self._paths[module_name], module_name)
+        # importing `a.b.c` also imports the packages `a` and `a.b`
+        imported |= {m.rsplit(".", i)[0] for m in imported for i in range(1, m.count(".") + 1)}
+        self._imports[module_name] = imported
+
+    def update(self, changed_paths: Iterable[Path]) -> Set[str]:
+        """Update the graph with changed python files, return the changed module names."""
+        changed_modules = set()
+        for path in changed_paths:
+            if Path(path).suffix != ".py":
+                continue
+            module_name = path_to_module_name(path)
+            changed_modules.add(module_name)
+            if Path(path).exists():
+                self._paths[module_name] = Path(path)
+                self._update_module(module_name)
+            else:
+                self._paths.pop(module_name, None)
+                self._imports.pop(module_name, None)
+        return changed_modules
+
+    def get_paths(self, module_names: Iterable[str]) -> Set[Path]:
+        """Return the file paths of the given modules, ignoring unknown modules."""
+        return {self._paths[m] for m in module_names if m in self._paths}
+
+    def dependents(self, module_names: Iterable[str]) -> Set[str]:
+        """Return the given modules and all modules importing them, directly or not."""
+        importers: Dict[str, Set[str]] = {}
+        for module_name, imported in self._imports.items():
+            for imported_module in imported & self._paths.keys():
+                importers.setdefault(imported_module, set()).add(module_name)
+
+        affected = set(module_names)
+        to_visit = list(affected)
+        while to_visit:
+            for importer in importers.get(to_visit.pop(), ()):
+                if importer not in affected:
+                    affected.add(importer)
+                    to_visit.append(importer)
+        return affected
+
+    def dependencies(self, module_names: Iterable[str]) -> Set[str]:
+        """Return the given modules and the modules of the directory they import, recursively."""
+        dependencies = set(module_names) & self._paths.keys()
+        to_visit = list(dependencies)
+        while to_visit:
+            for imported_module in self._imports.get(to_visit.pop(), set()) & self._paths.keys():
+                if imported_module not in dependencies:
+                    dependencies.add(imported_module)
+                    to_visit.append(imported_module)
+        return dependencies
+
+
+def unload_modules(module_names: Iterable[str]) -> List[str]:
+    """Remove modules from `sys.modules` so that they are executed again on next import."""
+    unloaded = [m for m in module_names if sys.modules.pop(m, None) is not None]
+    for module_name in unloaded:
+        parent_name, _, child_name = module_name.rpartition(".")
+        parent = sys.modules.get(parent_name)
+        if parent is not None and hasattr(parent, child_name):
+            delattr(parent, child_name)
+    return unloaded
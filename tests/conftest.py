@@ -27,3 +27,14 @@ except Exception as e:
 @pytest.fixture(scope="session")
 def templates_path_fixture():
     return Path("tests/unit_tests/input_files")
+
+
+@pytest.fixture
+def fake_gcp(monkeypatch):
+    """Fake Artifact Registry and Vertex AI APIs, with the environment pointing to them."""
+    from deployer.fake_gcp import FakeGCPServer
+
+    with FakeGCPServer() as server:
+        for key, value in server.environ().items():
+            monkeypatch.setenv(key, value)
+        yield server
@@ -46,6 +46,8 @@ def test_init_command_with_user_input(tmp_path):
                 "y",
                 "",
                 "n",
+                "",
+                "",
                 "y",
                 "",
                 "",
@@ -61,9 +63,23 @@ def test_init_command_with_user_input(tmp_path):
                 "",
                 "",
                 "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
                 "y",
                 "json",
                 "",
+                "n",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
                 "y",
                 "y",
                 "pipe",
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from deployer.cli import app
+from deployer.utils.store import CompiledPipelineStore
+
+runner = CliRunner()
+
+
+def _content(version: int) -> bytes:
+    return f"pipelineInfo:\n  name: dummy-pipeline\n# {version}\n".encode()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    (tmp_path / "vertex" / "pipelines").mkdir(parents=True)
+    (tmp_path / "vertex" / "pipelines" / "dummy_pipeline.py").touch()
+    monkeypatch.chdir(tmp_path)
+    store = CompiledPipelineStore(Path("vertex/pipelines/compiled_pipelines"))
+    for i in range(2):
+        store.add("dummy_pipeline", _content(i), save_package_file=True)
+    return store
+
+
+def test_rollback_command_only_updates_history(store):
+    # Given
+    digests = [v["digest"] for v in store.history("dummy_pipeline")]
+
+    # When
+    result = runner.invoke(app, ["rollback", "dummy_pipeline"], catch_exceptions=False)
+
+    # Then
+    assert result.exit_code == 0
+    assert digests[1] in result.stdout
+    assert [v["digest"] for v in store.history("dummy_pipeline")] == [digests[1], digests[0]]
+    package_filepath = store.local_package_path / "dummy_pipeline.yaml"
+    assert package_filepath.read_bytes() == _content(1)
+
+
+def test_rollback_command_with_local_package(store):
+    # Given
+    digests = [v["digest"] for v in store.history("dummy_pipeline")]
+
+    # When
+    result = runner.invoke(
+        app,
+        ["rollback", "dummy_pipeline", "--to", digests[1].split(":")[-1][:12], "--local-package"],
+        catch_exceptions=False,
+    )
+
+    # Then
+    assert result.exit_code == 0
+    assert [v["digest"] for v in store.history("dummy_pipeline")] == [digests[1], digests[0]]
+    package_filepath = store.local_package_path / "dummy_pipeline.yaml"
+    assert package_filepath.read_bytes() == _content(0)
+
+
+def test_rollback_command_to_unknown_version(store):
+    # When
+    result = runner.invoke(app, ["rollback", "dummy_pipeline", "--to", "5"])
+
+    # Then
+    assert result.exit_code == 2
+    assert len(store.history("dummy_pipeline")) == 2
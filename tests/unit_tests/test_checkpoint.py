@@ -0,0 +1,52 @@
+from deployer.utils.checkpoint import Checkpoint, get_checkpoint_filepath
+
+
+def test_get_checkpoint_filepath_depends_on_options(tmp_path):
+    # Given
+    options = {"pipeline_names": ["dummy_pipeline"], "upload": True}
+
+    # When
+    filepath = get_checkpoint_filepath("deploy", options, tmp_path)
+    same_filepath = get_checkpoint_filepath("deploy", dict(reversed(options.items())), tmp_path)
+    other_filepath = get_checkpoint_filepath("deploy", {**options, "upload": False}, tmp_path)
+
+    # Then
+    assert filepath.parent == tmp_path
+    assert filepath.name.startswith("deploy-")
+    assert filepath == same_filepath
+    assert filepath != other_filepath
+
+
+def test_checkpoint_resumes_stages_with_same_inputs(tmp_path):
+    # Given
+    filepath = tmp_path / "deploy.json"
+    inputs = {"pipeline_spec": "sha256:abc"}
+    checkpoint = Checkpoint(filepath)
+    checkpoint.complete("dummy_pipeline", "upload", inputs, {"version_name": "sha256:abc"})
+
+    # When
+    not_resumed = Checkpoint(filepath)
+    resumed = Checkpoint(filepath, resume=True)
+
+    # Then
+    assert not_resumed.has_previous
+    assert not_resumed.get_completed("dummy_pipeline", "upload", inputs) is None
+    assert resumed.get_completed("dummy_pipeline", "upload", inputs) == {
+        "version_name": "sha256:abc"
+    }
+    assert resumed.get_completed("dummy_pipeline", "upload", {"pipeline_spec": "x"}) is None
+    assert resumed.get_completed("dummy_pipeline", "run", inputs) is None
+
+
+def test_checkpoint_clear(tmp_path):
+    # Given
+    filepath = tmp_path / "deploy.json"
+    checkpoint = Checkpoint(filepath)
+    checkpoint.complete("dummy_pipeline", "upload", {})
+
+    # When
+    checkpoint.clear()
+
+    # Then
+    assert not filepath.exists()
+    assert not Checkpoint(filepath, resume=True).has_previous
@@ -0,0 +1,134 @@
+import copy
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from kfp import compiler
+
+from deployer.pipeline_deployer import VertexPipelineDeployer
+from deployer.utils.compilation import compile_pipeline, replace_pipeline_spec
+
+
+def test_compile_pipeline_same_as_kfp_compiler(dummy_pipeline_fixture, tmp_path):
+    # Given
+    package_path = tmp_path / "dummy_pipeline.yaml"
+    compiler.Compiler().compile(dummy_pipeline_fixture, package_path=str(package_path))
+
+    # When
+    compiled_pipeline = compile_pipeline(dummy_pipeline_fixture)
+
+    # Then
+    assert compiled_pipeline.content == package_path.read_bytes()
+    assert compiled_pipeline.pipeline_spec["pipelineInfo"] == {"name": "dummy-pipeline"}
+
+
+def test_compile_pipeline_without_files(dummy_pipeline_fixture):
+    # Given
+    no_files = patch("tempfile.mkstemp", side_effect=AssertionError("file written"))
+    no_dirs = patch("tempfile.mkdtemp", side_effect=AssertionError("directory created"))
+
+    # When
+    with no_files, no_dirs:
+        compiled_pipeline = compile_pipeline(dummy_pipeline_fixture)
+
+    # Then
+    assert compiled_pipeline.pipeline_spec["root"]["dag"]["tasks"]
+
+
+def test_replace_pipeline_spec_same_as_kfp_compiler(dummy_pipeline_fixture):
+    # Given
+    compiled_pipeline = compile_pipeline(dummy_pipeline_fixture)
+
+    # When
+    replaced_pipeline = replace_pipeline_spec(
+        compiled_pipeline, copy.deepcopy(compiled_pipeline.pipeline_spec)
+    )
+
+    # Then
+    assert replaced_pipeline == compiled_pipeline
+
+
+@pytest.fixture
+def anonymous_credentials():
+    with patch("google.auth.default", return_value=(AnonymousCredentials(), "my-project")):
+        yield
+
+
+@pytest.mark.usefixtures("anonymous_credentials")
+class TestVertexPipelineDeployerInMemory:
+    def _get_deployer(self, pipeline_func, local_package_path):
+        return VertexPipelineDeployer(
+            pipeline_name="dummy_pipeline",
+            pipeline_func=pipeline_func,
+            project_id="my-project",
+            region="europe-west1",
+            gar_location="europe-west1",
+            gar_repo_id="my-repo",
+            local_package_path=local_package_path,
+        )
+
+    def test_compile_without_saving(self, dummy_pipeline_fixture, tmp_path):
+        # Given
+        deployer = self._get_deployer(dummy_pipeline_fixture, tmp_path / "compiled_pipelines")
+
+        # When
+        deployer.compile(save=False)
+
+        # Then
+        assert deployer.compiled_pipeline is not None
+        assert not (tmp_path / "compiled_pipelines").exists()
+
+    def test_compile_and_save(self, dummy_pipeline_fixture, tmp_path):
+        # Given
+        deployer = self._get_deployer(dummy_pipeline_fixture, tmp_path)
+
+        # When
+        deployer.compile()
+
+        # Then
+        compiled_files = [p.name for p in tmp_path.iterdir() if not p.name.startswith(".")]
+        assert compiled_files == ["dummy_pipeline.yaml"]
+        assert (
+            tmp_path / "dummy_pipeline.yaml"
+        ).read_bytes() == deployer.compiled_pipeline.content
+
+    def test_upload_from_memory(self, dummy_pipeline_fixture, tmp_path):
+        # Given
+        deployer = self._get_deployer(dummy_pipeline_fixture, tmp_path).compile(save=False)
+
+        def _upload_pipeline(file_name, tags):
+            assert Path(file_name).read_bytes() == deployer.compiled_pipeline.content
+            return "dummy-pipeline", "sha256:abc"
+
+        # When
+        with patch(
+            "deployer.pipeline_deployer.RegistryClient.upload_pipeline",
+            side_effect=_upload_pipeline,
+        ) as mock_upload:
+            deployer.upload_to_registry(tags=["dev", "latest"])
+
+        # Then
+        _, kwargs = mock_upload.call_args
+        assert kwargs["tags"] == ["dev", "latest"]
+        assert not Path(kwargs["file_name"]).exists()
+        assert (deployer.template_name, deployer.version_name) == (
+            "dummy-pipeline",
+            "sha256:abc",
+        )
+
+    def test_pipeline_job_from_memory(self, dummy_pipeline_fixture, tmp_path):
+        # Given
+        deployer = self._get_deployer(dummy_pipeline_fixture, tmp_path).compile(save=False)
+        deployer.run_name = "dummy-pipeline-20240101-000000"
+
+        # When
+        job = deployer._create_pipeline_job(
+            template_path=deployer._local_template_path,
+            parameter_values={"name": "John"},
+            input_artifacts={"artifact": "123"},
+        )
+
+        # Then
+        assert job.job_id == "dummy-pipeline-20240101-000000"
+        assert job.runtime_config.parameter_values["name"] == "John"
@@ -0,0 +1,172 @@
+import os
+import subprocess
+import sys
+import time
+
+import click
+import pytest
+import typer
+
+from deployer.cli import app
+from deployer.completion import (
+    _GLOBAL_VALUE_OPTIONS,
+    _PIPELINE_COMMANDS_VALUE_OPTIONS,
+    _parse_args,
+    get_completions,
+)
+from deployer.utils.discovery import get_discovery_cache
+
+# Time allowed on top of the python interpreter startup to answer a completion request
+COMPLETION_LATENCY_BUDGET_S = 0.15
+
+
+@pytest.fixture
+def vertex_repo(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text('[tool.vertex_deployer.deploy]\ntags = ["custom"]\n')
+    for pipeline_name in ["dummy_pipeline", "other_pipeline"]:
+        (tmp_path / "vertex" / "pipelines").mkdir(parents=True, exist_ok=True)
+        (tmp_path / "vertex" / "pipelines" / f"{pipeline_name}.py").touch()
+        (tmp_path / "vertex" / "configs" / pipeline_name).mkdir(parents=True)
+        (tmp_path / "vertex" / "configs" / pipeline_name / f"{pipeline_name}_dev.json").touch()
+
+    monkeypatch.chdir(tmp_path)
+    discovery_cache = get_discovery_cache()
+    discovery_cache.set_settings(
+        str(tmp_path / "pyproject.toml"), {"deploy": {"tags": ["custom"]}}
+    )
+    discovery_cache.save()
+    return tmp_path
+
+
+def _get_value_options(command: click.Command) -> set:
+    """Names of the options of a click command that expect a value."""
+    return {
+        name
+        for param in command.params
+        if isinstance(param, click.Option) and not param.is_flag and not param.count
+        for name in [*param.opts, *param.secondary_opts]
+    }
+
+
+CLI_COMMAND = typer.main.get_command(app)
+CLI_VALUE_OPTIONS = [(None, option) for option in sorted(_get_value_options(CLI_COMMAND))] + [
+    (command, option)
+    for command in sorted(_PIPELINE_COMMANDS_VALUE_OPTIONS)
+    for option in sorted(_get_value_options(CLI_COMMAND.commands[command]))
+]
+
+
+class TestParseArgs:
+    def test_command_and_pipeline_names(self):
+        assert _parse_args(["-log", "DEBUG", "deploy", "p1", "--upload", "p2"]) == (
+            "deploy",
+            ["p1", "p2"],
+            None,
+        )
+
+    def test_pending_option(self):
+        assert _parse_args(["deploy", "p1", "--config-name"]) == (
+            "deploy",
+            ["p1"],
+            "--config-name",
+        )
+
+    def test_option_value_is_not_a_pipeline_name(self):
+        assert _parse_args(["deploy", "--tags", "dev", "p1"]) == ("deploy", ["p1"], None)
+
+    @pytest.mark.parametrize("command, option", CLI_VALUE_OPTIONS)
+    def test_cli_option_value_is_not_a_pipeline_name(self, command, option):
+        # Given
+        if command is None:  # global option
+            args, expected = [option, "value", "deploy", "p1"], ("deploy", ["p1"], None)
+        else:
+            args, expected = [command, option, "value", "p1"], (command, ["p1"], None)
+
+        # When
+        parsed = _parse_args(args)
+        parsed_pending = _parse_args(args[: args.index(option) + 1])
+
+        # Then
+        assert parsed == expected
+        assert parsed_pending == (command, [], option)
+
+    def test_value_options_match_cli(self):
+        assert _GLOBAL_VALUE_OPTIONS == _get_value_options(CLI_COMMAND)
+        for command, value_options in _PIPELINE_COMMANDS_VALUE_OPTIONS.items():
+            assert value_options == _get_value_options(CLI_COMMAND.commands[command]), command
+
+
+class TestGetCompletions:
+    def test_pipeline_names(self, vertex_repo):
+        assert get_completions(["deploy"], "") == ["dummy_pipeline", "other_pipeline"]
+        assert get_completions(["check", "dummy_pipeline"], "") == ["other_pipeline"]
+        assert get_completions(["deploy"], "oth") == ["other_pipeline"]
+
+    def test_config_names_scoped_to_pipeline(self, vertex_repo):
+        completions = get_completions(["deploy", "dummy_pipeline", "--config-name"], "")
+        assert completions == ["dummy_pipeline_dev.json"]
+
+    def test_tags(self, vertex_repo):
+        get_discovery_cache().add_tags(["v1"])
+        assert get_completions(["deploy", "dummy_pipeline", "--tags"], "") == [
+            "custom",
+            "v1",
+            "dev",
+            "stg",
+            "prd",
+            "latest",
+        ]
+
+    def test_fallback_to_cli(self, vertex_repo):
+        assert get_completions(["deploy"], "--con") is None
+        assert get_completions(["create"], "") is None
+        assert get_completions(["deploy", "--cron"], "") is None
+
+    def test_fallback_to_cli_if_settings_not_cached(self, vertex_repo):
+        (vertex_repo / "pyproject.toml").write_text("[tool.vertex_deployer]\n")
+        assert get_completions(["deploy"], "") is None
+
+
+def _run_completion(cwd, code=None):
+    env = {
+        **os.environ,
+        "_VERTEX_DEPLOYER_COMPLETE": "complete_bash",
+        "COMP_WORDS": "vertex-deployer deploy ",
+        "COMP_CWORD": "2",
+    }
+    cmd = [sys.executable, "-m", "deployer"] if code is None else [sys.executable, "-c", code]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True, check=True)  # noqa: S603
+    return result, time.perf_counter() - start
+
+
+def test_completion_does_not_import_heavy_modules(vertex_repo):
+    # Given
+    code = (
+        "import sys\n"
+        "from deployer.__main__ import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = ['pydantic', 'rich', 'typer', 'kfp', 'loguru']\n"
+        "print([m for m in heavy if m in sys.modules], file=sys.stderr)\n"
+    )
+
+    # When
+    result, _ = _run_completion(vertex_repo, code)
+
+    # Then
+    assert result.stdout.splitlines() == ["dummy_pipeline", "other_pipeline"]
+    assert result.stderr.strip() == "[]"
+
+
+def test_completion_latency(vertex_repo):
+    # Given
+    interpreter_startup = min(_run_completion(vertex_repo, code="pass")[1] for _ in range(3))
+
+    # When
+    latency = min(_run_completion(vertex_repo)[1] for _ in range(3))
+
+    # Then
+    assert latency - interpreter_startup < COMPLETION_LATENCY_BUDGET_S
@@ -0,0 +1,174 @@
+from pathlib import Path
+
+import kfp.dsl
+
+from deployer import deployment
+from deployer.deployment import (
+    DeployOptions,
+    EnvironmentDeployment,
+    StageOptions,
+    deploy_pipelines,
+    deploy_to_environments,
+    get_environment_ledger,
+)
+from deployer.settings import DeployerSettings
+from deployer.utils.compilation import compile_pipeline
+from deployer.utils.config import load_vertex_settings
+from deployer.utils.digest import bytes_digest
+
+
+@kfp.dsl.component(base_image="python:3.10-slim-buster")
+def dummy_component(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="dummy_pipeline")
+def dummy_pipeline(name: str) -> None:
+    dummy_component(name=name)
+
+
+@kfp.dsl.component(base_image="python:3.11-slim")
+def updated_component(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="dummy_pipeline")
+def updated_dummy_pipeline(name: str) -> None:
+    updated_component(name=name)
+
+
+ENV_FILE_TEMPLATE = """
+PROJECT_ID={project_id}
+GCP_REGION=europe-west1
+GAR_LOCATION=europe-west1
+GAR_PIPELINES_REPO_ID=my-repo
+VERTEX_STAGING_BUCKET_NAME=my-bucket
+VERTEX_SERVICE_ACCOUNT=sa@my-project.iam.gserviceaccount.com
+"""
+
+
+def test_deploy_to_environments(fake_gcp, tmp_path, monkeypatch):
+    # Given
+    monkeypatch.chdir(tmp_path)
+    env_files = []
+    for project_id in ["my-dev-project", "my-prd-project"]:
+        env_file = tmp_path / f"{project_id}.env"
+        env_file.write_text(ENV_FILE_TEMPLATE.format(project_id=project_id))
+        env_files.append(env_file)
+    compiled_pipeline = compile_pipeline(dummy_pipeline)
+
+    def _deployment(**options):
+        return EnvironmentDeployment(
+            pipelines={"dummy_pipeline": compiled_pipeline},
+            stage_inputs={
+                "dummy_pipeline": {"pipeline_spec": bytes_digest(compiled_pipeline.content)}
+            },
+            options=StageOptions(upload=True, tags=["dev"], **options),
+            local_package_path=tmp_path / "compiled",
+            ledger=str(tmp_path / "ledger.json"),
+        )
+
+    # When
+    results = deploy_to_environments(env_files, _deployment())
+    results_changed_only = deploy_to_environments(env_files, _deployment(changed_only=True))
+
+    # Then
+    assert results == {
+        str(env_file): {"dummy_pipeline": {"upload": "uploaded"}} for env_file in env_files
+    }
+    assert results_changed_only == {
+        str(env_file): {"dummy_pipeline": {"upload": "unchanged"}} for env_file in env_files
+    }
+    assert {project_id for project_id, _, _ in fake_gcp.state.packages} == {
+        "my-dev-project",
+        "my-prd-project",
+    }
+
+
+def test_deploy_pipelines_skip_unchanged_sources_to_environments(fake_gcp, tmp_path, monkeypatch):
+    # Given
+    monkeypatch.chdir(tmp_path)
+    pipeline_filepath = tmp_path / "vertex" / "pipelines" / "dummy_pipeline.py"
+    pipeline_filepath.parent.mkdir(parents=True)
+    pipeline_filepath.write_text("# dummy_pipeline\n")
+    imported = []
+    monkeypatch.setattr(
+        deployment,
+        "import_pipeline_from_dir",
+        lambda dirpath, pipeline_name: imported.append(pipeline_name) or dummy_pipeline,
+    )
+    env_files = []
+    for project_id in ["my-dev-project", "my-prd-project"]:
+        env_file = tmp_path / f"{project_id}.env"
+        env_file.write_text(ENV_FILE_TEMPLATE.format(project_id=project_id))
+        env_files.append(env_file)
+    ledger_filepath = str(tmp_path / "ledger.json")
+
+    def _deploy():
+        results = deploy_pipelines(
+            ["dummy_pipeline"],
+            env_files,
+            load_vertex_settings(env_file=env_files[0]),
+            DeployerSettings(vertex_folder_path=Path("vertex")),
+            StageOptions(upload=True, tags=["dev"], changed_only=True),
+            DeployOptions(ledger=ledger_filepath, skip_unchanged_sources=True),
+            checkpoint_options={},
+        )
+        outcomes = [r["dummy_pipeline"]["upload"] for r in results.environments.values()]
+        return outcomes, len(imported)
+
+    # When
+    first_deploy = _deploy()
+    unchanged = _deploy()
+    prd_settings = load_vertex_settings(env_file=env_files[1])
+    prd_ledger = get_environment_ledger(prd_settings, ledger_filepath)
+    prd_ledger.record("dummy_pipeline", sources="sha256:other")
+    prd_ledger.save()
+    changed_in_prd = _deploy()
+
+    # Then
+    assert first_deploy == (["uploaded", "uploaded"], 1)
+    assert unchanged == (["unchanged", "unchanged"], 1)
+    assert changed_in_prd == (["unchanged", "unchanged"], 2)
+
+
+def test_deploy_pipelines_changed_only_compares_compiled_specs(fake_gcp, tmp_path, monkeypatch):
+    # Given
+    monkeypatch.chdir(tmp_path)
+    pipeline_filepath = tmp_path / "vertex" / "pipelines" / "dummy_pipeline.py"
+    pipeline_filepath.parent.mkdir(parents=True)
+    pipeline_filepath.write_text("# dummy_pipeline\n")
+    # e.g. a shared package outside the vertex folder changes the pipeline, not its sources
+    pipelines = [dummy_pipeline, dummy_pipeline, updated_dummy_pipeline]
+    monkeypatch.setattr(
+        deployment, "import_pipeline_from_dir", lambda dirpath, pipeline_name: pipelines.pop(0)
+    )
+    env_file = tmp_path / "my-project.env"
+    env_file.write_text(ENV_FILE_TEMPLATE.format(project_id="my-project"))
+    vertex_settings = load_vertex_settings(env_file=env_file)
+    ledger_filepath = str(tmp_path / "ledger.json")
+
+    def _deploy():
+        deploy_pipelines(
+            ["dummy_pipeline"],
+            [env_file],
+            vertex_settings,
+            DeployerSettings(vertex_folder_path=Path("vertex")),
+            StageOptions(upload=True, tags=["dev"], changed_only=True),
+            DeployOptions(ledger=ledger_filepath),
+            checkpoint_options={},
+        )
+        package = fake_gcp.state.packages[("my-project", "my-repo", "dummy-pipeline")]
+        return len(package["versions"])
+
+    # When
+    n_versions = [_deploy() for _ in range(3)]
+
+    # Then
+    assert not pipelines
+    assert n_versions == [1, 1, 2]
+    deployed = get_environment_ledger(vertex_settings, ledger_filepath).get("dummy_pipeline")
+    assert deployed["pipeline_spec"] == bytes_digest(
+        compile_pipeline(updated_dummy_pipeline).content
+    )
+    assert deployed.get("sources") is None
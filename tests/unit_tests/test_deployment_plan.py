@@ -0,0 +1,243 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+from deployer.deployment_plan import (
+    ActionStatus,
+    AppliedDigests,
+    DeploymentManifest,
+    apply_actions,
+    build_actions,
+    load_manifest,
+)
+from deployer.utils.config import VertexPipelinesSettings
+from deployer.utils.exceptions import BadConfigError
+
+PIPELINE_MODULE = """
+import kfp.dsl
+
+
+@kfp.dsl.component(base_image="python:3.10-slim-buster")
+def dummy_component(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="dummy_pipeline")
+def dummy_pipeline(name: str) -> None:
+    dummy_component(name=name)
+"""
+
+MANIFEST = {
+    "concurrency": {"run": 2},
+    "pipelines": [
+        {
+            "name": "dummy_pipeline",
+            "upload": True,
+            "tags": ["latest"],
+            "runs": [
+                {"config_name": "dev.json"},
+                {"config_name": "prd.json", "skip_unchanged": True},
+            ],
+            "schedules": [{"config_name": "prd.json", "cron": "0 10 * * *"}],
+        }
+    ],
+}
+
+
+@pytest.fixture
+def vertex_plan_repo(tmp_path, monkeypatch):
+    pipelines_root_path = tmp_path / "vertex_plan" / "pipelines"
+    pipelines_root_path.mkdir(parents=True)
+    (pipelines_root_path / "dummy_pipeline.py").write_text(PIPELINE_MODULE)
+    configs_dirpath = tmp_path / "vertex_plan" / "configs" / "dummy_pipeline"
+    configs_dirpath.mkdir(parents=True)
+    (configs_dirpath / "dev.json").write_text('{"name": "dev"}')
+    (configs_dirpath / "prd.json").write_text('{"name": "prd"}')
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield {
+        "pipelines_root_path": Path("vertex_plan/pipelines"),
+        "configs_root_path": Path("vertex_plan/configs"),
+        "local_package_path": tmp_path / "compiled",
+    }
+    for module_name in [m for m in sys.modules if m.startswith("vertex_plan")]:
+        del sys.modules[module_name]
+
+
+def _vertex_settings(server) -> VertexPipelinesSettings:
+    return VertexPipelinesSettings(
+        PROJECT_ID="my-project",
+        GCP_REGION="europe-west1",
+        GAR_LOCATION="europe-west1",
+        GAR_PIPELINES_REPO_ID="my-repo",
+        VERTEX_STAGING_BUCKET_NAME="my-bucket",
+        VERTEX_SERVICE_ACCOUNT="sa@my-project.iam.gserviceaccount.com",
+        VERTEX_API_ENDPOINT=server.url,
+        GAR_ENDPOINT=server.url,
+    )
+
+
+def test_build_actions_dependencies():
+    # Given
+    manifest = DeploymentManifest.model_validate(MANIFEST)
+
+    # When
+    actions = build_actions(manifest, Path("configs"))
+
+    # Then
+    assert [(a.id, a.depends_on) for a in actions] == [
+        ("compile:dummy_pipeline", []),
+        ("upload:dummy_pipeline", ["compile:dummy_pipeline"]),
+        ("run:dummy_pipeline:dev.json", ["upload:dummy_pipeline"]),
+        ("run:dummy_pipeline:prd.json", ["upload:dummy_pipeline"]),
+        ("schedule:dummy_pipeline:prd.json", ["upload:dummy_pipeline"]),
+    ]
+    assert actions[2].config_filepath == Path("configs/dummy_pipeline/dev.json")
+
+
+def test_build_actions_rejects_duplicates():
+    # Given
+    manifest = DeploymentManifest.model_validate(
+        {"pipelines": [{"name": "dummy_pipeline"}, {"name": "dummy_pipeline"}]}
+    )
+
+    # When / Then
+    with pytest.raises(BadConfigError, match="compile:dummy_pipeline"):
+        build_actions(manifest, Path("configs"))
+
+
+def test_load_manifest_validates_configs(tmp_path):
+    # Given
+    manifest_filepath = tmp_path / "manifest.yaml"
+    manifest_filepath.write_text("pipelines:\n  - name: dummy_pipeline\n    runs: [{}]\n")
+
+    # When / Then
+    with pytest.raises(BadConfigError, match="Exactly one of config_name and config_filepath"):
+        load_manifest(manifest_filepath)
+
+
+def _count_pipeline_jobs(server) -> int:
+    return sum("/pipelineJobs/" in name for name in server.state.resources)
+
+
+def test_plan_then_apply_runs_and_skips_unchanged_actions(vertex_plan_repo, fake_gcp, tmp_path):
+    # Given
+    manifest = DeploymentManifest.model_validate(MANIFEST)
+    kwargs = {
+        "manifest": manifest,
+        "vertex_settings": _vertex_settings(fake_gcp),
+        "pipelines_root_path": vertex_plan_repo["pipelines_root_path"],
+        "local_package_path": vertex_plan_repo["local_package_path"],
+    }
+    digests_filepath = tmp_path / "cache" / "applied-digests.json"
+
+    def _apply(**options):
+        actions = build_actions(manifest, vertex_plan_repo["configs_root_path"])
+        applied_digests = AppliedDigests(digests_filepath)
+        return {
+            a.id: a.status
+            for a in apply_actions(actions, **kwargs, **options, applied_digests=applied_digests)
+        }
+
+    # When
+    planned = _apply(dry_run=True)
+    n_requests_after_plan = len(fake_gcp.requests)
+    applied = _apply()
+    n_runs = _count_pipeline_jobs(fake_gcp)
+    time.sleep(1)  # run names are timestamped to the second
+    reapplied = _apply()
+
+    # Then
+    assert set(planned.values()) == {ActionStatus.planned}
+    assert n_requests_after_plan == 0
+    assert set(applied.values()) == {ActionStatus.applied}
+    assert reapplied == {
+        "compile:dummy_pipeline": ActionStatus.applied,
+        "upload:dummy_pipeline": ActionStatus.unchanged,
+        "run:dummy_pipeline:dev.json": ActionStatus.applied,
+        "run:dummy_pipeline:prd.json": ActionStatus.unchanged,
+        "schedule:dummy_pipeline:prd.json": ActionStatus.unchanged,
+    }
+    assert _count_pipeline_jobs(fake_gcp) == n_runs + 1
+
+
+def test_apply_skips_actions_depending_on_failed_actions(vertex_plan_repo, fake_gcp, tmp_path):
+    # Given
+    manifest = DeploymentManifest.model_validate(MANIFEST)
+    actions = build_actions(manifest, vertex_plan_repo["configs_root_path"])
+    fake_gcp.inject_errors(count=10, method="POST", path_pattern="^/my-project/my-repo$")
+
+    # When
+    apply_actions(
+        actions,
+        manifest,
+        _vertex_settings(fake_gcp),
+        pipelines_root_path=vertex_plan_repo["pipelines_root_path"],
+        local_package_path=vertex_plan_repo["local_package_path"],
+        applied_digests=AppliedDigests(tmp_path / "applied-digests.json"),
+    )
+
+    # Then
+    assert [a.status for a in actions] == [
+        ActionStatus.applied,
+        ActionStatus.failed,
+        ActionStatus.skipped,
+        ActionStatus.skipped,
+        ActionStatus.skipped,
+    ]
+    assert not (tmp_path / "applied-digests.json").exists()
+
+
+SLOW_PIPELINE_MODULE = """
+import time
+
+import kfp.dsl
+
+
+@kfp.dsl.component(base_image="python:3.10-slim-buster")
+def {name}_component(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="{name}")
+def {name}(name: str) -> None:
+    time.sleep(0.05)  # releases the GIL while the graph is built
+    {name}_component(name=name)
+"""
+
+
+def test_apply_compiles_pipelines_one_at_a_time(vertex_plan_repo, fake_gcp, tmp_path):
+    # Given
+    pipeline_names = [f"slow_pipeline_{i}" for i in range(8)]
+    for pipeline_name in pipeline_names:
+        module = SLOW_PIPELINE_MODULE.replace("{name}", pipeline_name)
+        (tmp_path / vertex_plan_repo["pipelines_root_path"] / f"{pipeline_name}.py").write_text(
+            module
+        )
+    manifest = DeploymentManifest.model_validate(
+        {"pipelines": [{"name": name, "local_package": True} for name in pipeline_names]}
+    )
+    actions = build_actions(manifest, vertex_plan_repo["configs_root_path"])
+
+    # When
+    apply_actions(
+        actions,
+        manifest,
+        _vertex_settings(fake_gcp),
+        pipelines_root_path=vertex_plan_repo["pipelines_root_path"],
+        local_package_path=vertex_plan_repo["local_package_path"],
+        applied_digests=AppliedDigests(tmp_path / "applied-digests.json"),
+    )
+
+    # Then
+    assert [(a.id, a.status, a.error) for a in actions] == [
+        (f"compile:{name}", ActionStatus.applied, None) for name in pipeline_names
+    ]
+    for pipeline_name in pipeline_names:
+        package_filepath = vertex_plan_repo["local_package_path"] / f"{pipeline_name}.yaml"
+        tasks = yaml.safe_load(package_filepath.read_text())["root"]["dag"]["tasks"]
+        assert list(tasks) == [f"{pipeline_name.replace('_', '-')}-component"]
@@ -0,0 +1,123 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from deployer.utils.discovery import (
+    DiscoveryCache,
+    list_files_with_suffixes,
+    list_python_modules,
+)
+
+
+class TestListFilesWithSuffixes:
+    def test_filters_on_suffixes_and_ignores_directories(self, tmp_path):
+        # Given
+        for name in ["b.json", "a.yaml", "c.txt", "d.py"]:
+            (tmp_path / name).touch()
+        (tmp_path / "folder.json").mkdir()
+
+        # When
+        filepaths = list_files_with_suffixes(tmp_path, [".json", ".yaml", ".py"])
+
+        # Then
+        assert filepaths == [tmp_path / "a.yaml", tmp_path / "b.json", tmp_path / "d.py"]
+
+    def test_directory_does_not_exist(self, tmp_path):
+        # When
+        filepaths = list_files_with_suffixes(tmp_path / "nonexistent", [".json"])
+
+        # Then
+        assert filepaths == []
+
+    def test_list_python_modules_ignores_init(self, tmp_path):
+        # Given
+        for name in ["__init__.py", "pipeline_b.py", "pipeline_a.py", "README.md"]:
+            (tmp_path / name).touch()
+
+        # When
+        names = list_python_modules(tmp_path)
+
+        # Then
+        assert names == ["pipeline_a", "pipeline_b"]
+
+
+class TestDiscoveryCache:
+    def test_cache_is_used_after_save(self, tmp_path):
+        # Given
+        pipelines_root_path = tmp_path / "pipelines"
+        pipelines_root_path.mkdir()
+        (pipelines_root_path / "dummy_pipeline.py").touch()
+        cache_filepath = tmp_path / "cache" / "discovery.json"
+
+        cache = DiscoveryCache(cache_filepath)
+        cache.list_pipeline_names(pipelines_root_path)
+        cache.save()
+
+        # When
+        with patch("deployer.utils.discovery.list_python_modules") as mock_list:
+            names = DiscoveryCache(cache_filepath).list_pipeline_names(pipelines_root_path)
+
+        # Then
+        assert names == ["dummy_pipeline"]
+        mock_list.assert_not_called()
+        assert (cache_filepath.parent / ".gitignore").exists()
+
+    def test_cache_file_not_written_if_unchanged(self, tmp_path):
+        # Given
+        cache_filepath = tmp_path / "discovery.json"
+
+        # When
+        DiscoveryCache(cache_filepath).save()
+
+        # Then
+        assert not cache_filepath.exists()
+
+    def test_config_filepaths_invalidated_when_file_added(self, tmp_path):
+        # Given
+        configs_root_path = tmp_path / "configs"
+        (configs_root_path / "dummy_pipeline").mkdir(parents=True)
+        (configs_root_path / "dummy_pipeline" / "dev.yaml").touch()
+        cache_filepath = tmp_path / "discovery.json"
+
+        cache = DiscoveryCache(cache_filepath)
+        cache.list_config_filepaths(configs_root_path, "dummy_pipeline")
+        cache.save()
+
+        # When
+        (configs_root_path / "dummy_pipeline" / "prd.json").touch()
+        filepaths = DiscoveryCache(cache_filepath).list_config_filepaths(
+            configs_root_path, "dummy_pipeline"
+        )
+
+        # Then
+        assert [p.name for p in filepaths] == ["dev.yaml", "prd.json"]
+
+    def test_settings_invalidated_when_pyproject_changes(self, tmp_path):
+        # Given
+        pyproject_toml_path = tmp_path / "pyproject.toml"
+        pyproject_toml_path.write_text("[tool.vertex_deployer]\n")
+        cache_filepath = tmp_path / "discovery.json"
+
+        cache = DiscoveryCache(cache_filepath)
+        cache.set_settings(str(pyproject_toml_path), {"log_level": "DEBUG"})
+        cache.save()
+
+        # When
+        cached_settings = DiscoveryCache(cache_filepath).get_settings(str(pyproject_toml_path))
+        pyproject_toml_path.write_text('[tool.vertex_deployer]\nlog_level = "INFO"\n')
+        stale_settings = DiscoveryCache(cache_filepath).get_settings(str(pyproject_toml_path))
+
+        # Then
+        assert cached_settings == {"log_level": "DEBUG"}
+        assert stale_settings is None
+
+    def test_corrupted_cache_file_is_ignored(self, tmp_path):
+        # Given
+        cache_filepath = tmp_path / "discovery.json"
+        cache_filepath.write_text("{not json")
+
+        # When
+        cache = DiscoveryCache(cache_filepath)
+
+        # Then
+        assert cache.get_settings(None) is None
+        assert cache.list_pipeline_names(Path(tmp_path / "nonexistent")) == []
@@ -0,0 +1,120 @@
+import time
+
+import kfp.dsl
+import pytest
+import requests
+from kfp.registry import RegistryClient
+
+from deployer.fake_gcp import FakeGCPServer
+from deployer.pipeline_deployer import VertexPipelineDeployer
+from deployer.utils.compilation import compile_pipeline
+
+
+@kfp.dsl.component(base_image="python:3.10-slim-buster")
+def _hello(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="dummy-pipeline")
+def dummy_pipeline(name: str = "world") -> None:
+    """Say hello."""
+    _hello(name=name)
+
+
+def _make_deployer(server: FakeGCPServer, tmp_path) -> VertexPipelineDeployer:
+    return VertexPipelineDeployer(
+        pipeline_name="dummy_pipeline",
+        pipeline_func=dummy_pipeline,
+        project_id="my-project",
+        region="europe-west1",
+        staging_bucket_name="my-bucket",
+        service_account="sa@my-project.iam.gserviceaccount.com",
+        gar_location="europe-west1",
+        gar_repo_id="my-repo",
+        local_package_path=tmp_path,
+        api_endpoint=server.url,
+        gar_endpoint=server.url,
+    )
+
+
+def test_registry_endpoints(fake_gcp, tmp_path):
+    # Given
+    client = RegistryClient(host=f"{fake_gcp.url}/my-project/my-repo")
+    content = compile_pipeline(dummy_pipeline).content
+    (tmp_path / "dummy_pipeline.yaml").write_bytes(content)
+
+    # When
+    package_name, version = client.upload_pipeline(
+        str(tmp_path / "dummy_pipeline.yaml"), tags=["latest", "v1"]
+    )
+    client.create_tag(package_name, version, "prd")
+
+    # Then
+    assert package_name == "dummy-pipeline"
+    assert version.startswith("sha256:")
+    assert client.get_tag(package_name, "latest")["version"].endswith(f"/versions/{version}")
+    assert sorted(t["name"].split("/")[-1] for t in client.list_tags(package_name)) == [
+        "latest",
+        "prd",
+        "v1",
+    ]
+    assert [v["name"].split("/")[-1] for v in client.list_versions(package_name)] == [version]
+    response = requests.get(f"{fake_gcp.url}/my-project/my-repo/{package_name}/prd", timeout=5)
+    assert response.content == content
+    with pytest.raises(requests.HTTPError):
+        RegistryClient(host=f"{fake_gcp.url}/my-project/my-repo").get_tag(package_name, "dev")
+
+
+def test_inject_errors(fake_gcp):
+    # Given
+    client = RegistryClient(host=f"{fake_gcp.url}/my-project/my-repo")
+    fake_gcp.inject_errors(count=2, status=429, path_pattern="/packages$")
+
+    # When
+    statuses = []
+    for _ in range(3):
+        try:
+            client.list_packages()
+            statuses.append(200)
+        except requests.HTTPError as e:
+            statuses.append(e.response.status_code)
+
+    # Then
+    assert statuses == [429, 429, 200]
+    assert [r.status for r in fake_gcp.requests] == statuses
+
+
+def test_error_rate_and_latency():
+    # Given
+    with FakeGCPServer(latency=0.05, error_rate=1.0, error_status=500) as server:
+        # When
+        start = time.perf_counter()
+        response = requests.get(f"{server.url}/my-project/my-repo/packages", timeout=5)
+        elapsed = time.perf_counter() - start
+
+    # Then
+    assert response.status_code == 500
+    assert response.json()["error"]["status"] == "INTERNAL"
+    assert elapsed >= 0.05
+
+
+def test_deploy_offline(fake_gcp, tmp_path):
+    # Given
+    deployer = _make_deployer(fake_gcp, tmp_path)
+
+    # When
+    deployer.compile().upload_to_registry(tags=["latest"])
+    deployer.run(tag="latest")
+    deployer.schedule(cron="0 0 * * *", tag="latest")
+    deployer.schedule(cron="0 1 * * *", tag="latest", delete_last_schedule=True)
+
+    # Then
+    resources = fake_gcp.state.resources
+    jobs = [r for name, r in resources.items() if "/pipelineJobs/" in name]
+    schedules = [r for name, r in resources.items() if "/schedules/" in name]
+    assert len(jobs) == 1
+    assert jobs[0]["displayName"] == "dummy_pipeline"
+    assert jobs[0]["serviceAccount"] == "sa@my-project.iam.gserviceaccount.com"
+    assert len(schedules) == 1
+    assert schedules[0]["cron"] == "TZ=Europe/Paris 0 1 * * *"
+    assert schedules[0]["displayName"] == "schedule-dummy_pipeline"
@@ -0,0 +1,88 @@
+import importlib
+import sys
+
+import pytest
+
+from deployer.utils.import_timing import (
+    ImportRecord,
+    collect_imports,
+    summarize_imports,
+    traced_imports,
+)
+
+
+@pytest.fixture
+def import_project(tmp_path, monkeypatch):
+    site_dirpath = tmp_path / "site"
+    project_dirpath = tmp_path / "project"
+    files = {
+        site_dirpath / "heavy_lib.py": "import time\ntime.sleep(0.05)\n",
+        project_dirpath / "timed_project" / "__init__.py": "",
+        project_dirpath / "timed_project" / "components.py": "import heavy_lib\n",
+        project_dirpath / "timed_project" / "pipeline.py": "import timed_project.components\n",
+    }
+    for path, content in files.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    monkeypatch.chdir(project_dirpath)
+    monkeypatch.syspath_prepend(str(site_dirpath))
+    monkeypatch.syspath_prepend(str(project_dirpath))
+    yield project_dirpath
+    for module_name in ["heavy_lib", *[m for m in sys.modules if m.startswith("timed_project")]]:
+        sys.modules.pop(module_name, None)
+
+
+def test_collect_traced_imports(import_project):
+    # When
+    with collect_imports() as records:
+        with traced_imports():
+            importlib.import_module("timed_project.pipeline")
+
+    # Then
+    records_by_module = {r.module: r for r in records}
+    assert set(records_by_module) == {
+        "timed_project",
+        "timed_project.pipeline",
+        "timed_project.components",
+        "heavy_lib",
+    }
+    heavy_lib = records_by_module["heavy_lib"]
+    assert not heavy_lib.is_project
+    assert heavy_lib.imported_by == "timed_project.components"
+    assert heavy_lib.cumulative_time >= 0.05
+    pipeline = records_by_module["timed_project.pipeline"]
+    assert pipeline.is_project
+    assert pipeline.cumulative_time >= heavy_lib.cumulative_time
+    assert pipeline.self_time < heavy_lib.cumulative_time
+    assert sys.modules["heavy_lib"].__loader__.__class__.__name__ != "_TimedLoader"
+
+
+def test_imports_outside_traced_blocks_are_ignored(import_project):
+    # When
+    with collect_imports() as records:
+        importlib.import_module("timed_project.pipeline")
+
+    # Then
+    assert records == []
+    assert all(type(f).__name__ != "_TimedImportFinder" for f in sys.meta_path)
+
+
+def test_summarize_imports():
+    # Given
+    components, pipeline = "project.components", "project.pipeline"
+    records = [
+        ImportRecord("heavy_lib.core", "heavy_lib", components, False, 0.2, 0.2),
+        ImportRecord("heavy_lib", components, components, False, 0.1, 0.3),
+        ImportRecord("light_lib", components, components, False, 0.05, 0.05),
+        ImportRecord(components, pipeline, pipeline, True, 0.01, 0.36),
+        ImportRecord(pipeline, None, None, True, 0.02, 0.38),
+    ]
+
+    # When
+    summary = summarize_imports(records, n_heaviest=1)
+
+    # Then
+    assert [e["module"] for e in summary] == ["project.components", "project.pipeline"]
+    assert summary[0]["total_time"] == pytest.approx(0.36)
+    assert summary[0]["heaviest_imports"] == [("heavy_lib", 0.3)]
+    assert summary[1]["total_time"] == pytest.approx(0.02)
@@ -0,0 +1,136 @@
+import os
+import threading
+
+from deployer.utils.instrumentation import (
+    add_listener,
+    add_start_listener,
+    collect_all_stages,
+    collect_counts,
+    collect_stages,
+    count,
+    current_labels,
+    current_stage,
+    remove_listener,
+    remove_start_listener,
+    stage,
+)
+
+
+def test_nested_stages_inherit_labels():
+    # When
+    with collect_stages() as records:
+        with stage("check", pipeline="dummy"):
+            with stage("compile"):
+                labels = current_labels()
+            outer_stage = current_stage()
+
+    # Then
+    assert labels == {"pipeline": "dummy"}
+    assert outer_stage == "check"
+    assert current_stage() is None
+    assert [(r.name, r.labels) for r in records] == [
+        ("compile", {"pipeline": "dummy"}),
+        ("check", {"pipeline": "dummy"}),
+    ]
+    assert records[1].elapsed >= records[0].elapsed
+    assert current_labels() == {}
+
+
+def test_collectors_are_per_thread():
+    # Given
+    def _other_thread():
+        with stage("other"):
+            pass
+
+    # When
+    with collect_stages() as records:
+        thread = threading.Thread(target=_other_thread)
+        thread.start()
+        thread.join()
+        with stage("mine"):
+            pass
+
+    # Then
+    assert [r.name for r in records] == ["mine"]
+
+
+def test_listeners_receive_stages_from_all_threads():
+    # Given
+    def _other_thread():
+        with stage("other"):
+            pass
+
+    received = []
+    add_listener(received.append)
+
+    # When
+    try:
+        thread = threading.Thread(target=_other_thread)
+        thread.start()
+        thread.join()
+    finally:
+        remove_listener(received.append)
+    with stage("after"):
+        pass
+
+    # Then
+    assert [r.name for r in received] == ["other"]
+
+
+def test_start_listeners_receive_labels():
+    # Given
+    started = []
+
+    def _on_start(name, labels):
+        started.append((name, labels))
+
+    add_start_listener(_on_start)
+
+    # When
+    try:
+        with stage("check", pipeline="dummy"):
+            with stage("compile"):
+                pass
+    finally:
+        remove_start_listener(_on_start)
+
+    # Then
+    assert started == [("check", {"pipeline": "dummy"}), ("compile", {"pipeline": "dummy"})]
+
+
+def test_collect_all_stages():
+    # Given
+    def _other_thread():
+        with stage("other"):
+            pass
+
+    # When
+    with collect_all_stages() as records:
+        thread = threading.Thread(target=_other_thread, name="worker")
+        thread.start()
+        thread.join()
+        with stage("mine"):
+            pass
+    with stage("after"):
+        pass
+
+    # Then
+    assert [(r.name, r.thread_name) for r in records] == [
+        ("other", "worker"),
+        ("mine", "MainThread"),
+    ]
+    assert {r.process_id for r in records} == {os.getpid()}
+
+
+def test_counts_have_stage_labels():
+    # When
+    with collect_counts() as records:
+        with stage("check", pipeline="dummy"):
+            count("cache_hits", cache="compiled_pipelines")
+        count("configs", value=2)
+
+    # Then
+    assert [(r.name, r.labels, r.value) for r in records] == [
+        ("cache_hits", {"pipeline": "dummy", "cache": "compiled_pipelines"}, 1),
+        ("configs", {}, 2),
+    ]
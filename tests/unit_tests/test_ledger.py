@@ -0,0 +1,101 @@
+import pytest
+
+from deployer.utils.instrumentation import collect_all_stages
+from deployer.utils.ledger import DeploymentLedger, get_sources_digest
+from deployer.utils.watch import ModuleGraph
+
+
+@pytest.fixture
+def vertex_repo(tmp_path, monkeypatch):
+    files = {
+        "vertex/components/dummy.py": "",
+        "vertex/components/other.py": "",
+        "vertex/pipelines/dummy_pipeline.py": "from vertex.components import dummy\n",
+    }
+    for path, content in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(content)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_sources_digest_follows_imports(vertex_repo):
+    # Given
+    pipeline_filepath = vertex_repo / "vertex" / "pipelines" / "dummy_pipeline.py"
+
+    def _digest():
+        return get_sources_digest(ModuleGraph(vertex_repo / "vertex"), pipeline_filepath)
+
+    # When
+    digest = _digest()
+    (vertex_repo / "vertex" / "components" / "other.py").write_text("# not imported\n")
+    digest_after_other_change = _digest()
+    (vertex_repo / "vertex" / "components" / "dummy.py").write_text("# imported\n")
+    digest_after_imported_change = _digest()
+
+    # Then
+    assert digest is not None
+    assert digest_after_other_change == digest
+    assert digest_after_imported_change != digest
+
+
+def test_local_ledger_merges_concurrent_saves(tmp_path):
+    # Given
+    filepath = tmp_path / "ledger.json"
+    ledger = DeploymentLedger("project/region", filepath)
+    other_ledger = DeploymentLedger("project/region", filepath)
+
+    # When
+    ledger.record("dummy_pipeline", pipeline_spec="sha256:abc", tags=["dev"])
+    other_ledger.record("other_pipeline", pipeline_spec="sha256:def")
+    ledger.save()
+    other_ledger.save()
+
+    # Then
+    reloaded = DeploymentLedger("project/region", filepath)
+    assert reloaded.get("dummy_pipeline")["tags"] == ["dev"]
+    assert reloaded.get("other_pipeline")["pipeline_spec"] == "sha256:def"
+    assert DeploymentLedger("project/other-region", filepath).get("dummy_pipeline") == {}
+
+
+def test_ledger_is_only_read_by_get(tmp_path):
+    # Given
+    filepath = tmp_path / "ledger.json"
+    ledger = DeploymentLedger("project/region", filepath)
+    ledger.record("other_pipeline", tags=["dev"])
+    ledger.save()
+
+    # When
+    with collect_all_stages() as stages:
+        ledger = DeploymentLedger("project/region", filepath)
+        ledger.record("dummy_pipeline", pipeline_spec="sha256:abc")
+        ledger.save()
+        stages_on_save = [s.name for s in stages]
+        entries = DeploymentLedger("project/region", filepath).get("dummy_pipeline")
+
+    # Then
+    assert stages_on_save == ["ledger_write"]
+    assert [s.name for s in stages] == ["ledger_write", "ledger_read"]
+    assert entries["pipeline_spec"] == "sha256:abc"
+    assert ledger.get("other_pipeline")["tags"] == ["dev"]
+
+
+def test_gcs_ledger_merges_concurrent_saves(fake_gcp):
+    # Given
+    uri = "gs://ledger-bucket/ci/ledger.json"
+    ledger = DeploymentLedger("project/region", uri, project_id="project")
+    other_ledger = DeploymentLedger("project/region", uri, project_id="project")
+
+    # When
+    ledger.record("dummy_pipeline", schedule={"cron": "0 10 * * *"})
+    other_ledger.record("dummy_pipeline", pipeline_spec="sha256:abc")
+    ledger.save()
+    other_ledger.save()
+
+    # Then
+    entry = DeploymentLedger("project/region", uri, project_id="project").get("dummy_pipeline")
+    assert entry["schedule"] == {"cron": "0 10 * * *"}
+    assert entry["pipeline_spec"] == "sha256:abc"
+    assert ("GET", "/download/storage/v1/b/ledger-bucket/o/ci%2Fledger.json", 200) in [
+        tuple(r) for r in fake_gcp.requests
+    ]
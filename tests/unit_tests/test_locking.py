@@ -0,0 +1,63 @@
+import os
+import threading
+
+from deployer.utils.instrumentation import collect_stages
+from deployer.utils.locking import LOCK_FILENAME, _try_lock, directory_lock
+
+
+def _can_lock(dirpath, shared=False):
+    fd = os.open(dirpath / LOCK_FILENAME, os.O_RDWR)
+    try:
+        return _try_lock(fd, shared)
+    finally:
+        os.close(fd)
+
+
+class TestDirectoryLock:
+    def test_exclusive_lock_blocks_other_lockers(self, tmp_path):
+        # Given
+        dirpath = tmp_path / "compiled_pipelines"
+
+        # When
+        with directory_lock(dirpath):
+            can_lock_while_held = _can_lock(dirpath, shared=True)
+        can_lock_after_release = _can_lock(dirpath)
+
+        # Then
+        assert (dirpath / LOCK_FILENAME).exists()
+        assert not can_lock_while_held
+        assert can_lock_after_release
+
+    def test_shared_locks_are_compatible(self, tmp_path):
+        # When
+        with directory_lock(tmp_path, shared=True):
+            can_share = _can_lock(tmp_path, shared=True)
+            can_lock_exclusively = _can_lock(tmp_path)
+
+        # Then
+        assert can_share
+        assert not can_lock_exclusively
+
+    def test_waits_for_lock_release(self, tmp_path):
+        # Given
+        events = []
+        lock_acquired = threading.Event()
+
+        def hold_lock():
+            with directory_lock(tmp_path):
+                lock_acquired.set()
+                threading.Event().wait(0.1)
+                events.append("released")
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        lock_acquired.wait()
+
+        # When
+        with collect_stages() as stages, directory_lock(tmp_path):
+            events.append("acquired")
+        thread.join()
+
+        # Then
+        assert events == ["released", "acquired"]
+        assert [(s.name, s.labels) for s in stages] == [("lock_wait", {"lock": str(tmp_path)})]
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+
+from loguru import logger
+
+from deployer.utils.instrumentation import stage
+from deployer.utils.logging import JsonLogSink
+
+
+def _add_sink(sink: JsonLogSink) -> int:
+    return logger.add(sink, level="DEBUG", format="{message}")
+
+
+def test_json_log_sink_writes_context_fields(tmp_path):
+    # Given
+    filepath = tmp_path / "logs.jsonl"
+    with filepath.open("w") as f:
+        sink = JsonLogSink(f, correlation_id="abc123", start_time=0.0)
+        handler_id = _add_sink(sink)
+
+        # When
+        with stage("submit", pipeline="dummy", run_name="dummy-run"):
+            logger.bind(attempt=1).info("Submitting")
+        logger.remove(handler_id)
+
+    # Then
+    (line,) = filepath.read_text().splitlines()
+    fields = json.loads(line)
+    assert fields["message"] == "Submitting"
+    assert fields["level"] == "INFO"
+    assert fields["correlation_id"] == "abc123"
+    assert fields["stage"] == "submit"
+    assert fields["pipeline"] == "dummy"
+    assert fields["run_name"] == "dummy-run"
+    assert fields["attempt"] == 1
+    assert fields["process"] == os.getpid()
+    assert fields["elapsed_ms"] > 0
+
+
+def test_json_log_sink_writes_whole_lines_from_threads():
+    # Given
+    read_fd, write_fd = os.pipe()
+    n_threads, n_messages = 8, 200
+    with os.fdopen(write_fd, "w") as stream:
+        sink = JsonLogSink(stream, correlation_id="abc123", start_time=0.0, flush_interval=0.01)
+        handler_id = _add_sink(sink)
+        chunks = []
+        reader = threading.Thread(
+            target=lambda: chunks.extend(iter(lambda: os.read(read_fd, 65536), b""))
+        )
+        reader.start()
+
+        def _log(i: int):
+            for j in range(n_messages):
+                logger.info(f"{i}-{j}" + "x" * 100)
+
+        # When
+        threads = [threading.Thread(target=_log, args=(i,)) for i in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.remove(handler_id)
+    reader.join()
+    os.close(read_fd)
+
+    # Then
+    lines = b"".join(chunks).decode().splitlines()
+    messages = [json.loads(line)["message"] for line in lines]
+    assert len(messages) == n_threads * n_messages
+    assert {m.split("x")[0] for m in messages} == {
+        f"{i}-{j}" for i in range(n_threads) for j in range(n_messages)
+    }
@@ -0,0 +1,77 @@
+import tracemalloc
+
+from deployer.utils.instrumentation import stage
+from deployer.utils.memory import StageMemory, summarize_memory, trace_memory
+
+MiB = 1024 * 1024
+
+
+def test_nested_stages_memory():
+    # Given
+    kept = []
+
+    # When
+    with trace_memory() as records:
+        with stage("check", pipeline="dummy"):
+            with stage("compile"):
+                kept.append(bytearray(2 * MiB))
+            with stage("model_creation"):
+                temporary = bytearray(4 * MiB)
+                del temporary
+
+    # Then
+    memory = {r.name: r for r in records}
+    assert [r.name for r in records] == ["compile", "model_creation", "check"]
+    assert memory["compile"].labels == {"pipeline": "dummy"}
+    assert memory["compile"].allocated >= 2 * MiB
+    assert memory["compile"].top_sites[0][0].endswith("test_memory.py:17")
+    assert memory["model_creation"].allocated < MiB
+    assert memory["model_creation"].peak >= 3 * MiB
+    assert memory["check"].allocated >= 2 * MiB
+    assert memory["check"].peak >= 3 * MiB
+    assert not tracemalloc.is_tracing()
+
+
+def test_stages_outside_block_are_not_traced():
+    # When
+    with trace_memory() as records:
+        pass
+    with stage("after"):
+        pass
+
+    # Then
+    assert records == []
+
+
+def test_summarize_memory():
+    # Given
+    records = [
+        StageMemory("config_validation", {"pipeline": "a"}, 10, 30, [("a.py:1", 10)], 100),
+        StageMemory("config_validation", {"pipeline": "a"}, 20, 25, [("a.py:1", 5)], 200),
+        StageMemory("compile", {"pipeline": "a"}, 50, 60, [("b.py:2", 50)], None),
+    ]
+
+    # When
+    summary = summarize_memory(records)
+
+    # Then
+    assert summary == [
+        {
+            "pipeline": "a",
+            "stage": "config_validation",
+            "count": 2,
+            "allocated": 30,
+            "peak": 30,
+            "peak_rss": 200,
+            "top_sites": [("a.py:1", 15)],
+        },
+        {
+            "pipeline": "a",
+            "stage": "compile",
+            "count": 1,
+            "allocated": 50,
+            "peak": 60,
+            "peak_rss": None,
+            "top_sites": [("b.py:2", 50)],
+        },
+    ]
@@ -0,0 +1,130 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from google.api_core import exceptions, retry
+
+from deployer.utils.instrumentation import collect_all_stages, count, stage
+from deployer.utils.metrics import (
+    MetricsCollector,
+    collect_metrics,
+    push_metrics,
+    write_metrics_file,
+)
+
+
+def test_collect_metrics():
+    # When
+    with collect_metrics("check") as metrics:
+        with stage("check", pipeline="dummy_pipeline"):
+            with stage("config_validation", config="dev.json"):
+                count("configs")
+            count("cache_hits", cache="compiled_pipelines")
+            count("cache_hits", cache="compiled_pipelines")
+    count("configs")
+
+    # Then
+    lines = metrics.format().splitlines()
+    labels = 'command="check",pipeline="dummy_pipeline",stage="config_validation"'
+    assert "# TYPE vertex_deployer_stage_duration_seconds histogram" in lines
+    assert f'vertex_deployer_stage_duration_seconds_bucket{{{labels},le="0.01"}} 1' in lines
+    assert f'vertex_deployer_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+    assert f"vertex_deployer_stage_duration_seconds_count{{{labels}}} 1" in lines
+    assert (
+        'vertex_deployer_cache_hits_total{cache="compiled_pipelines",command="check",'
+        'pipeline="dummy_pipeline"} 2'
+    ) in lines
+    assert 'vertex_deployer_configs_total{command="check",pipeline="dummy_pipeline"} 1' in lines
+
+
+def test_api_retries_are_counted():
+    # Given
+    calls = []
+
+    def _flaky_call():
+        calls.append(None)
+        if len(calls) < 3:
+            raise exceptions.ServiceUnavailable("unavailable")
+
+    retried_call = retry.Retry(initial=0.001, maximum=0.001, timeout=5)(_flaky_call)
+
+    # When
+    with collect_metrics("deploy") as metrics, stage("run", pipeline="dummy_pipeline"):
+        retried_call()
+
+    # Then
+    assert (
+        'vertex_deployer_api_retries_total{command="deploy",pipeline="dummy_pipeline"} 2'
+    ) in metrics.format().splitlines()
+
+
+def test_worker_records():
+    # Given
+    with collect_all_stages() as stages, stage("compile", pipeline="dummy_pipeline"):
+        pass
+    worker_stage = {**stages[0]._asdict(), "process_id": os.getpid() + 1}
+    worker_count = {
+        "name": "configs",
+        "labels": {"pipeline": "dummy_pipeline"},
+        "value": 3,
+        "process_id": os.getpid() + 1,
+    }
+    metrics = MetricsCollector("check")
+
+    # When
+    metrics.add_worker_records([stages[0]._asdict(), worker_stage], [worker_count])
+
+    # Then
+    lines = metrics.format().splitlines()
+    labels = 'command="check",pipeline="dummy_pipeline",stage="compile"'
+    assert f"vertex_deployer_stage_duration_seconds_count{{{labels}}} 1" in lines
+    assert 'vertex_deployer_configs_total{command="check",pipeline="dummy_pipeline"} 3' in lines
+
+
+def test_write_metrics_file(tmp_path):
+    # Given
+    filepath = tmp_path / "textfiles" / "vertex_deployer.prom"
+
+    # When
+    write_metrics_file("metric 1\n", filepath)
+
+    # Then
+    assert filepath.read_text() == "metric 1\n"
+    assert [p.name for p in filepath.parent.iterdir()] == ["vertex_deployer.prom"]
+
+
+def test_push_metrics():
+    # Given
+    pushed = []
+
+    class _Gateway(BaseHTTPRequestHandler):
+        def do_PUT(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            pushed.append((self.path, self.headers["Content-Type"], body.decode()))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    gateway = HTTPServer(("127.0.0.1", 0), _Gateway)
+    thread = threading.Thread(target=gateway.serve_forever, daemon=True)
+    thread.start()
+
+    # When
+    try:
+        push_metrics(
+            "metric 1\n", f"http://127.0.0.1:{gateway.server_port}/", {"command": "check"}
+        )
+    finally:
+        gateway.shutdown()
+        gateway.server_close()
+
+    # Then
+    assert pushed == [
+        (
+            "/metrics/job/vertex_deployer/command/check",
+            "text/plain; version=0.0.4; charset=utf-8",
+            "metric 1\n",
+        )
+    ]
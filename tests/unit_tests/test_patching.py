@@ -0,0 +1,116 @@
+import copy
+import json
+
+import kfp.dsl
+import pytest
+
+from deployer.patching import (
+    PipelineSpecPatches,
+    load_patches,
+    patch_compiled_pipeline,
+    patch_pipeline_spec,
+)
+from deployer.utils.compilation import compile_pipeline, load_compiled_pipeline
+from deployer.utils.exceptions import BadConfigError
+
+
+@kfp.dsl.component(base_image="python:3.10-slim-buster")
+def dummy_component(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="dummy_pipeline")
+def dummy_pipeline(name: str) -> None:
+    dummy_component(name=name).set_display_name("first")
+    dummy_component(name=name)
+
+
+def _executors(compiled_pipeline):
+    return compiled_pipeline.pipeline_spec["deploymentSpec"]["executors"]
+
+
+def test_patch_compiled_pipeline(tmp_path):
+    # Given
+    compiled_pipeline = compile_pipeline(dummy_pipeline)
+    patches_filepath = tmp_path / "patches.toml"
+    patches_filepath.write_text(
+        '[images]\n"python" = "python:3.11-slim"\n\n'
+        '[tasks."dummy-component*"]\ncpu_limit = "2"\nmemory_limit = "8G"\n'
+        "retry = { max_retry_count = 3 }\n\n"
+        "[pipelines.dummy_pipeline.tasks.dummy-component-2]\ncpu_limit = 4\n"
+    )
+
+    # When
+    patches = load_patches(patches_filepath)
+    patched_pipeline = patch_compiled_pipeline(compiled_pipeline, "dummy_pipeline", patches)
+
+    # Then
+    executors = _executors(patched_pipeline)
+    assert len(executors) == 2
+    assert {e["container"]["image"] for e in executors.values()} == {"python:3.11-slim"}
+    assert sorted(e["container"]["resources"]["cpuLimit"] for e in executors.values()) == [
+        2.0,
+        4.0,
+    ]
+    assert all(e["container"]["resources"]["memoryLimit"] == 8.0 for e in executors.values())
+    tasks = patched_pipeline.pipeline_spec["root"]["dag"]["tasks"]
+    assert all(t["retryPolicy"]["maxRetryCount"] == 3 for t in tasks.values())
+    assert load_compiled_pipeline(patched_pipeline.content) == patched_pipeline
+    assert all(
+        e["container"]["image"] == "python:3.10-slim-buster"
+        for e in _executors(compiled_pipeline).values()
+    )
+
+
+def test_patch_pipeline_spec_with_shared_executor():
+    # Given
+    pipeline_spec = copy.deepcopy(compile_pipeline(dummy_pipeline).pipeline_spec)
+    pipeline_spec["root"]["dag"]["tasks"]["dummy-component-2"]["componentRef"]["name"] = (
+        "comp-dummy-component"
+    )
+    del pipeline_spec["components"]["comp-dummy-component-2"]
+    del pipeline_spec["deploymentSpec"]["executors"]["exec-dummy-component-2"]
+    patches = PipelineSpecPatches.model_validate(
+        {"tasks": {"dummy-component-2": {"image": "python:3.11-slim"}}}
+    )
+
+    # When
+    patched_spec = patch_pipeline_spec(pipeline_spec, "dummy_pipeline", patches)
+
+    # Then
+    tasks = patched_spec["root"]["dag"]["tasks"]
+    component_name = tasks["dummy-component-2"]["componentRef"]["name"]
+    assert tasks["dummy-component"]["componentRef"]["name"] == "comp-dummy-component"
+    assert component_name != "comp-dummy-component"
+    executors = patched_spec["deploymentSpec"]["executors"]
+    executor_label = patched_spec["components"][component_name]["executorLabel"]
+    assert executors[executor_label]["container"]["image"] == "python:3.11-slim"
+    assert executors["exec-dummy-component"]["container"]["image"] == "python:3.10-slim-buster"
+
+
+def test_patch_compiled_pipeline_without_patches():
+    # Given
+    compiled_pipeline = compile_pipeline(dummy_pipeline)
+    patches = PipelineSpecPatches.model_validate(
+        {"pipelines": {"other_pipeline": {"images": {"python": "python:3.11"}}}}
+    )
+
+    # When
+    patched_pipeline = patch_compiled_pipeline(compiled_pipeline, "dummy_pipeline", patches)
+
+    # Then
+    assert patched_pipeline is compiled_pipeline
+
+
+@pytest.mark.parametrize(
+    "task_patch",
+    [{"cpu_limit": "two"}, {"memory_request": "8GB"}, {"retry": {"max_retry_count": -1}}],
+)
+def test_load_patches_with_invalid_patches(tmp_path, task_patch):
+    # Given
+    patches_filepath = tmp_path / "patches.json"
+    patches_filepath.write_text(json.dumps({"tasks": {"*": task_patch}}))
+
+    # When / Then
+    with pytest.raises(BadConfigError):
+        load_patches(patches_filepath)
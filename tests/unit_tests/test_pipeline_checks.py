@@ -1,7 +1,19 @@
+import sys
+from pathlib import Path
+
 import pytest
 from kfp.dsl import Artifact, Dataset, Input, Metrics, Model, Output
 
-from deployer.pipeline_checks import _convert_artifact_type_to_str
+from deployer.constants import ProfileFormat
+from deployer.pipeline_checks import (
+    PipelineCheckResult,
+    _convert_artifact_type_to_str,
+    _merge_check_results,
+    check_pipelines,
+    use_pipeline_cache,
+    watch_pipelines,
+)
+from deployer.utils.watch import PollingFileWatcher
 
 
 @pytest.mark.parametrize(
@@ -29,3 +41,228 @@ def test_artifact_type_to_str(input_annotation, expected_annotation):
 
     # Then
     assert result == expected_annotation
+
+
+PIPELINE_MODULE = """
+import kfp.dsl
+
+
+@kfp.dsl.component(base_image="python:3.10-slim-buster")
+def dummy_component(name: str) -> None:
+    print("Hello ", name)
+
+
+@kfp.dsl.pipeline(name="dummy_pipeline")
+def dummy_pipeline(name: str, count: int = 1) -> None:
+    dummy_component(name=name)
+"""
+
+
+@pytest.fixture
+def vertex_checks_repo(tmp_path, monkeypatch):
+    pipelines_root_path = tmp_path / "vertex_checks" / "pipelines"
+    pipelines_root_path.mkdir(parents=True)
+    (pipelines_root_path / "dummy_pipeline.py").write_text(PIPELINE_MODULE)
+    configs_dirpath = tmp_path / "vertex_checks" / "configs" / "dummy_pipeline"
+    configs_dirpath.mkdir(parents=True)
+    (configs_dirpath / "good.json").write_text('{"name": "John", "count": 2}')
+    (configs_dirpath / "default.json").write_text('{"name": "John"}')
+    (configs_dirpath / "bad.json").write_text('{"name": 1}')
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield {
+        "to_check": {"dummy_pipeline": sorted(configs_dirpath.iterdir())},
+        "pipelines_root_path": Path("vertex_checks/pipelines"),
+        "configs_root_path": Path("vertex_checks/configs"),
+    }
+    for module_name in [m for m in sys.modules if m.startswith("vertex_checks")]:
+        del sys.modules[module_name]
+
+
+class TestCheckPipelines:
+    def test_results_are_parsed(self, vertex_checks_repo):
+        # When
+        results = list(check_pipelines(**vertex_checks_repo))
+
+        # Then
+        assert len(results) == 1
+        assert not results[0].is_valid
+        assert results[0].errors == {
+            "bad.json": [
+                {"type": "string_type", "msg": "Input should be a valid string", "field": "name"}
+            ]
+        }
+
+    def test_warnings_for_default_values(self, vertex_checks_repo):
+        # Given
+        to_check = {
+            "dummy_pipeline": [
+                p for p in vertex_checks_repo["to_check"]["dummy_pipeline"] if p.name != "bad.json"
+            ]
+        }
+
+        # When
+        results = list(check_pipelines(**{**vertex_checks_repo, "to_check": to_check}))
+
+        # Then
+        assert results[0].is_valid
+        assert list(results[0].warnings) == ["default.json"]
+        assert results[0].warnings["default.json"][0]["field"] == "count"
+
+    def test_pipeline_level_error(self, vertex_checks_repo):
+        # Given
+        (Path("vertex_checks/pipelines/dummy_pipeline.py")).write_text("import not_a_module\n")
+
+        # When
+        results = list(check_pipelines(**vertex_checks_repo))
+
+        # Then
+        assert list(results[0].errors) == ["pipeline level error"]
+
+    def test_isolated_does_not_import_pipelines(self, vertex_checks_repo):
+        # When
+        results = list(check_pipelines(**vertex_checks_repo, isolated=True, max_tasks_per_child=1))
+        imported_in_parent = "vertex_checks.pipelines.dummy_pipeline" in sys.modules
+
+        # Then
+        assert not imported_in_parent
+        timings = {"elapsed", "stage_timings", "config_timings", "stages", "counts"}
+        assert [r.model_dump(exclude=timings) for r in results] == [
+            r.model_dump(exclude=timings) for r in check_pipelines(**vertex_checks_repo)
+        ]
+
+    def test_elapsed_time(self, vertex_checks_repo):
+        # When
+        results = list(check_pipelines(**vertex_checks_repo))
+
+        # Then
+        assert results[0].elapsed > 0
+        assert set(results[0].stage_timings) == {"import", "compile", "model_creation"}
+        assert set(results[0].config_timings) == {"bad.json", "default.json", "good.json"}
+
+    def test_stages(self, vertex_checks_repo):
+        # When
+        results = list(check_pipelines(**vertex_checks_repo))
+
+        # Then
+        stages = {(s["name"], s["labels"].get("config")) for s in results[0].stages}
+        assert ("config_loading", "good.json") in stages
+        assert ("config_validation", "good.json") in stages
+        assert "config_loading" not in results[0].stage_timings
+
+    def test_pipeline_cache(self, vertex_checks_repo):
+        # Given
+        def _cache_hits(result):
+            return {
+                c["labels"]["cache"]
+                for c in result.counts
+                if c["name"] == "cache_hits" and c["labels"]["cache"] != "discovery"
+            }
+
+        # When
+        uncached_results = [r for _ in range(2) for r in check_pipelines(**vertex_checks_repo)]
+        with use_pipeline_cache():
+            cached_results = [r for _ in range(2) for r in check_pipelines(**vertex_checks_repo)]
+
+        # Then
+        assert [_cache_hits(r) for r in uncached_results] == [set(), set()]
+        assert [_cache_hits(r) for r in cached_results] == [
+            set(),
+            {"compiled_pipelines", "pipeline_models"},
+        ]
+
+    def test_import_timings(self, vertex_checks_repo):
+        # When
+        results = list(check_pipelines(**vertex_checks_repo, profile_imports=True))
+
+        # Then
+        modules = {r["module"]: r for r in results[0].import_timings}
+        assert modules["vertex_checks.pipelines.dummy_pipeline"]["is_project"]
+
+    def test_trace_memory(self, vertex_checks_repo):
+        # When
+        results = list(check_pipelines(**vertex_checks_repo, trace_memory=True))
+
+        # Then
+        stages = {m["name"] for m in results[0].memory_stages}
+        assert {"import", "compile", "model_creation", "config_validation", "check"} <= stages
+        assert all(m["labels"]["pipeline"] == "dummy_pipeline" for m in results[0].memory_stages)
+
+    def test_profile_each_pipeline(self, vertex_checks_repo, tmp_path):
+        # Given
+        pytest.importorskip("pyinstrument")
+        profile_dirpath = tmp_path / "profiles"
+
+        # When
+        list(
+            check_pipelines(
+                **vertex_checks_repo,
+                profile_dirpath=profile_dirpath,
+                profile_format=ProfileFormat.text,
+            )
+        )
+
+        # Then
+        report = (profile_dirpath / "dummy_pipeline.txt").read_text()
+        assert "compile_pipeline" in report
+
+
+def test_merge_check_results():
+    # Given
+    previous = PipelineCheckResult(
+        pipeline_name="dummy_pipeline",
+        config_paths=[Path("dev.json"), Path("prd.json"), Path("old.json")],
+        errors={"dev.json": [{"type": "missing", "msg": "Field required"}]},
+        warnings={"prd.json": [{"type": "default_value", "msg": "default"}]},
+    )
+    partial = PipelineCheckResult(
+        pipeline_name="dummy_pipeline",
+        config_paths=[Path("dev.json")],
+        warnings={"dev.json": [{"type": "default_value", "msg": "default"}]},
+    )
+
+    # When
+    merged = _merge_check_results(
+        previous, partial, [Path("dev.json"), Path("prd.json"), Path("new.json")]
+    )
+
+    # Then
+    assert merged.is_valid
+    assert merged.config_paths == [Path("dev.json"), Path("prd.json"), Path("new.json")]
+    assert set(merged.warnings) == {"dev.json", "prd.json"}
+
+
+def test_watch_pipelines_outside_working_directory(tmp_path, monkeypatch):
+    # Given
+    vertex_folder_path = tmp_path / "vertex"
+    (vertex_folder_path / "pipelines").mkdir(parents=True)
+    (vertex_folder_path / "pipelines" / "dummy_pipeline.py").touch()
+    (tmp_path / "other").mkdir()
+    monkeypatch.chdir(tmp_path / "other")
+    watchers = []
+
+    class _FileWatcher(PollingFileWatcher):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(
+        "deployer.pipeline_checks.get_file_watcher",
+        lambda root_path, force_polling: watchers.append(_FileWatcher(root_path)) or watchers[-1],
+    )
+
+    # When
+    with pytest.raises(ValueError, match="must be in the current working directory"):
+        next(
+            watch_pipelines(
+                None,
+                vertex_folder_path=vertex_folder_path,
+                pipelines_root_path=vertex_folder_path / "pipelines",
+                configs_root_path=vertex_folder_path / "configs",
+            )
+        )
+
+    # Then
+    assert [w.closed for w in watchers] == [True]
@@ -0,0 +1,51 @@
+import json
+import time
+
+import pytest
+
+from deployer.constants import ProfileFormat
+from deployer.utils.profiling import get_profile_filepath, profiling
+
+pytest.importorskip("pyinstrument")
+
+
+def _busy_function():
+    start = time.perf_counter()
+    while time.perf_counter() - start < 0.05:
+        pass
+
+
+def test_get_profile_filepath():
+    assert get_profile_filepath("check", ProfileFormat.html).name.startswith("check-")
+    assert get_profile_filepath("check", ProfileFormat.speedscope).suffixes == [
+        ".speedscope",
+        ".json",
+    ]
+    assert get_profile_filepath("check").suffix == ""
+
+
+@pytest.mark.parametrize("profile_format", list(ProfileFormat))
+def test_profiling_writes_report(tmp_path, profile_format):
+    # Given
+    output_filepath = tmp_path / "reports" / "profile"
+
+    # When
+    with profiling(output_filepath, profile_format):
+        _busy_function()
+
+    # Then
+    report = output_filepath.read_text()
+    assert "_busy_function" in report
+    if profile_format == ProfileFormat.speedscope:
+        assert json.loads(report)["exporter"].startswith("pyinstrument")
+
+
+def test_nested_profiles(tmp_path):
+    # When
+    with profiling(tmp_path / "outer.txt", ProfileFormat.text):
+        with profiling(tmp_path / "inner.txt", ProfileFormat.text):
+            _busy_function()
+
+    # Then
+    assert "_busy_function" in (tmp_path / "outer.txt").read_text()
+    assert "_busy_function" in (tmp_path / "inner.txt").read_text()
@@ -0,0 +1,133 @@
+from unittest.mock import patch
+
+import requests
+from rich.console import Console
+
+from deployer.promotion import _RegistryClient, build_promotions_table, promote_pipelines
+
+
+def _upload(fake_gcp, pipeline_name: str, version: int, tags):
+    content = f"# {version}\npipelineInfo:\n  name: {pipeline_name}\n".encode()
+    return fake_gcp.state.upload("my-project", "my-repo", content, tags).split("/")[-1]
+
+
+def test_promote_pipelines(fake_gcp):
+    # Given
+    gar_host = f"{fake_gcp.url}/my-project/my-repo"
+    dev_version = _upload(fake_gcp, "pipeline-a", 1, ["dev"])
+    _upload(fake_gcp, "pipeline-b", 1, ["dev", "prd"])
+    prd_version = _upload(fake_gcp, "pipeline-a", 0, ["prd"])
+
+    # When
+    results = promote_pipelines(
+        gar_host, ["pipeline_a", "pipeline_b", "pipeline_c"], from_tag="dev", to_tag="prd"
+    )
+
+    # Then
+    assert [(r.pipeline_name, r.status) for r in results] == [
+        ("pipeline_a", "promoted"),
+        ("pipeline_b", "unchanged"),
+        ("pipeline_c", "failed"),
+    ]
+    assert results[0].version == dev_version
+    assert results[0].previous_version == prd_version
+    assert "TagNotFoundError" in results[2].error
+    tags = fake_gcp.state.packages[("my-project", "my-repo", "pipeline-a")]["tags"]
+    assert tags == {"dev": dev_version, "prd": dev_version}
+    assert not any(r.method == "POST" and r.path.endswith("/my-repo") for r in fake_gcp.requests)
+
+
+def test_promote_pipelines_without_from_tag_version(fake_gcp):
+    # Given
+    gar_host = f"{fake_gcp.url}/my-project/my-repo"
+    prd_version = _upload(fake_gcp, "pipeline-a", 0, ["prd"])
+
+    # When
+    results = promote_pipelines(gar_host, ["pipeline_a"], from_tag="dev", to_tag="prd")
+
+    # Then
+    assert [(r.pipeline_name, r.status) for r in results] == [("pipeline_a", "failed")]
+    assert "TagNotFoundError: Tag dev not found" in results[0].error
+    assert "['prd']" in results[0].error
+    tags = fake_gcp.state.packages[("my-project", "my-repo", "pipeline-a")]["tags"]
+    assert tags == {"prd": prd_version}
+
+
+def test_promote_pipelines_already_promoted(fake_gcp):
+    # Given
+    gar_host = f"{fake_gcp.url}/my-project/my-repo"
+    version = _upload(fake_gcp, "pipeline-a", 1, ["dev", "prd"])
+
+    # When
+    results = promote_pipelines(gar_host, ["pipeline_a"], from_tag="dev", to_tag="prd")
+
+    # Then
+    assert [(r.pipeline_name, r.status) for r in results] == [("pipeline_a", "unchanged")]
+    assert results[0].version == results[0].previous_version == version
+    assert not any(r.method in ("POST", "PATCH") for r in fake_gcp.requests)
+
+
+def test_build_promotions_table_previous_versions(fake_gcp):
+    # Given
+    gar_host = f"{fake_gcp.url}/my-project/my-repo"
+    version_a = _upload(fake_gcp, "pipeline-a", 1, ["dev"])
+    prd_version_a = _upload(fake_gcp, "pipeline-a", 0, ["prd"])
+    version_b = _upload(fake_gcp, "pipeline-b", 1, ["dev"])
+    results = promote_pipelines(
+        gar_host, ["pipeline_a", "pipeline_b"], from_tag="dev", to_tag="prd"
+    )
+
+    # When
+    console = Console(record=True, width=200)
+    console.print(build_promotions_table(results, from_tag="dev", to_tag="prd"))
+    lines = console.export_text().splitlines()
+
+    # Then
+    rows = [[cell.strip() for cell in line.split("│")[1:-1]] for line in lines]
+    assert "Previous prd version" in lines[2]
+    assert rows[4] == [
+        "pipeline_a",
+        "promoted",
+        version_a.split(":")[-1][:12],
+        prd_version_a.split(":")[-1][:12],
+    ]
+    assert rows[5] == ["pipeline_b", "promoted", version_b.split(":")[-1][:12], "-"]
+
+
+def test_registry_client_uses_artifact_registry_api():
+    # Given
+    class _Credentials:
+        valid = False
+        token = None
+
+        def refresh(self, request):
+            self.valid, self.token = True, "my-token"
+
+    class _Session:
+        def __init__(self):
+            self.requests = []
+
+        def request(self, method, url, json=None, headers=None):
+            self.requests.append((method, url, json, headers))
+            response = requests.Response()
+            response.status_code, response._content = 200, b"{}"
+            return response
+
+    session = _Session()
+    with patch("google.auth.default", return_value=(_Credentials(), "my-project")):
+        client = _RegistryClient("https://europe-west1-kfp.pkg.dev/my-project/my-repo", session)
+
+    # When
+    client.update_tag("pipeline-a", "sha256:abc", "prd")
+
+    # Then
+    packages = "projects/my-project/locations/europe-west1/repositories/my-repo/packages"
+    assert session.requests == [
+        (
+            "PATCH",
+            f"https://artifactregistry.googleapis.com/v1/{packages}"
+            "/pipeline-a/tags/prd?updateMask=version",
+            {"name": "", "version": f"{packages}/pipeline-a/versions/sha256:abc"},
+            {"Authorization": "Bearer my-token"},
+        )
+    ]
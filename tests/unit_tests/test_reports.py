@@ -0,0 +1,216 @@
+import json
+from pathlib import Path
+from xml.etree import ElementTree
+
+from deployer.constants import CheckOutputFormat
+from deployer.pipeline_checks import PipelineCheckResult
+from deployer.utils.reports import (
+    build_check_records,
+    format_check_report,
+    format_chrome_trace,
+    format_import_timings_report,
+    format_memory_report,
+)
+
+RESULTS = [
+    PipelineCheckResult(
+        pipeline_name="dummy_pipeline",
+        config_paths=[Path("dev.json"), Path("prd.json"), Path("stg.json")],
+        errors={"prd.json": [{"type": "missing", "msg": "Field required", "field": "name"}]},
+        warnings={"stg.json": [{"type": "default_value", "field": "count", "msg": "..."}]},
+        elapsed=1.5,
+        stage_timings={"import": 1.0, "compile": 0.3, "model_creation": 0.1},
+        config_timings={"dev.json": 0.04, "prd.json": 0.03, "stg.json": 0.02},
+    ),
+    PipelineCheckResult(
+        pipeline_name="broken_pipeline",
+        config_paths=[Path("dev.json")],
+        errors={"pipeline level error": [{"type": "value_error", "msg": "Import failed"}]},
+        elapsed=0.5,
+        stage_timings={"import": 0.5},
+    ),
+    PipelineCheckResult(pipeline_name="no_config_pipeline", config_paths=[], elapsed=0.1),
+]
+
+
+class TestBuildCheckRecords:
+    def test_one_record_per_pipeline_and_config(self):
+        # When
+        records = build_check_records(RESULTS)
+
+        # Then
+        assert [(r["pipeline"], r["config_file"], r["status"]) for r in records] == [
+            ("dummy_pipeline", "dev.json", "passed"),
+            ("dummy_pipeline", "prd.json", "failed"),
+            ("dummy_pipeline", "stg.json", "warning"),
+            ("broken_pipeline", "dev.json", "failed"),
+            ("no_config_pipeline", None, "skipped"),
+        ]
+
+    def test_timings(self):
+        # When
+        records = build_check_records(RESULTS)
+
+        # Then
+        assert records[1]["timings"] == {
+            "import": 1.0,
+            "compile": 0.3,
+            "model_creation": 0.1,
+            "config_validation": 0.03,
+        }
+        assert records[3]["timings"] == {"import": 0.5}
+
+    def test_pipeline_error_is_reported_for_each_config(self):
+        # When
+        records = build_check_records(RESULTS)
+
+        # Then
+        assert records[3]["errors"] == [{"type": "value_error", "msg": "Import failed"}]
+
+    def test_no_warning_status_without_warn_defaults(self):
+        # When
+        records = build_check_records(RESULTS, warn_defaults=False)
+
+        # Then
+        assert records[2]["status"] == "passed"
+        assert records[2]["warnings"] != []
+
+
+def test_json_report():
+    # When
+    report = format_check_report(RESULTS, CheckOutputFormat.json)
+
+    # Then
+    assert json.loads(report) == build_check_records(RESULTS)
+
+
+def test_junit_report():
+    # When
+    report = format_check_report(RESULTS, CheckOutputFormat.junit)
+
+    # Then
+    testsuites = ElementTree.fromstring(report.encode())  # noqa: S314
+    assert testsuites.attrib["tests"] == "5"
+    assert testsuites.attrib["failures"] == "2"
+    dummy_suite = testsuites.find("testsuite[@name='dummy_pipeline']")
+    assert dummy_suite.find("properties/property[@name='import_seconds']").get("value") == (
+        "1.000000"
+    )
+    failure = dummy_suite.find("testcase[@name='prd.json']/failure")
+    assert failure.get("type") == "missing"
+    assert failure.text == "name: Field required"
+    assert testsuites.find("testsuite[@name='no_config_pipeline']/testcase/skipped") is not None
+
+
+def test_format_import_timings_report():
+    # Given
+    result = PipelineCheckResult(
+        pipeline_name="dummy_pipeline",
+        config_paths=[],
+        stage_timings={"import": 0.4},
+        import_timings=[
+            {
+                "module": "heavy_lib",
+                "imported_by": "vertex.pipelines.dummy_pipeline",
+                "project_module": "vertex.pipelines.dummy_pipeline",
+                "is_project": False,
+                "self_time": 0.3,
+                "cumulative_time": 0.3,
+            },
+            {
+                "module": "vertex.pipelines.dummy_pipeline",
+                "imported_by": None,
+                "project_module": None,
+                "is_project": True,
+                "self_time": 0.1,
+                "cumulative_time": 0.4,
+            },
+        ],
+    )
+
+    # When
+    report = json.loads(format_import_timings_report([result]))
+
+    # Then
+    pipeline = report["pipelines"][0]
+    assert pipeline["import_time"] == 0.4
+    assert len(pipeline["modules"]) == 2
+    assert pipeline["project_modules"][0]["module"] == "vertex.pipelines.dummy_pipeline"
+    assert pipeline["project_modules"][0]["heaviest_imports"] == [
+        {"module": "heavy_lib", "cumulative_time": 0.3}
+    ]
+
+
+def test_format_memory_report():
+    # Given
+    memory_stages = [
+        {
+            "name": "compile",
+            "labels": {"pipeline": "dummy_pipeline"},
+            "allocated": 100,
+            "peak": 300,
+            "top_sites": [("dummy.py:1", 100)],
+            "peak_rss": 1000,
+        },
+        {
+            "name": "compile",
+            "labels": {"pipeline": "other_pipeline"},
+            "allocated": 50,
+            "peak": 50,
+            "top_sites": [],
+            "peak_rss": 2000,
+        },
+    ]
+
+    # When
+    report = json.loads(format_memory_report(memory_stages))
+
+    # Then
+    assert report["peak_rss"] == 2000
+    assert [s["pipeline"] for s in report["stages"]] == ["dummy_pipeline", "other_pipeline"]
+    assert report["stages"][0]["top_sites"] == [{"site": "dummy.py:1", "size": 100}]
+    assert len(report["records"]) == 2
+
+
+def test_format_chrome_trace():
+    # Given
+    def _stage(name, start, elapsed, process_id=1, thread_name="MainThread"):
+        return {
+            "name": name,
+            "labels": {"pipeline": "dummy_pipeline", "config": Path("dev.json")},
+            "start": start,
+            "elapsed": elapsed,
+            "process_id": process_id,
+            "thread_name": thread_name,
+        }
+
+    stages = [
+        _stage("compile", 10.0, 1.0),
+        _stage("deploy", 10.0, 3.0),
+        _stage("deploy", 10.5, 2.0, thread_name="worker"),
+        _stage("check", 11.0, 0.5, process_id=2),
+    ]
+
+    # When
+    trace = json.loads(format_chrome_trace(stages))
+
+    # Then
+    events = trace["traceEvents"]
+    metadata = [
+        (e["name"], e["pid"], e["tid"], e["args"]["name"]) for e in events if e["ph"] == "M"
+    ]
+    assert metadata == [
+        ("process_name", 1, 0, "worker 1"),
+        ("thread_name", 1, 1, "MainThread"),
+        ("thread_name", 1, 2, "worker"),
+        ("process_name", 2, 0, "worker 2"),
+        ("thread_name", 2, 3, "MainThread"),
+    ]
+    spans = [(e["name"], e["ts"], e["dur"], e["tid"]) for e in events if e["ph"] == "X"]
+    assert spans == [
+        ("deploy", 0.0, 3e6, 1),
+        ("compile", 0.0, 1e6, 1),
+        ("deploy", 0.5e6, 2e6, 2),
+        ("check", 1e6, 0.5e6, 3),
+    ]
+    assert events[2]["args"] == {"pipeline": "dummy_pipeline", "config": "dev.json"}
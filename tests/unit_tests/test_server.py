@@ -0,0 +1,138 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from deployer import constants
+from deployer.server import DeployerServer, _is_forwardable, forward_to_server, stop_server
+from deployer.settings import load_deployer_settings
+
+
+@pytest.fixture
+def vertex_repo(tmp_path, monkeypatch):
+    files = {
+        "pyproject.toml": "[tool.vertex_deployer.deploy]\nupload = true\n",
+        "vertex/pipelines/dummy_pipeline.py": "",
+        "vertex/components/dummy.py": "",
+        "vertex/configs/dummy_pipeline/dev.json": "{}",
+    }
+    for path, content in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(content)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("VERTEX_DEPLOYER_NO_SERVER", raising=False)
+    load_deployer_settings.cache_clear()
+    yield tmp_path
+    load_deployer_settings.cache_clear()
+
+
+@pytest.fixture
+def running_server(vertex_repo):
+    server = DeployerServer(constants.SERVER_SOCKET_FILEPATH, idle_timeout=10)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    while not constants.SERVER_SOCKET_FILEPATH.exists():
+        thread.join(0.01)
+    yield server
+    stop_server()
+    thread.join()
+
+
+def test_is_forwardable():
+    assert _is_forwardable(["-log", "DEBUG", "check", "--all"])
+    assert _is_forwardable(["list"])
+    assert not _is_forwardable(["check", "--all", "--watch"])
+    assert not _is_forwardable(["init"])
+    assert not _is_forwardable(["deploy", "--help"])
+    assert not _is_forwardable(["--profile", "check", "--all"])
+    assert not _is_forwardable(["check", "--all", "-pp"])
+    assert not _is_forwardable(["check", "--all", "--trace-memory"])
+    assert not _is_forwardable(["check", "--all", "--trace-file", "trace.json"])
+    assert not _is_forwardable(["--metrics-file", "metrics.prom", "check", "--all"])
+
+
+def test_forward_without_server(vertex_repo):
+    assert forward_to_server(["list"]) is None
+
+
+def test_forward_to_server(running_server, capsys):
+    # When
+    exit_code = forward_to_server(["list", "--with-configs"])
+
+    # Then
+    assert exit_code == 0
+    output = capsys.readouterr().out
+    assert "dummy_pipeline" in output
+    assert "dev.json" in output
+
+
+def test_forward_to_server_exit_code(running_server, capsys):
+    # When
+    exit_code = forward_to_server(["check", "unknown_pipeline"])
+
+    # Then
+    assert exit_code == 2
+    assert "unknown_pipeline" in capsys.readouterr().err
+
+
+def test_forward_disabled_by_env_var(running_server, monkeypatch):
+    monkeypatch.setenv("VERTEX_DEPLOYER_NO_SERVER", "1")
+    assert forward_to_server(["list"]) is None
+
+
+def test_server_restores_process_state(running_server):
+    # Given
+    environ = dict(os.environ)
+
+    # When
+    forward_to_server(["list"])
+
+    # Then
+    assert dict(os.environ) == environ
+
+
+def test_stop_server(running_server):
+    assert stop_server()
+    assert not constants.SERVER_SOCKET_FILEPATH.exists()
+    assert not stop_server()
+
+
+def test_deploy_is_handled_only_when_compiling(vertex_repo):
+    # Given
+    server = DeployerServer(constants.SERVER_SOCKET_FILEPATH)
+
+    # Then
+    assert not server._can_handle(["deploy", "dummy_pipeline"])  # upload set in pyproject
+    assert server._can_handle(["deploy", "dummy_pipeline", "--no-upload"])
+    assert not server._can_handle(["deploy", "dummy_pipeline", "-nu", "--run"])
+    assert not server._can_handle(["deploy", "dummy_pipeline", "-nu", "--no-skip"])
+    assert server._can_handle(["check", "--all"])
+
+
+class TestFindChangedFiles:
+    def test_content_changes_only(self, vertex_repo):
+        # Given
+        server = DeployerServer(constants.SERVER_SOCKET_FILEPATH)
+        server._refresh()
+        component_path = vertex_repo / "vertex" / "components" / "dummy.py"
+        config_path = vertex_repo / "vertex" / "configs" / "dummy_pipeline" / "dev.json"
+
+        # When
+        os.utime(component_path, ns=(0, 0))
+        config_path.write_text('{"name": "dummy"}')
+
+        # Then
+        assert server._find_changed_files() == {Path("vertex/configs/dummy_pipeline/dev.json")}
+        assert server._find_changed_files() == set()
+
+    def test_deleted_file(self, vertex_repo):
+        # Given
+        server = DeployerServer(constants.SERVER_SOCKET_FILEPATH)
+        server._refresh()
+
+        # When
+        (vertex_repo / "vertex" / "components" / "dummy.py").unlink()
+
+        # Then
+        assert server._find_changed_files() == {Path("vertex/components/dummy.py")}
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+
+from deployer.utils.exceptions import PipelineVersionNotFoundError
+from deployer.utils.store import CompiledPipelineStore
+
+
+def _content(version: int) -> bytes:
+    return f"pipelineInfo:\n  name: dummy-pipeline\n# {version}\n".encode()
+
+
+def test_store_versions_most_recently_used_first(tmp_path):
+    # Given
+    store = CompiledPipelineStore(tmp_path)
+    digests = [store.add("dummy_pipeline", _content(i)) for i in range(3)]
+
+    # When
+    store.add("dummy_pipeline", _content(0), save_package_file=True)
+
+    # Then
+    assert [v["digest"] for v in store.history("dummy_pipeline")] == [
+        digests[0],
+        digests[2],
+        digests[1],
+    ]
+    assert store.resolve("dummy_pipeline", "1") == digests[2]
+    assert store.resolve("dummy_pipeline", digests[1].split(":")[-1][:8]) == digests[1]
+    assert store.load(digests[1]).content == _content(1)
+    assert (tmp_path / "dummy_pipeline.yaml").read_bytes() == _content(0)
+    with pytest.raises(PipelineVersionNotFoundError):
+        store.resolve("dummy_pipeline", "3")
+    with pytest.raises(PipelineVersionNotFoundError):
+        store.resolve("other_pipeline", "1")
+
+
+def test_store_collects_old_versions(tmp_path):
+    # Given
+    store = CompiledPipelineStore(tmp_path, max_versions=2)
+    digests = [store.add("dummy_pipeline", _content(i)) for i in range(3)]
+
+    # When
+    CompiledPipelineStore(tmp_path, max_age=timedelta(0)).add("other_pipeline", _content(3))
+
+    # Then
+    assert [v["digest"] for v in store.history("dummy_pipeline")] == [digests[2]]
+    with pytest.raises(PipelineVersionNotFoundError):
+        store.load(digests[1])
+    assert sorted(p.name for p in (store.dirpath / "versions").iterdir()) == sorted(
+        store._version_filepath(d).name for d in [digests[2], store.resolve("other_pipeline", "0")]
+    )
+
+
+def test_store_collects_versions_beyond_max_versions(tmp_path):
+    # Given
+    store = CompiledPipelineStore(tmp_path, max_versions=2)
+    digests = [store.add("dummy_pipeline", _content(i)) for i in range(2)]
+
+    # When
+    digests.append(store.add("dummy_pipeline", _content(2)))
+
+    # Then
+    assert [v["digest"] for v in store.history("dummy_pipeline")] == [digests[2], digests[1]]
+    assert store.load(digests[1]).content == _content(1)
+    with pytest.raises(PipelineVersionNotFoundError):
+        store.load(digests[0])
+
+
+def test_store_collects_versions_older_than_max_age(tmp_path):
+    # Given
+    digests = [CompiledPipelineStore(tmp_path).add("dummy_pipeline", _content(i)) for i in (0, 1)]
+    store = CompiledPipelineStore(tmp_path, max_age=timedelta(0))
+
+    # When
+    digests.append(store.add("dummy_pipeline", _content(2)))
+
+    # Then
+    assert [v["digest"] for v in store.history("dummy_pipeline")] == [digests[2]]
+    for digest in digests[:2]:
+        with pytest.raises(PipelineVersionNotFoundError):
+            store.load(digest)
+
+
+def test_store_resolves_abbreviated_digests(tmp_path):
+    # Given
+    store = CompiledPipelineStore(tmp_path)
+    digest = store.add("dummy_pipeline", _content(0))
+    store.add("dummy_pipeline", _content(1))
+    hex_digest = digest.split(":")[-1]
+
+    # When / Then
+    assert store.resolve("dummy_pipeline", hex_digest[:12]) == digest
+    assert store.resolve("dummy_pipeline", f"sha256:{hex_digest[:12]}") == digest
+    assert store.resolve("dummy_pipeline", digest) == digest
+    with pytest.raises(PipelineVersionNotFoundError, match="No stored versions"):
+        store.resolve("dummy_pipeline", f"md5:{hex_digest[:12]}")
+
+
+def test_store_does_not_resolve_ambiguous_digests(tmp_path):
+    # Given
+    store = CompiledPipelineStore(tmp_path)
+    digests_by_first_char = {}
+    i = 0
+    # among 17 digests, two start with the same hexadecimal character
+    while True:
+        digest = store.add("dummy_pipeline", _content(i))
+        first_char = digest.split(":")[-1][0]
+        if first_char in digests_by_first_char:
+            break
+        digests_by_first_char[first_char] = digest
+        i += 1
+
+    # When / Then
+    with pytest.raises(PipelineVersionNotFoundError, match="Several stored versions"):
+        store.resolve("dummy_pipeline", f"sha256:{first_char}")
+    with pytest.raises(PipelineVersionNotFoundError, match="Several stored versions"):
+        store.resolve("dummy_pipeline", "sha256:")
@@ -3,8 +3,18 @@ from unittest.mock import patch
 
 import pytest
 from conftest import exception_traceback
+from pydantic import BaseModel
 
-from deployer.utils.utils import filter_lines_from, make_enum_from_python_package_dir
+from deployer.pipeline_checks import PipelineCheckResult
+from deployer.utils.utils import (
+    _get_unset_default_fields,
+    build_check_results_table,
+    build_check_summary_table,
+    filter_lines_from,
+    format_check_result_summary,
+    make_enum_from_python_package_dir,
+    print_check_results_table,
+)
 
 
 class TestMakeEnumFromPythonPackageDir:
@@ -92,7 +102,7 @@ class TestFilterLinesFrom:
 
         # Then
         assert internal_output == (
-            f'  File "{internal_path}", line 71, in TestFilterLinesFrom\n'
+            f'  File "{internal_path}", line 81, in TestFilterLinesFrom\n'
             '    raise Exception("This is an exception.")\n'
         )
         assert external_output == (
@@ -119,7 +129,7 @@ class TestFilterLinesFrom:
 
         # Then
         assert internal_output == (
-            f'  File "{internal_path}", line 71, in TestFilterLinesFrom\n'
+            f'  File "{internal_path}", line 81, in TestFilterLinesFrom\n'
             '    raise Exception("This is an exception.")\n'
         )
         assert external_output == (
@@ -134,3 +144,117 @@ class TestFilterLinesFrom:
         # When
         output = filter_lines_from(exception_traceback, path)
         assert output == "Could not find potential source of error."
+
+
+CONFIG_PATHS = [Path("dev.json"), Path("prd.json")]
+
+
+class TestFormatCheckResultSummary:
+    def test_valid(self):
+        result = PipelineCheckResult(
+            pipeline_name="dummy", config_paths=CONFIG_PATHS, elapsed=1.234
+        )
+        assert format_check_result_summary(result) == (
+            "✅ [green]dummy[/green]  2 configs valid  [dim](1.23s)[/dim]"
+        )
+
+    def test_invalid_configs(self):
+        result = PipelineCheckResult(
+            pipeline_name="dummy",
+            config_paths=CONFIG_PATHS,
+            errors={"dev.json": [{"type": "missing", "msg": "Field required"}]},
+        )
+        assert "1/2 configs invalid" in format_check_result_summary(result)
+
+    def test_pipeline_level_error(self):
+        result = PipelineCheckResult(
+            pipeline_name="dummy",
+            config_paths=CONFIG_PATHS,
+            errors={"pipeline level error": [{"type": "value_error", "msg": "Import [failed]"}]},
+        )
+        assert "❌" in format_check_result_summary(result)
+        assert "Import \\[failed]" in format_check_result_summary(result)
+
+    def test_warnings(self):
+        result = PipelineCheckResult(
+            pipeline_name="dummy",
+            config_paths=CONFIG_PATHS,
+            warnings={"dev.json": [{"type": "default_value", "msg": "..."}]},
+        )
+        assert format_check_result_summary(result).startswith("⚠️")
+        assert format_check_result_summary(result, warn_defaults=False).startswith("✅")
+
+
+RESULTS = [
+    PipelineCheckResult(
+        pipeline_name="dummy",
+        config_paths=CONFIG_PATHS,
+        errors={"dev.json": [{"type": "missing", "msg": "Field required", "field": "name"}]},
+        warnings={"prd.json": [{"type": "default_value", "field": "count", "msg": "..."}]},
+        elapsed=1.0,
+    ),
+    PipelineCheckResult(pipeline_name="valid", config_paths=CONFIG_PATHS, elapsed=0.5),
+    PipelineCheckResult(
+        pipeline_name="broken",
+        config_paths=CONFIG_PATHS,
+        errors={"pipeline level error": [{"type": "value_error", "msg": "Import failed"}]},
+    ),
+]
+
+
+class TestCheckResultsTables:
+    def test_empty_columns_are_dropped(self):
+        # When
+        table = build_check_results_table(RESULTS[1:2])
+
+        # Then
+        assert [c.header for c in table.columns] == ["Status", "Pipeline", "Config File"]
+        assert table.row_count == 2
+
+    def test_summary_table(self):
+        # When
+        table = build_check_summary_table(RESULTS)
+
+        # Then
+        rows = list(zip(*(c._cells for c in table.columns)))
+        assert rows == [
+            ("❌", "dummy", "2", "0", "1", "1", "1.00"),
+            ("✅", "valid", "2", "2", "0", "0", "0.50"),
+            ("❌", "broken", "2", "0", "0", "2", "0.00"),
+        ]
+        assert [c.footer for c in table.columns[1:]] == ["Total", "6", "2", "1", "3", "1.50"]
+
+    def test_summary_shows_failures_only(self):
+        # When
+        with patch("deployer.utils.utils.console") as mock_console:
+            print_check_results_table(RESULTS, summary=True)
+
+        # Then
+        summary_table, failures_table = [c.args[0] for c in mock_console.print.call_args_list]
+        assert summary_table.row_count == 3
+        assert list(failures_table.columns[1]._cells) == ["dummy", "broken"]
+
+    def test_pagination(self):
+        # When
+        with patch("deployer.utils.utils.console") as mock_console:
+            print_check_results_table(RESULTS, page_size=2)
+
+        # Then
+        tables = [c.args[0] for c in mock_console.print.call_args_list]
+        assert [t.row_count for t in tables] == [2, 2, 1]
+        assert len({len(t.columns) for t in tables}) == 1
+
+
+def test_get_unset_default_fields():
+    # Given
+    class Config(BaseModel):
+        name: str
+        count: int = 1
+        flag: bool = False
+        other: str = "default"
+
+    # When
+    unset_fields = _get_unset_default_fields(Config(name="John", other="value"))
+
+    # Then
+    assert unset_fields == [{"field": "count", "default": 1}]
@@ -0,0 +1,142 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from deployer.utils.watch import (
+    FileWatcher,
+    InotifyFileWatcher,
+    ModuleGraph,
+    PollingFileWatcher,
+    unload_modules,
+)
+
+
+@pytest.fixture
+def vertex_repo(tmp_path, monkeypatch):
+    files = {
+        "vertex/lib/__init__.py": "",
+        "vertex/lib/utils.py": "import os\n",
+        "vertex/components/dummy.py": "from vertex.lib import utils\n",
+        "vertex/components/other.py": "",
+        "vertex/pipelines/dummy_pipeline.py": "from ..components.dummy import comp\n",
+        "vertex/pipelines/other_pipeline.py": "import vertex.components.other\n",
+        "vertex/configs/dummy_pipeline/dev.json": "{}",
+    }
+    for path, content in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(content)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestModuleGraph:
+    def test_dependents_are_transitive(self, vertex_repo):
+        # Given
+        graph = ModuleGraph(vertex_repo / "vertex")
+
+        # When
+        dependents = graph.dependents({"vertex.lib.utils"})
+
+        # Then
+        assert dependents == {
+            "vertex.lib.utils",
+            "vertex.components.dummy",
+            "vertex.pipelines.dummy_pipeline",
+        }
+
+    def test_dependencies_are_transitive(self, vertex_repo):
+        # Given
+        graph = ModuleGraph(vertex_repo / "vertex")
+
+        # When
+        dependencies = graph.dependencies({"vertex.pipelines.dummy_pipeline"})
+
+        # Then
+        assert dependencies == {
+            "vertex.pipelines.dummy_pipeline",
+            "vertex.components.dummy",
+            "vertex.lib",
+            "vertex.lib.utils",
+        }
+
+    def test_update_with_created_module(self, vertex_repo):
+        # Given
+        graph = ModuleGraph(vertex_repo / "vertex")
+        new_module_path = vertex_repo / "vertex" / "lib" / "new.py"
+        (vertex_repo / "vertex" / "components" / "other.py").write_text(
+            "from vertex.lib import new"
+        )
+        new_module_path.touch()
+
+        # When
+        changed = graph.update(
+            [new_module_path, vertex_repo / "vertex" / "components" / "other.py"]
+        )
+
+        # Then
+        assert changed == {"vertex.lib.new", "vertex.components.other"}
+        assert graph.dependents({"vertex.lib.new"}) == {
+            "vertex.lib.new",
+            "vertex.components.other",
+            "vertex.pipelines.other_pipeline",
+        }
+
+
+def test_unload_modules(monkeypatch):
+    # Given
+    module = type(sys)("vertex_fake_module")
+    monkeypatch.setitem(sys.modules, "vertex_fake_module", module)
+
+    # When
+    unloaded = unload_modules(["vertex_fake_module", "not_loaded"])
+
+    # Then
+    assert unloaded == ["vertex_fake_module"]
+    assert "vertex_fake_module" not in sys.modules
+
+
+@pytest.mark.parametrize(
+    "watcher_class",
+    [
+        PollingFileWatcher,
+        pytest.param(
+            InotifyFileWatcher,
+            marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only"),
+        ),
+    ],
+)
+def test_file_watcher_detects_changes(vertex_repo, watcher_class):
+    # Given
+    watcher = watcher_class(vertex_repo / "vertex")
+    config_path = vertex_repo / "vertex" / "configs" / "dummy_pipeline" / "dev.json"
+    new_dirpath = vertex_repo / "vertex" / "configs" / "new_pipeline"
+
+    def modify_files():
+        time.sleep(0.1)
+        config_path.write_text('{"name": "John"}')
+        (vertex_repo / "vertex" / "configs" / "dummy_pipeline" / "notes.txt").touch()
+        new_dirpath.mkdir()
+        (new_dirpath / "prd.yaml").touch()
+
+    # When
+    thread = threading.Thread(target=modify_files)
+    thread.start()
+    changes = set()
+    deadline = time.monotonic() + 5
+    while len(changes) < 2 and time.monotonic() < deadline:
+        changes |= watcher.wait_for_changes(timeout=1)
+    thread.join()
+    watcher.close()
+
+    # Then
+    assert {p.resolve() for p in changes} == {
+        config_path.resolve(),
+        (new_dirpath / "prd.yaml").resolve(),
+    }
+
+
+def test_file_watcher_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        FileWatcher(tmp_path)